@@ -12,7 +12,7 @@ import sys
 import argparse
 import numpy as np
 
-from stm_ai_runner import AiRunner
+from stm_ai_runner import AiRunner, AiCaptureCallback, AiProfileReport
 
 _DEFAULT = 'stm32ai_ws/'
 
@@ -58,7 +58,11 @@ def run(args):
 
     inputs = runner.generate_rnd_inputs(session.name, batch_size=args.batch)
 
-    outputs, profiler = session.invoke(inputs, mode=mode)
+    capture = AiCaptureCallback(args.capture) if args.capture else None
+    outputs, profiler = session.invoke(inputs, mode=mode, callback=capture)
+    if capture:
+        capture.close()
+        print('Outputs of the c-nodes are stored in "{}"'.format(capture.path))
 
     if args.debug:
         print(profiler)
@@ -67,6 +71,8 @@ def run(args):
     print(' nb samples            : {}'.format(len(profiler['c_durations'])))
     print(' duration by sample    : {:.03f}ms'.format(np.array(profiler['c_durations']).mean()))
     print(' rt duration by sample : {:.03f}ms'.format(np.array(profiler['debug']['exec_times']).mean()))
+    if args.verbosity:
+        AiProfileReport(profiler).summary()
 
     # display profiling info by c-node if available
     if profiler['c_nodes']:
@@ -132,6 +138,9 @@ def main():
                         default=0)
     parser.add_argument('--debug', action='store_true', help="debug option")
     parser.add_argument('--data', action='store_true', help="show the data")
+    parser.add_argument('--capture', metavar='DIR', type=str,
+                        help='store the outputs of the c-nodes in a directory (per_layer_with_data mode)',
+                        default=None)
     args = parser.parse_args()
 
     return run(args)
@@ -0,0 +1,102 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+asyncio front-end - several boards are driven from one event loop
+
+An AsyncAiRunner object is connected to each board (socket or serial domain),
+the samples are split across the boards and invoked concurrently (gather). The
+results of the first board are then received sample by sample (invoke_stream).
+With --emulator N, N emulated boards are started on local TCP sockets.
+"""
+
+import sys
+import asyncio
+import argparse
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner.ai_runner_async import AsyncAiRunner
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket
+
+
+def _start_emulators(n_boards, port):
+    """Start the emulated boards in background threads, return the descriptors"""
+    descs = []
+    for idx in range(n_boards):
+        ready = threading.Event()
+        thread = threading.Thread(target=serve_socket, args=(Stm32Emulator([EmuModel()]),),
+                                  kwargs={'port': port + idx, 'ready': ready}, daemon=True)
+        thread.start()
+        ready.wait()
+        descs.append('socket:localhost:{}'.format(port + idx))
+    return descs
+
+
+async def _connect(desc, debug):
+    """Return a connected runner"""
+    runner = AsyncAiRunner(debug=debug)
+    if not await runner.connect(desc):
+        raise RuntimeError('connection to "{}" has failed - {}'.format(desc, runner.get_error()))
+    return runner
+
+
+async def example(args):
+
+    descs = _start_emulators(args.emulator, args.port) if args.emulator else args.desc
+    runners = await asyncio.gather(*[_connect(desc, args.debug) for desc in descs])
+    for runner in runners:
+        print(runner, flush=True)
+
+    inputs = runners[0].generate_rnd_inputs(batch_size=args.batch)
+
+    # one shard by board, invoked concurrently
+    shards = np.array_split(np.arange(args.batch), len(runners))
+    start_time = t.perf_counter()
+    results = await asyncio.gather(*[runner.invoke([in_[shard] for in_ in inputs])
+                                     for runner, shard in zip(runners, shards)])
+    elapsed = t.perf_counter() - start_time
+    outputs = [np.concatenate([res[0][idx] for res in results]) for idx in range(len(results[0][0]))]
+    print('')
+    print('{} samples on {} board(s) : {:.1f}ms ({:.1f} samples/s)'.format(
+        outputs[0].shape[0], len(runners), elapsed * 1000.0, outputs[0].shape[0] / elapsed))
+
+    # results are received as they are available
+    async for idx, s_outputs in runners[0].invoke_stream(inputs):
+        if not np.allclose(s_outputs[0].reshape(outputs[0][idx].shape), outputs[0][idx]):
+            print('sample {}: inconsistent outputs'.format(idx))
+
+    for runner in runners:
+        runner.disconnect()
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='asyncio front-end example')
+
+    parser.add_argument('--desc', '-d', metavar='STR', type=str, nargs='+',
+                        help='descriptions for the connections (serial/socket domains)',
+                        default=['serial'])
+    parser.add_argument('--emulator', '-e', metavar='INT', type=int,
+                        help='number of emulated boards (--desc is ignored)', default=0)
+    parser.add_argument('--port', '-p', metavar='INT', type=int,
+                        help='first TCP port of the emulated boards', default=10400)
+    parser.add_argument('--batch', '-b', metavar='INT', type=int, help='number of sample', default=64)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return asyncio.run(example(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
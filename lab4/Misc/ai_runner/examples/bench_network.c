@@ -0,0 +1,290 @@
+/**
+  ******************************************************************************
+  * @file    bench_network.c
+  * @brief   Reference c-model for the benchmarks of the X86 shared lib driver
+  ******************************************************************************
+  * @attention
+  *
+  * Copyright (c) 2021 STMicroelectronics.
+  * All rights reserved.
+  *
+  * This software is licensed under terms that can be found in the LICENSE file
+  * in the root directory of this software component.
+  * If no LICENSE file comes with this software, it is provided AS-IS.
+  *
+  ******************************************************************************
+  *
+  * Minimal implementation of the "ai_network_XXX" API (see ai_network.h) used
+  * by the AiDllDriver: fp32 MLP, N_IN -> N_HIDDEN (x N_REPEAT) -> N_OUT, relu.
+  * The weights are generated at creation time (deterministic LCG) or are
+  * provided by the host (EXTERNAL_WEIGHTS, ai_network_init() params).
+  *
+  * Build options (-D):
+  *   N_IN, N_HIDDEN, N_OUT  size of the layers
+  *   N_REPEAT               number of hidden layers (computational load)
+  *   IO_IN_ACT              1: input/output buffers are located in the
+  *                          activations buffer
+  *   MAX_BATCHES            max number of samples by ai_network_run() call
+  *                          (0: no limit)
+  *   EXTERNAL_WEIGHTS       1: no weights buffer in the library, the weights
+  *                          (N_WEIGHTS fp32 values) are provided by the host
+  */
+
+#include <stdint.h>
+#include <stddef.h>
+#include <string.h>
+
+#ifndef N_IN
+#define N_IN 32
+#endif
+#ifndef N_HIDDEN
+#define N_HIDDEN 64
+#endif
+#ifndef N_OUT
+#define N_OUT 10
+#endif
+#ifndef N_REPEAT
+#define N_REPEAT 1
+#endif
+#ifndef IO_IN_ACT
+#define IO_IN_ACT 0
+#endif
+#ifndef MAX_BATCHES
+#define MAX_BATCHES 0
+#endif
+#ifndef EXTERNAL_WEIGHTS
+#define EXTERNAL_WEIGHTS 0
+#endif
+
+#if defined(_WIN32)
+#define AI_API_ENTRY __declspec(dllexport)
+#else
+#define AI_API_ENTRY __attribute__((visibility("default")))
+#endif
+
+#define AI_BUFFER_FORMAT_FLOAT (0x09821040)
+#define AI_ERROR_NONE (0x00)
+#define AI_ERROR_INVALID_INPUT (0x13)
+#define AI_ERROR_CODE_INVALID_FORMAT (0x11)
+
+typedef struct {
+  uint32_t major : 8;
+  uint32_t minor : 8;
+  uint32_t micro : 8;
+  uint32_t reserved : 8;
+} ai_platform_version;
+
+typedef struct {
+  uint32_t format;
+  uint16_t n_batches;
+  uint16_t height;
+  uint16_t width;
+  uint32_t channels;
+  uint8_t *data;
+  void *meta_info;
+} ai_buffer;
+
+typedef struct {
+  uint16_t flags;
+  uint16_t size;
+  ai_buffer *buffer;
+} ai_buffer_array;
+
+typedef struct {
+  uint32_t map_signature;
+  ai_buffer_array map_weights;
+  ai_buffer_array map_activations;
+} ai_network_buffers;
+
+typedef struct {
+  ai_buffer params;
+  ai_buffer activations;
+} ai_network_params;
+
+typedef union {
+  ai_network_params params;
+  ai_network_buffers buffers;
+} ai_network_params_union;
+
+typedef struct {
+  const char *model_name;
+  const char *model_signature;
+  const char *model_datetime;
+  const char *compile_datetime;
+  const char *runtime_revision;
+  ai_platform_version runtime_version;
+  const char *tool_revision;
+  ai_platform_version tool_version;
+  ai_platform_version tool_api_version;
+  ai_platform_version api_version;
+  ai_platform_version interface_api_version;
+  uint32_t n_macc;
+  uint16_t n_inputs;
+  uint16_t n_outputs;
+  ai_buffer *inputs;
+  ai_buffer *outputs;
+  ai_network_params_union buffers;
+  uint32_t n_nodes;
+  uint32_t signature;
+} ai_network_report;
+
+typedef struct {
+  uint32_t type : 8;
+  uint32_t code : 24;
+} ai_error;
+
+#define N_WEIGHTS (N_IN * N_HIDDEN + (N_REPEAT - 1) * N_HIDDEN * N_HIDDEN + N_HIDDEN * N_OUT)
+#define N_IO_ACT (IO_IN_ACT ? (N_IN + N_OUT) : 0)
+#define N_ACT (2 * N_HIDDEN + N_IO_ACT)
+
+typedef struct {
+  ai_error error;
+  const float *weights;
+  float *activations;
+  ai_buffer inputs[1];
+  ai_buffer outputs[1];
+} ai_bench_network;
+
+/* one instance by library (as the generated c-model) */
+static ai_bench_network g_network;
+#if !EXTERNAL_WEIGHTS
+static float g_weights[N_WEIGHTS];
+#endif
+
+static void _init_buffer(ai_buffer *buffer, uint32_t channels)
+{
+  buffer->format = AI_BUFFER_FORMAT_FLOAT;
+  buffer->n_batches = 1;
+  buffer->height = 1;
+  buffer->width = 1;
+  buffer->channels = channels;
+  buffer->data = NULL;
+  buffer->meta_info = NULL;
+}
+
+static void _set_error(ai_error *error, uint32_t type, uint32_t code)
+{
+  error->type = type;
+  error->code = code;
+}
+
+static void _dense(const float *in, float *out, const float *w, int n_in, int n_out, int relu)
+{
+  for (int o = 0; o < n_out; o++) {
+    float acc = 0.0f;
+    for (int i = 0; i < n_in; i++)
+      acc += in[i] * w[i * n_out + o];
+    out[o] = (relu && acc < 0.0f) ? 0.0f : acc;
+  }
+}
+
+AI_API_ENTRY ai_error ai_network_create(void **network, const ai_buffer *network_config)
+{
+  (void)network_config;
+  memset(&g_network, 0, sizeof(g_network));
+#if !EXTERNAL_WEIGHTS
+  uint32_t seed = 42;
+  for (int i = 0; i < N_WEIGHTS; i++) {
+    seed = seed * 1664525u + 1013904223u;
+    g_weights[i] = ((float)(seed >> 8) / (float)(1u << 24) - 0.5f) * 0.25f;
+  }
+#endif
+  _init_buffer(&g_network.inputs[0], N_IN);
+  _init_buffer(&g_network.outputs[0], N_OUT);
+  *network = &g_network;
+  return g_network.error;
+}
+
+AI_API_ENTRY ai_error ai_network_get_error(void *network)
+{
+  return ((ai_bench_network *)network)->error;
+}
+
+AI_API_ENTRY void *ai_network_destroy(void *network)
+{
+  (void)network;
+  return NULL;
+}
+
+AI_API_ENTRY void *ai_network_data_weights_get(void)
+{
+#if EXTERNAL_WEIGHTS
+  return NULL;
+#else
+  return g_weights;
+#endif
+}
+
+AI_API_ENTRY int ai_network_init(void *network, const ai_network_params_union *params)
+{
+  ai_bench_network *net = (ai_bench_network *)network;
+  net->weights = (const float *)params->params.params.data;
+  net->activations = (float *)params->params.activations.data;
+  if (!net->weights || !net->activations) {
+    _set_error(&net->error, AI_ERROR_INVALID_INPUT, AI_ERROR_CODE_INVALID_FORMAT);
+    return 0;
+  }
+#if IO_IN_ACT
+  net->inputs[0].data = (uint8_t *)(net->activations + 2 * N_HIDDEN);
+  net->outputs[0].data = (uint8_t *)(net->activations + 2 * N_HIDDEN + N_IN);
+#endif
+  return 1;
+}
+
+AI_API_ENTRY int ai_network_get_info(void *network, ai_network_report *report)
+{
+  ai_bench_network *net = (ai_bench_network *)network;
+  memset(report, 0, sizeof(*report));
+  report->model_name = "network";
+  report->model_signature = "bench-network-" __DATE__;
+  report->model_datetime = __DATE__ " " __TIME__;
+  report->compile_datetime = __DATE__ " " __TIME__;
+  report->runtime_revision = "bench";
+  report->runtime_version.major = 7;
+  report->tool_revision = "bench";
+  report->tool_version.major = 7;
+  report->tool_api_version.major = 1;
+  report->api_version.major = 1;
+  report->interface_api_version.major = 1;
+  report->n_macc = N_WEIGHTS;
+  report->n_inputs = 1;
+  report->n_outputs = 1;
+  report->inputs = net->inputs;
+  report->outputs = net->outputs;
+  _init_buffer(&report->buffers.params.params, N_WEIGHTS * sizeof(float));
+  report->buffers.params.params.data = (uint8_t *)net->weights;
+  _init_buffer(&report->buffers.params.activations, N_ACT * sizeof(float));
+  report->buffers.params.activations.data = (uint8_t *)net->activations;
+  report->n_nodes = N_REPEAT + 1;
+  return 1;
+}
+
+AI_API_ENTRY int ai_network_run(void *network, const ai_buffer *input, ai_buffer *output)
+{
+  ai_bench_network *net = (ai_bench_network *)network;
+  int n_batches = input[0].n_batches;
+  float *h0 = net->activations;
+  float *h1 = net->activations + N_HIDDEN;
+
+  if (!input[0].data || !output[0].data || input[0].channels != N_IN) {
+    _set_error(&net->error, AI_ERROR_INVALID_INPUT, AI_ERROR_CODE_INVALID_FORMAT);
+    return 0;
+  }
+  if (MAX_BATCHES && n_batches > MAX_BATCHES)
+    n_batches = MAX_BATCHES;
+
+  for (int b = 0; b < n_batches; b++) {
+    const float *in = (const float *)input[0].data + b * N_IN;
+    float *out = (float *)output[0].data + b * N_OUT;
+    const float *w = net->weights;
+    _dense(in, h0, w, N_IN, N_HIDDEN, 1);
+    w += N_IN * N_HIDDEN;
+    for (int r = 1; r < N_REPEAT; r++) {
+      _dense(h0, h1, w, N_HIDDEN, N_HIDDEN, 1);
+      memcpy(h0, h1, N_HIDDEN * sizeof(float));
+      w += N_HIDDEN * N_HIDDEN;
+    }
+    _dense(h0, out, w, N_HIDDEN, N_OUT, 0);
+  }
+  return n_batches;
+}
@@ -0,0 +1,36 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Build the reference c-model (bench_network.c) as a shared library
+
+The generated library exports the "ai_network_XXX" API and can be loaded
+with the 'file' domain of the AiRunner (AiDllDriver), a C compiler is
+requested (CC environment variable, default: gcc).
+"""
+
+import os
+import sys
+import subprocess
+
+
+def build_network(out_dir, n_in=32, n_hidden=64, n_out=10, n_repeat=1,
+                  io_in_act=False, max_batches=0, external_weights=False):
+    """Build the reference c-model, return the path of the shared library"""
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_network.c')
+    ext = '.dll' if os.name == 'nt' else ('.dylib' if sys.platform == 'darwin' else '.so')
+    lib = os.path.join(out_dir, 'libai_network' + ext)
+    defines = {
+        'N_IN': n_in, 'N_HIDDEN': n_hidden, 'N_OUT': n_out, 'N_REPEAT': n_repeat,
+        'IO_IN_ACT': int(io_in_act), 'MAX_BATCHES': max_batches,
+        'EXTERNAL_WEIGHTS': int(external_weights),
+    }
+    cmd = [os.environ.get('CC', 'gcc'), '-O2', '-shared', '-fPIC', '-fvisibility=hidden']
+    cmd += ['-D{}={}'.format(key, val) for key, val in defines.items()]
+    cmd += [src, '-o', lib]
+    subprocess.run(cmd, check=True)
+    return lib
@@ -0,0 +1,130 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - encoded tensor datas (CAP_COMPRESSED_DATAS)
+
+An emulated board with a quantized model (uint8 28x28 input, int8 hidden
+layers with relu, uint8 output) is started behind a throttled link (default:
+115200 bauds, 1ms turnaround latency). The same samples are invoked with the
+raw datas (default) and with the encoded datas (compression=True), the effective number
+of bytes by sample (tx + rx) and the throughput (samples/s) are reported for
+sparse images (digit-like strokes on a black background) and for random
+images (not compressible, the raw datas are sent).
+"""
+
+import sys
+import argparse
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from stm_ai_runner import stm32msg_pb2 as stm32msg
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket
+
+
+def _start_emulator(args):
+    """Start an emulated board in a background thread"""
+    model = EmuModel(n_features=28 * 28, hidden=[128, 32], quantized=True)
+    capability = stm32msg.CAP_STREAM | stm32msg.CAP_INSPECTOR | stm32msg.CAP_COMPRESSED_DATAS
+    emu = Stm32Emulator([model], capability=capability)
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_socket, args=(emu,),
+                              kwargs={'port': args.port, 'baudrate': args.baudrate,
+                                      'latency': args.latency, 'ready': ready},
+                              daemon=True)
+    thread.start()
+    ready.wait()
+    return emu
+
+
+def _digits(n_samples, rng):
+    """Return sparse images (a few strokes on a black background)"""
+    images = np.zeros((n_samples, 28, 28), dtype=np.uint8)
+    for image in images:
+        for _ in range(rng.randint(2, 4)):
+            row, col = rng.randint(4, 20, size=2)
+            if rng.randint(2):
+                image[row:row + 2, col:col + rng.randint(4, 8)] = rng.randint(128, 256)
+            else:
+                image[row:row + rng.randint(4, 8), col:col + 2] = rng.randint(128, 256)
+    return images.reshape(n_samples, 1, 1, 28 * 28)
+
+
+def _bench(runner, inputs, mode):
+    """Invoke the model, return the throughput (samples/s) and the IO statistics"""
+    start_time = t.perf_counter()
+    _, profiler = runner.invoke(inputs, mode=mode, disable_pb=True)
+    elapsed = t.perf_counter() - start_time
+    return inputs[0].shape[0] / elapsed, profiler['debug']['io']
+
+
+def bench(args):
+
+    emu = _start_emulator(args)
+    model = emu.models[0]
+    rng = np.random.RandomState(42)
+
+    datasets = {
+        'digits': _digits(args.samples, rng),
+        'random': rng.randint(0, 256, size=(args.samples, 1, 1, 28 * 28)).astype(np.uint8),
+    }
+    modes = {'io_only': AiRunner.Mode.IO_ONLY, 'per_layer': AiRunner.Mode.PER_LAYER_WITH_DATA}
+
+    results = {}
+    for compression in [False, True]:
+        runner = AiRunner(debug=args.debug)
+        if not runner.connect('socket:localhost:{}'.format(args.port), compression=compression):
+            raise RuntimeError('Unable to connect the emulator: {}'.format(runner.get_error()))
+        for data_key, data in datasets.items():
+            for mode_key, mode in modes.items():
+                results[(compression, data_key, mode_key)] = _bench(runner, [data], mode)
+        outputs, _ = runner.invoke([datasets['digits']], disable_pb=True)
+        if not np.array_equal(outputs[0], model([datasets['digits']])[0]):
+            raise RuntimeError('Outputs are not consistent with the reference model')
+        runner.disconnect()
+
+    print('link: {} bauds, {}ms latency - {} samples by invoke'.format(
+        args.baudrate if args.baudrate else 'unlimited', args.latency, args.samples))
+    print('')
+    print(' {:8s} | {:9s} | {:>10} | {:>10} | {:>6} | {:>9} | {:>9} | {:>7}'.format(
+        'inputs', 'mode', 'raw B/smp', 'enc B/smp', 'ratio', 'raw smp/s', 'enc smp/s', 'speedup'))
+    print('-' * 88)
+    for data_key in datasets:
+        for mode_key in modes:
+            raw_rate, raw_io = results[(False, data_key, mode_key)]
+            enc_rate, enc_io = results[(True, data_key, mode_key)]
+            print(' {:8s} | {:9s} | {:10.0f} | {:10.0f} | {:5.2f}x | {:9.1f} | {:9.1f} | {:6.2f}x'.format(
+                data_key, mode_key, raw_io['bytes_by_sample'], enc_io['bytes_by_sample'],
+                enc_io['datas_ratio'], raw_rate, enc_rate, enc_rate / raw_rate))
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='Encoded tensor datas benchmark')
+
+    parser.add_argument('--port', metavar='INT', type=int, help='port number', default=10030)
+    parser.add_argument('--baudrate', '-b', metavar='INT', type=int,
+                        help='simulated baudrate (0 for unlimited)', default=115200)
+    parser.add_argument('--latency', metavar='FLOAT', type=float,
+                        help='simulated turnaround latency (ms)', default=1.0)
+    parser.add_argument('--samples', '-n', metavar='INT', type=int,
+                        help='number of samples by invoke', default=16)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - host overhead by call of the X86 shared lib driver (AiDllDriver)
+
+The reference c-model (bench_network.c, small MLP similar to the activity
+recognition model) is built and loaded. The per-call overhead is the host time
+by sample minus the time spent in the ai_network_run() function.
+
+The 'uncached' row is the baseline: the sample path is run with the IO views
+and the AiBuffer arrays rebuilt by call, as the driver did before the IO
+buffers were built once at connect() (reference copy of the previous code).
+"""
+
+import sys
+import argparse
+import tempfile
+import functools
+import ctypes as ct
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner, AiRunnerCallback
+from stm_ai_runner.dll_mgr_drv import AiBuffer
+from stm_ai_runner.stm_ai_utils import AiBufferFormat
+from bench_network import build_network
+
+
+def _uncached_invoke(drv, s_inputs, dests=None):  # pylint: disable=protected-access
+    """Run a sample, the IO views and the AiBuffer arrays are rebuilt by call (baseline)"""
+    assert dests is None
+    info = drv._info
+
+    c_inputs = []
+    for idx in range(info.n_inputs):
+        in_info = info.inputs[idx]
+        shape = (1, in_info.height, in_info.width, in_info.channels)
+        dtype = AiBufferFormat.to_np_type(in_info.format)
+        if in_info.data and drv._io_from_act:
+            # a new ndarray is created with a buffer located inside the activations buffer
+            size = np.dtype(dtype).itemsize * int(np.prod(shape))
+            data = ct.cast(in_info.data, ct.POINTER(ct.c_uint8 * size))
+            bytebuf = np.ctypeslib.as_array(data.contents, (size, ))
+            dst_ = np.reshape(np.frombuffer(bytebuf, dtype), shape)
+            np.copyto(dst_, s_inputs[idx], casting='no')
+            c_inputs.append(dst_)
+        else:
+            c_inputs.append(s_inputs[idx])
+
+    c_outputs = []
+    for idx in range(info.n_outputs):
+        out_info = info.outputs[idx]
+        shape = (1, out_info.height, out_info.width, out_info.channels)
+        dtype = AiBufferFormat.to_np_type(out_info.format)
+        if out_info.data and drv._io_from_act:
+            size = np.dtype(dtype).itemsize * int(np.prod(shape))
+            data = ct.cast(out_info.data, ct.POINTER(ct.c_uint8 * size))
+            bytebuf = np.ctypeslib.as_array(data.contents, (size, ))
+            c_outputs.append(np.reshape(np.frombuffer(bytebuf, dtype), shape))
+        else:
+            c_outputs.append(np.require(np.zeros(shape, dtype=dtype), dtype=dtype,
+                                        requirements=['C', 'O', 'W', 'A']))
+
+    in_buffers = [AiBuffer.from_ndarray(arr, info.inputs[idx].format) for idx, arr in enumerate(c_inputs)]
+    out_buffers = [AiBuffer.from_ndarray(arr, info.outputs[idx].format) for idx, arr in enumerate(c_outputs)]
+    in_ = (AiBuffer * len(in_buffers))(*in_buffers)
+    out_ = (AiBuffer * len(out_buffers))(*out_buffers)
+
+    start_time = t.perf_counter()
+    run_batches = drv._backend.ai_network_run(drv._handle, in_, out_)
+    elapsed_time = (t.perf_counter() - start_time) * 1000.0
+    drv._check_run(run_batches, 1)
+
+    outputs = [out_.copy() if info.outputs[idx].data and drv._io_from_act else out_
+               for idx, out_ in enumerate(c_outputs)]
+    return outputs, drv._report_duration(elapsed_time)
+
+
+def _overhead(runner, inputs, repeat, callback=None):
+    """Return the host time and the overhead by sample (us, best of the repeats)"""
+    host, over = [], []
+    for _ in range(repeat):
+        _, profile = runner.invoke(inputs, callback=callback, disable_pb=True)
+        host_ = profile['debug']['host_duration'] * 1000.0 / inputs[0].shape[0]
+        run_ = np.mean(profile['debug']['exec_times']) * 1000.0
+        host.append(host_)
+        over.append(host_ - run_)
+    return min(host), min(over)
+
+
+def bench(args):
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print('c-model: {}-{}-{} (fp32), io in activations: {}, max batches: {}'.format(
+            args.n_in, args.n_hidden, args.n_out, args.io_in_act, args.max_batches))
+        print('')
+        print(' {:>14} | {:>16} | {:>16} | {:>10}'.format('path', 'host (us/smp)', 'overhead (us/smp)',
+                                                      'smp/s'))
+        print('-' * 67)
+        lib = build_network(tmp_dir, n_in=args.n_in, n_hidden=args.n_hidden, n_out=args.n_out,
+                            io_in_act=args.io_in_act, max_batches=args.max_batches)
+        runner = AiRunner(debug=args.debug)
+        if not runner.connect(lib):
+            print('ERR: unable to load the c-model: {}'.format(runner.get_error()))
+            return 1
+
+        inputs = runner.generate_rnd_inputs(batch_size=args.batch, rng=np.random.RandomState(42))
+        runner.invoke(inputs, disable_pb=True)  # warm-up
+
+        for path, callback in [('batch', None), ('sample', AiRunnerCallback()), ('uncached', AiRunnerCallback())]:
+            drv = runner._drv  # pylint: disable=protected-access
+            if path == 'uncached':
+                drv._invoke = functools.partial(_uncached_invoke, drv)  # pylint: disable=protected-access
+            host, over = _overhead(runner, inputs, args.repeat, callback)
+            if path == 'uncached':
+                del drv._invoke  # pylint: disable=protected-access
+            print(' {:>14} | {:16.2f} | {:16.2f} | {:10.0f}'.format(path, host, over, 1e6 / host))
+
+        runner.disconnect()
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='X86 shared lib - overhead by call')
+
+    parser.add_argument('--batch', '-b', metavar='INT', type=int,
+                        help='number of samples', default=2000)
+    parser.add_argument('--repeat', '-r', metavar='INT', type=int,
+                        help='number of repeats (best is reported)', default=5)
+    parser.add_argument('--n-in', metavar='INT', type=int, help='input size', default=32)
+    parser.add_argument('--n-hidden', metavar='INT', type=int, help='hidden size', default=64)
+    parser.add_argument('--n-out', metavar='INT', type=int, help='output size', default=10)
+    parser.add_argument('--io-in-act', action='store_true',
+                        help='input/output buffers are located in the activations buffer')
+    parser.add_argument('--max-batches', metavar='INT', type=int,
+                        help='max number of samples by ai_network_run() call (0: no limit)', default=0)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - scaling of the multi-process pool for the X86 shared lib (AiDllPool)
+
+A compute-bound reference c-model (bench_network.c) is built, the throughput
+of a single AiRunner is compared with the throughput of the pool for an
+increasing number of workers.
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner, AiDllPool
+from bench_network import build_network
+
+
+def _throughput(obj, inputs, repeat):
+    """Return the throughput (samples/s, best of the repeats) and the outputs"""
+    best, outputs = 0.0, None
+    for _ in range(repeat):
+        start_time = t.perf_counter()
+        outputs, _ = obj.invoke(inputs) if isinstance(obj, AiDllPool) else obj.invoke(inputs, disable_pb=True)
+        best = max(best, inputs[0].shape[0] / (t.perf_counter() - start_time))
+    return best, outputs
+
+
+def bench(args):
+
+    workers = args.workers
+    if not workers:
+        workers = sorted({n for n in (1, 2, 4, 8, 16, 32) if n < os.cpu_count()} | {os.cpu_count()})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lib = build_network(tmp_dir, n_in=args.n_in, n_hidden=args.n_hidden, n_out=args.n_out,
+                            n_repeat=args.n_repeat)
+
+        runner = AiRunner(debug=args.debug)
+        if not runner.connect(lib):
+            print('ERR: unable to load the c-model: {}'.format(runner.get_error()))
+            return 1
+        inputs = runner.generate_rnd_inputs(batch_size=args.batch, rng=np.random.RandomState(42))
+        ref, ref_outputs = _throughput(runner, inputs, args.repeat)
+        runner.disconnect()
+
+        print('c-model: {}-{}x{}-{} (fp32) - {} samples - {} CPU(s)'.format(
+            args.n_in, args.n_hidden, args.n_repeat, args.n_out, args.batch, os.cpu_count()))
+        print('')
+        print(' {:>8} | {:>10} | {:>8} | {:>10}'.format('workers', 'smp/s', 'speedup', 'efficiency'))
+        print('-' * 47)
+        print(' {:>8} | {:10.1f} | {:>8} | {:>10}'.format('AiRunner', ref, '1.00x', '-'))
+
+        for n_workers in workers:
+            pool = AiDllPool(debug=args.debug)
+            pool.connect(lib, n_workers=n_workers)
+            pool.invoke(inputs)  # warm-up
+            res, outputs = _throughput(pool, inputs, args.repeat)
+            pool.disconnect()
+            if not np.allclose(outputs[0], ref_outputs[0]):
+                print('ERR: outputs are not consistent')
+                return 1
+            print(' {:8d} | {:10.1f} | {:7.2f}x | {:9.1f}%'.format(n_workers, res, res / ref,
+                                                                   res * 100.0 / ref / n_workers),
+                  flush=True)
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='X86 shared lib - multi-process pool scaling')
+
+    parser.add_argument('--batch', '-b', metavar='INT', type=int,
+                        help='number of samples', default=10000)
+    parser.add_argument('--repeat', '-r', metavar='INT', type=int,
+                        help='number of repeats (best is reported)', default=3)
+    parser.add_argument('--workers', '-w', metavar='INT', type=int, nargs='+',
+                        help='number of workers (default: 1, 2, 4.. up to the number of CPUs)')
+    parser.add_argument('--n-in', metavar='INT', type=int, help='input size', default=256)
+    parser.add_argument('--n-hidden', metavar='INT', type=int, help='hidden size', default=256)
+    parser.add_argument('--n-repeat', metavar='INT', type=int, help='number of hidden layers', default=8)
+    parser.add_argument('--n-out', metavar='INT', type=int, help='output size', default=10)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
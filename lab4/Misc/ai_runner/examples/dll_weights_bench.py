@@ -0,0 +1,127 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - loading of the weights by the X86 shared lib driver (AiDllDriver)
+
+The reference c-model (bench_network.c) is built w/o weights buffer
+(EXTERNAL_WEIGHTS), the weights are provided by a binary file. K processes
+load the same model, the connect time and the memory usage by instance are
+reported with and w/o the memory-mapped weights (mmap_weights option).
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import multiprocessing as mp
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from bench_network import build_network
+
+
+def _mem_usage():
+    """Return the RSS (anonymous, file-backed) and the PSS of the process (KiB)"""
+    res = {'RssAnon': 0, 'RssFile': 0, 'Pss': 0}
+    for fname in ('/proc/self/status', '/proc/self/smaps_rollup'):
+        if not os.path.isfile(fname):
+            continue
+        with open(fname, 'r') as file:
+            for line in file:
+                key, _, val = line.partition(':')
+                if key in res:
+                    res[key] = int(val.split()[0])
+    return res
+
+
+def _instance(lib, weights, mmap_weights, barrier, queue):
+    """Load the c-model, report the connect time and the memory usage"""
+    runner = AiRunner()
+    mem_0 = _mem_usage()
+    start_time = t.perf_counter()
+    connected = runner.connect(lib, weights=weights, mmap_weights=mmap_weights)
+    dur = t.perf_counter() - start_time
+    if connected:
+        inputs = runner.generate_rnd_inputs(batch_size=1, rng=np.random.RandomState(42))
+        runner.invoke(inputs, disable_pb=True)  # all weights pages are touched
+    barrier.wait()  # all instances are alive
+    mem_1 = _mem_usage()
+    queue.put((connected, dur, {key: mem_1[key] - mem_0[key] for key in mem_0}))
+    barrier.wait()
+    runner.disconnect()
+
+
+def _run(lib, weights, mmap_weights, n_instances):
+    """Spawn the instances and return the averaged results"""
+    ctx = mp.get_context('spawn')
+    barrier, queue = ctx.Barrier(n_instances), ctx.Queue()
+    procs = [ctx.Process(target=_instance, args=(lib, weights, mmap_weights, barrier, queue))
+             for _ in range(n_instances)]
+    for proc in procs:
+        proc.start()
+    res = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    if not all([r[0] for r in res]):
+        return None
+    return np.mean([r[1] for r in res]), {key: np.mean([r[2][key] for r in res]) for key in res[0][2]}
+
+
+def bench(args):
+
+    n_weights = args.n_in * args.n_hidden + (args.n_repeat - 1) * args.n_hidden * args.n_hidden
+    n_weights += args.n_hidden * args.n_out
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lib = build_network(tmp_dir, n_in=args.n_in, n_hidden=args.n_hidden, n_out=args.n_out,
+                            n_repeat=args.n_repeat, external_weights=True)
+        weights = os.path.join(tmp_dir, 'network_data.bin')
+        rng = np.random.RandomState(42)
+        ((rng.rand(n_weights).astype(np.float32) - 0.5) * 0.25).tofile(weights)
+
+        print('c-model: {}-{}x{}-{} (fp32) - weights: {:.1f} MiB - {} instance(s)'.format(
+            args.n_in, args.n_hidden, args.n_repeat, args.n_out, os.path.getsize(weights) / 1048576,
+            args.instances))
+        print('')
+        print(' {:>8} | {:>12} | {:>14} | {:>14} | {:>10}'.format('weights', 'connect (ms)', 'RssAnon (MiB)',
+                                                                  'RssFile (MiB)', 'Pss (MiB)'))
+        print('-' * 72)
+
+        for mode, mmap_weights in [('copy', False), ('mmap', True)]:
+            res = _run(lib, weights, mmap_weights, args.instances)
+            if res is None:
+                print('ERR: unable to load the c-model')
+                return 1
+            dur, mem = res
+            print(' {:>8} | {:12.2f} | {:14.1f} | {:14.1f} | {:10.1f}'.format(
+                mode, dur * 1000.0, mem['RssAnon'] / 1024, mem['RssFile'] / 1024, mem['Pss'] / 1024),
+                flush=True)
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='X86 shared lib - loading of the weights')
+
+    parser.add_argument('--instances', '-k', metavar='INT', type=int,
+                        help='number of processes loading the model', default=4)
+    parser.add_argument('--n-in', metavar='INT', type=int, help='input size', default=1024)
+    parser.add_argument('--n-hidden', metavar='INT', type=int, help='hidden size', default=1024)
+    parser.add_argument('--n-repeat', metavar='INT', type=int, help='number of hidden layers', default=4)
+    parser.add_argument('--n-out', metavar='INT', type=int, help='output size', default=10)
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,215 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark suite - host stack with a simulated STM32 runtime (no board)
+
+The emulated aiValidation firmware (stm32_emulator.py) is served on a TCP
+socket ('socket' domain) and on a pseudo-terminal ('serial' domain, POSIX
+only). The following cases are measured for several tensor sizes:
+
+    framing     AiPbMsg packet framing/re-assembly (MB/s)
+    invoke      IO_ONLY invoke (samples/s)
+    per_layer   PER_LAYER_WITH_DATA invoke, outputs of the c-nodes (samples/s)
+    discovery   connect + discovery of the models (ms)
+    reconnect   disconnect + connect (ms)
+
+The results can be stored (--json) and compared with a previous run
+(--baseline), the script returns 1 if a regression is detected.
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from stm_ai_runner.pb_mgr_drv import AiPbMsg
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket, open_pty, serve_pty
+
+_BENCH_VERSION = 1
+
+
+def _models(sizes):
+    """Return the emulated models (one by tensor size)"""
+    return [EmuModel(name='network_{}'.format(size), n_features=size, hidden=[min(size, 256)])
+            for size in sizes]
+
+
+def _start_transports(args):
+    """Start the emulators, return a dict with the descriptors by transport"""
+    transports = {}
+    ready = threading.Event()
+    emu = Stm32Emulator(_models(args.sizes))
+    threading.Thread(target=serve_socket, args=(emu,), kwargs={'port': args.port, 'ready': ready},
+                     daemon=True).start()
+    ready.wait()
+    transports['socket'] = 'socket:localhost:{}'.format(args.port)
+    if os.name == 'posix' and not args.no_pty:
+        master_fd, _, device = open_pty()
+        emu = Stm32Emulator(_models(args.sizes))
+        threading.Thread(target=serve_pty, args=(emu, master_fd), daemon=True).start()
+        transports['pty'] = 'serial:{}'.format(device)
+    return transports
+
+
+def _record(results, case, transport, size, value, unit, better):
+    """Append a result"""
+    results.append({'case': case, 'transport': transport, 'size': size, 'value': value,
+                    'unit': unit, 'better': better})
+    print(' {:10s} | {:8s} | {:>7} | {:12.2f} {}'.format(case, transport, size, value, unit), flush=True)
+
+
+def _bench_framing(args, results):
+    """Framing/re-assembly of the messages (CPU only)"""
+    for size in args.sizes:
+        buff = bytes(np.random.RandomState(42).bytes(size * 4))
+        best = 0.0
+        for _ in range(args.repeat):
+            start_time = t.perf_counter()
+            frames, n_packets = AiPbMsg._to_io_frames(buff)  # pylint: disable=protected-access
+            frame_s = len(frames) // n_packets
+            msg = bytearray()
+            for pos in range(0, len(frames), frame_s):
+                AiPbMsg._append_packet(msg, frames[pos:pos + frame_s])  # pylint: disable=protected-access
+            best = max(best, len(buff) / (t.perf_counter() - start_time) / 1e6)
+        _record(results, 'framing', '-', size, best, 'MB/s', 'higher')
+
+
+def _connect(desc):
+    """Connect a runner"""
+    runner = AiRunner()
+    if not runner.connect(desc):
+        raise RuntimeError('Unable to connect "{}": {}'.format(desc, runner.get_error()))
+    return runner
+
+
+def _bench_invoke(args, results, transport, desc):
+    """IO_ONLY and PER_LAYER_WITH_DATA invokes"""
+    runner = _connect(desc)
+    rng = np.random.RandomState(42)
+    for case, mode, n_samples in [('invoke', AiRunner.Mode.IO_ONLY, args.samples),
+                                  ('per_layer', AiRunner.Mode.PER_LAYER_WITH_DATA, args.samples // 4)]:
+        for size in args.sizes:
+            name = 'network_{}'.format(size)
+            inputs = runner.generate_rnd_inputs(name, batch_size=max(n_samples, 1), rng=rng)
+            runner.invoke(inputs[:1], name=name, mode=mode, disable_pb=True)  # warm-up
+            best = 0.0
+            for _ in range(args.repeat):
+                start_time = t.perf_counter()
+                runner.invoke(inputs, name=name, mode=mode, disable_pb=True)
+                best = max(best, inputs[0].shape[0] / (t.perf_counter() - start_time))
+            _record(results, case, transport, size, best, 'smp/s', 'higher')
+    runner.disconnect()
+
+
+def _bench_connect(args, results, transport, desc):
+    """Discovery and reconnection"""
+    best = float('inf')
+    for _ in range(args.repeat):
+        start_time = t.perf_counter()
+        runner = _connect(desc)
+        best = min(best, (t.perf_counter() - start_time) * 1000.0)
+        runner.disconnect()
+    _record(results, 'discovery', transport, len(args.sizes), best, 'ms', 'lower')
+
+    runner = _connect(desc)
+    start_time = t.perf_counter()
+    for _ in range(args.repeat):
+        runner.disconnect()
+        runner.connect(desc)
+    _record(results, 'reconnect', transport, len(args.sizes),
+            (t.perf_counter() - start_time) * 1000.0 / args.repeat, 'ms', 'lower')
+    runner.disconnect()
+
+
+def _key(res):
+    return '{}/{}/{}'.format(res['case'], res['transport'], res['size'])
+
+
+def _compare(results, baseline, tolerance):
+    """Compare the results with a baseline, return the number of regressions"""
+    ref = {_key(res): res for res in baseline['results']}
+    n_regressions = 0
+    print('')
+    print('Comparison with the baseline (tolerance: {:.0f}%)'.format(tolerance * 100))
+    for res in results:
+        if _key(res) not in ref or not ref[_key(res)]['value']:
+            continue
+        ratio = res['value'] / ref[_key(res)]['value']
+        regression = ratio < 1.0 - tolerance if res['better'] == 'higher' else ratio > 1.0 + tolerance
+        n_regressions += int(regression)
+        print(' {:30s} : {:12.2f} -> {:12.2f} {:6s} ({:+.1f}%){}'.format(
+            _key(res), ref[_key(res)]['value'], res['value'], res['unit'], (ratio - 1.0) * 100,
+            ' REGRESSION' if regression else ''))
+    return n_regressions
+
+
+def bench(args):
+
+    transports = _start_transports(args)
+    results = []
+
+    print(' {:10s} | {:8s} | {:>7} | {:>12}'.format('case', 'link', 'size', 'result'))
+    print('-' * 52)
+    _bench_framing(args, results)
+    for transport, desc in transports.items():
+        _bench_invoke(args, results, transport, desc)
+        _bench_connect(args, results, transport, desc)
+
+    report = {
+        'version': _BENCH_VERSION,
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpus': os.cpu_count()},
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=1)
+        print('\nResults are stored in "{}"'.format(args.json))
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        if _compare(results, baseline, args.tolerance):
+            return 1
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='Benchmark suite - host stack with a simulated STM32')
+
+    parser.add_argument('--sizes', metavar='INT', type=int, nargs='+',
+                        help='size of the input tensors (number of float values)', default=[32, 1024, 8192])
+    parser.add_argument('--samples', '-s', metavar='INT', type=int,
+                        help='number of samples by invoke', default=200)
+    parser.add_argument('--repeat', '-r', metavar='INT', type=int,
+                        help='number of repeats (best is reported)', default=3)
+    parser.add_argument('--port', '-p', metavar='INT', type=int, help='TCP port of the emulator',
+                        default=10300)
+    parser.add_argument('--no-pty', action='store_true', help='skip the pseudo-terminal (serial) link')
+    parser.add_argument('--json', metavar='FILE', type=str, help='store the results (JSON format)',
+                        default=None)
+    parser.add_argument('--baseline', metavar='FILE', type=str,
+                        help='results of a previous run (JSON), regressions are reported', default=None)
+    parser.add_argument('--tolerance', metavar='FLOAT', type=float,
+                        help='accepted variation before a regression is reported', default=0.15)
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
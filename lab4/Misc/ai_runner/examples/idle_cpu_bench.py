@@ -0,0 +1,115 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - host CPU load while the runners are waiting the boards
+
+N emulated boards (default: 8) are started in a separate process with a long
+simulated inference time, N runners (one thread by runner) invoke the model
+concurrently. The CPU time consumed by the host process is reported against
+the elapsed time.
+"""
+
+import sys
+import argparse
+import multiprocessing
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket
+
+
+def _emulators(ports, exec_time, ready):
+    """Serve the emulated boards (process entry point)"""
+    threads = []
+    for port in ports:
+        event = threading.Event()
+        emu = Stm32Emulator([EmuModel(exec_time=exec_time)])
+        thread = threading.Thread(target=serve_socket, args=(emu,),
+                                  kwargs={'port': port, 'ready': event}, daemon=True)
+        thread.start()
+        event.wait()
+        threads.append(thread)
+    ready.set()
+    for thread in threads:
+        thread.join()
+
+
+def _worker(runner, inputs, results, idx):
+    """Invoke the model (thread entry point)"""
+    _, profile = runner.invoke(inputs, disable_pb=True)
+    results[idx] = profile['debug']['host_duration']
+
+
+def bench(args):
+
+    ports = [args.port + idx for idx in range(args.runners)]
+
+    ready = multiprocessing.Event()
+    proc = multiprocessing.Process(target=_emulators, args=(ports, args.exec_time, ready),
+                                   daemon=True)
+    proc.start()
+    ready.wait()
+
+    runners = []
+    for port in ports:
+        runner = AiRunner(debug=args.debug)
+        if not runner.connect('socket:localhost:{}'.format(port)):
+            print('ERR: unable to connect the emulator: {}'.format(runner.get_error()))
+            return 1
+        runners.append(runner)
+
+    inputs = runners[0].generate_rnd_inputs(batch_size=args.batch, rng=np.random.RandomState(42))
+    results = [0.0] * len(runners)
+    threads = [threading.Thread(target=_worker, args=(runner, inputs, results, idx))
+               for idx, runner in enumerate(runners)]
+
+    start_cpu, start_time = t.process_time(), t.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpu_time, elapsed = t.process_time() - start_cpu, t.perf_counter() - start_time
+
+    for runner in runners:
+        runner.disconnect()
+    proc.terminate()
+
+    print('runners                  : {}'.format(args.runners))
+    print('samples by runner        : {} ({}ms by inference)'.format(args.batch, args.exec_time))
+    print('elapsed time             : {:.3f}s'.format(elapsed))
+    print('host CPU time            : {:.3f}s'.format(cpu_time))
+    print('host CPU load            : {:.1f}% (of one core)'.format(cpu_time * 100.0 / elapsed))
+    print('host duration by runner  : {:.3f}ms (average)'.format(np.mean(results)))
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='Idle CPU benchmark')
+
+    parser.add_argument('--port', metavar='INT', type=int, help='first port number', default=10020)
+    parser.add_argument('--runners', '-r', metavar='INT', type=int,
+                        help='number of concurrent runners', default=8)
+    parser.add_argument('--batch', '-b', metavar='INT', type=int,
+                        help='number of samples by runner', default=10)
+    parser.add_argument('--exec-time', metavar='FLOAT', type=float,
+                        help='simulated inference time by sample (ms)', default=500.0)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
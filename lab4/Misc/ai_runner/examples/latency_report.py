@@ -0,0 +1,97 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Latency report - percentiles, jitter and share by c-node
+
+N warm-up samples are invoked (not recorded), then M timed samples are invoked
+by chunk, the profiler records are accumulated in an AiProfileReport object
+(fixed memory, whatever the number of samples). A callback is passed to force
+the per-sample loop, the batch mode of the X86 driver reports only the mean
+duration of the samples of a call (tail latency is hidden).
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+
+from stm_ai_runner import AiRunner, AiRunnerCallback, AiProfileReport
+
+_DEFAULT = 'serial'
+
+
+def run(args):
+    """Processing function"""  # noqa: DAR101,DAR201,DAR401
+    mode = AiRunner.Mode.IO_ONLY
+    if args.mode == 'per_layer':
+        mode = AiRunner.Mode.PER_LAYER
+
+    runner = AiRunner(debug=args.debug)
+    if not runner.connect(args.desc):
+        print('ERR: connection to stm.ai runtime has failed..')
+        print(' {}'.format(runner.get_error()))
+        return 1
+
+    c_name = runner.names[0] if not args.name else args.name
+    if c_name not in runner.names:
+        print('ERR: c-model "{}" is not available'.format(c_name))
+        return 1
+
+    print(runner, flush=True)
+    rng = np.random.RandomState(42)
+
+    if args.warmup:
+        inputs = runner.generate_rnd_inputs(c_name, batch_size=args.warmup, rng=rng)
+        runner.invoke(inputs, name=c_name, mode=mode, disable_pb=True)
+
+    report = AiProfileReport()
+    callback = AiRunnerCallback()  # real duration by sample
+    n_done = 0
+    while n_done < args.samples:
+        n_samples = min(args.chunk, args.samples - n_done)
+        inputs = runner.generate_rnd_inputs(c_name, batch_size=n_samples, rng=rng)
+        _, profiler = runner.invoke(inputs, name=c_name, mode=mode, callback=callback, disable_pb=True)
+        report.update(profiler)
+        n_done += n_samples
+
+    runner.disconnect()
+
+    print('')
+    report.summary()
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report.to_dict(), file, indent=1)
+        print('Report is stored in "{}"'.format(args.json))
+
+    return 0
+
+
+def main():
+    """Main function to parse the arguments"""  # noqa: DAR101,DAR201,DAR401
+    parser = argparse.ArgumentParser(description='AI runner - latency report')
+    parser.add_argument('--desc', '-d', metavar='STR', type=str, help='description', default=_DEFAULT)
+    parser.add_argument('--name', '-n', metavar='STR', type=str, help='c-model name', default=None)
+    parser.add_argument('--warmup', '-w', metavar='INT', type=int,
+                        help='number of warm-up samples (not recorded)', default=10)
+    parser.add_argument('--samples', '-s', metavar='INT', type=int,
+                        help='number of timed samples', default=1000)
+    parser.add_argument('--chunk', '-c', metavar='INT', type=int,
+                        help='number of samples by invoke', default=100)
+    parser.add_argument('--mode', '-m', type=str, help='mode', default='io_only',
+                        choices=['io_only', 'per_layer'])
+    parser.add_argument('--json', metavar='FILE', type=str, help='store the report (JSON format)',
+                        default=None)
+    parser.add_argument('--debug', action='store_true', help="debug option")
+    args = parser.parse_args()
+
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,14 +12,13 @@ from statistics import mean
 import logging
 import numpy as np
 
-from sklearn.metrics import classification_report
-
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 logging.getLogger("tensorflow").setLevel(logging.ERROR)
 
 from tensorflow import keras
 
 from stm_ai_runner import AiRunner
+from stm_ai_runner.ai_metrics import confusion_matrix, classification_report, top_k_accuracy
 
 _DEFAULT = 'stm32ai_ws/'
 # _DEFAULT = 'serial'
@@ -79,13 +78,19 @@ print('number of samples        : {}'.format(len(profiler['c_durations'])))
 print('inference time by sample : {:.3f}ms (average)'.format(mean(profiler['c_durations'])))
 
 # classification report
-print('\nClassification report (sklearn.metrics)\n')
+print('\nClassification report (stm_ai_runner.ai_metrics)\n')
 
 # align the shape of the outputs (c-model is always - (b, h, w, c))
 predictions[0] = predictions[0].reshape(refs.shape)
 
+labels = np.argmax(refs, axis=1)
+matrix = confusion_matrix(labels, np.argmax(predictions[0], axis=1), NB_CLASSES)
+
 target_names = ['c0', 'c1', 'c2', 'c3', 'c4', 'c5', 'c6', 'c7', 'c8', 'c9']
-print(classification_report(np.argmax(refs, axis=1), np.argmax(predictions[0], axis=1),
-                            target_names=target_names))
+print(classification_report(matrix, target_names=target_names))
+print('top-1 accuracy           : {:.4f}'.format(top_k_accuracy(labels, predictions[0], k=1)))
+print('top-3 accuracy           : {:.4f}'.format(top_k_accuracy(labels, predictions[0], k=3)))
+print('\nConfusion matrix (true class x predicted class)\n')
+print(matrix)
 
 runner.disconnect()
@@ -0,0 +1,132 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - throughput with the negotiated packet size (CAP_PACKET_SIZE)
+
+Two emulated boards are started behind a throttled link (default: 921600
+bauds, 1ms turnaround latency): a legacy firmware (32-byte packets only) and a
+firmware supporting the negotiated packet size. The same random samples are
+invoked with the legacy packets and with the requested packet sizes, for
+several tensor sizes.
+"""
+
+import sys
+import argparse
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from stm_ai_runner import stm32msg_pb2 as stm32msg
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket
+
+
+def _models(sizes):
+    """Return the emulated models (one by tensor size)"""
+    return [EmuModel(name='network_{}'.format(size), n_features=size) for size in sizes]
+
+
+def _start_emulator(args, port, packet_size):
+    """Start an emulated board in a background thread"""
+    emu = Stm32Emulator(_models(args.sizes), packet_size=packet_size)
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_socket, args=(emu,),
+                              kwargs={'port': port, 'baudrate': args.baudrate,
+                                      'latency': args.latency, 'ready': ready},
+                              daemon=True)
+    thread.start()
+    ready.wait()
+    return emu
+
+
+def _connect(port, packet_size, args):
+    """Connect a runner to the emulated board"""
+    runner = AiRunner(debug=args.debug)
+    if not runner.connect('socket:localhost:{}'.format(port), packet_size=packet_size,
+                          tx_window=args.tx_window):
+        raise RuntimeError('Unable to connect the emulator: {}'.format(runner.get_error()))
+    return runner
+
+
+def _bench(runner, name, inputs, ref):
+    """Invoke the model, return the throughput (samples/s) and the IO statistics"""
+    start_time = t.perf_counter()
+    outputs, profiler = runner.invoke(inputs, name=name, disable_pb=True)
+    elapsed = t.perf_counter() - start_time
+    if not np.allclose(outputs[0], ref, atol=1e-5):
+        raise RuntimeError('Outputs are not consistent with the reference model')
+    return inputs[0].shape[0] / elapsed, profiler['debug'].get('io', {})
+
+
+def bench(args):
+
+    _start_emulator(args, args.port, 0)
+    emu = _start_emulator(args, args.port + 1, max(args.packet_sizes))
+
+    # (description, port, requested packet size), one connection at a time by emulator
+    configs = [('legacy fw', args.port, max(args.packet_sizes))]
+    configs += [('{} bytes'.format(size), args.port + 1, size) for size in args.packet_sizes]
+
+    rng = np.random.RandomState(42)
+    inputs = [[rng.uniform(-1.0, 1.0, (args.samples,) + model.input_shapes[0][1:]).astype(np.float32)]
+              for model in emu.models]
+    results = {}
+    for key, port, packet_size in configs:
+        runner = _connect(port, packet_size, args)
+        negotiated = runner._drv._packet_size  # pylint: disable=protected-access
+        for model, inputs_ in zip(emu.models, inputs):
+            rate, io_ = _bench(runner, model.name, inputs_, model(inputs_)[0])
+            results[(key, model.name)] = (negotiated, rate, io_)
+        runner.disconnect()
+
+    print('link: {} bauds, {}ms latency - tx window: {} - {} samples by invoke'.format(
+        args.baudrate if args.baudrate else 'unlimited', args.latency, args.tx_window, args.samples))
+    print('')
+    print(' {:>7} | {:12s} | {:>6} | {:>10} | {:>10} | {:>7}'.format(
+        'size', 'packets', 'bytes', 'smp/s', 'KiB/s', 'speedup'))
+    print('-' * 66)
+    for size, model in zip(args.sizes, emu.models):
+        ref_rate = results[(configs[0][0], model.name)][1]
+        for key, _, _ in configs:
+            packet_size, rate, io_ = results[(key, model.name)]
+            print(' {:7d} | {:12s} | {:>6} | {:10.1f} | {:10.1f} | {:6.2f}x'.format(
+                size, key, packet_size if packet_size else stm32msg.IO_OUT_PACKET_SIZE,
+                rate, io_.get('bytes_per_s', 0.0) / 1024, rate / ref_rate))
+        print('-' * 66)
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='Negotiated packet size benchmark')
+
+    parser.add_argument('--port', metavar='INT', type=int, help='first port number', default=10020)
+    parser.add_argument('--baudrate', '-b', metavar='INT', type=int,
+                        help='simulated baudrate (0 for unlimited)', default=921600)
+    parser.add_argument('--latency', metavar='FLOAT', type=float,
+                        help='simulated turnaround latency (ms)', default=1.0)
+    parser.add_argument('--sizes', metavar='INT', type=int, nargs='+',
+                        help='size of the input tensors (number of float values)', default=[64, 768, 3072])
+    parser.add_argument('--packet-sizes', '-p', metavar='INT', type=int, nargs='+',
+                        help='requested packet sizes (bytes)', default=[128, 512, 2048])
+    parser.add_argument('--tx-window', metavar='INT', type=int,
+                        help='number of packets written before waiting the acks (0: no limit)', default=1)
+    parser.add_argument('--samples', '-n', metavar='INT', type=int,
+                        help='number of samples by invoke', default=8)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Benchmark - throughput of the streaming run mode (CMD_NETWORK_RUN_STREAM)
+
+Two emulated boards are started (with and w/o CAP_STREAM capability) behind a
+throttled link (default: 115200 bauds, 1ms turnaround latency) and the same
+random samples are invoked through the two connections. Each mode is warmed up
+(untimed invoke of the same samples) before the timed invokes, the best of the
+repeats is reported. A single sample is always sent with the per-sample flow
+(reference row, speedup ~1.00x).
+"""
+
+import sys
+import argparse
+import threading
+import time as t
+import numpy as np
+
+from stm_ai_runner import AiRunner
+from stm_ai_runner import stm32msg_pb2 as stm32msg
+from stm_ai_runner.stm32_emulator import Stm32Emulator, EmuModel, serve_socket
+
+
+def _start_emulator(args, port, capability):
+    """Start an emulated board in a background thread"""
+    emu = Stm32Emulator([EmuModel(exec_time=args.exec_time)], capability=capability,
+                        window=args.window)
+    ready = threading.Event()
+    thread = threading.Thread(target=serve_socket, args=(emu,),
+                              kwargs={'port': port, 'baudrate': args.baudrate,
+                                      'latency': args.latency, 'ready': ready},
+                              daemon=True)
+    thread.start()
+    ready.wait()
+    return emu
+
+
+def _connect(port, args):
+    """Connect a runner to the emulated board"""
+    runner = AiRunner(debug=args.debug)
+    if not runner.connect('socket:localhost:{}'.format(port), tx_window=args.tx_window):
+        raise RuntimeError('Unable to connect the emulator: {}'.format(runner.get_error()))
+    return runner
+
+
+def _bench(runner, inputs, ref, repeat):
+    """Invoke the model, return the throughput (samples/s, best of the repeats)"""
+    runner.invoke(inputs, disable_pb=True)  # warm-up
+    elapsed = []
+    for _ in range(max(1, repeat)):
+        start_time = t.perf_counter()
+        outputs, _ = runner.invoke(inputs, disable_pb=True)
+        elapsed.append(t.perf_counter() - start_time)
+        if not np.allclose(outputs[0], ref):
+            raise RuntimeError('Outputs are not consistent with the reference model')
+    return inputs[0].shape[0] / min(elapsed)
+
+
+def bench(args):
+
+    _start_emulator(args, args.port, 0)
+    emu = _start_emulator(args, args.port + 1, stm32msg.CAP_STREAM)
+
+    runners = {
+        'sample': _connect(args.port, args),
+        'stream': _connect(args.port + 1, args),
+    }
+
+    model = emu.models[0]
+    rng = np.random.RandomState(42)
+
+    print('link: {} bauds, {}ms latency - window: {} - exec time: {}ms'.format(
+        args.baudrate if args.baudrate else 'unlimited', args.latency, args.window, args.exec_time))
+    print('')
+    print(' {:>8} | {:>14} | {:>14} | {:>7}'.format('samples', 'sample (smp/s)',
+                                                   'stream (smp/s)', 'speedup'))
+    print('-' * 54)
+    for n_samples in args.samples:
+        inputs = [rng.uniform(-1.0, 1.0, (n_samples,) + model.input_shapes[0][1:]).astype(np.float32)]
+        ref = model(inputs)[0]
+        res = {key: _bench(runner, inputs, ref, args.repeat) for key, runner in runners.items()}
+        print(' {:8d} | {:14.1f} | {:14.1f} | {:6.2f}x'.format(n_samples, res['sample'], res['stream'],
+                                                             res['stream'] / res['sample']), flush=True)
+
+    for runner in runners.values():
+        runner.disconnect()
+
+    return 0
+
+
+def main():
+    """ script entry point """
+
+    parser = argparse.ArgumentParser(description='Streaming run mode benchmark')
+
+    parser.add_argument('--port', metavar='INT', type=int, help='first port number', default=10010)
+    parser.add_argument('--baudrate', '-b', metavar='INT', type=int,
+                        help='simulated baudrate (0 for unlimited)', default=115200)
+    parser.add_argument('--latency', metavar='FLOAT', type=float,
+                        help='simulated turnaround latency (ms)', default=1.0)
+    parser.add_argument('--exec-time', metavar='FLOAT', type=float,
+                        help='simulated inference time by sample (ms)', default=0.0)
+    parser.add_argument('--window', '-w', metavar='INT', type=int,
+                        help='number of samples by window', default=8)
+    parser.add_argument('--tx-window', metavar='INT', type=int,
+                        help='number of packets written before waiting the acks (0: no limit)', default=1)
+    parser.add_argument('--samples', '-n', metavar='INT', type=int, nargs='+',
+                        help='number of samples', default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument('--repeat', '-r', metavar='INT', type=int,
+                        help='number of timed invokes by mode (best is reported)', default=3)
+    parser.add_argument('--debug', action='store_true',
+                        help="debug option")
+
+    args = parser.parse_args()
+
+    return bench(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,114 +16,36 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 import tensorflow as tf
 
 from stm_ai_runner import AiRunner
+from stm_ai_runner.ai_compare import AiComparator, AiFeatureCollector, AiTensorComparator
 
 _DEFAULT = 'serial'
 
 
-def dequantize(q, scale, zp):
-    """Dequantize the array"""
-    return (q.astype(np.float32) - np.float32(zp)) * np.float32(scale)
-
-
-def stat_to_str(val):
-    if val.dtype == np.float32:
-        str = 'min={:.9f}, max={:.9f}, mean={:.1f}, std={:.1f}'.format(
-            np.min(val), np.max(val), np.mean(val), np.std(val))
-    else:
-        str = 'min={}, max={}, mean={:.1f}, std={:.1f}'.format(
-            np.min(val), np.max(val), np.mean(val), np.std(val))
-    return str
-
-
-def rmse(ref, pred):
-    """Return Root Mean Squared Error (RMSE)."""
-    return np.sqrt(((ref.astype(np.float32) - pred.astype(np.float32)) ** 2).mean())
-
-
-def l2r(ref, pred):
-  """Compute L2 relative error"""
-  def magnitude(v):
-    return np.sqrt(np.sum(np.square(v).flatten()))
-  mag = magnitude(pred.astype(np.float32)) + np.finfo(np.float32).eps
-  return magnitude((ref.astype(np.float32) - pred.astype(np.float32))) / mag
-
-
 def generate_metrics(ref, pred, scale=1.0, zp=0, desc=None, plot=False):
     """Generate and display metrics"""
 
     assert ref.dtype == pred.dtype
 
-    desc = '[{}]'.format(str(desc)) if desc else '[]'
-    b_size = ref.shape[0]
-
-    ref = ref.flatten()
-    pred = pred.flatten()
-
-    if ref.dtype != np.float32:
-        # integer data type
-        ref_f = dequantize(ref, scale, zp)
-        pred_f = dequantize(pred, scale, zp)
-        rmse_f = rmse(ref_f, pred_f)
-        l2r_f = l2r(ref_f, pred_f)
-        d = ref.astype(np.int32) - pred.astype(np.int32)
-
-        # histogram
-        err = []
-        hist = {}
-        for i in range(len(d)):
-            if np.abs(d[i]) > 0:
-                # err_ = np.abs(d[i])
-                err_ = d[i]
-                err.extend([err_])
-                hist[err_] = hist.get(err_, 0) + 1
-    else:
-        # float32 data type
-        d = ref - pred
-        rmse_f = rmse(ref, pred)
-        l2r_f = l2r(ref, pred)       
-
-    print('')
-    print(f'{desc} - {b_size} samples, {ref.dtype}, {ref.size} items')
-    print('-' * 80)
-    if ref.dtype != np.float32:
-        print(f' diff     : {len(err)}/{len(ref)}, hist={hist}')
-    print(' ref      : {}'.format(stat_to_str(ref)))
-    print(' pred     : {}'.format(stat_to_str(pred)))
-    print(' diff     : {}'.format(stat_to_str(d)))
-    if ref.dtype != np.float32:
-        print(' metrics  : rmse={:.9f} l2r={:.9f} (quant.)'.format(rmse(ref, pred), l2r(ref, pred)))
-        print(' metrics  : rmse={:.9f} l2r={:.9f} (dequant.)'.format(rmse_f, l2r_f), flush=True)
-    else:
-        print(' metrics  : rmse={:.9f} l2r={:.9f}'.format(rmse_f, l2r_f), flush=True)
-
-    if ref.dtype == np.float32:
-        return
-
-    if not len(err) or not plot:
-        return
-
-    import matplotlib.pyplot as plt
-
-    # display histogram
-    bins = [b for b in range(min(err), max(err)+2)]
-    plt.style.use('ggplot')
-    plt.hist(np.array(err), bins=bins, density=False, align='left', rwidth=0.8)
-    plt.xlabel('Value')
-    plt.ylabel('Frequency')
-    plt.title(f'Diff. histogram: {len(err)}/{len(d)} items')
-    plt.show()
-
-    return
+    comparator = AiTensorComparator(str(desc) if desc else '', scale=scale, zero_point=zp)
+    comparator.update(ref, pred)
+    comparator.report()
+    if plot:
+        comparator.plot()
+    return comparator.summary()
 
 
-def tf_create(f_path, verbosity):
+def tf_create(f_path, verbosity, per_layer=False):
 
     if not f_path:
         return None
 
     print('\nCreate the interpreter for the "{}" model'.format(f_path))
 
-    tf_interpreter = tf.lite.Interpreter(model_path=f_path)
+    if per_layer:
+        # intermediate tensors are kept (TF 2.5+)
+        tf_interpreter = tf.lite.Interpreter(model_path=f_path, experimental_preserve_all_tensors=True)
+    else:
+        tf_interpreter = tf.lite.Interpreter(model_path=f_path)
     tf_interpreter.allocate_tensors()
 
     input_details = tf_interpreter.get_input_details()
@@ -147,28 +69,107 @@ def tf_create(f_path, verbosity):
     return tf_interpreter
 
 
-def tf_run(tf_interpreter, inputs):
+def tf_resize(tf_interpreter, batch_size):
+    """Set the batch size of the interpreter, False if the model has a fixed batch size"""
+
+    input_details = tf_interpreter.get_input_details()
+    if input_details[0]['shape'][0] == batch_size:
+        return True
+    try:
+        tf_interpreter.resize_tensor_input(input_details[0]['index'],
+                                           [batch_size] + list(input_details[0]['shape'][1:]))
+        tf_interpreter.allocate_tensors()
+    except (ValueError, RuntimeError):
+        return False
+    return True
+
+
+def tf_layer_tensors(tf_interpreter):
+    """Return the index of the output tensor of each operator (m_id: index of the operator)"""
+
+    try:
+        ops = tf_interpreter._get_ops_details()  # pylint: disable=protected-access
+    except AttributeError:
+        return {}
+    return {op['index']: op['outputs'][0] for op in ops if len(op['outputs'])}
+
+
+def tf_tensor_names(tf_interpreter):
+    """Return the names of the tensors (key: index of the tensor)"""
+
+    return {tens['index']: tens['name'] for tens in tf_interpreter.get_tensor_details()}
+
+
+def pair_layers(c_features, tf_features, names):
+    """Associate the c-nodes to the TFLite operators, return {c_idx: operator index}
+
+    The m_id of a c-node is not always the index of a TFLite operator (fused or
+    split layers), the candidates are the operators with the same output dtype
+    and shape (w/o the batch and the 1-dims). The operator with the index m_id
+    is used if it is a candidate, else the unique candidate. A c-node with
+    several or without candidates is skipped. The pairings are printed.
+    """
+
+    def _signature(array):
+        return array.dtype, tuple(dim for dim in array.shape[1:] if dim != 1)
+
+    print('\n{:>6s} {:>6s} {:20s} | {:>6s} {:30s} {}'.format('c_idx', 'm_id', 'shape', 'op', 'TFLite tensor',
+                                                            'pairing'))
+    print('-' * 90)
+    pairs = {}
+    for c_idx, (feature, desc) in sorted(c_features.items()):
+        candidates = [op for op, ref in tf_features.items() if _signature(ref) == _signature(feature)]
+        if desc['m_id'] in candidates:
+            op_idx, how = desc['m_id'], 'm_id'
+        elif len(candidates) == 1:
+            op_idx, how = candidates[0], 'shape'
+        else:
+            op_idx, how = None, 'skipped ({} candidates)'.format(len(candidates))
+        name = names.get(op_idx, '') if op_idx is not None else ''
+        print('{:6d} {:>6s} {:20s} | {:>6s} {:30.30s} {}'.format(c_idx, str(desc['m_id']), str(feature.shape[1:]),
+                                                              str(op_idx) if op_idx is not None else '-',
+                                                              name, how))
+        if op_idx is not None:
+            pairs[c_idx] = op_idx
+    return pairs
+
+
+def tf_run(tf_interpreter, inputs, layers=None):
+    """Run the interpreter with a batch, return the outputs and the requested intermediate tensors"""
 
     assert len(tf_interpreter.get_input_details()) == 1
 
+    batch_size = inputs[0].shape[0]
+    batched = tf_resize(tf_interpreter, batch_size)
+
     input_details = tf_interpreter.get_input_details()
     output_details = tf_interpreter.get_output_details()
-    batch_size = inputs[0].shape[0]
 
     # align the shape of the inputs (c-model is always - (b, h, w, c))
-    inputs[0] = inputs[0].reshape((-1,) +\
-        tuple(input_details[0]['shape'][1:]))
+    inputs[0] = inputs[0].reshape((-1,) + tuple(input_details[0]['shape'][1:]))
 
-    for batch in range(batch_size):
-        input = np.expand_dims(inputs[0][batch], axis=0)
-        tf_interpreter.set_tensor(input_details[0]['index'], input)
+    indexes = [tens['index'] for tens in output_details] + list(layers.values() if layers else [])
+    if batched:
+        tf_interpreter.set_tensor(input_details[0]['index'], inputs[0])
         tf_interpreter.invoke()
-        output = tf_interpreter.get_tensor(output_details[0]['index'])
-        if batch == 0:
-            outputs = [output]
-        else:
-            outputs[0] = np.append(outputs[0], output, axis=0)
-    return outputs
+        results = [tf_interpreter.get_tensor(idx) for idx in indexes]
+    else:
+        # fixed batch size, the results are written in pre-allocated arrays
+        results = None
+        for batch in range(batch_size):
+            tf_interpreter.set_tensor(input_details[0]['index'], inputs[0][batch:batch + 1])
+            tf_interpreter.invoke()
+            for i, idx in enumerate(indexes):
+                value = tf_interpreter.get_tensor(idx)
+                if results is None:
+                    results = [None] * len(indexes)
+                if results[i] is None:
+                    results[i] = np.empty((batch_size,) + value.shape[1:], dtype=value.dtype)
+                results[i][batch] = value[0]
+
+    outputs = results[:len(output_details)]
+    features = dict(zip(layers.keys(), results[len(output_details):])) if layers else {}
+    return outputs, features
 
 
 def load_data(f_npz):
@@ -180,7 +181,7 @@ def load_data(f_npz):
 def test(args):
 
     # create the interpreters
-    tf_interpreter = tf_create(args.model, args.verbosity)
+    tf_interpreter = tf_create(args.model, args.verbosity, per_layer=args.per_layer)
 
     ai_runner = AiRunner(debug=args.debug)
     if not ai_runner.connect(args.desc):
@@ -200,24 +201,44 @@ def test(args):
     else:
         inputs = ai_runner.generate_rnd_inputs(batch_size=args.batch)
 
-    # run the interpreters
-    print('\nRunning the interpreters...', flush=True)
-
-    outputs, _ = ai_runner.invoke(inputs)
-    tf_outputs = tf_run(tf_interpreter, inputs)
+    # run the interpreters by chunk, the metrics are accumulated
+    print('\nRunning the interpreters ({} samples, chunk={})...'.format(inputs[0].shape[0], args.chunk),
+          flush=True)
+
+    comparator = AiComparator()
+    collector = AiFeatureCollector() if args.per_layer else None
+    mode = AiRunner.Mode.PER_LAYER_WITH_DATA if args.per_layer else AiRunner.Mode.IO_ONLY
+    layers = tf_layer_tensors(tf_interpreter) if args.per_layer else None
+    pairs = None
+
+    for start in range(0, inputs[0].shape[0], args.chunk):
+        chunk = [inputs[0][start:start + args.chunk]]
+        if collector:
+            collector.reset()
+        outputs, _ = ai_runner.invoke(chunk, mode=mode, callback=collector, disable_pb=True)
+        tf_outputs, tf_features = tf_run(tf_interpreter, [chunk[0]], layers)
+
+        comparator.update_outputs(tf_outputs, outputs, ai_runner.get_output_infos())
+        if collector:
+            c_features = collector.features()
+            if pairs is None:
+                # operator names: name of the output tensor
+                names = tf_tensor_names(tf_interpreter)
+                names = {op: names.get(idx, '') for op, idx in layers.items()}
+                pairs = pair_layers(c_features, tf_features, names)
+            for c_idx, (feature, desc) in c_features.items():
+                ref = tf_features.get(pairs.get(c_idx, None), None)
+                if ref is not None and ref.size == feature.size:
+                    comparator.update_layer(c_idx, ref, feature, desc)
 
     # Compare results
     print('\nComparing results...', flush=True)
 
-    for i, (tf_res, res) in enumerate(zip(tf_outputs, outputs)):
-        tens = ai_runner.get_output_infos()[i]
-        if tf_res.dtype == np.float32:
-            desc = '{}'.format(tens['name'])
-            generate_metrics(tf_res, res, desc=desc)
-            np.testing.assert_almost_equal(tf_res, res.reshape(tf_res.shape), decimal=6)
-        else:
-            desc = '{}, scale={}, zp={}'.format(tens['name'], tens['scale'], tens['zero_point'])
-            generate_metrics(tf_res, res, scale=tens['scale'], zp=tens['zero_point'], desc=desc, plot=args.plot)
+    comparator.report(plot=args.plot)
+
+    for comp in comparator.outputs.values():
+        if comp.is_float:
+            assert comp.max_abs_diff < 1.5e-6, '{} - max |diff| = {}'.format(comp.name, comp.max_abs_diff)
 
 
 def main():
@@ -229,6 +250,8 @@ def main():
     parser.add_argument('--desc', '-d', metavar='STR', type=str, help='description for STM AI connection',
                         default=_DEFAULT)
     parser.add_argument('--batch', '-b', metavar='INT', type=int, help='batch_size', default=2)
+    parser.add_argument('--chunk', '-c', metavar='INT', type=int,
+                        help='number of samples by invoke (metrics are accumulated)', default=256)
     parser.add_argument('--verbosity', '-v',
                         nargs='?', const=1,
                         type=int, choices=range(0, 3),
@@ -237,6 +260,10 @@ def main():
 
     parser.add_argument('--npz', metavar='STR', type=str, help='NPZ file', default=None)
 
+    parser.add_argument('--per-layer', action='store_true',
+                        help="compare the intermediate tensors, a c-node is paired with the TFLite operator "
+                        "with the same output dtype/shape (index m_id if several), the ambiguous c-nodes "
+                        "are skipped (pairings are printed)")
     parser.add_argument('--debug', action='store_true', help="debug option")
     parser.add_argument('--plot', action='store_true', help="plot option")
     args = parser.parse_args()
@@ -246,4 +273,3 @@ def main():
 
 if __name__ == '__main__':
     sys.exit(main())
-
@@ -9,5 +9,14 @@
 from .ai_runner import AiRunner
 from .ai_runner import AiRunnerCallback
 from .ai_runner import AiRunnerSession
+from .ai_runner_pool import AiRunnerPool
+from .ai_profiler import AiProfiler
+from .ai_model_info import AiModelInfo, AiInputSignature
+from .ai_capture import AiCaptureCallback, AiCaptureStore
+from .ai_report import AiProfileReport
+from .ai_dll_pool import AiDllPool
+from .ai_dataset import AiDataset
+from .ai_metrics import AiConfusionMatrix
+from .ai_compare import AiComparator, AiFeatureCollector
 
 __version__ = "1.0"
@@ -0,0 +1,316 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+On-disk capture of the intermediate tensors (PER_LAYER_WITH_DATA mode)
+
+AiCaptureCallback is an AiRunnerCallback which streams the outputs of the
+c-nodes to a directory, one append-only .npy file by c-node output (first
+dimension is the sample index), written by chunk. The capture.json file
+describes the c-nodes (m_id, layer type, shape, dtype, scale/zero_point).
+The files are valid .npy files after each chunk, a layer can be memory-mapped
+(AiCaptureStore) without loading the other layers. The features are not kept
+by the profiler returned by invoke() (only the durations of the c-nodes), the
+memory used by a capture does not depend on the number of samples.
+
+    capture = AiCaptureCallback('capture_dir')
+    runner.invoke(inputs, mode=AiRunner.Mode.PER_LAYER_WITH_DATA, callback=capture)
+    capture.close()
+
+    store = AiCaptureStore('capture_dir')
+    data = store.load(c_idx=3)  # numpy.memmap, shape: (n_samples, h, w, c)
+"""
+
+import os
+import json
+import struct
+
+import numpy as np
+
+from .ai_runner import AiRunnerCallback, InvalidParamError
+from .ai_quantization import dequantize_array
+
+
+_CAPTURE_META_FILE = 'capture.json'
+_CAPTURE_VERSION = 1
+
+_NPY_MAGIC = b'\x93NUMPY\x01\x00'
+_NPY_COUNT_WIDTH = 14  # fixed width of the first dimension in the header
+
+
+def _npy_header(dtype, shape, count):
+    """Build a .npy (v1.0) header, fixed size for a given dtype/shape"""  # noqa: DAR101,DAR201,DAR401
+    dims = ['{:{}d}'.format(count, _NPY_COUNT_WIDTH)] + [str(dim) for dim in shape]
+    header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({}{}), }}".format(
+        np.lib.format.dtype_to_descr(dtype), ', '.join(dims), ',' if not shape else '')
+    pad = 64 - (len(_NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = header + ' ' * (pad % 64) + '\n'
+    return _NPY_MAGIC + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class _AiAppendArray:
+    """Append-only .npy file, the samples are buffered and written by chunk"""
+
+    def __init__(self, file_name, dtype, shape, chunk_size):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self._dtype = np.dtype(dtype)
+        self._shape = tuple(shape)
+        self._count = 0
+        self._chunk = np.empty((chunk_size,) + self._shape, dtype=self._dtype)
+        self._n_chunk = 0
+        self._file = open(file_name, 'wb')
+        self._file.write(_npy_header(self._dtype, self._shape, 0))
+
+    def __len__(self):
+        return self._count + self._n_chunk
+
+    def append(self, data):
+        """Append one sample"""  # noqa: DAR101,DAR201,DAR401
+        self._chunk[self._n_chunk] = data.reshape(self._shape)
+        self._n_chunk += 1
+        if self._n_chunk == self._chunk.shape[0]:
+            self.flush()
+
+    def flush(self):
+        """Write the pending samples and update the header"""  # noqa: DAR101,DAR201,DAR401
+        if self._file is None or not self._n_chunk:
+            return
+        self._file.write(self._chunk[:self._n_chunk].tobytes())
+        self._count += self._n_chunk
+        self._n_chunk = 0
+        self._file.seek(0)
+        self._file.write(_npy_header(self._dtype, self._shape, self._count))
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file"""  # noqa: DAR101,DAR201,DAR401
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def _to_scale(value):
+    """Return the scale as a float or None"""  # noqa: DAR101,DAR201,DAR401
+    return float(value) if value is not None and float(value) != 0.0 else None
+
+
+def _to_zero_point(value):
+    """Return the zero-point as an int or None"""  # noqa: DAR101,DAR201,DAR401
+    return int(value) if value is not None else None
+
+
+class AiCaptureCallback(AiRunnerCallback):
+    """Callback streaming the outputs of the c-nodes to a directory"""
+
+    stores_features = True
+
+    def __init__(self, path, chunk_size=64, callback=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        path
+            Directory where the capture is stored (created if necessary)
+        chunk_size
+            Number of samples buffered in memory by c-node output
+        callback
+            Optional AiRunnerCallback object, the events are forwarded
+        """
+        super().__init__()
+        os.makedirs(path, exist_ok=True)
+        self._path = path
+        self._chunk_size = max(chunk_size, 1)
+        self._callback = callback
+        self._nodes = {}  # key: c_idx, value: (desc, list of _AiAppendArray)
+        self._samples = None
+        self._idx = 0
+
+    @property
+    def path(self):
+        """Return the directory of the capture"""  # noqa: DAR101,DAR201,DAR401
+        return self._path
+
+    def on_sample_begin(self, idx):
+        """Record the index of the sample"""  # noqa: DAR101,DAR201,DAR401
+        self._idx = idx
+        if self._samples is None:
+            self._samples = _AiAppendArray(os.path.join(self._path, 'samples.npy'), np.int64, (),
+                                           self._chunk_size)
+        self._samples.append(np.array(idx, dtype=np.int64))
+        if self._callback:
+            self._callback.on_sample_begin(idx)
+
+    def on_sample_end(self, idx, data, logs=None):
+        """Forward the event"""  # noqa: DAR101,DAR201,DAR401
+        if self._callback:
+            return self._callback.on_sample_end(idx, data, logs=logs)
+        return True
+
+    def on_node_begin(self, idx, data, logs=None):
+        """Forward the event"""  # noqa: DAR101,DAR201,DAR401
+        if self._callback:
+            self._callback.on_node_begin(idx, data, logs=logs)
+
+    def _create_node(self, idx, data, logs):
+        """Create the files for a new c-node"""  # noqa: DAR101,DAR201,DAR401
+        n_outputs = len(data)
+        scales = logs.get('scale', [None] * n_outputs)
+        zero_points = logs.get('zero_point', [None] * n_outputs)
+        desc = {
+            'c_idx': idx,
+            'm_id': logs.get('m_id', None),
+            'layer_type': logs.get('layer_type', logs.get('layer-type', None)),
+            'outputs': [],
+        }
+        arrays = []
+        for i_out, tensor in enumerate(data):
+            if tensor is None or tensor.size == 0:
+                arrays.append(None)
+                continue
+            shape = tensor.shape[1:] if tensor.ndim > 1 and tensor.shape[0] == 1 else tensor.shape
+            file_name = 'c_node_{:03d}_{}.npy'.format(idx, i_out)
+            arrays.append(_AiAppendArray(os.path.join(self._path, file_name), tensor.dtype, shape,
+                                         self._chunk_size))
+            desc['outputs'].append({
+                'idx': i_out,
+                'file': file_name,
+                'dtype': np.dtype(tensor.dtype).name,
+                'shape': list(shape),
+                'scale': _to_scale(scales[i_out]),
+                'zero_point': _to_zero_point(zero_points[i_out]),
+            })
+        self._nodes[idx] = (desc, arrays)
+        self._write_meta()
+        return arrays
+
+    def on_node_end(self, idx, data, logs=None):
+        """Append the outputs of the c-node"""  # noqa: DAR101,DAR201,DAR401
+        if data:
+            arrays = self._nodes[idx][1] if idx in self._nodes else self._create_node(idx, data, logs or {})
+            for array, tensor in zip(arrays, data):
+                if array is not None:
+                    array.append(tensor)
+        if self._callback:
+            self._callback.on_node_end(idx, data, logs=logs)
+
+    def _write_meta(self):
+        """Write the description of the capture"""  # noqa: DAR101,DAR201,DAR401
+        meta = {
+            'version': _CAPTURE_VERSION,
+            'n_samples': len(self._samples) if self._samples is not None else 0,
+            'c_nodes': [self._nodes[key][0] for key in sorted(self._nodes)],
+        }
+        with open(os.path.join(self._path, _CAPTURE_META_FILE), 'w') as file:
+            json.dump(meta, file, indent=1)
+
+    def flush(self):
+        """Write the pending samples"""  # noqa: DAR101,DAR201,DAR401
+        for _, arrays in self._nodes.values():
+            for array in arrays:
+                if array is not None:
+                    array.flush()
+        if self._samples is not None:
+            self._samples.flush()
+        self._write_meta()
+
+    def close(self):
+        """Flush and close the files"""  # noqa: DAR101,DAR201,DAR401
+        self.flush()
+        for _, arrays in self._nodes.values():
+            for array in arrays:
+                if array is not None:
+                    array.close()
+        if self._samples is not None:
+            self._samples.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AiCaptureStore:
+    """Read access to a capture (AiCaptureCallback)"""
+
+    def __init__(self, path):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        path
+            Directory of the capture
+
+        Raises
+        ------
+        InvalidParamError
+            Directory is not a valid capture
+        """
+        meta_file = os.path.join(path, _CAPTURE_META_FILE)
+        if not os.path.isfile(meta_file):
+            raise InvalidParamError('Invalid capture directory: {}'.format(path))
+        with open(meta_file, 'r') as file:
+            self._meta = json.load(file)
+        self._path = path
+        self._nodes = {node['c_idx']: node for node in self._meta['c_nodes']}
+
+    @property
+    def c_nodes(self):
+        """Return the description of the captured c-nodes"""  # noqa: DAR101,DAR201,DAR401
+        return self._meta['c_nodes']
+
+    def __len__(self):
+        return len(self.samples())
+
+    def samples(self, mmap_mode='r'):
+        """Return the indexes of the captured samples"""  # noqa: DAR101,DAR201,DAR401
+        file_name = os.path.join(self._path, 'samples.npy')
+        if not os.path.isfile(file_name):
+            return np.array([], dtype=np.int64)
+        return np.load(file_name, mmap_mode=mmap_mode)
+
+    def _output_desc(self, c_idx, idx):
+        """Return the description of a c-node output"""  # noqa: DAR101,DAR201,DAR401
+        node = self._nodes.get(c_idx, None)
+        outputs = [out for out in node['outputs'] if out['idx'] == idx] if node else []
+        if not outputs:
+            raise InvalidParamError('No data for the c-node {} (output {})'.format(c_idx, idx))
+        return outputs[0]
+
+    def load(self, c_idx, idx=0, mmap_mode='r'):
+        """
+        Return the captured data of a c-node output
+
+        Parameters
+        ----------
+        c_idx
+            Index of the c-node
+        idx
+            Index of the output
+        mmap_mode
+            See numpy.load(), None to load the data in memory
+
+        Returns
+        -------
+        numpy.ndarray
+            Array (or memory-map), first dimension is the sample
+        """
+        desc = self._output_desc(c_idx, idx)
+        return np.load(os.path.join(self._path, desc['file']), mmap_mode=mmap_mode)
+
+    def dequantize(self, c_idx, idx=0, start=0, end=None):
+        """Return the data of a c-node output as float32 values (scale/zero_point)"""
+        # noqa: DAR101,DAR201,DAR401
+        desc = self._output_desc(c_idx, idx)
+        data = self.load(c_idx, idx)[start:end]
+        if desc['scale'] is None:
+            return np.asarray(data, dtype=np.float32)
+        return dequantize_array(data, desc['scale'], desc['zero_point'])
@@ -0,0 +1,412 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Differential testing - comparison of the outputs of a reference model (TFLite
+interpreter for example) and of the c-model
+
+The metrics are accumulated over batches (only sums, min/max values and the
+histogram of the differences are kept), so a full test set can be compared
+by chunk. For the integer tensors, the histogram of the non-zero differences
+is built with np.unique() and the metrics are reported for the quantized and
+the de-quantized values.
+
+    comparator = AiComparator()
+    for batch in batches:
+        outputs, _ = runner.invoke(batch)
+        comparator.update_outputs(ref_model(batch), outputs, runner.get_output_infos())
+    comparator.report()
+
+AiFeatureCollector is an AiRunnerCallback which keeps the outputs of the
+c-nodes (PER_LAYER_WITH_DATA mode) of the last invoke, to compare them with the
+intermediate tensors of the reference model (AiComparator.update_layer()).
+"""
+
+import numpy as np
+
+from .ai_runner import AiRunnerCallback, InvalidParamError
+from .ai_quantization import dequantize_array, is_quantized
+
+
+class _AiStats:
+    """Streaming min/max/mean/std of a set of values"""
+
+    def __init__(self):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+
+    def update(self, values):
+        """Add a flat array"""  # noqa: DAR101,DAR201,DAR401
+        if not values.size:
+            return
+        v_min, v_max = values.min(), values.max()
+        self.min = v_min if self.min is None else min(self.min, v_min)
+        self.max = v_max if self.max is None else max(self.max, v_max)
+        values = values.astype(np.float64, copy=False)
+        self.count += values.size
+        self.sum += float(values.sum())
+        self.sum_sq += float(np.dot(values, values))
+
+    @property
+    def mean(self):
+        """Return the mean value"""  # noqa: DAR101,DAR201,DAR401
+        return self.sum / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """Return the standard deviation"""  # noqa: DAR101,DAR201,DAR401
+        if not self.count:
+            return 0.0
+        return float(np.sqrt(max(self.sum_sq / self.count - self.mean ** 2, 0.0)))
+
+    def to_str(self, is_float):
+        """Return a string with the statistics"""  # noqa: DAR101,DAR201,DAR401
+        fmt = 'min={:.9f}, max={:.9f}, mean={:.1f}, std={:.1f}' if is_float else\
+            'min={}, max={}, mean={:.1f}, std={:.1f}'
+        return fmt.format(self.min, self.max, self.mean, self.std)
+
+
+class _AiErrors:
+    """Streaming RMSE/L2 relative error"""
+
+    def __init__(self):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self.count = 0
+        self.diff_sq = 0.0
+        self.pred_sq = 0.0
+
+    def update(self, diff, pred):
+        """Add the differences and the predicted values (flat arrays)"""  # noqa: DAR101,DAR201,DAR401
+        diff = diff.astype(np.float64, copy=False)
+        pred = pred.astype(np.float64, copy=False)
+        self.count += diff.size
+        self.diff_sq += float(np.dot(diff, diff))
+        self.pred_sq += float(np.dot(pred, pred))
+
+    @property
+    def rmse(self):
+        """Return the Root Mean Squared Error (RMSE)"""  # noqa: DAR101,DAR201,DAR401
+        return float(np.sqrt(self.diff_sq / self.count)) if self.count else 0.0
+
+    @property
+    def l2r(self):
+        """Return the L2 relative error"""  # noqa: DAR101,DAR201,DAR401
+        return float(np.sqrt(self.diff_sq) / (np.sqrt(self.pred_sq) + np.finfo(np.float32).eps))
+
+
+class AiTensorComparator:
+    """Comparison of the reference and predicted values of a tensor, accumulated over batches"""
+
+    def __init__(self, name='', scale=None, zero_point=0):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        name
+            description of the tensor (used in the report)
+        scale
+            scale (scalar or per-channel) to de-quantize the integer values,
+            None if the values are not quantized
+        zero_point
+            zero-point (scalar or per-channel)
+        """
+        self.name = name
+        self.scale = scale
+        self.zero_point = zero_point
+        self.dtype = None
+        self.n_samples = 0
+        self.ref = _AiStats()
+        self.pred = _AiStats()
+        self.diff = _AiStats()
+        self.errors = _AiErrors()
+        self.errors_f = _AiErrors()  # de-quantized values
+        self.max_abs_diff = 0.0
+        self._hist = {}
+
+    @property
+    def is_float(self):
+        """Indicate if the values are float values"""  # noqa: DAR101,DAR201,DAR401
+        return self.dtype is not None and not np.issubdtype(self.dtype, np.integer)
+
+    @property
+    def size(self):
+        """Return the number of compared items"""  # noqa: DAR101,DAR201,DAR401
+        return self.diff.count
+
+    @property
+    def n_diff(self):
+        """Return the number of different items (integer values)"""  # noqa: DAR101,DAR201,DAR401
+        return sum(self._hist.values())
+
+    @property
+    def hist(self):
+        """Return the histogram of the non-zero differences (integer values)"""
+        # noqa: DAR101,DAR201,DAR401
+        return dict(sorted(self._hist.items()))
+
+    def update(self, ref, pred):
+        """
+        Add a batch of values
+
+        Parameters
+        ----------
+        ref
+            reference values, first dimension is the batch dimension
+        pred
+            predicted values (same type and size, reshaped as ref)
+
+        Raises
+        ------
+        InvalidParamError
+            inconsistent arrays
+        """
+        ref = np.asarray(ref)
+        pred = np.asarray(pred)
+        if ref.dtype != pred.dtype or ref.size != pred.size:
+            msg = '{} - inconsistent values {}/{} instead {}/{}'.format(self.name, pred.dtype, pred.size,
+                                                                     ref.dtype, ref.size)
+            raise InvalidParamError(msg)
+        if self.dtype is not None and ref.dtype != self.dtype:
+            raise InvalidParamError('{} - dtype {} instead {}'.format(self.name, ref.dtype, self.dtype))
+        self.dtype = ref.dtype
+        self.n_samples += ref.shape[0] if ref.ndim else 1
+        pred = pred.reshape(ref.shape)
+
+        if self.is_float:
+            diff = ref.astype(np.float32) - pred.astype(np.float32)
+        else:
+            diff = ref.astype(np.int64) - pred
+            values, counts = np.unique(diff[diff != 0], return_counts=True)
+            for value, count in zip(values.tolist(), counts.tolist()):
+                self._hist[value] = self._hist.get(value, 0) + count
+            if self.scale is not None:
+                ref_f = dequantize_array(ref, self.scale, self.zero_point).ravel()
+                pred_f = dequantize_array(pred, self.scale, self.zero_point).ravel()
+                self.errors_f.update(ref_f - pred_f, pred_f)
+
+        diff = diff.ravel()
+        self.ref.update(ref.ravel())
+        self.pred.update(pred.ravel())
+        self.diff.update(diff)
+        self.errors.update(diff, pred.ravel())
+        if diff.size:
+            self.max_abs_diff = max(self.max_abs_diff, float(np.abs(diff).max()))
+
+    def summary(self):
+        """Return a dict with the metrics"""  # noqa: DAR101,DAR201,DAR401
+        summary = {
+            'name': self.name,
+            'dtype': str(self.dtype),
+            'n_samples': self.n_samples,
+            'size': self.size,
+            'rmse': self.errors.rmse,
+            'l2r': self.errors.l2r,
+            'max_abs_diff': self.max_abs_diff,
+        }
+        if not self.is_float:
+            summary['n_diff'] = self.n_diff
+            summary['hist'] = self.hist
+            if self.scale is not None:
+                summary['rmse_f'] = self.errors_f.rmse
+                summary['l2r_f'] = self.errors_f.l2r
+        return summary
+
+    def report(self, print_fn=None):
+        """Print the metrics"""  # noqa: DAR101,DAR201,DAR401
+        print_fn = print_fn if print_fn is not None else print
+        print_fn('')
+        print_fn('[{}] - {} samples, {}, {} items'.format(self.name, self.n_samples, self.dtype, self.size))
+        print_fn('-' * 80)
+        if not self.is_float:
+            print_fn(' diff     : {}/{}, hist={}'.format(self.n_diff, self.size, self.hist))
+        print_fn(' ref      : {}'.format(self.ref.to_str(self.is_float)))
+        print_fn(' pred     : {}'.format(self.pred.to_str(self.is_float)))
+        print_fn(' diff     : {}'.format(self.diff.to_str(self.is_float)))
+        if self.is_float:
+            print_fn(' metrics  : rmse={:.9f} l2r={:.9f}'.format(self.errors.rmse, self.errors.l2r))
+        else:
+            print_fn(' metrics  : rmse={:.9f} l2r={:.9f} (quant.)'.format(self.errors.rmse, self.errors.l2r))
+            if self.scale is not None:
+                print_fn(' metrics  : rmse={:.9f} l2r={:.9f} (dequant.)'.format(self.errors_f.rmse,
+                                                                              self.errors_f.l2r))
+
+    def plot(self):
+        """Display the histogram of the differences (matplotlib)"""  # noqa: DAR101,DAR201,DAR401
+        if self.is_float or not self._hist:
+            return
+
+        import matplotlib.pyplot as plt
+
+        hist = self.hist
+        plt.style.use('ggplot')
+        plt.bar(list(hist.keys()), list(hist.values()), width=0.8)
+        plt.xlabel('Value')
+        plt.ylabel('Frequency')
+        plt.title('Diff. histogram: {}/{} items'.format(self.n_diff, self.size))
+        plt.show()
+
+
+class AiComparator:
+    """Per-output and per-layer comparison, the metrics are accumulated over batches"""
+
+    def __init__(self):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self.outputs = {}  # key: index of the output
+        self.layers = {}  # key: index of the c-node
+
+    def update_outputs(self, refs, preds, descs=None):
+        """
+        Add a batch of outputs
+
+        Parameters
+        ----------
+        refs
+            list of arrays, reference outputs
+        preds
+            list of arrays, outputs of the c-model
+        descs
+            list of dict, description of the outputs (see AiRunner.get_output_infos())
+        """
+        descs = descs if descs is not None else [{}] * len(refs)
+        for idx, (ref, pred, desc) in enumerate(zip(refs, preds, descs)):
+            if idx not in self.outputs:
+                name = desc.get('name', 'output_{}'.format(idx + 1))
+                if 'type' in desc and is_quantized(desc):
+                    name = '{}, scale={}, zp={}'.format(name, desc['scale'], desc.get('zero_point', 0))
+                self.outputs[idx] = self._create(name, desc)
+            self.outputs[idx].update(ref, pred)
+
+    def update_layer(self, c_idx, ref, pred, desc=None):
+        """
+        Add a batch of values for an intermediate tensor
+
+        Parameters
+        ----------
+        c_idx
+            index of the c-node
+        ref
+            reference values (intermediate tensor of the reference model)
+        pred
+            output of the c-node
+        desc
+            dict, optional description ('name', 'type', 'scale', 'zero_point')
+        """
+        desc = desc if desc is not None else {}
+        if c_idx not in self.layers:
+            self.layers[c_idx] = self._create(desc.get('name', 'c_node_{}'.format(c_idx)), desc)
+        self.layers[c_idx].update(ref, pred)
+
+    @staticmethod
+    def _create(name, desc):
+        """Create a comparator, the values are de-quantized if the tensor is quantized"""
+        # noqa: DAR101,DAR201,DAR401
+        if 'type' in desc and is_quantized(desc):
+            return AiTensorComparator(name, scale=desc['scale'], zero_point=desc.get('zero_point', 0))
+        return AiTensorComparator(name)
+
+    def summary(self):
+        """Return the metrics by output and by layer"""  # noqa: DAR101,DAR201,DAR401
+        return {
+            'outputs': [comp.summary() for comp in self.outputs.values()],
+            'layers': {c_idx: comp.summary() for c_idx, comp in sorted(self.layers.items())},
+        }
+
+    def report(self, print_fn=None, plot=False):
+        """Print the per-output report and the per-layer table"""  # noqa: DAR101,DAR201,DAR401
+        print_fn = print_fn if print_fn is not None else print
+        for comp in self.outputs.values():
+            comp.report(print_fn)
+            if plot:
+                comp.plot()
+        if not self.layers:
+            return
+        print_fn('')
+        print_fn(' {:>5} | {:30s} | {:>8} | {:>10} | {:>12} | {:>12} | {:>12}'.format(
+            'c_idx', 'layer', 'dtype', 'diff', 'max |diff|', 'rmse', 'l2r'))
+        print_fn('-' * 117)
+        for c_idx, comp in sorted(self.layers.items()):
+            n_diff = comp.n_diff if not comp.is_float else '-'
+            errors = comp.errors_f if comp.scale is not None else comp.errors
+            print_fn(' {:5d} | {:30s} | {:>8} | {:>10} | {:12.6f} | {:12.9f} | {:12.9f}'.format(
+                c_idx, comp.name[:30], str(comp.dtype), n_diff, comp.max_abs_diff, errors.rmse, errors.l2r))
+
+
+class AiFeatureCollector(AiRunnerCallback):
+    """Callback keeping the outputs of the c-nodes (PER_LAYER_WITH_DATA mode) of the last invoke"""
+
+    def __init__(self, callback=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        callback
+            Optional AiRunnerCallback object, the events are forwarded
+        """
+        super().__init__()
+        self._callback = callback
+        self._features = {}  # key: c_idx, value: list of arrays (one by sample)
+        self._descs = {}
+
+    def reset(self):
+        """Clear the collected outputs"""  # noqa: DAR101,DAR201,DAR401
+        self._features = {}
+
+    def on_sample_begin(self, idx):
+        """Forward the event"""  # noqa: DAR101,DAR201,DAR401
+        if self._callback:
+            self._callback.on_sample_begin(idx)
+
+    def on_sample_end(self, idx, data, logs=None):
+        """Forward the event"""  # noqa: DAR101,DAR201,DAR401
+        if self._callback:
+            return self._callback.on_sample_end(idx, data, logs=logs)
+        return True
+
+    def on_node_begin(self, idx, data, logs=None):
+        """Forward the event"""  # noqa: DAR101,DAR201,DAR401
+        if self._callback:
+            self._callback.on_node_begin(idx, data, logs=logs)
+
+    def on_node_end(self, idx, data, logs=None):
+        """Keep the first output of the c-node"""  # noqa: DAR101,DAR201,DAR401
+        if data and data[0] is not None and data[0].size:
+            logs = logs or {}
+            if idx not in self._descs:
+                scales = logs.get('scale', [None])
+                zero_points = logs.get('zero_point', [0])
+                self._descs[idx] = {
+                    'name': 'c_node_{} (m_id={})'.format(idx, logs.get('m_id', None)),
+                    'm_id': logs.get('m_id', None),
+                    'type': data[0].dtype.type,
+                    'scale': scales[0] if scales else None,
+                    'zero_point': zero_points[0] if zero_points else 0,
+                }
+            self._features.setdefault(idx, []).append(data[0])
+        if self._callback:
+            self._callback.on_node_end(idx, data, logs=logs)
+
+    def features(self):
+        """
+        Return the collected outputs
+
+        Returns
+        -------
+        dict
+            key: c_idx, value: (array, desc), first dimension of the array is the sample
+        """
+        features = {}
+        for c_idx, values in self._features.items():
+            values = [value.reshape((-1,) + value.shape[1:]) if value.ndim > 1 else value[None]
+                      for value in values]
+            features[c_idx] = (np.concatenate(values), self._descs[c_idx])
+        return features
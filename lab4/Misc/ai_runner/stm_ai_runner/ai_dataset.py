@@ -0,0 +1,492 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Validation dataset - binary container with memory-mapped arrays
+
+The inputs are stored with the format of the model input (quantized values if
+the input is quantized, the scale/zero-point are stored in the header), the
+labels are stored in a second array. The arrays are memory-mapped, only the
+requested batches are read.
+
+    magic (8 bytes) | uint32 header size | JSON header (padded) | inputs | labels
+
+The JSON header describes the arrays (dtype, shape of a sample, offset), the
+number of samples and the quantization params of the inputs. The data of the
+arrays are aligned on 64 bytes.
+
+One-time conversion of the existing formats:
+
+    CSV     one sample by row, flat input values followed by the label
+            (lab4 notebook, ui_python_ai_runner.py)
+    NPZ     'm_inputs_1' and 'c_outputs_1' arrays (reference outputs are
+            used as labels)
+
+The converted file is written next to the source file, in a cache directory
+if requested, else in a temporary directory if the directory of the source
+file is not writable.
+
+    dataset = convert_csv('val.csv', 'val.aidata', desc=runner.get_input_infos()[0])
+    for inputs, labels in dataset.batches(64):
+        outputs, _ = runner.invoke(inputs)
+"""
+
+import os
+import json
+import zlib
+import struct
+import tempfile
+
+import numpy as np
+
+from .ai_runner import InvalidParamError
+from .ai_quantization import quantize, dequantize, is_quantized
+
+
+_DATASET_MAGIC = b'STMAIDS\x00'
+_DATASET_VERSION = 1
+_DATASET_ALIGN = 64
+_DATASET_EXT = '.aidata'
+
+_CSV_CHUNK_SIZE = 1024  # number of rows parsed by chunk
+_CACHE_DIR = 'stm_ai_dataset'  # sub-directory of the temporary directory (fallback)
+
+
+def _align(value):
+    """Return the value aligned on _DATASET_ALIGN"""  # noqa: DAR101,DAR201,DAR401
+    return -(-value // _DATASET_ALIGN) * _DATASET_ALIGN
+
+
+def _to_quant(desc):
+    """Return the quantization params (JSON compatible) of an IO descriptor"""  # noqa: DAR101,DAR201,DAR401
+    if desc is None or not is_quantized(desc):
+        return None
+    return {
+        'type': np.dtype(desc['type']).str,
+        'scale': np.asarray(desc['scale'], dtype=np.float32).tolist(),
+        'zero_point': np.asarray(desc.get('zero_point', 0)).tolist(),
+    }
+
+
+def _array_desc(dtype, shape, offset):
+    """Return the description of an array"""  # noqa: DAR101,DAR201,DAR401
+    return {'dtype': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'shape': [int(dim) for dim in shape],
+            'offset': offset}
+
+
+def create_dataset(path, n_samples, input_shape, input_dtype, label_shape=(), label_dtype=np.int32,
+                   quant=None, meta=None):
+    """
+    Create an empty dataset file, the arrays are filled through AiDataset.inputs/labels
+
+    Parameters
+    ----------
+    path
+        file name
+    n_samples
+        number of samples
+    input_shape
+        shape of an input sample
+    input_dtype
+        type of the stored input values
+    label_shape
+        shape of a label
+    label_dtype
+        type of the labels
+    quant
+        quantization params of the inputs (dict with the 'type', 'scale' and
+        'zero_point' keys) or None
+    meta
+        user information (JSON compatible dict)
+
+    Returns
+    -------
+    AiDataset
+        dataset opened in 'r+' mode
+    """
+    in_size = int(np.prod(input_shape)) * np.dtype(input_dtype).itemsize * n_samples
+    label_size = int(np.prod(label_shape)) * np.dtype(label_dtype).itemsize * n_samples
+    header = {
+        'version': _DATASET_VERSION,
+        'n_samples': int(n_samples),
+        'inputs': _array_desc(input_dtype, input_shape, 0),
+        'labels': _array_desc(label_dtype, label_shape, 0),
+        'quant': quant,
+        'meta': meta if meta else {},
+    }
+    # the offsets are stored in the header, the header is sized with fixed-width offsets
+    header_size = len(json.dumps(header)) + 2 * 20
+    data_pos = _align(len(_DATASET_MAGIC) + 4 + header_size)
+    header['inputs']['offset'] = data_pos
+    header['labels']['offset'] = _align(data_pos + in_size)
+    raw = json.dumps(header).encode('utf-8')
+    raw += b' ' * (data_pos - len(_DATASET_MAGIC) - 4 - len(raw))
+    with open(path, 'wb') as file:
+        file.write(_DATASET_MAGIC + struct.pack('<I', len(raw)) + raw)
+        file.truncate(header['labels']['offset'] + label_size)
+    return AiDataset(path, mode='r+')
+
+
+class AiDataset:
+    """Read access to a dataset file (memory-mapped arrays)"""
+
+    def __init__(self, path, mode='r'):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        path
+            file name
+        mode
+            memory-map mode ('r': read-only, 'r+': the arrays can be updated)
+
+        Raises
+        ------
+        InvalidParamError
+            File is not a valid dataset
+        """
+        with open(path, 'rb') as file:
+            head = file.read(len(_DATASET_MAGIC) + 4)
+            if len(head) != len(_DATASET_MAGIC) + 4 or head[:len(_DATASET_MAGIC)] != _DATASET_MAGIC:
+                raise InvalidParamError('Invalid dataset file: {}'.format(path))
+            self._header = json.loads(file.read(struct.unpack('<I', head[len(_DATASET_MAGIC):])[0]))
+        if self._header.get('version', 0) > _DATASET_VERSION:
+            raise InvalidParamError('Unsupported dataset version: {}'.format(self._header.get('version')))
+        self._path = path
+        self._inputs = self._map('inputs', mode)
+        self._labels = self._map('labels', mode)
+
+    def _map(self, key, mode):
+        """Memory-map an array"""  # noqa: DAR101,DAR201,DAR401
+        desc = self._header[key]
+        shape = (self._header['n_samples'],) + tuple(desc['shape'])
+        if not self._header['n_samples']:
+            return np.empty(shape, dtype=np.lib.format.descr_to_dtype(desc['dtype']))
+        return np.memmap(self._path, dtype=np.lib.format.descr_to_dtype(desc['dtype']), mode=mode,
+                         offset=desc['offset'], shape=shape)
+
+    def __len__(self):
+        return self._header['n_samples']
+
+    def __repr__(self):
+        return 'AiDataset({}, n_samples={}, inputs={}{}, labels={}{})'.format(
+            self._path, len(self), self._inputs.shape[1:], self._inputs.dtype,
+            self._labels.shape[1:], self._labels.dtype)
+
+    @property
+    def inputs(self):
+        """Return the inputs (memory-mapped array, first dimension is the sample)"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._inputs
+
+    @property
+    def labels(self):
+        """Return the labels (memory-mapped array, first dimension is the sample)"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._labels
+
+    @property
+    def quant(self):
+        """Return the quantization params of the inputs (None if float values are stored)"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._header['quant']
+
+    @property
+    def meta(self):
+        """Return the user information"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._header['meta']
+
+    def is_compatible(self, desc):
+        """Indicate if the inputs can be passed as-is to a model input (IO descriptor)"""
+        # noqa: DAR101,DAR201,DAR401
+        if self._inputs.dtype != np.dtype(desc['type']) or self.quant != _to_quant(desc):
+            return False
+        return int(np.prod(self._inputs.shape[1:])) == int(np.prod(desc['shape'][1:]))
+
+    def to_float(self, inputs):
+        """Return the input values as float32 values"""  # noqa: DAR101,DAR201,DAR401
+        if self.quant is None:
+            return np.asarray(inputs, dtype=np.float32)
+        return dequantize(inputs, self.quant)
+
+    def batches(self, batch_size=64, start=0, end=None, float_values=False):
+        """
+        Iterate over the samples, only the current batch is read
+
+        Parameters
+        ----------
+        batch_size
+            number of samples by batch
+        start
+            index of the first sample
+        end
+            index of the last sample (excluded), None for all samples
+        float_values
+            if True, the inputs are de-quantized (float32 values)
+
+        Yields
+        ------
+        tuple
+            inputs and labels of the batch (numpy arrays)
+        """
+        end = len(self) if end is None else min(end, len(self))
+        for pos in range(start, end, max(1, batch_size)):
+            stop = min(pos + batch_size, end)
+            inputs = np.array(self._inputs[pos:stop])
+            yield (self.to_float(inputs) if float_values else inputs), np.array(self._labels[pos:stop])
+
+    def flush(self):
+        """Write the updated arrays"""  # noqa: DAR101,DAR201,DAR401
+        for array in (self._inputs, self._labels):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def close(self):
+        """Release the memory-maps"""  # noqa: DAR101,DAR201,DAR401
+        self.flush()
+        self._inputs = None
+        self._labels = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _to_input_values(values, desc):
+    """Convert float input values to the stored format"""  # noqa: DAR101,DAR201,DAR401
+    if desc is None:
+        return np.asarray(values, dtype=np.float32)
+    return quantize(values, desc)
+
+
+def _input_format(desc, n_values):
+    """Return the shape/dtype of the stored inputs"""  # noqa: DAR101,DAR201,DAR401
+    if desc is None:
+        return (n_values,), np.float32
+    shape = tuple(int(dim) for dim in desc['shape'][1:])
+    if int(np.prod(shape)) != n_values:
+        raise InvalidParamError('Inconsistent number of input values - {} instead {}'.format(
+            n_values, int(np.prod(shape))))
+    return shape, np.dtype(desc['type'])
+
+
+def _count_rows(path):
+    """Return the number of rows (not empty) of a text file"""  # noqa: DAR101,DAR201,DAR401
+    n_rows = 0
+    with open(path, 'rb') as file:
+        for line in file:
+            n_rows += int(bool(line.strip()))
+    return n_rows
+
+
+def _csv_chunks(path, chunk_size):
+    """Yield the rows of a CSV file (numeric values) by chunk, 2-D float64 arrays"""
+    # noqa: DAR101,DAR201,DAR401
+    with open(path, 'r') as file:
+        lines = []
+        for line in file:
+            line = line.strip()
+            if line:
+                lines.append(line)
+            if len(lines) == chunk_size:
+                yield _parse_rows(lines)
+                lines = []
+        if lines:
+            yield _parse_rows(lines)
+
+
+def _parse_rows(lines):
+    """Parse CSV rows with numeric values"""  # noqa: DAR101,DAR201,DAR401
+    values = np.fromstring(','.join(lines), dtype=np.float64, sep=',')
+    if values.size % len(lines):
+        raise InvalidParamError('Invalid CSV file - rows have different sizes')
+    return values.reshape(len(lines), -1)
+
+
+def _to_labels(values, dtype):
+    """Check that the labels can be stored with an integer type (no truncation)"""
+    # noqa: DAR101,DAR201,DAR401
+    if np.dtype(dtype).kind in 'iu':
+        info = np.iinfo(dtype)
+        if not np.all(values == np.round(values)) or values.min() < info.min or values.max() > info.max:
+            raise InvalidParamError('Invalid CSV file - labels are not {} values '
+                                    '(label_dtype=np.float32 to keep them)'.format(np.dtype(dtype)))
+    return values
+
+
+def convert_csv(path, out_path=None, desc=None, label_dtype=np.int32, chunk_size=_CSV_CHUNK_SIZE):
+    """
+    Convert a CSV file (flat input values followed by the label) to a dataset file
+
+    Parameters
+    ----------
+    path
+        CSV file
+    out_path
+        dataset file, default: path with the .aidata extension
+    desc
+        IO descriptor of the model input (see AiRunner.get_input_infos()), the
+        inputs are stored with the format of the input (quantized values if the
+        input is quantized). If None, the float values are stored (flat shape)
+    label_dtype
+        type of the stored labels, for an integer type the labels should be
+        integral values
+    chunk_size
+        number of rows converted by chunk
+
+    Returns
+    -------
+    AiDataset
+        converted dataset (read-only)
+
+    Raises
+    ------
+    InvalidParamError
+        Invalid CSV file (or non integral labels) or inconsistent input descriptor
+    """
+    out_path = out_path if out_path else os.path.splitext(path)[0] + _DATASET_EXT
+    n_samples = _count_rows(path)
+    dataset, pos = None, 0
+    for rows in _csv_chunks(path, chunk_size):
+        if dataset is None:
+            shape, dtype = _input_format(desc, rows.shape[1] - 1)
+            dataset = create_dataset(out_path, n_samples, shape, dtype, (), label_dtype, quant=_to_quant(desc),
+                                     meta={'source': os.path.basename(path)})
+        if rows.shape[1] - 1 != int(np.prod(dataset.inputs.shape[1:])):
+            raise InvalidParamError('Invalid CSV file - rows have different sizes')
+        end = pos + rows.shape[0]
+        dataset.inputs[pos:end] = _to_input_values(rows[:, :-1], desc).reshape((-1,) + dataset.inputs.shape[1:])
+        dataset.labels[pos:end] = _to_labels(rows[:, -1], label_dtype)
+        pos = end
+    if dataset is None:
+        raise InvalidParamError('Empty CSV file: {}'.format(path))
+    dataset.close()
+    return AiDataset(out_path)
+
+
+def convert_npz(path, out_path=None, desc=None):
+    """
+    Convert a NPZ file ('m_inputs_1' and 'c_outputs_1' arrays) to a dataset file
+
+    Parameters
+    ----------
+    path
+        NPZ file
+    out_path
+        dataset file, default: path with the .aidata extension
+    desc
+        IO descriptor of the model input (see convert_csv()), if None the
+        inputs are stored as-is
+
+    Returns
+    -------
+    AiDataset
+        converted dataset (read-only), the reference outputs are the labels
+
+    Raises
+    ------
+    InvalidParamError
+        Invalid NPZ file or inconsistent input descriptor
+    """
+    out_path = out_path if out_path else os.path.splitext(path)[0] + _DATASET_EXT
+    with np.load(path) as data:
+        if 'm_inputs_1' not in data or 'c_outputs_1' not in data:
+            raise InvalidParamError('Invalid NPZ file (m_inputs_1/c_outputs_1 are expected): {}'.format(path))
+        inputs, labels = data['m_inputs_1'], data['c_outputs_1']
+    if desc is not None:
+        shape, dtype = _input_format(desc, int(np.prod(inputs.shape[1:])))
+        if inputs.dtype != dtype:
+            inputs = _to_input_values(inputs, desc)
+        inputs = inputs.reshape((-1,) + shape)
+    dataset = create_dataset(out_path, inputs.shape[0], inputs.shape[1:], inputs.dtype, labels.shape[1:],
+                             labels.dtype, quant=_to_quant(desc), meta={'source': os.path.basename(path)})
+    dataset.inputs[...] = inputs
+    dataset.labels[...] = labels
+    dataset.close()
+    return AiDataset(out_path)
+
+
+def _converted_paths(path, cache_dir=None):
+    """Return the candidate names of the converted file"""  # noqa: DAR101,DAR201,DAR401
+    # the name in a shared directory includes a key of the source path
+    name = '{}_{:08x}{}'.format(os.path.splitext(os.path.basename(path))[0],
+                                zlib.crc32(os.path.abspath(path).encode('utf-8')), _DATASET_EXT)
+    if cache_dir:
+        return [os.path.join(cache_dir, name)]
+    return [os.path.splitext(path)[0] + _DATASET_EXT, os.path.join(tempfile.gettempdir(), _CACHE_DIR, name)]
+
+
+def _open_converted(path, out_path, desc):
+    """Return the converted dataset if it is up-to-date and compatible, else None"""
+    # noqa: DAR101,DAR201,DAR401
+    if not os.path.isfile(out_path) or os.path.getmtime(out_path) < os.path.getmtime(path):
+        return None
+    try:
+        dataset = AiDataset(out_path)
+        if desc is None or dataset.is_compatible(desc):
+            return dataset
+        dataset.close()
+    except (InvalidParamError, ValueError, OSError):
+        pass
+    return None
+
+
+def open_dataset(path, desc=None, cache_dir=None):
+    """
+    Open a dataset, CSV and NPZ files are converted once (.aidata file)
+
+    The converted file is re-used if it is more recent than the source file and
+    if it is compatible with the input descriptor.
+
+    Parameters
+    ----------
+    path
+        dataset (.aidata), CSV or NPZ file
+    desc
+        IO descriptor of the model input (see convert_csv())
+    cache_dir
+        directory of the converted file (created if necessary). If None, the
+        file is written next to the source file, or in a temporary directory
+        if the directory of the source file is not writable
+
+    Returns
+    -------
+    AiDataset
+        dataset (read-only)
+
+    Raises
+    ------
+    OSError
+        The converted file can not be written
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in ('.csv', '.npz'):
+        return AiDataset(path)
+    out_paths = _converted_paths(path, cache_dir)
+    for out_path in out_paths:
+        dataset = _open_converted(path, out_path, desc)
+        if dataset is not None:
+            return dataset
+    error = None
+    for out_path in out_paths:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+            if ext == '.csv':
+                return convert_csv(path, out_path, desc=desc)
+            return convert_npz(path, out_path, desc=desc)
+        except OSError as exc:
+            error = exc
+            try:
+                if os.path.isfile(out_path):  # partially written
+                    os.remove(out_path)
+            except OSError:
+                pass
+    raise error
@@ -0,0 +1,406 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Pool of processes running the shared library generated for the X86 validation
+
+The c-model holds one network instance (one activations buffer and a global
+observer), an AiRunner on the 'file' domain uses only one core. Each worker
+process loads its own copy of the shared library (temporary copy, reload=True)
+and the samples are sharded across the workers. The inputs and the outputs are
+exchanged through shared memory blocks (multiprocessing.shared_memory) owned by
+the pool, only the shard boundaries are sent to the workers.
+
+Workers are started with the 'spawn' method, the main module of the
+application should be protected with a "if __name__ == '__main__':" statement.
+"""
+
+import os
+import time as t
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from .ai_runner import AiRunner, get_logger
+from .ai_runner import HwIOError, InvalidParamError, AiRunnerError
+from .ai_profiler import AiProfiler, merge_profiles
+from .ai_quantization import quantize_inputs, dequantize_outputs
+
+
+def _attach(specs, blocks):
+    """Return the ndarray objects mapped on the shared memory blocks"""  # noqa: DAR101,DAR201,DAR401
+    arrays = []
+    for name, shape, dtype in specs:
+        if name not in blocks:
+            blocks[name] = shared_memory.SharedMemory(name=name)
+        arrays.append(np.ndarray(shape, dtype=dtype, buffer=blocks[name].buf))
+    return arrays
+
+
+def _invoke_shard(runner, blocks, task):
+    """Invoke the c-model with a shard, outputs are written in the shared blocks"""  # noqa: DAR101,DAR201,DAR401
+    in_specs, out_specs, start, end, options = task
+    for name in [name for name in blocks if name not in {spec[0] for spec in in_specs + out_specs}]:
+        blocks.pop(name).close()
+    inputs = [in_[start:end] for in_ in _attach(in_specs, blocks)]
+    outputs = [out_[start:end] for out_ in _attach(out_specs, blocks)]
+    start_time = t.perf_counter()
+    _, profiler = runner.invoke(inputs, outputs=outputs, disable_pb=True, **options)
+    busy = (t.perf_counter() - start_time) * 1000.0
+    profiler.pop('info', None)
+    return busy, profiler
+
+
+def _dll_worker(desc, kwargs, conn):
+    """Worker process entry point"""  # noqa: DAR101,DAR201,DAR401
+    runner = AiRunner()
+    if not runner.connect(desc, reload=True, **kwargs):
+        conn.send(('error', runner.get_error()))
+        return
+    conn.send(('ready', runner.get_info()))
+
+    blocks = dict()  # attached shared memory blocks
+    try:
+        while True:
+            task = conn.recv()
+            if task is None:
+                break
+            try:
+                busy, profiler = _invoke_shard(runner, blocks, task)
+            except Exception as exc_:  # pylint: disable=broad-except
+                conn.send(('error', '{}: {}'.format(type(exc_).__name__, str(exc_))))
+                continue
+            conn.send(('done', (task[2], task[3], profiler, busy)))
+    finally:
+        for block in blocks.values():
+            block.close()
+        runner.disconnect()
+
+
+class _SharedArena:
+    """Shared memory blocks for the IO tensors, re-allocated only if too small"""
+
+    def __init__(self):
+        self._blocks = []
+
+    def map(self, idx, shape, dtype):
+        """Return the ndarray mapped on the block idx and its spec (name, shape, dtype)"""
+        # noqa: DAR101,DAR201,DAR401
+        size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        if idx >= len(self._blocks):
+            self._blocks.append(None)
+        if self._blocks[idx] is None or self._blocks[idx].size < size:
+            self._release(idx)
+            self._blocks[idx] = shared_memory.SharedMemory(create=True, size=size)
+        block = self._blocks[idx]
+        spec = (block.name, tuple(shape), np.dtype(dtype).str)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf), spec
+
+    def _release(self, idx):
+        """Release a block"""  # noqa: DAR101,DAR201,DAR401
+        if self._blocks[idx] is not None:
+            self._blocks[idx].close()
+            self._blocks[idx].unlink()
+            self._blocks[idx] = None
+
+    def release(self):
+        """Release all the blocks"""  # noqa: DAR101,DAR201,DAR401
+        for idx in range(len(self._blocks)):
+            self._release(idx)
+        self._blocks = []
+
+
+class AiDllPool:
+    """Pool of processes running the X86 shared library (one c-model instance by process)
+
+    !!! example
+        ```python
+           from stm_ai_runner import AiDllPool
+           pool = AiDllPool()
+           pool.connect('./workspace/lib/libai_network.so', n_workers=8)
+           outputs, profile = pool.invoke(inputs)
+           pool.disconnect()
+        ```
+    """
+
+    def __init__(self, logger=None, debug=False, verbosity=0):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        logger
+            Logger object which must be used
+        debug
+            Logger is created with DEBUG level if True
+        verbosity
+            Logger is created with INFO level if > 0
+        """
+        if logger is None:
+            logger = get_logger(self.__class__.__name__, debug, verbosity)
+        self._logger = logger
+        self._workers = []  # list of (process, connection)
+        self._desc = None
+        self._info = dict()
+        self._in_arena = _SharedArena()
+        self._out_arena = _SharedArena()
+        self._last_report = None
+
+    def get_logger(self):
+        """Return the logger object"""  # noqa: DAR101,DAR201,DAR401
+        return self._logger
+
+    def __len__(self):
+        return len(self._workers)
+
+    def __repr__(self):
+        return self.short_desc()
+
+    def __str__(self):
+        return self.short_desc()
+
+    def __del__(self):
+        if getattr(self, '_workers', None):
+            self.disconnect()
+
+    def short_desc(self):
+        """Return human readable description"""  # noqa: DAR101,DAR201,DAR401
+        return 'AiDllPool ({} worker(s), {})'.format(len(self._workers), self._desc)
+
+    @property
+    def is_connected(self):
+        """Indicate if at least one worker is running"""
+        # noqa: DAR101,DAR201,DAR401
+        return bool(self._workers)
+
+    @property
+    def names(self):
+        """Return the c-names of the available models"""
+        # noqa: DAR101,DAR201,DAR401
+        return [self._info['name']] if self._info else []
+
+    def connect(self, desc, n_workers=None, **kwargs):
+        """
+        Start the workers, each worker loads its own copy of the shared library
+
+        Parameters
+        ----------
+        desc
+            path of the shared library (see AiRunner.connect())
+        n_workers
+            number of workers, default: number of CPUs
+        kwargs
+            parameters for the AiRunner.connect() function (weights, dll_name..)
+
+        Returns
+        -------
+        bool
+            True if the workers are running
+
+        Raises
+        ------
+        HwIOError
+            the shared library can not be loaded
+        """
+        self.disconnect()
+        n_workers = n_workers if n_workers else os.cpu_count()
+
+        ctx = mp.get_context('spawn')
+        for _ in range(max(1, n_workers)):
+            conn, child_conn = ctx.Pipe()
+            proc = ctx.Process(target=_dll_worker, args=(desc, kwargs, child_conn), daemon=True)
+            proc.start()
+            child_conn.close()
+            self._workers.append((proc, conn))
+
+        errors = []
+        for proc, conn in list(self._workers):
+            try:
+                status, res = conn.recv()
+            except EOFError:
+                status, res = 'error', 'worker {} has been stopped'.format(proc.pid)
+            if status == 'ready':
+                self._info = res
+            else:
+                errors.append(res)
+
+        if errors:
+            self.disconnect()
+            raise HwIOError('Unable to start the workers - {}'.format(errors[0]))
+
+        self._desc = desc
+        self._logger.debug('pool: %d worker(s) are running (%s)', len(self._workers), desc)
+        return self.is_connected
+
+    def disconnect(self):
+        """Stop the workers and release the shared memory blocks"""  # noqa: DAR101,DAR201,DAR401
+        for proc, conn in self._workers:
+            try:
+                conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for proc, conn in self._workers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+            conn.close()
+        self._workers = []
+        self._info = dict()
+        self._in_arena.release()
+        self._out_arena.release()
+        return True
+
+    def get_info(self, name=None):  # pylint: disable=unused-argument
+        """Get model details"""  # noqa: DAR101,DAR201,DAR401
+        return self._info
+
+    def get_input_infos(self, name=None):
+        """Get model input details"""  # noqa: DAR101,DAR201,DAR401
+        return self.get_info(name).get('inputs', list())
+
+    def get_output_infos(self, name=None):
+        """Get model output details"""  # noqa: DAR101,DAR201,DAR401
+        return self.get_info(name).get('outputs', list())
+
+    def generate_rnd_inputs(self, name=None, batch_size=4, rng=np.random.RandomState(42)):
+        """Generate input data with random values"""  # noqa: DAR101,DAR201,DAR401
+        from .ai_runner import generate_rnd
+
+        info_ = self.get_input_infos(name)
+        return generate_rnd([t_['type'] for t_ in info_], [s_['shape'] for s_ in info_],
+                            batch_size, rng=rng)
+
+    def invoke(self, inputs, **kwargs):
+        """
+        Generate output predictions, the samples are sharded across the workers
+
+        Parameters
+        ----------
+        inputs
+            Input samples. A Numpy array, or a list of arrays in case the model
+            has multiple inputs.
+        kwargs
+            mode, float_io (see AiRunner.invoke()) and shard_size (number of
+            samples by shard, default: batch_size / (4 x number of workers))
+
+        Returns
+        -------
+        tuple
+            list of numpy arrays (one by outputs) and the merged profiler
+
+        Raises
+        ------
+        InvalidParamError
+            callback is not supported or no worker is running
+        AiRunnerError
+            a worker has failed
+        """
+        if not self._workers:
+            raise InvalidParamError('No worker is running')
+        if kwargs.pop('callback', None) is not None:
+            raise InvalidParamError('callback is not supported by the pool')
+
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+
+        # float inputs are quantized before to be shared, the workers write
+        # the quantized values in the output blocks
+        inputs, float_io = quantize_inputs(inputs, self.get_input_infos(), kwargs.pop('float_io', None))
+
+        options = {'mode': kwargs.pop('mode', AiRunner.Mode.IO_ONLY), 'float_io': False}
+        batch_size = inputs[0].shape[0]
+        n_workers = len(self._workers)
+        shard_size = kwargs.pop('shard_size', None)
+        if not shard_size:
+            shard_size = max(1, -(-batch_size // (4 * n_workers)))
+
+        start_time = t.perf_counter()
+
+        # inputs are copied one time in the shared blocks
+        in_specs, out_specs, s_outputs = [], [], []
+        for idx, in_ in enumerate(inputs):
+            arr, spec = self._in_arena.map(idx, in_.shape, in_.dtype)
+            arr[...] = in_
+            in_specs.append(spec)
+        for idx, o_ in enumerate(self.get_output_infos()):
+            arr, spec = self._out_arena.map(idx, (batch_size,) + tuple(o_['shape'][1:]), o_['type'])
+            s_outputs.append(arr)
+            out_specs.append(spec)
+
+        shards = [(start, min(start + shard_size, batch_size)) for start in range(0, batch_size, shard_size)]
+        shards.reverse()
+        conns = {conn: idx for idx, (_, conn) in enumerate(self._workers)}
+        usage = [{'desc': 'worker:{}'.format(proc.pid), 'samples': 0, 'busy': 0.0}
+                 for proc, _ in self._workers]
+        profiles = dict()
+
+        def _submit(conn):
+            if not shards:
+                return False
+            start, end = shards.pop()
+            conn.send((in_specs, out_specs, start, end, options))
+            return True
+
+        pending = [conn for conn in conns if _submit(conn)]
+        error = None
+        while pending:
+            for conn in wait(pending):
+                try:
+                    status, res = conn.recv()
+                except EOFError:
+                    status, res = 'error', 'worker has been stopped'
+                if status != 'done':
+                    error = error if error else res
+                    pending.remove(conn)
+                    continue
+                start, end, s_prof, busy = res
+                profiles[start] = s_prof
+                usage[conns[conn]]['samples'] += end - start
+                usage[conns[conn]]['busy'] += busy
+                if error or not _submit(conn):
+                    pending.remove(conn)
+
+        if error:
+            raise AiRunnerError('pool: invoke has failed - {}'.format(error))
+
+        outputs = [np.copy(out_) for out_ in s_outputs]
+        if float_io:
+            outputs = dequantize_outputs(outputs, self.get_output_infos())
+        duration = (t.perf_counter() - start_time) * 1000.0
+
+        profiler = AiProfiler()
+        profiler['info'] = self.get_info()
+        profiler['debug']['host_duration'] = duration
+        merge_profiles([profiles[key] for key in sorted(profiles)], profiler)
+
+        for item in usage:
+            item['utilisation'] = item['busy'] * 100.0 / duration if duration else 0.0
+        profiler['pool'] = {
+            'samples_per_s': batch_size * 1000.0 / duration if duration else 0.0,
+            'shard_size': shard_size,
+            'devices': usage,
+        }
+        self._last_report = profiler['pool']
+
+        return outputs, profiler
+
+    def summary(self, print_fn=None):
+        """Prints a summary of the pool and of the last invoke"""  # noqa: DAR101,DAR201,DAR401
+
+        print_fn = print if print_fn is None else print_fn
+
+        print_fn('Summary "{}" - {} worker(s)'.format(self.short_desc(), len(self._workers)))
+        print_fn('-' * 80)
+        if self._last_report:
+            print_fn('{:20s} : {:.1f}'.format('samples/s', self._last_report['samples_per_s']))
+            for dev_ in self._last_report['devices']:
+                print_fn('{:20s} : {} samples, {:.1f}% busy'.format(dev_['desc'], dev_['samples'],
+                                                                    dev_['utilisation']))
+        print_fn('-' * 80)
+        print_fn('')
@@ -0,0 +1,247 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Classification metrics (confusion matrix, precision/recall/F1, top-k accuracy)
+
+The metrics are computed over integer label arrays (class indexes). The
+confusion matrix is built with a single np.bincount() call, rows are the
+true classes and columns the predicted classes. The per-class metrics are
+derived from the confusion matrix, so they can be accumulated over batches
+(AiConfusionMatrix) without keeping the predictions.
+"""
+
+import numpy as np
+
+from .ai_runner import InvalidParamError
+
+
+def class_indexes(values, classes):
+    """
+    Return the position of each value in the classes array
+
+    Parameters
+    ----------
+    values
+        label values (numbers or strings)
+    classes
+        1-D array-like with the class values (numbers or strings)
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 indexes, len(classes) for the unknown values
+    """
+    values = np.asarray(values)
+    classes = np.asarray(classes)
+    if not classes.size:
+        return np.zeros(values.shape, dtype=np.int64)
+    order = np.argsort(classes, kind='stable')
+    pos = np.minimum(np.searchsorted(classes[order], values), classes.size - 1)
+    found = classes[order][pos] == values
+    return np.where(found, order[pos], classes.size).astype(np.int64)
+
+
+def _to_indexes(values, name):
+    """Return a flat int64 array, check the values"""  # noqa: DAR101,DAR201,DAR401
+    values = np.asarray(values)
+    if values.size and not np.issubdtype(values.dtype, np.integer):
+        raise InvalidParamError('{} - integer class indexes are expected ({})'.format(name, values.dtype))
+    values = values.ravel().astype(np.int64, copy=False)
+    if values.size and values.min() < 0:
+        raise InvalidParamError('{} - class indexes should be positive'.format(name))
+    return values
+
+
+def confusion_matrix(labels, predictions, n_classes=None):
+    """
+    Compute the confusion matrix
+
+    Parameters
+    ----------
+    labels
+        true class indexes (int array-like)
+    predictions
+        predicted class indexes (int array-like, same size)
+    n_classes
+        number of classes (default: max index + 1)
+
+    Returns
+    -------
+    numpy.ndarray
+        (n_classes, n_classes) int64 array, matrix[true, predicted]
+
+    Raises
+    ------
+    InvalidParamError
+        invalid or inconsistent label arrays
+    """
+    labels = _to_indexes(labels, 'labels')
+    predictions = _to_indexes(predictions, 'predictions')
+    if labels.size != predictions.size:
+        msg = 'inconsistent number of samples - {} labels, {} predictions'.format(labels.size, predictions.size)
+        raise InvalidParamError(msg)
+    max_index = int(max(labels.max(initial=-1), predictions.max(initial=-1)))
+    if n_classes is None:
+        n_classes = max_index + 1
+    if max_index >= n_classes:
+        raise InvalidParamError('class index {} is out of range (n_classes={})'.format(max_index, n_classes))
+    counts = np.bincount(labels * n_classes + predictions, minlength=n_classes * n_classes)
+    return counts.reshape(n_classes, n_classes)
+
+
+def _safe_divide(num, den):
+    """Element-wise division, 0.0 when the denominator is 0"""  # noqa: DAR101,DAR201,DAR401
+    num = np.asarray(num, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros_like(num), where=np.asarray(den) != 0)
+
+
+def classification_metrics(matrix):
+    """
+    Compute the per-class metrics from a confusion matrix
+
+    Parameters
+    ----------
+    matrix
+        confusion matrix (see confusion_matrix())
+
+    Returns
+    -------
+    dict
+        'precision', 'recall', 'f1', 'support' (per-class arrays),
+        'predicted' (number of predictions by class) and 'accuracy'
+    """
+    matrix = np.asarray(matrix)
+    true_pos = np.diag(matrix)
+    predicted = matrix.sum(axis=0)
+    support = matrix.sum(axis=1)
+    precision = _safe_divide(true_pos, predicted)
+    recall = _safe_divide(true_pos, support)
+    f1_score = _safe_divide(2 * precision * recall, precision + recall)
+    return {
+        'precision': precision,
+        'recall': recall,
+        'f1': f1_score,
+        'support': support,
+        'predicted': predicted,
+        'accuracy': float(_safe_divide(true_pos.sum(), matrix.sum())),
+    }
+
+
+def top_k_accuracy(labels, scores, k=1):
+    """
+    Compute the top-k accuracy
+
+    Parameters
+    ----------
+    labels
+        true class indexes (int array-like, n_samples)
+    scores
+        scores/probabilities by class, (n_samples, ..., n_classes)
+    k
+        number of best scores which are considered
+
+    Returns
+    -------
+    float
+        ratio of samples for which the true class is in the k best scores
+
+    Raises
+    ------
+    InvalidParamError
+        inconsistent arrays
+    """
+    labels = _to_indexes(labels, 'labels')
+    scores = np.asarray(scores)
+    if not labels.size:
+        return 0.0
+    if scores.size % labels.size:
+        raise InvalidParamError('inconsistent number of samples - {} labels'.format(labels.size))
+    scores = scores.reshape(labels.size, -1)
+    k = max(1, min(k, scores.shape[1]))
+    if k == 1:
+        return float(np.mean(np.argmax(scores, axis=1) == labels))
+    best = np.argpartition(scores, -k, axis=1)[:, -k:]
+    return float(np.mean(np.any(best == labels[:, None], axis=1)))
+
+
+def classification_report(matrix, target_names=None, digits=2):
+    """
+    Return a text report with the per-class metrics (sklearn-like layout)
+
+    Parameters
+    ----------
+    matrix
+        confusion matrix (see confusion_matrix())
+    target_names
+        optional list with the names of the classes
+    digits
+        number of digits for the metrics
+
+    Returns
+    -------
+    str
+        report
+    """
+    metrics = classification_metrics(matrix)
+    support = metrics['support']
+    n_classes = support.size
+    names = list(target_names) if target_names is not None else [str(idx) for idx in range(n_classes)]
+    width = max([len(name) for name in names] + [len('weighted avg')])
+
+    head = '{:>{w}s} {:>9s} {:>9s} {:>9s} {:>9s}'.format('', 'precision', 'recall', 'f1-score', 'support', w=width)
+    row = '{:>{w}s} {:>9.{d}f} {:>9.{d}f} {:>9.{d}f} {:>9d}'
+    lines = [head, '']
+    for idx in range(n_classes):
+        lines.append(row.format(names[idx], metrics['precision'][idx], metrics['recall'][idx],
+                                metrics['f1'][idx], int(support[idx]), w=width, d=digits))
+    total = int(support.sum())
+    lines.append('')
+    lines.append('{:>{w}s} {:>9s} {:>9s} {:>9.{d}f} {:>9d}'.format('accuracy', '', '', metrics['accuracy'],
+                                                                   total, w=width, d=digits))
+    weights = _safe_divide(support, total)
+    for name, avg in (('macro avg', lambda x: np.mean(x) if n_classes else 0.0),
+                      ('weighted avg', lambda x: np.sum(x * weights))):
+        lines.append(row.format(name, avg(metrics['precision']), avg(metrics['recall']),
+                                avg(metrics['f1']), total, w=width, d=digits))
+    return '\n'.join(lines) + '\n'
+
+
+class AiConfusionMatrix:
+    """Confusion matrix accumulated over batches of predictions"""
+
+    def __init__(self, n_classes):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        n_classes
+            number of classes
+        """
+        self.n_classes = n_classes
+        self.matrix = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+    def __len__(self):
+        return int(self.matrix.sum())
+
+    def reset(self):
+        """Clear the accumulated predictions"""  # noqa: DAR101,DAR201,DAR401
+        self.matrix[...] = 0
+
+    def update(self, labels, predictions):
+        """Add a batch of predictions (class indexes)"""  # noqa: DAR101,DAR201,DAR401
+        self.matrix += confusion_matrix(labels, predictions, self.n_classes)
+        return self
+
+    def metrics(self):
+        """Return the per-class metrics (see classification_metrics())"""  # noqa: DAR101,DAR201,DAR401
+        return classification_metrics(self.matrix)
+
+    def report(self, target_names=None, digits=2):
+        """Return the text report (see classification_report())"""  # noqa: DAR101,DAR201,DAR401
+        return classification_report(self.matrix, target_names, digits)
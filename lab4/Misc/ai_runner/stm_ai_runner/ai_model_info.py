@@ -0,0 +1,193 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Model descriptor (network info)
+
+The descriptor is built once by the driver (discovery/connection) and returned
+as-is by get_info(). It is a read-only dict: the nested dicts are also
+read-only and the lists are converted to tuples. The descriptor can be pickled
+(exchanged with the worker processes) and serialized with json.
+
+The input signature (AiInputSignature) is compiled once by model from the
+descriptor, the inputs are checked (and optionally converted) with it before
+each invoke.
+"""
+
+import numpy as np
+
+from .ai_runner import HwIOError, InvalidParamError
+
+
+def _freeze(value):
+    """Return a read-only version of the value"""  # noqa: DAR101,DAR201,DAR401
+    if isinstance(value, _AiFrozenDict):
+        return value
+    if isinstance(value, dict):
+        return _AiFrozenDict(value)
+    if isinstance(value, (list, tuple)) and not hasattr(value, '_fields'):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _AiFrozenDict(dict):
+    """Read-only dict, the values are recursively frozen"""
+
+    def __init__(self, *args, **kwargs):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        super().__init__()
+        for key, value in dict(*args, **kwargs).items():
+            dict.__setitem__(self, key, _freeze(value))
+
+    def _read_only(self, *args, **kwargs):
+        """Raise an exception, the dict can not be modified"""  # noqa: DAR101,DAR201,DAR401
+        raise TypeError('{} object is read-only'.format(type(self).__name__))
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
+
+    def __ior__(self, other):
+        self._read_only()
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class AiModelInfo(_AiFrozenDict):
+    """Read-only description of a model (see AiRunner.get_info())"""
+
+    @property
+    def name(self):
+        """Return the c-name of the model"""
+        # noqa: DAR101,DAR201,DAR401
+        return self.get('name', None)
+
+    @property
+    def inputs(self):
+        """Return the descriptions of the input tensors"""
+        # noqa: DAR101,DAR201,DAR401
+        return self.get('inputs', ())
+
+    @property
+    def outputs(self):
+        """Return the descriptions of the output tensors"""
+        # noqa: DAR101,DAR201,DAR401
+        return self.get('outputs', ())
+
+
+class AiInputSignature:
+    """
+    Compiled description of the inputs of a model (dtypes, shapes w/o the batch
+    dimension, flat sizes), used to check/prepare the inputs before each invoke
+    """
+
+    __slots__ = ('dtypes', 'shapes', 'sizes', 'contiguous')
+
+    def __init__(self, in_desc, contiguous=True):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        in_desc
+            List of dict with the input details (see AiRunner.get_input_infos())
+        contiguous
+            C-contiguous arrays are required
+        """
+        self.dtypes = tuple(np.dtype(desc['type']) for desc in in_desc)
+        self.shapes = tuple(tuple(int(dim) for dim in desc['shape'][1:]) for desc in in_desc)
+        self.sizes = tuple(int(np.prod(shape)) for shape in self.shapes)
+        self.contiguous = contiguous
+
+    def __len__(self):
+        return len(self.dtypes)
+
+    def _is_ready(self, data, idx):
+        """Indicate if the array can be used as-is"""  # noqa: DAR101,DAR201,DAR401
+        return (isinstance(data, np.ndarray) and data.dtype == self.dtypes[idx] and
+                data.shape[1:] == self.shapes[idx] and
+                (not self.contiguous or data.flags.c_contiguous))
+
+    def _prepare_one(self, data, idx, coerce, reshape):
+        """Check/convert an input, one copy at most"""  # noqa: DAR101,DAR201,DAR401
+        if reshape and data.shape[1:] != self.shapes[idx]:
+            if data.ndim == 1 and data.size == self.sizes[idx]:
+                data = data.reshape((1,) + self.shapes[idx])
+            elif data.ndim == 2 and data.shape[1] == self.sizes[idx]:
+                data = data.reshape((data.shape[0],) + self.shapes[idx])
+        if data.shape[1:] != self.shapes[idx]:
+            msg = 'invalid shape - {} instead {}'.format((None,) + data.shape[1:], (None,) + self.shapes[idx])
+            raise InvalidParamError(msg + ' for the input #{}'.format(idx + 1))
+        src, dst = data.dtype, self.dtypes[idx]
+        if src != dst:
+            # narrowing conversions (same kind or integer to integer) are range-checked
+            if not coerce or not (np.can_cast(src, dst, 'same_kind') or (src.kind in 'iu' and dst.kind in 'iu')):
+                msg = 'invalid dtype - {} instead {}'.format(src, dst)
+                raise InvalidParamError(msg + ' for the input #{}'.format(idx + 1))
+            if not np.can_cast(src, dst, 'safe'):
+                self._check_range(data, idx)
+        return np.asarray(data, dtype=self.dtypes[idx], order='C' if self.contiguous else 'K')
+
+    def _check_range(self, data, idx):
+        """Check that the values are representable with the expected dtype (narrowing)"""
+        # noqa: DAR101,DAR201,DAR401
+        dtype = self.dtypes[idx]
+        if data.size == 0 or dtype.kind not in 'iuf':
+            return
+        info = np.iinfo(dtype) if dtype.kind in 'iu' else np.finfo(dtype)
+        v_min, v_max = data.min(), data.max()
+        if v_min < info.min or v_max > info.max:
+            msg = 'values out of the {} range - [{}, {}] not in [{}, {}]'.format(dtype, v_min, v_max,
+                                                                               info.min, info.max)
+            raise InvalidParamError(msg + ' for the input #{}'.format(idx + 1))
+
+    def prepare(self, inputs, coerce=False, reshape=False):
+        """
+        Check the inputs, return the arrays which can be passed to the driver
+
+        Parameters
+        ----------
+        inputs
+            List of numpy arrays (first dimension is the batch size)
+        coerce
+            Inputs are converted to the expected dtype, else the dtype should
+            be the same. The 'safe' conversions are always accepted, a narrowing
+            conversion (int32 -> int8, int64 -> uint8, float64 -> float32..) is
+            accepted if all the values are in the range of the expected dtype
+        reshape
+            Flat rows (batch_size, size) or a flat sample (size,) are reshaped
+
+        Returns
+        -------
+        list
+            List of numpy arrays, unchanged objects if they are compliant
+
+        Raises
+        ------
+        HwIOError
+            Number of inputs is invalid
+        InvalidParamError
+            Shape or dtype is invalid, or values are out of range (coerce)
+        """
+        if len(inputs) != len(self.dtypes):
+            msg = 'Input number is inconsistent {} instead {}'.format(len(inputs), len(self.dtypes))
+            raise HwIOError(msg)
+        if all(self._is_ready(data, idx) for idx, data in enumerate(inputs)):
+            return inputs
+        inputs = [np.asarray(data) for data in inputs]
+        return [self._prepare_one(data, idx, coerce, reshape) for idx, data in enumerate(inputs)]
@@ -0,0 +1,233 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Profiler records of an inference session
+
+The features of the c-nodes (PER_LAYER_WITH_DATA mode) are stored in
+columnar arrays (one by c-node output), allocated with the shape of the first
+sample for the whole batch and grown geometrically if necessary. The arrays can
+be spilled to disk (memory-mapped .npy files), a grown array is written in a new
+file (segment), the previous one is removed when it is no longer mapped (a
+mapped file can not be replaced or removed on Windows). The profiler is a dict, the
+'data' entries of the c-nodes are views of the filled part of the arrays. When
+the features are stored by a callback (AiCaptureCallback), they are not kept,
+only the durations and the descriptions of the c-nodes are recorded.
+"""
+
+import os
+
+import numpy as np
+
+
+class _AiFeatureStore:
+    """Pre-allocated array for the successive features of a c-node output"""
+
+    def __init__(self, n_samples, file_name=None):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self._n_samples = max(n_samples, 1)
+        self._file_name = file_name
+        self._segment = 0
+        self._stale = []  # previous segments which are not yet removed
+        self._buffer = None
+        self._empty = None
+        self._len = 0
+
+    def _alloc(self, shape, dtype, file_name):
+        """Create the array (memory-mapped if a file is provided)"""  # noqa: DAR101,DAR201,DAR401
+        if file_name:
+            return np.lib.format.open_memmap(file_name, mode='w+', dtype=dtype, shape=shape)
+        return np.empty(shape, dtype=dtype)
+
+    @property
+    def file_name(self):
+        """Return the name of the current file (segment), None if the array is in memory"""
+        # noqa: DAR101,DAR201,DAR401
+        if not self._file_name or not self._segment:
+            return self._file_name
+        root, ext = os.path.splitext(self._file_name)
+        return '{}.{}{}'.format(root, self._segment, ext)
+
+    def _remove_stale(self):
+        """Remove the previous segments, kept if they are still mapped"""  # noqa: DAR101,DAR201,DAR401
+        stale = []
+        for file_name in self._stale:
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                pass
+            except OSError:  # still mapped (Windows)
+                stale.append(file_name)
+        self._stale = stale
+
+    def _grow(self, capacity):
+        """Re-allocate the array in a new segment, the filled part is copied"""  # noqa: DAR101,DAR201,DAR401
+        old = self._buffer
+        if self._file_name:
+            self._stale.append(self.file_name)
+            self._segment += 1
+        self._buffer = self._alloc((capacity,) + old.shape[1:], old.dtype, self.file_name)
+        self._buffer[:self._len] = old[:self._len]
+        del old
+        self._remove_stale()
+
+    def append(self, feature):
+        """Append the feature(s), first dimension is the batch dimension"""  # noqa: DAR101,DAR201,DAR401
+        if self._buffer is None:
+            if feature.size == 0:  # no data (PER_LAYER mode)
+                self._empty = feature
+                return
+            capacity = self._n_samples * max(feature.shape[0], 1)
+            self._buffer = self._alloc((capacity,) + feature.shape[1:], feature.dtype, self._file_name)
+        n_items = feature.shape[0]
+        if self._len + n_items > self._buffer.shape[0]:
+            self._grow(max(2 * self._buffer.shape[0], self._len + n_items))
+        self._buffer[self._len:self._len + n_items] = feature
+        self._len += n_items
+
+    def view(self):
+        """Return the filled part of the array"""  # noqa: DAR101,DAR201,DAR401
+        if self._buffer is None:
+            return self._empty
+        return self._buffer[:self._len]
+
+    def close(self):
+        """Flush the memory-mapped file"""  # noqa: DAR101,DAR201,DAR401
+        if isinstance(self._buffer, np.memmap):
+            self._buffer.flush()
+        self._remove_stale()
+
+
+class AiProfiler(dict):
+    """Profiler records (dict) with columnar storage of the c-node features"""
+
+    def __init__(self, n_samples=0, spill_dir=None, keep_features=True):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        n_samples
+            Expected number of samples (used to pre-allocate the arrays)
+        spill_dir
+            Directory where the arrays are stored (memory-mapped .npy files,
+            c_node_<idx>_<output>.npy, c_node_<idx>_<output>.<n>.npy after
+            the n-th growth), if None the arrays are in memory
+        keep_features
+            If False, the features are not stored ('data' entry of the c-nodes
+            is None)
+        """
+        super().__init__()
+        self['info'] = dict()
+        self['c_durations'] = []  # Inference time by sample w/o cb by node if enabled
+        self['c_nodes'] = []
+        self['debug'] = {
+            'exec_times': [],  # real inference time by sample with cb by node overhead
+            'host_duration': 0.0,  # host execution time (on whole batch)
+            'averaged': 0,  # number of samples with an averaged duration (batch call)
+        }
+        self._n_samples = n_samples
+        self._spill_dir = spill_dir
+        self._keep_features = keep_features
+        self._stores = []  # list of _AiFeatureStore by c-node
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def __reduce__(self):
+        # exchanged (pickle) as a simple dict, features are copied
+        return (dict, (dict(self),))
+
+    def _file_name(self, c_idx, idx):
+        """Return the file name of a spilled array"""  # noqa: DAR101,DAR201,DAR401
+        if not self._spill_dir:
+            return None
+        return os.path.join(self._spill_dir, 'c_node_{:03d}_{}.npy'.format(c_idx, idx))
+
+    def add_node(self, c_idx, desc, duration, features):
+        """
+        Record the execution of a c-node
+
+        Parameters
+        ----------
+        c_idx
+            Index of the c-node
+        desc
+            Description of the c-node (m_id, layer_type, type, shape..), used
+            for the first sample
+        duration
+            Execution time of the c-node (ms)
+        features
+            List of numpy arrays (one by output)
+
+        Returns
+        -------
+        dict
+            The c-node entry
+        """
+        c_nodes = self['c_nodes']
+        if c_idx >= len(c_nodes):
+            item = {'c_durations': [duration]}
+            item.update(desc)
+            stores = [_AiFeatureStore(self._n_samples, self._file_name(len(c_nodes), idx))
+                      for idx in range(len(features))] if self._keep_features else None
+            c_nodes.append(item)
+            self._stores.append(stores)
+        else:
+            item = c_nodes[c_idx]
+            item['c_durations'].append(duration)
+            stores = self._stores[c_idx]
+        item['data'] = None  # the views of the arrays are released before a growth
+        if stores is None:
+            return item
+        for store, feature in zip(stores, features):
+            store.append(feature)
+        item['data'] = [store.view() for store in stores]
+        return item
+
+    def close(self):
+        """Flush the spilled arrays"""  # noqa: DAR101,DAR201,DAR401
+        for stores in self._stores:
+            for store in stores or []:
+                store.close()
+
+
+def merge_profiles(profiles, profiler=None):
+    """
+    Merge the profiler records of successive shards of a batch
+
+    Parameters
+    ----------
+    profiles
+        list of AiProfiler objects, in the order of the samples
+    profiler
+        AiProfiler object which is updated (default: a new one)
+
+    Returns
+    -------
+    AiProfiler
+        merged profiler, the features of the c-nodes are concatenated
+    """
+    profiler = AiProfiler() if profiler is None else profiler
+    for prof_ in profiles:
+        profiler['c_durations'].extend(prof_['c_durations'])
+        profiler['debug']['exec_times'].extend(prof_['debug']['exec_times'])
+        profiler['debug']['averaged'] += prof_['debug'].get('averaged', 0)
+        for idx, node in enumerate(prof_['c_nodes']):
+            if idx >= len(profiler['c_nodes']):
+                item = dict(node)
+                item['c_durations'] = list(node['c_durations'])
+                item['data'] = [[data] for data in node['data']] if node['data'] else node['data']
+                profiler['c_nodes'].append(item)
+            else:
+                item = profiler['c_nodes'][idx]
+                item['c_durations'].extend(node['c_durations'])
+                for i_data, data in enumerate(node['data'] if node['data'] else []):
+                    item['data'][i_data].append(data)
+    for item in profiler['c_nodes']:
+        if item['data']:
+            item['data'] = [np.concatenate(data, axis=0) for data in item['data']]
+    return profiler
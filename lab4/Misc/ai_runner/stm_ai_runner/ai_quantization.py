@@ -0,0 +1,274 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Quantization/de-quantization of the tensors (integer formats with scale/zero-point)
+
+    q = clip(round(x / scale) + zero_point, q_min, q_max)
+    x = (q - zero_point) * scale
+
+The parameters are scalars (per-tensor) or 1-D arrays (per-channel, last
+dimension is the channel dimension). The values are processed by block of
+rows with a float32 scratch buffer (float64 for the 32/64-bit types, float32
+can not represent their bounds), scale, round and clip are done in the same
+block while it is in the cache, no int64 intermediate array is created. The
+results can be written in pre-allocated arrays (out=).
+"""
+
+import numpy as np
+
+from .ai_runner import InvalidParamError
+
+
+_BLOCK_SIZE = 16384  # number of values processed by block
+
+
+def _to_params(values, scale, zero_point):
+    """Return the float32 params and the number of channels"""  # noqa: DAR101,DAR201,DAR401
+    scale = np.asarray(scale, dtype=np.float32)
+    zero_point = np.asarray(0 if zero_point is None else zero_point, dtype=np.float32)
+    channels = max(scale.size, zero_point.size) if scale.ndim or zero_point.ndim else 1
+    if scale.size not in (1, channels) or zero_point.size not in (1, channels):
+        raise InvalidParamError('scale/zero_point - inconsistent number of channels')
+    if channels > 1 and (not values.ndim or values.shape[-1] != channels):
+        msg = 'per-channel params - {} channels instead {}'.format(values.shape[-1] if values.ndim else 0,
+                                                                   channels)
+        raise InvalidParamError(msg)
+    if channels > 1:
+        return scale.ravel(), zero_point.ravel(), channels
+    return scale.reshape(()), zero_point.reshape(()), 1
+
+
+def _check_out(out, shape, dtype):
+    """Return the output array, allocated if necessary"""  # noqa: DAR101,DAR201,DAR401
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.shape != shape or out.dtype != dtype or not out.flags.c_contiguous:
+        msg = 'invalid out array - {}/{} instead {}/{} (C-contiguous)'.format(out.shape, out.dtype,
+                                                                            shape, np.dtype(dtype))
+        raise InvalidParamError(msg)
+    return out
+
+
+def _clip_bounds(info, ftype):
+    """Return the clip bounds, representable in ftype and inside the integer range"""
+    # noqa: DAR101,DAR201,DAR401
+    low, high = ftype.type(info.min), ftype.type(info.max)
+    if int(high) > info.max:
+        high = np.nextafter(high, ftype.type(0))
+    return low, high
+
+
+def _rows(values, channels):
+    """Return a 2-D view (rows, channels) and the number of rows by block"""  # noqa: DAR101,DAR201,DAR401
+    rows = np.reshape(values, (-1, channels))
+    return rows, max(1, _BLOCK_SIZE // channels)
+
+
+def quantize_array(values, scale, zero_point, dtype, out=None):
+    """
+    Quantize an array
+
+    Parameters
+    ----------
+    values
+        float values (numpy array or array-like)
+    scale
+        scale, scalar or 1-D array (per-channel)
+    zero_point
+        zero-point, scalar or 1-D array (per-channel)
+    dtype
+        integer type of the quantized values
+    out
+        pre-allocated array (dtype, same shape, C-contiguous)
+
+    Returns
+    -------
+    numpy.ndarray
+        quantized values
+
+    Raises
+    ------
+    InvalidParamError
+        invalid params or invalid out array
+    """
+    values = np.asarray(values)
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.integer):
+        raise InvalidParamError('quantize - integer type is expected ({})'.format(dtype))
+    scale, zero_point, channels = _to_params(values, scale, zero_point)
+    out = _check_out(out, values.shape, dtype)
+    if not values.size:
+        return out
+    ftype = np.dtype(np.float64 if dtype.itemsize >= 4 else np.float32)
+    low, high = _clip_bounds(np.iinfo(dtype), ftype)
+    src, step = _rows(values, channels)
+    dst, _ = _rows(out, channels)
+    scratch = np.empty((min(step, src.shape[0]), channels), dtype=ftype)
+    for start in range(0, src.shape[0], step):
+        end = min(start + step, src.shape[0])
+        tmp = scratch[:end - start]
+        np.divide(src[start:end], scale, out=tmp)
+        np.rint(tmp, out=tmp)
+        np.add(tmp, zero_point, out=tmp)
+        np.clip(tmp, low, high, out=tmp)
+        np.copyto(dst[start:end], tmp, casting='unsafe')
+    return out
+
+
+def dequantize_array(values, scale, zero_point, out=None):
+    """
+    De-quantize an array
+
+    Parameters
+    ----------
+    values
+        quantized values (numpy array)
+    scale
+        scale, scalar or 1-D array (per-channel)
+    zero_point
+        zero-point, scalar or 1-D array (per-channel)
+    out
+        pre-allocated float32 array (same shape, C-contiguous)
+
+    Returns
+    -------
+    numpy.ndarray
+        float32 values
+
+    Raises
+    ------
+    InvalidParamError
+        invalid params or invalid out array
+    """
+    values = np.asarray(values)
+    scale, zero_point, channels = _to_params(values, scale, zero_point)
+    out = _check_out(out, values.shape, np.float32)
+    if not values.size:
+        return out
+    src, step = _rows(values, channels)
+    dst, _ = _rows(out, channels)
+    for start in range(0, src.shape[0], step):
+        end = min(start + step, src.shape[0])
+        np.subtract(src[start:end], zero_point, out=dst[start:end])
+        np.multiply(dst[start:end], scale, out=dst[start:end])
+    return out
+
+
+def is_quantized(desc):
+    """Indicate if the tensor (IO descriptor) is quantized (integer type with a scale)"""
+    # noqa: DAR101,DAR201,DAR401
+    scale = desc.get('scale', None)
+    if scale is None or not np.issubdtype(np.dtype(desc['type']), np.integer):
+        return False
+    return bool(np.any(np.asarray(scale) != 0.0))
+
+
+def quantize(values, desc, out=None):
+    """
+    Convert float values to the format of a tensor
+
+    Parameters
+    ----------
+    values
+        float values, the last dimension is the channel dimension
+    desc
+        IO descriptor ('type', 'scale' and 'zero_point' keys, see
+        AiRunner.get_input_infos())
+    out
+        pre-allocated array (tensor type, same shape, C-contiguous)
+
+    Returns
+    -------
+    numpy.ndarray
+        values with the type of the tensor (converted only if the tensor is
+        not quantized)
+    """
+    if not is_quantized(desc):
+        if out is None:
+            return np.asarray(values, dtype=desc['type'])
+        np.copyto(_check_out(out, np.shape(values), desc['type']), values, casting='same_kind')
+        return out
+    return quantize_array(values, desc['scale'], desc.get('zero_point', 0), desc['type'], out=out)
+
+
+def dequantize(values, desc, out=None):
+    """
+    Convert the values of a tensor to float32 values
+
+    Parameters
+    ----------
+    values
+        values with the type of the tensor, the last dimension is the channel
+        dimension
+    desc
+        IO descriptor ('type', 'scale' and 'zero_point' keys, see
+        AiRunner.get_output_infos())
+    out
+        pre-allocated float32 array (same shape, C-contiguous)
+
+    Returns
+    -------
+    numpy.ndarray
+        float32 values
+    """
+    if not is_quantized(desc):
+        if out is None:
+            return np.asarray(values, dtype=np.float32)
+        np.copyto(_check_out(out, np.shape(values), np.float32), values, casting='same_kind')
+        return out
+    return dequantize_array(values, desc['scale'], desc.get('zero_point', 0), out=out)
+
+
+def quantize_inputs(inputs, in_desc, float_io=None):
+    """
+    Quantize the float inputs of a quantized model
+
+    Parameters
+    ----------
+    inputs
+        list of input arrays
+    in_desc
+        list of IO descriptors (see AiRunner.get_input_infos())
+    float_io
+        True to quantize the inputs, None: enabled if float values are passed
+        for a quantized input
+
+    Returns
+    -------
+    tuple
+        list of input arrays and the float_io flag
+    """
+    if float_io is None:
+        float_io = any(isinstance(in_, np.ndarray) and np.issubdtype(in_.dtype, np.floating) and
+                       is_quantized(desc) for in_, desc in zip(inputs, in_desc))
+    if not float_io:
+        return inputs, False
+    return [quantize(in_, desc) if is_quantized(desc) else in_ for in_, desc in zip(inputs, in_desc)], True
+
+
+def dequantize_outputs(outputs, out_desc, out=None):
+    """
+    Convert the outputs of a model to float32 values
+
+    Parameters
+    ----------
+    outputs
+        list of output arrays
+    out_desc
+        list of IO descriptors (see AiRunner.get_output_infos())
+    out
+        optional list of pre-allocated float32 arrays (one by output)
+
+    Returns
+    -------
+    list
+        list of float32 arrays
+    """
+    if out is None:
+        out = [None] * len(outputs)
+    return [dequantize(out_, desc, out=dst) for out_, desc, dst in zip(outputs, out_desc, out)]
@@ -0,0 +1,264 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Latency report built from the profiler records (AiRunner.invoke())
+
+AiProfileReport accumulates the records of one or several invokes in
+fixed-memory streaming histograms (log-spaced bins), the percentiles
+(p50/p90/p99), the jitter (standard deviation), the share of each c-node and
+the host/protocol overhead (host_duration - sum of c_durations) are reported.
+
+    report = AiProfileReport()
+    for batch in batches:
+        _, profiler = runner.invoke(batch)
+        report.update(profiler)
+    report.summary()
+"""
+
+import math
+
+import numpy as np
+
+
+class AiLatencyHistogram:
+    """Streaming histogram (fixed memory, log-spaced bins) of durations (ms)"""
+
+    def __init__(self, min_value=1e-3, max_value=1e5, bins_per_decade=100):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        min_value
+            Lower bound of the first bin (ms), smaller values are counted in an
+            underflow bin
+        max_value
+            Upper bound of the last bin (ms), greater values are counted in an
+            overflow bin
+        bins_per_decade
+            Resolution (100: relative error of the percentiles < 2.4%)
+        """
+        self._log_min = math.log10(min_value)
+        self._bins_per_decade = bins_per_decade
+        self._n_bins = int(math.ceil((math.log10(max_value) - self._log_min) * bins_per_decade))
+        self._counts = np.zeros(self._n_bins + 2, dtype=np.int64)  # + underflow/overflow
+        self.count = 0
+        self.total = 0.0
+        self._sum_sq = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        """Add the values"""  # noqa: DAR101,DAR201,DAR401
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if not values.size:
+            return
+        with np.errstate(divide='ignore'):
+            idx = np.floor((np.log10(values) - self._log_min) * self._bins_per_decade) + 1
+        idx = np.clip(np.nan_to_num(idx, neginf=0), 0, self._n_bins + 1).astype(np.int64)
+        self._counts += np.bincount(idx, minlength=self._n_bins + 2)
+        self.count += values.size
+        self.total += float(values.sum())
+        self._sum_sq += float(np.square(values).sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """Add the values of a histogram with the same bins"""  # noqa: DAR101,DAR201,DAR401
+        self._counts += other._counts  # pylint: disable=protected-access
+        self.count += other.count
+        self.total += other.total
+        self._sum_sq += other._sum_sq  # pylint: disable=protected-access
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        """Return the mean value"""  # noqa: DAR101,DAR201,DAR401
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        """Return the standard deviation (jitter)"""  # noqa: DAR101,DAR201,DAR401
+        if not self.count:
+            return 0.0
+        return math.sqrt(max(self._sum_sq / self.count - self.mean ** 2, 0.0))
+
+    def percentile(self, q):
+        """Return the q-th percentile (interpolated in the bin)"""  # noqa: DAR101,DAR201,DAR401
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        cum = np.cumsum(self._counts)
+        idx = min(int(np.searchsorted(cum, rank, side='left')), self._n_bins + 1)
+        if idx == 0:
+            return self.min
+        if idx == self._n_bins + 1:
+            return self.max
+        n_before = cum[idx - 1]
+        frac = (rank - n_before) / self._counts[idx] if self._counts[idx] else 0.0
+        value = 10 ** (self._log_min + (idx - 1 + frac) / self._bins_per_decade)
+        return min(max(value, self.min), self.max)
+
+    def to_dict(self, percentiles=(50, 90, 99)):
+        """Return the statistics as a dict"""  # noqa: DAR101,DAR201,DAR401
+        res = {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+        for q in percentiles:
+            res['p{}'.format(q)] = self.percentile(q)
+        return res
+
+
+class AiProfileReport:
+    """Latency report (percentiles, jitter, share by c-node, protocol overhead)"""
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, profiler=None, bins_per_decade=100):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        profiler
+            Optional profiler dict (see AiRunner.invoke()), first record
+        bins_per_decade
+            Resolution of the histograms
+        """
+        self._bins_per_decade = bins_per_decade
+        self._c_durations = AiLatencyHistogram(bins_per_decade=bins_per_decade)
+        self._exec_times = AiLatencyHistogram(bins_per_decade=bins_per_decade)
+        self._nodes = []  # by c-node: dict (m_id, layer_desc, count, total, min, max)
+        self._host_duration = 0.0
+        self._n_invokes = 0
+        self._n_averaged = 0
+        self._info = dict()
+        if profiler is not None:
+            self.update(profiler)
+
+    def update(self, profiler):
+        """
+        Add the records of an invoke
+
+        Parameters
+        ----------
+        profiler
+            Profiler dict returned by AiRunner.invoke()
+        """
+        self._n_invokes += 1
+        self._n_averaged += profiler['debug'].get('averaged', 0)
+        self._host_duration += profiler['debug']['host_duration']
+        self._c_durations.update(profiler['c_durations'])
+        self._exec_times.update(profiler['debug']['exec_times'])
+        if profiler.get('info', None):
+            self._info = profiler['info']
+        for idx, node in enumerate(profiler['c_nodes']):
+            if idx >= len(self._nodes):
+                self._nodes.append({
+                    'm_id': node.get('m_id', None),
+                    'layer_desc': node.get('layer_desc', ''),
+                    'count': 0, 'total': 0.0, 'min': math.inf, 'max': -math.inf,
+                })
+            durations = np.asarray(node['c_durations'], dtype=np.float64)
+            if not durations.size:
+                continue
+            item = self._nodes[idx]
+            item['count'] += durations.size
+            item['total'] += float(durations.sum())
+            item['min'] = min(item['min'], float(durations.min()))
+            item['max'] = max(item['max'], float(durations.max()))
+
+    @property
+    def n_samples(self):
+        """Return the number of recorded samples"""  # noqa: DAR101,DAR201,DAR401
+        return self._c_durations.count
+
+    def to_dict(self):
+        """
+        Return the report as a dict
+
+        Returns
+        -------
+        dict
+            'c_durations' and 'exec_times' statistics (ms), 'host' (total host
+            duration, protocol/host overhead = host_duration - sum of c_durations),
+            'c_nodes' (duration and share by c-node) and 'averaged' (number of
+            samples with an averaged duration, percentiles and jitter are not
+            significant if not 0)
+        """
+        c_total = self._c_durations.total
+        protocol = self._host_duration - c_total
+        nodes_total = sum([node['total'] for node in self._nodes])
+        c_nodes = []
+        for idx, node in enumerate(self._nodes):
+            c_nodes.append({
+                'c_idx': idx,
+                'm_id': node['m_id'],
+                'layer_desc': node['layer_desc'],
+                'mean': node['total'] / node['count'] if node['count'] else 0.0,
+                'min': node['min'] if node['count'] else 0.0,
+                'max': node['max'] if node['count'] else 0.0,
+                'share': node['total'] * 100.0 / nodes_total if nodes_total else 0.0,
+            })
+        return {
+            'n_invokes': self._n_invokes,
+            'n_samples': self.n_samples,
+            'averaged': self._n_averaged,
+            'c_durations': self._c_durations.to_dict(self.PERCENTILES),
+            'exec_times': self._exec_times.to_dict(self.PERCENTILES),
+            'host': {
+                'duration': self._host_duration,
+                'device': c_total,
+                'protocol': protocol,
+                'protocol_by_sample': protocol / self.n_samples if self.n_samples else 0.0,
+                'protocol_share': protocol * 100.0 / self._host_duration if self._host_duration else 0.0,
+            },
+            'c_nodes': c_nodes,
+        }
+
+    def summary(self, print_fn=None):
+        """Prints a summary of the report"""  # noqa: DAR101,DAR201,DAR401
+
+        print_fn = print if print_fn is None else print_fn
+        res = self.to_dict()
+
+        name = self._info.get('name', '') if isinstance(self._info, dict) else ''
+        print_fn('Latency report "{}" - {} sample(s), {} invoke(s)'.format(name, res['n_samples'],
+                                                                          res['n_invokes']))
+        print_fn('-' * 80)
+        print_fn(' {:14s} | {:>9} | {:>9} | {:>9} | {:>9} | {:>9} | {:>9}'.format(
+            '(ms)', 'mean', 'p50', 'p90', 'p99', 'max', 'jitter'))
+        for key, desc in [('c_durations', 'device'), ('exec_times', 'device (rt)')]:
+            stats = res[key]
+            if not stats['count']:
+                continue
+            print_fn(' {:14s} | {:9.3f} | {:9.3f} | {:9.3f} | {:9.3f} | {:9.3f} | {:9.3f}'.format(
+                desc, stats['mean'], stats['p50'], stats['p90'], stats['p99'], stats['max'], stats['std']))
+        if res['averaged']:
+            print_fn(' WARNING: {} sample(s) with an averaged duration (batch mode),'.format(res['averaged']) +
+                     ' percentiles/max/jitter are not significant')
+        print_fn('-' * 80)
+        host = res['host']
+        print_fn('{:20s} : {:.3f}ms'.format('host duration', host['duration']))
+        print_fn('{:20s} : {:.3f}ms'.format('device (sum)', host['device']))
+        print_fn('{:20s} : {:.3f}ms ({:.1f}%), {:.3f}ms by sample'.format(
+            'protocol/host', host['protocol'], host['protocol_share'], host['protocol_by_sample']))
+        if res['c_nodes']:
+            print_fn('-' * 80)
+            print_fn(' {:>5} {:>5} {:20s} | {:>9} | {:>9} | {:>9} | {:>7}'.format(
+                'c_id', 'm_id', 'layer', 'mean', 'min', 'max', 'share'))
+            for node in res['c_nodes']:
+                print_fn(' {:5d} {:>5} {:20s} | {:9.3f} | {:9.3f} | {:9.3f} | {:6.1f}%'.format(
+                    node['c_idx'], str(node['m_id']), str(node['layer_desc'])[:20], node['mean'],
+                    node['min'], node['max'], node['share']))
+        print_fn('-' * 80)
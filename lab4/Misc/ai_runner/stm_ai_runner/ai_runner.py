@@ -29,6 +29,8 @@ import logging
 from enum import Enum
 import numpy as np
 
+from .ai_profiler import AiProfiler
+
 
 class AiRunnerError(Exception):
     """Base exceptions for errors raised by AIRunner"""
@@ -182,6 +184,11 @@ class AiHwDriver(ABC):
     def _write(self, data, timeout=0):
         return 0
 
+    def _read_wait(self, size, timeout):
+        """Read up to size bytes, wait the data until timeout (s, None: infinite)"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._read(size)
+
     def connect(self, desc=None, **kwargs):
         """Connect the driver"""  # noqa: DAR101,DAR201,DAR401
         self.disconnect()
@@ -198,6 +205,41 @@ class AiHwDriver(ABC):
             return self._read(size, timeout)
         raise NotConnectedError()
 
+    def read_exact(self, size, deadline=None):
+        """
+        Read size bytes, block until the data are available or the deadline
+
+        Parameters
+        ----------
+        size
+            number of bytes to read
+        deadline
+            absolute time (time.monotonic() base), None to wait indefinitely
+
+        Returns
+        -------
+        bytes
+            received data, less than size bytes if the deadline is reached
+
+        Raises
+        ------
+        NotConnectedError
+            driver is not connected
+        """
+        if not self.is_connected:
+            raise NotConnectedError()
+        buf = bytearray()
+        while len(buf) < size:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - t.monotonic()
+                if timeout <= 0:
+                    break
+            data = self._read_wait(size - len(buf), timeout)
+            if data:
+                buf += data
+        return bytes(buf)
+
     def write(self, data, timeout=0):
         """Write the data"""  # noqa: DAR101,DAR201,DAR401
         if self.is_connected:
@@ -264,6 +306,36 @@ class AiRunnerDriver(ABC):
         # noqa: DAR101,DAR201,DAR401
         return [], dict()
 
+    def invoke_batch(self, inputs, outputs, **kwargs):
+        """
+        Invoke the c-network with a batch of inputs (batch mode)
+
+        Only called by AiRunner if AiRunner.Caps.BATCH is reported by the
+        driver. The results are directly written in the pre-allocated outputs.
+        Default implementation: invoke_sample() is called for each sample.
+
+        Parameters
+        ----------
+        inputs
+            List of ndarray (one by input), first dim is the batch size
+        outputs
+            List of pre-allocated ndarray (one by output), same batch size
+        kwargs
+            name, profiler and mode (see invoke_sample())
+
+        Returns
+        -------
+        list
+            durations by sample (ms)
+        """
+        durations = []
+        for idx in range(inputs[0].shape[0]):
+            s_outputs, s_dur = self.invoke_sample([in_[idx:idx + 1] for in_ in inputs], **kwargs)
+            for out_, s_out in zip(outputs, s_outputs):
+                out_[idx:idx + 1] = s_out
+            durations.append(s_dur)
+        return durations
+
     def check_inputs(self, _1, _2):
         """Specific function to check the inputs"""  # noqa: DAR101,DAR201,DAR401
         return False
@@ -346,6 +418,11 @@ class AiRunnerCallback:
     """
     Abstract base class used to build new callbacks
     """
+
+    # True if the callback stores the features of the c-nodes (on_node_end()),
+    # in this case they are not kept by the profiler
+    stores_features = False
+
     def __init__(self):
         pass
 
@@ -428,6 +505,7 @@ class AiRunner:
         PER_LAYER_WITH_DATA = PER_LAYER | 2
         SELF_TEST = 4
         RELOC = 8
+        BATCH = 16
 
     class Mode(Enum):
         """Mode values"""
@@ -435,6 +513,9 @@ class AiRunner:
         PER_LAYER = 1
         PER_LAYER_WITH_DATA = PER_LAYER | 2
 
+    # max number of samples passed by call to the invoke_batch() function of the driver
+    BATCH_CHUNK_SIZE = 64
+
     def __init__(self, logger=None, debug=False, verbosity=0):
         """
         Constructor
@@ -450,6 +531,7 @@ class AiRunner:
         """
         self._sessions = []
         self._names = []
+        self._signatures = dict()  # compiled input signatures by c-name
         self._drv = None
         if logger is None:
             logger = get_logger(self.__class__.__name__, debug, verbosity)
@@ -505,7 +587,8 @@ class AiRunner:
         Returns
         -------
         dict
-            Dict with the model information
+            Dict with the model information (read-only AiModelInfo object,
+            built once by the driver at the discovery of the models)
         """
         name_ = self._check_name(name)
         return self._drv.get_info(name_) if name_ else dict()
@@ -562,30 +645,30 @@ class AiRunner:
                 mode = AiRunner.Mode.IO_ONLY
         return mode
 
-    def _check_inputs(self, inputs, name):
-        """Check the coherence of the inputs (data type and shape)"""  # noqa: DAR101,DAR201,DAR401
+    def _check_inputs(self, inputs, name, coerce=False, reshape=False):
+        """Check the coherence of the inputs (data type and shape), return the inputs"""
+        # noqa: DAR101,DAR201,DAR401
 
         if self._drv.check_inputs(inputs, name):
-            return
+            return inputs
 
-        in_desc = self.get_input_infos(name)
+        signature = self._signatures.get(name, None)
+        if signature is None:
+            signature = self._compile_signature(name)
+        return signature.prepare(inputs, coerce=coerce, reshape=reshape)
 
-        if len(inputs) != len(in_desc):
-            msg = 'Input number is inconsistent {} instead {}'.format(len(inputs), len(in_desc))
-            raise HwIOError(msg)
+    def _compile_signature(self, name):
+        """Compile and cache the input signature of a model"""  # noqa: DAR101,DAR201,DAR401
+        from .ai_model_info import AiInputSignature
 
-        for idx, ref in enumerate(in_desc):
-            in_shape = (ref['shape'][0],) + inputs[idx].shape[1:]
-            if inputs[idx].dtype != ref['type']:
-                msg = 'invalid dtype - {} instead {}'.format(inputs[idx].dtype,
-                                                             ref['type'])
-                msg += ' for the input #{}'.format(idx + 1)
-                raise InvalidParamError(msg)
-            if in_shape != ref['shape']:
-                msg = 'invalid shape - {} instead {}'.format(in_shape,
-                                                             ref['shape'])
-                msg += ' for the input #{}'.format(idx + 1)
-                raise InvalidParamError(msg)
+        self._signatures[name] = AiInputSignature(self.get_input_infos(name))
+        return self._signatures[name]
+
+    def _compile_signatures(self):
+        """Compile the input signatures of the available models"""  # noqa: DAR101,DAR201,DAR401
+        self._signatures = dict()
+        for name_ in self._names:
+            self._compile_signature(name_)
 
     def invoke(self, inputs, **kwargs):
         """
@@ -597,7 +680,19 @@ class AiRunner:
             Input samples. A Numpy array, or a list of arrays in case the model
             has multiple inputs.
         kwargs
-            specific parameters
+            specific parameters, 'outputs': pre-allocated output arrays (one by
+            output, C-contiguous, first dimension is the batch size), the results
+            are written in place, 'spill_dir': directory where the features of the
+            c-nodes are stored (PER_LAYER_WITH_DATA mode, see AiProfiler, not
+            kept if the callback stores them, 'stores_features' attribute), 'coerce':
+            the inputs are converted to the expected dtype ('safe' casting, a
+            narrowing conversion of the same kind is range-checked, values out of
+            range raise InvalidParamError, see AiInputSignature.prepare()),
+            'reshape': flat rows (batch_size, size) are reshaped to the input shape,
+            'float_io': float inputs are quantized and the outputs are de-quantized
+            (float32) for a quantized model (default: enabled if float values are
+            passed for a quantized input), the pre-allocated outputs should be
+            float32 arrays in this case
 
         Returns
         -------
@@ -615,57 +710,114 @@ class AiRunner:
         if not isinstance(inputs, list):
             inputs = [inputs]
 
-        self._check_inputs(inputs, name_)
+        inputs, float_io = self._quantize_inputs(inputs, name_, kwargs.pop('float_io', None))
+        inputs = self._check_inputs(inputs, name_, coerce=kwargs.pop('coerce', False),
+                                    reshape=kwargs.pop('reshape', False))
 
         callback = kwargs.pop('callback', None)
         mode = self._align_requested_mode(kwargs.pop('mode', AiRunner.Mode.IO_ONLY))
         disable_pb = kwargs.pop('disable_pb', False)
 
         batch_size = inputs[0].shape[0]
-        profiler = {
-            'info': dict(),
-            'c_durations': [],  # Inference time by sample w/o cb by node if enabled
-            'c_nodes': [],
-            'debug': {
-                'exec_times': [],  # real inference time by sample with cb by node overhead
-                'host_duration': 0.0,  # host execution time (on whole batch)
-            },
-        }
+        profiler = AiProfiler(batch_size, spill_dir=kwargs.pop('spill_dir', None),
+                              keep_features=not getattr(callback, 'stores_features', False))
 
         start_time = t.perf_counter()
-        outputs = []
+        f_outputs = None
+        if float_io and kwargs.get('outputs', None) is not None:
+            # quantized values are stored in intermediate arrays, the caller
+            # arrays receive the de-quantized values
+            f_outputs = self._check_outputs(kwargs.pop('outputs'), name_, batch_size, dtype=np.float32)
+        outputs = self._check_outputs(kwargs.pop('outputs', None), name_, batch_size)
+
+        # native batch mode is used if supported by the driver, per sample
+        # loop is kept when the callbacks are requested.
+        use_batch = callback is None and AiRunner.Caps.BATCH in self._drv.capabilities
+        step = self.BATCH_CHUNK_SIZE if use_batch else 1
+
         prog_bar = None
-        cont = True
-        for batch in range(batch_size):
+        n_done = 0
+        for batch in range(0, batch_size, step):
             if not prog_bar and not disable_pb and (t.perf_counter() - start_time) > 1:
                 prog_bar = tqdm.tqdm(total=batch_size, file=sys.stdout, desc='STM.IO',
                                      unit_scale=False,
                                      leave=False)
-                prog_bar.update(batch)
-            elif prog_bar:
-                prog_bar.update(1)
-            s_inputs = [np.expand_dims(in_[batch], axis=0) for in_ in inputs]
-            if callback:
-                callback.on_sample_begin(batch)
-            s_outputs, s_dur = self._drv.invoke_sample(s_inputs, name=name_,
-                                                       profiler=profiler, mode=mode,
-                                                       callback=callback)
-            if batch == 0:
-                outputs = s_outputs
+                prog_bar.update(n_done)
+            end = min(batch + step, batch_size)
+            if use_batch:
+                self._drv.invoke_batch([in_[batch:end] for in_ in inputs],
+                                       [out_[batch:end] for out_ in outputs],
+                                       name=name_, profiler=profiler, mode=mode)
+                cont = True
             else:
+                s_inputs = [in_[batch:end] for in_ in inputs]
+                if callback:
+                    callback.on_sample_begin(batch)
+                s_outputs, s_dur = self._drv.invoke_sample(s_inputs, name=name_,
+                                                           profiler=profiler, mode=mode,
+                                                           callback=callback)
                 for idx, out_ in enumerate(s_outputs):
-                    outputs[idx] = np.append(outputs[idx], out_, axis=0)
-            if callback:
-                cont = callback.on_sample_end(batch, s_outputs, logs={'dur': s_dur})
+                    outputs[idx][batch:end] = out_
+                cont = callback.on_sample_end(batch, s_outputs, logs={'dur': s_dur}) if callback else True
+            if prog_bar:
+                prog_bar.update(end - n_done)
+            n_done = end
             if not cont:
                 break
+
+        if n_done != batch_size:
+            outputs = [out_[:n_done] for out_ in outputs]
+
         profiler['debug']['host_duration'] = (t.perf_counter() - start_time) * 1000.0
         profiler['info'] = self.get_info(name_)
+        profiler.close()
         if prog_bar:
             prog_bar.close()
 
+        if float_io:
+            if f_outputs is not None:
+                f_outputs = [out_[:n_done] for out_ in f_outputs]
+            outputs = self._dequantize_outputs(outputs, name_, out=f_outputs)
+
         return outputs, profiler
 
+    def _quantize_inputs(self, inputs, name, float_io=None):
+        """Quantize the float inputs of a quantized model, return the inputs and the float_io flag"""
+        # noqa: DAR101,DAR201,DAR401
+        from .ai_quantization import quantize_inputs
+
+        return quantize_inputs(inputs, self.get_input_infos(name), float_io)
+
+    def _dequantize_outputs(self, outputs, name, out=None):
+        """Return the outputs as float32 values"""  # noqa: DAR101,DAR201,DAR401
+        from .ai_quantization import dequantize_outputs
+
+        return dequantize_outputs(outputs, self.get_output_infos(name), out=out)
+
+    def _check_outputs(self, outputs, name, batch_size, dtype=None):
+        """Check the pre-allocated outputs or allocate them"""  # noqa: DAR101,DAR201,DAR401
+        if outputs is None:
+            return self._alloc_outputs(name, batch_size)
+        if not isinstance(outputs, list):
+            outputs = [outputs]
+        out_desc = self.get_output_infos(name)
+        if len(outputs) != len(out_desc):
+            msg = 'Output number is inconsistent {} instead {}'.format(len(outputs), len(out_desc))
+            raise InvalidParamError(msg)
+        for idx, ref in enumerate(out_desc):
+            shape_ = (batch_size,) + tuple(ref['shape'][1:])
+            type_ = np.dtype(ref['type'] if dtype is None else dtype)
+            if outputs[idx].shape != shape_ or outputs[idx].dtype != type_:
+                msg = 'invalid output #{} - {}/{} instead {}/{}'.format(idx + 1, outputs[idx].shape,
+                                                                       outputs[idx].dtype, shape_, type_)
+                raise InvalidParamError(msg)
+        return outputs
+
+    def _alloc_outputs(self, name, batch_size):
+        """Allocate the output tensors for the whole batch"""  # noqa: DAR101,DAR201,DAR401
+        return [np.empty((batch_size,) + tuple(o_['shape'][1:]), dtype=o_['type'])
+                for o_ in self.get_output_infos(name)]
+
     def generate_rnd_inputs(self, name=None, batch_size=4, rng=np.random.RandomState(42)):
         """Generate input data with random values"""  # noqa: DAR101,DAR201,DAR401
         if isinstance(name, AiRunnerSession):
@@ -693,6 +845,7 @@ class AiRunner:
             ses_.release()
             self._sessions.remove(ses_)
         self._names = []
+        self._signatures = dict()
         if self.is_connected:
             self._drv.disconnect()
             self._drv = None
@@ -728,6 +881,7 @@ class AiRunner:
                 self._names = self._drv.discover(flush=True)
                 for name_ in self._names:
                     self._sessions.append(AiRunnerSession(name_))
+                self._compile_signatures()
         except Exception as exc_:  # pylint: disable=broad-except
             msg_ = 'connection to "{}"/"{}" run-time fails\n {}'.format(desc, desc_, str(exc_))
             self._logger.debug(msg_)
@@ -0,0 +1,415 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+asyncio front-end for the AI runner (STM32 protobuf-based protocol)
+
+    runner = AsyncAiRunner()
+    await runner.connect('socket:localhost:10000')
+    outputs, profiler = await runner.invoke(inputs)
+    async for idx, s_outputs in runner.invoke_stream(inputs):
+        ...
+
+The socket domain is based on the asyncio streams, the blocking calls of the
+serial driver are delegated to a dedicated single-thread executor (one by
+board). The protocol is implemented by AiPbMsgCore (message layer w/o IO, the
+exchanges are generators yielding the IO requests), AsyncAiPbMsg executes them
+with the awaitable transports.
+"""
+
+import socket
+import asyncio
+import functools
+import collections
+import time as t
+from concurrent.futures import ThreadPoolExecutor
+
+from .ai_runner import AiRunner, AiRunnerSession
+from .ai_profiler import AiProfiler
+from .ai_runner import HwIOError, AiRunnerError, InvalidParamError
+from .pb_mgr_drv import AiPbMsg, AiPbMsgCore, _IO_READ
+
+
+class AsyncSocketTransport:
+    """Low-level IO driver - Client socket (asyncio streams)"""
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        self._hostname = None
+        self._port = 0
+        self._parent = None
+
+    def set_parent(self, parent):
+        """"Set parent object"""  # noqa: DAR101,DAR201,DAR401
+        self._parent = parent
+
+    @property
+    def is_connected(self):
+        """Indicate if the driver is connected"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._writer is not None
+
+    async def connect(self, desc=None, **kwargs):  # pylint: disable=unused-argument
+        """Open a connection"""  # noqa: DAR101,DAR201,DAR401
+        from .socket_hw_drv import socket_get_com_settings
+
+        self._hostname, self._port, msg_err = socket_get_com_settings(desc)
+        if self._hostname is None:
+            raise HwIOError(msg_err)
+        try:
+            self._reader, self._writer = await asyncio.open_connection(self._hostname, self._port)
+        except OSError as exc_:
+            raise HwIOError('{}:{} - {}'.format(self._hostname, self._port, str(exc_)))
+        sock = self._writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self.is_connected
+
+    def disconnect(self):
+        """Close the connection"""  # noqa: DAR101,DAR201,DAR401
+        if self._writer is not None:
+            self._writer.close()
+        self._reader, self._writer = None, None
+
+    async def read_exact(self, size, deadline=None):
+        """Read size bytes, an incomplete buffer is returned if the deadline is reached"""
+        # noqa: DAR101,DAR201,DAR401
+        timeout = None if deadline is None else max(0.0, deadline - t.monotonic())
+        try:
+            return await asyncio.wait_for(self._reader.readexactly(size), timeout)
+        except asyncio.TimeoutError:
+            return b''
+        except asyncio.IncompleteReadError as exc_:
+            raise HwIOError('Connection closed by the server ({} bytes received)'.format(len(exc_.partial)))
+
+    async def write(self, data):
+        """Write the data"""  # noqa: DAR101,DAR201,DAR401
+        self._writer.write(data)
+        await self._writer.drain()
+        return len(data)
+
+    def short_desc(self):
+        """Return human readable description"""  # noqa: DAR101,DAR201,DAR401
+        io_ = 'SOCKET(asyncio):' + str(self._hostname) + ':' + str(self._port)
+        return io_ + (':connected' if self.is_connected else ':not connected')
+
+
+class AsyncSerialTransport:
+    """Low-level IO driver - Serial COM (executor-backed adapter of the SerialHwDriver)"""
+
+    def __init__(self):
+        from .serial_hw_drv import SerialHwDriver
+
+        self._drv = SerialHwDriver()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._parent = None
+
+    def set_parent(self, parent):
+        """"Set parent object"""  # noqa: DAR101,DAR201,DAR401
+        self._parent = parent
+
+    @property
+    def is_connected(self):
+        """Indicate if the driver is connected"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._drv.is_connected
+
+    async def _run(self, func, *args, **kwargs):
+        """Execute a blocking function in the executor"""  # noqa: DAR101,DAR201,DAR401
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def connect(self, desc=None, **kwargs):
+        """Open a connection"""  # noqa: DAR101,DAR201,DAR401
+        # discovery of the COM ports relies on the blocking message layer (is_alive)
+        probe = AiPbMsg(self._parent, self._drv)
+        return await self._run(probe.connect, desc, **kwargs)
+
+    def disconnect(self):
+        """Close the connection"""  # noqa: DAR101,DAR201,DAR401
+        self._drv.disconnect()
+        self._executor.shutdown(wait=False)
+
+    async def read_exact(self, size, deadline=None):
+        """Read size bytes, an incomplete buffer is returned if the deadline is reached"""
+        # noqa: DAR101,DAR201,DAR401
+        return await self._run(self._drv.read_exact, size, deadline)
+
+    async def write(self, data):
+        """Write the data"""  # noqa: DAR101,DAR201,DAR401
+        return await self._run(self._drv.write, bytes(data))
+
+    def short_desc(self):
+        """Return human readable description"""  # noqa: DAR101,DAR201,DAR401
+        return self._drv.short_desc() + ' (executor)'
+
+
+class AsyncAiPbMsg(AiPbMsgCore):
+    """Class to handle the messages (protobuf-based) - asyncio IO driver"""
+
+    async def _run(self, gen):
+        """Execute an exchange (_gen_xx generator) with the IO driver, return its result"""
+        # noqa: DAR101,DAR201,DAR401
+        io_drv = self._io_drv
+        try:
+            req = next(gen)
+            while True:
+                if req[0] == _IO_READ:
+                    req = gen.send(await io_drv.read_exact(req[1], req[2]))
+                else:
+                    req = gen.send(await io_drv.write(req[1]))
+        except StopIteration as res:
+            return res.value
+
+    async def _iter_run(self, gen, ready):
+        """Execute an exchange, yield the items appended in ready as they are available"""
+        # noqa: DAR101,DAR201,DAR401
+        io_drv = self._io_drv
+        try:
+            req = next(gen)
+            while True:
+                while ready:
+                    yield ready.popleft()
+                if req[0] == _IO_READ:
+                    req = gen.send(await io_drv.read_exact(req[1], req[2]))
+                else:
+                    req = gen.send(await io_drv.write(req[1]))
+        except StopIteration:
+            pass
+        while ready:
+            yield ready.popleft()
+
+    async def connect(self, desc=None, **kwargs):
+        """Connect to the stm.ai run-time"""  # noqa: DAR101,DAR201,DAR401
+        if self._io_drv.is_connected:
+            return False
+        # the params are also passed to the transport (COM port discovery)
+        self._set_connect_params(dict(kwargs))
+        await self._io_drv.connect(desc, **kwargs)
+        if not self._io_drv.is_connected:
+            return False
+        if not await self.is_alive():
+            self._io_drv.disconnect()
+            raise HwIOError('{} - {}'.format('Invalid firmware', self._io_drv.short_desc()))
+        return True
+
+    def disconnect(self):
+        """Disconnect to the stm.ai run-time"""  # noqa: DAR101,DAR201,DAR401
+        self._reset()
+        self._io_drv.disconnect()
+
+    async def is_alive(self, timeout=500):
+        """"Indicate if the connection is always alive"""  # noqa: DAR101,DAR201,DAR401
+        try:
+            await self._run(self._gen_sync(timeout))
+        except (AiRunnerError, TimeoutError) as exc_:
+            self._logger.debug('is_alive() %s', str(exc_))
+            return False
+        return self._protocol_is_supported()
+
+    async def discover(self, flush=False):
+        """Build the list of the available model"""  # noqa: DAR101,DAR201,DAR401
+        return await self._run(self._gen_discover(flush))
+
+    async def invoke_sample(self, s_inputs, **kwargs):
+        """Invoke the model (sample mode)"""  # noqa: DAR101,DAR201,DAR401
+        return await self._run(self._gen_invoke_sample(s_inputs, **kwargs))
+
+    async def invoke_batch(self, inputs, outputs, **kwargs):
+        """Invoke the model (batch mode), results are written in outputs"""  # noqa: DAR101,DAR201,DAR401
+        return await self._run(self._gen_invoke_batch(inputs, outputs, **kwargs))
+
+    async def invoke_stream(self, inputs, **kwargs):
+        """Invoke the model, yield (batch, outputs) for each sample"""  # noqa: DAR101,DAR201,DAR401
+
+        name = kwargs.pop('name', None)
+        profiler = kwargs.pop('profiler', None)
+
+        model = self._get_model(name)
+        if self._use_stream(inputs):
+            ready = collections.deque()
+            gen = self._gen_stream(inputs, model, profiler,
+                                   lambda batch, s_outputs, _: ready.append((batch, s_outputs)))
+            async for batch, s_outputs in self._iter_run(gen, ready):
+                yield batch, s_outputs
+        else:
+            for batch in range(inputs[0].shape[0]):
+                s_outputs, _ = await self._run(self._gen_invoke([in_[batch:batch + 1] for in_ in inputs], model,
+                                                                profiler, AiRunner.Mode.IO_ONLY))
+                yield batch, s_outputs
+
+
+def _async_driver_create(parent, desc):
+    """Return the async driver for the given descriptor (socket or serial domain)"""
+    # noqa: DAR101,DAR201,DAR401
+    domain, desc_ = None, desc
+    if desc is not None and isinstance(desc, str):
+        desc = desc.strip()
+        split_ = desc.split(':')
+        if split_[0]:
+            domain = split_[0].lower()
+            desc_ = desc[len(domain + ':'):]
+        else:
+            desc_ = desc[1:]
+
+    if domain == 'socket':
+        return AsyncAiPbMsg(parent, AsyncSocketTransport()), desc_
+    if domain in (None, 'serial'):
+        return AsyncAiPbMsg(parent, AsyncSerialTransport()), desc_
+
+    return None, 'invalid/unsupported "{}:{}" descriptor (async runner)'.format(domain, desc_)
+
+
+class AsyncAiRunner(AiRunner):
+    """asyncio front-end of the AI runner (STM32 boards, socket and serial domains)
+
+    !!! example
+        ```python
+           from stm_ai_runner.ai_runner_async import AsyncAiRunner
+           runner = AsyncAiRunner()
+           await runner.connect('socket:localhost:10000')
+           ...
+           outputs, _ = await runner.invoke(input_data)  # invoke the model
+        ```
+    """
+
+    async def connect(self, desc=None, **kwargs):
+        """Connect to a given runtime defined by desc"""  # noqa: DAR101,DAR201,DAR401
+
+        self._logger.debug("connect(desc='%s')", str(desc))
+        self._release_all()
+
+        self._drv, desc_ = _async_driver_create(self, desc)
+        if self._drv is None:
+            self._last_err = desc_
+            self._logger.debug(desc_)
+            return False
+
+        try:
+            await self._drv.connect(desc_, **kwargs)
+            if not self._drv.is_connected:
+                self._release_all()
+            else:
+                await self.discover(flush=True)
+        except Exception as exc_:  # pylint: disable=broad-except
+            msg_ = 'connection to "{}"/"{}" run-time fails\n {}'.format(desc, desc_, str(exc_))
+            self._logger.debug(msg_)
+            self._last_err = msg_
+            self._release_all()
+
+        return self.is_connected
+
+    async def discover(self, flush=False):
+        """Return the c-names of the available models"""  # noqa: DAR101,DAR201,DAR401
+        if not self.is_connected:
+            return []
+        self._names = await self._drv.discover(flush=flush)
+        self._sessions = [AiRunnerSession(name_) for name_ in self._names]
+        self._compile_signatures()
+        return self._names
+
+    def _prepare(self, inputs, kwargs, callback=None):
+        """Check the parameters, return the c-name, the inputs, the profiler and the float_io flag"""
+        # noqa: DAR101,DAR201,DAR401
+        name_ = self._check_name(kwargs.pop('name', None))
+        if name_ is None:
+            raise InvalidParamError('No model is available')
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+        inputs, float_io = self._quantize_inputs(inputs, name_, kwargs.pop('float_io', None))
+        inputs = self._check_inputs(inputs, name_, coerce=kwargs.pop('coerce', False),
+                                    reshape=kwargs.pop('reshape', False))
+        profiler = AiProfiler(inputs[0].shape[0], spill_dir=kwargs.pop('spill_dir', None),
+                              keep_features=not getattr(callback, 'stores_features', False))
+        return name_, inputs, profiler, float_io
+
+    async def invoke(self, inputs, **kwargs):
+        """
+        Generate output predictions, invoke the c-network run-time (batch mode)
+
+        Parameters
+        ----------
+        inputs
+            Input samples. A Numpy array, or a list of arrays in case the model
+            has multiple inputs.
+        kwargs
+            name, mode, callback, spill_dir, coerce, reshape and float_io (see
+            AiRunner.invoke())
+
+        Returns
+        -------
+        tuple
+            list of numpy arrays (one by outputs) and the profiler
+        """
+        callback = kwargs.pop('callback', None)
+        name_, inputs, profiler, float_io = self._prepare(inputs, kwargs, callback)
+        mode = self._align_requested_mode(kwargs.pop('mode', AiRunner.Mode.IO_ONLY))
+
+        batch_size = inputs[0].shape[0]
+        start_time = t.perf_counter()
+        outputs = self._alloc_outputs(name_, batch_size)
+
+        n_done = 0
+        if callback is None:
+            for batch in range(0, batch_size, self.BATCH_CHUNK_SIZE):
+                end = min(batch + self.BATCH_CHUNK_SIZE, batch_size)
+                await self._drv.invoke_batch([in_[batch:end] for in_ in inputs],
+                                             [out_[batch:end] for out_ in outputs],
+                                             name=name_, profiler=profiler, mode=mode)
+                n_done = end
+        else:
+            for batch in range(batch_size):
+                callback.on_sample_begin(batch)
+                s_outputs, s_dur = await self._drv.invoke_sample([in_[batch:batch + 1] for in_ in inputs],
+                                                                 name=name_, profiler=profiler,
+                                                                 mode=mode, callback=callback)
+                for idx, out_ in enumerate(s_outputs):
+                    outputs[idx][batch:batch + 1] = out_
+                n_done = batch + 1
+                if not callback.on_sample_end(batch, s_outputs, logs={'dur': s_dur}):
+                    break
+
+        if n_done != batch_size:
+            outputs = [out_[:n_done] for out_ in outputs]
+
+        profiler['debug']['host_duration'] = (t.perf_counter() - start_time) * 1000.0
+        profiler['info'] = self.get_info(name_)
+        profiler.close()
+
+        if float_io:
+            outputs = self._dequantize_outputs(outputs, name_)
+
+        return outputs, profiler
+
+    async def invoke_stream(self, inputs, **kwargs):
+        """
+        Generate output predictions, the results are yielded sample by sample
+
+        The streaming run mode is used if supported by the device, else the
+        samples are invoked one by one (IO_ONLY mode).
+
+        Parameters
+        ----------
+        inputs
+            Input samples. A Numpy array, or a list of arrays in case the model
+            has multiple inputs.
+        kwargs
+            name, profiler (dict updated with the durations) and float_io (see
+            AiRunner.invoke())
+
+        Yields
+        ------
+        tuple
+            index of the sample and list of numpy arrays (one by outputs)
+        """
+        external_prof = kwargs.pop('profiler', None)
+        name_, inputs, profiler, float_io = self._prepare(inputs, kwargs)
+        profiler = profiler if external_prof is None else external_prof
+
+        async for batch, s_outputs in self._drv.invoke_stream(inputs, name=name_, profiler=profiler):
+            yield batch, self._dequantize_outputs(s_outputs, name_) if float_io else s_outputs
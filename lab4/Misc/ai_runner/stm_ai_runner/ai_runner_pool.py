@@ -0,0 +1,320 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Pool of runners - a data set is sharded across multiple boards
+
+All connected runtimes should embed the same c-model (checked with the hash
+reported by get_info()). The shards are dispatched on a thread pool (one
+worker by runner), the outputs and the profiler records are merged in the
+original order.
+"""
+
+import time as t
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .ai_runner import AiRunner, get_logger
+from .ai_profiler import AiProfiler, merge_profiles
+from .ai_runner import InvalidParamError, InvalidModelError
+from .ai_quantization import quantize_inputs, dequantize_outputs
+
+
+class AiRunnerPool:
+    """Pool of AiRunner objects (one by board)"""
+
+    def __init__(self, logger=None, debug=False, verbosity=0):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        logger
+            Logger object which must be used
+        debug
+            Logger is created with DEBUG level if True
+        verbosity
+            Logger is created with INFO level if > 0
+        """
+        if logger is None:
+            logger = get_logger(self.__class__.__name__, debug, verbosity)
+        self._logger = logger
+        self._debug = debug
+        self._runners = []  # list of (desc, AiRunner)
+        self._rejected = []  # list of (desc, reason)
+        self._hash = None
+        self._last_report = None
+
+    def get_logger(self):
+        """Return the logger object"""  # noqa: DAR101,DAR201,DAR401
+        return self._logger
+
+    def __len__(self):
+        return len(self._runners)
+
+    def __repr__(self):
+        return self.short_desc()
+
+    def __str__(self):
+        return self.short_desc()
+
+    def short_desc(self):
+        """Return human readable description"""  # noqa: DAR101,DAR201,DAR401
+        return 'AiRunnerPool ({} runtime(s))'.format(len(self._runners))
+
+    @property
+    def is_connected(self):
+        """Indicate if at least one runtime is connected"""
+        # noqa: DAR101,DAR201,DAR401
+        return bool(self._runners)
+
+    @property
+    def runners(self):
+        """Return the list of the connected runners"""
+        # noqa: DAR101,DAR201,DAR401
+        return [runner for _, runner in self._runners]
+
+    @property
+    def rejected(self):
+        """Return the list of the rejected runtimes (desc, reason)"""
+        # noqa: DAR101,DAR201,DAR401
+        return list(self._rejected)
+
+    @property
+    def names(self):
+        """Return the c-names of the available models"""
+        # noqa: DAR101,DAR201,DAR401
+        return self._runners[0][1].names if self._runners else []
+
+    @staticmethod
+    def discover_devices(sockets=None):
+        """
+        Return the descriptors of the possible runtimes
+
+        Parameters
+        ----------
+        sockets
+            list of the socket descriptions ('hostname:port') to include
+
+        Returns
+        -------
+        list
+            list of str (descriptor for the AiRunner.connect() function)
+        """
+        from .serial_hw_drv import serial_device_discovery
+
+        descs = ['serial:' + dev['device'] for dev in serial_device_discovery()]
+        descs += ['socket:' + str(sock_) for sock_ in (sockets if sockets else [])]
+        return descs
+
+    def _connect_runner(self, desc, kwargs):
+        """Create and connect a runner"""  # noqa: DAR101,DAR201,DAR401
+        runner = AiRunner(logger=self._logger, debug=self._debug)
+        if runner.connect(desc, **kwargs):
+            return runner, None
+        return None, runner.get_error()
+
+    def connect(self, descs=None, sockets=None, name=None, **kwargs):
+        """
+        Connect all the live runtimes
+
+        Parameters
+        ----------
+        descs
+            list of descriptors, if None the serial COM ports are discovered
+        sockets
+            list of the socket descriptions ('hostname:port') to include if descs is None
+        name
+            c-name of the model used to check the compatibility
+        kwargs
+            parameters for the AiRunner.connect() function
+
+        Returns
+        -------
+        bool
+            True if at least one runtime is connected
+
+        Raises
+        ------
+        InvalidModelError
+            no runtime is available
+        """
+        self.disconnect()
+        if descs is None:
+            descs = self.discover_devices(sockets)
+
+        # the boards are probed in parallel (discovery/sync can be long)
+        with ThreadPoolExecutor(max_workers=max(1, len(descs))) as pool:
+            results = list(pool.map(lambda desc_: self._connect_runner(desc_, kwargs), descs))
+
+        for desc, (runner, err) in zip(descs, results):
+            if runner is None:
+                self._logger.debug('pool: "%s" is not available (%s)', desc, err)
+                continue
+            hash_ = runner.get_info(name).get('hash', None)
+            if self._hash is None:
+                self._hash = hash_
+            if hash_ != self._hash:
+                msg_ = 'model hash "{}" instead "{}"'.format(hash_, self._hash)
+                self._logger.warning('pool: "%s" is rejected - %s', desc, msg_)
+                self._rejected.append((desc, msg_))
+                runner.disconnect()
+                continue
+            self._logger.debug('pool: "%s" is connected (%s)', desc, runner)
+            self._runners.append((desc, runner))
+
+        if not self._runners:
+            raise InvalidModelError('No compatible runtime is available ({} probed)'.format(len(descs)))
+
+        return self.is_connected
+
+    def disconnect(self):
+        """Disconnect all the runtimes"""  # noqa: DAR101,DAR201,DAR401
+        for _, runner in self._runners:
+            runner.disconnect()
+        self._runners = []
+        self._rejected = []
+        self._hash = None
+        return True
+
+    def get_info(self, name=None):
+        """Get model details (first runtime)"""  # noqa: DAR101,DAR201,DAR401
+        return self._runners[0][1].get_info(name) if self._runners else dict()
+
+    def get_input_infos(self, name=None):
+        """Get model input details"""  # noqa: DAR101,DAR201,DAR401
+        return self._runners[0][1].get_input_infos(name) if self._runners else list()
+
+    def get_output_infos(self, name=None):
+        """Get model output details"""  # noqa: DAR101,DAR201,DAR401
+        return self._runners[0][1].get_output_infos(name) if self._runners else list()
+
+    def generate_rnd_inputs(self, name=None, batch_size=4, rng=np.random.RandomState(42)):
+        """Generate input data with random values"""  # noqa: DAR101,DAR201,DAR401
+        return self._runners[0][1].generate_rnd_inputs(name, batch_size, rng)
+
+    def invoke(self, inputs, **kwargs):
+        """
+        Generate output predictions, the samples are sharded across the runtimes
+
+        Parameters
+        ----------
+        inputs
+            Input samples. A Numpy array, or a list of arrays in case the model
+            has multiple inputs.
+        kwargs
+            name, mode, float_io (see AiRunner.invoke()) and shard_size (number of
+            samples by shard, default: batch_size / (4 x number of runtimes))
+
+        Returns
+        -------
+        tuple
+            list of numpy arrays (one by outputs) and the merged profiler
+
+        Raises
+        ------
+        InvalidParamError
+            callback is not supported or no runtime is connected
+        """
+        if not self._runners:
+            raise InvalidParamError('No runtime is connected')
+        if kwargs.pop('callback', None) is not None:
+            raise InvalidParamError('callback is not supported by the pool')
+
+        name = kwargs.pop('name', None)
+        mode = kwargs.pop('mode', AiRunner.Mode.IO_ONLY)
+
+        if not isinstance(inputs, list):
+            inputs = [inputs]
+
+        # float inputs are quantized once, the shards return the quantized
+        # values which are de-quantized after the merge
+        inputs, float_io = quantize_inputs(inputs, self.get_input_infos(name), kwargs.pop('float_io', None))
+
+        batch_size = inputs[0].shape[0]
+        n_runners = len(self._runners)
+        shard_size = kwargs.pop('shard_size', None)
+        if not shard_size:
+            shard_size = max(1, -(-batch_size // (4 * n_runners)))
+
+        outputs = [np.empty((batch_size,) + tuple(o_['shape'][1:]), dtype=o_['type'])
+                   for o_ in self.get_output_infos(name)]
+
+        shards = queue.Queue()
+        for start in range(0, batch_size, shard_size):
+            shards.put((start, min(start + shard_size, batch_size)))
+
+        profiles = {}
+        usage = [{'desc': desc, 'samples': 0, 'busy': 0.0} for desc, _ in self._runners]
+        lock = threading.Lock()
+
+        def _worker(idx):
+            runner = self._runners[idx][1]
+            while True:
+                try:
+                    start, end = shards.get_nowait()
+                except queue.Empty:
+                    return
+                start_time = t.perf_counter()
+                s_outputs, s_prof = runner.invoke([in_[start:end] for in_ in inputs], name=name,
+                                                  mode=mode, float_io=False, disable_pb=True)
+                busy = (t.perf_counter() - start_time) * 1000.0
+                for i_out, out_ in enumerate(s_outputs):
+                    outputs[i_out][start:end] = out_
+                with lock:
+                    profiles[start] = s_prof
+                    usage[idx]['samples'] += end - start
+                    usage[idx]['busy'] += busy
+
+        start_time = t.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_runners) as pool:
+            for future in [pool.submit(_worker, idx) for idx in range(n_runners)]:
+                future.result()
+        duration = (t.perf_counter() - start_time) * 1000.0
+
+        profiler = AiProfiler()
+        profiler['info'] = self.get_info(name)
+        profiler['debug']['host_duration'] = duration
+        merge_profiles([profiles[key] for key in sorted(profiles)], profiler)
+
+        for item in usage:
+            item['utilisation'] = item['busy'] * 100.0 / duration if duration else 0.0
+        profiler['pool'] = {
+            'samples_per_s': batch_size * 1000.0 / duration if duration else 0.0,
+            'shard_size': shard_size,
+            'devices': usage,
+        }
+        self._last_report = profiler['pool']
+
+        if float_io:
+            outputs = dequantize_outputs(outputs, self.get_output_infos(name))
+
+        return outputs, profiler
+
+    def summary(self, print_fn=None):
+        """Prints a summary of the pool and of the last invoke"""  # noqa: DAR101,DAR201,DAR401
+
+        print_fn = print if print_fn is None else print_fn
+
+        print_fn('Summary "{}" - {} runtime(s), hash={}'.format(self.short_desc(), len(self._runners),
+                                                               self._hash))
+        print_fn('-' * 80)
+        for desc, runner in self._runners:
+            print_fn('{:20s} : {}'.format(desc, runner))
+        for desc, reason in self._rejected:
+            print_fn('{:20s} : rejected - {}'.format(desc, reason))
+        if self._last_report:
+            print_fn('-' * 80)
+            print_fn('{:20s} : {:.1f}'.format('samples/s', self._last_report['samples_per_s']))
+            for dev_ in self._last_report['devices']:
+                print_fn('{:20s} : {} samples, {:.1f}% busy'.format(dev_['desc'], dev_['samples'],
+                                                                    dev_['utilisation']))
+        print_fn('-' * 80)
+        print_fn('')
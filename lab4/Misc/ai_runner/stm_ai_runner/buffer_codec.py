@@ -0,0 +1,191 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+Encoding of the aiBufferByteMsg.datas field (COM protocol 2.5, CAP_COMPRESSED_DATAS)
+
+    ENC_RAW         raw values (little-endian)
+    ENC_ZERO_RLE    zero-run RLE, the "zero" value is the zero-point of the buffer
+    ENC_DELTA_RLE   delta coding by channel (integer types, wrap-around) followed
+                    by the zero-run RLE (zero: 0)
+
+Zero-run RLE stream (little-endian), a run is N zero values followed by M literal
+values, the run lengths are stored with the smallest unsigned type (idx_size: 1, 2
+or 4 bytes):
+
+    uint32 n_runs | uint8 idx_size | idx zeros[n_runs] | idx literals[n_runs] | literal values
+
+The encoding and the decoding are vectorized (numpy), no loop by value or by run.
+An encoding is only tried if a sample of the values (strided) contains enough
+zero values (zero-point or zero deltas), the raw values of a not compressible
+buffer are sent without a full encoding pass.
+"""
+
+import numpy as np
+
+from .ai_runner import InvalidMsgError
+from . import stm32msg_pb2 as stm32msg
+
+
+_RLE_HEADER_SIZE = 5
+_SAMPLE_SIZE = 256  # number of values checked before an encoding
+_MIN_ZERO_RATIO = 0.125  # min ratio of zero values in the sample to try an encoding
+
+
+def _idx_type(max_len):
+    """Return the smallest type for the run lengths"""  # noqa: DAR101,DAR201,DAR401
+    if max_len <= 0xFF:
+        return np.dtype('u1')
+    return np.dtype('<u2') if max_len <= 0xFFFF else np.dtype('<u4')
+
+
+def _rle_encode(values, zero):
+    """Zero-run RLE of a flat array"""  # noqa: DAR101,DAR201,DAR401
+    is_lit = values != zero
+    # boundaries of the literal runs
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], is_lit, [False])).view(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    zeros = starts - np.concatenate(([0], ends[:-1]))
+    lits = ends - starts
+    tail = values.size - (ends[-1] if ends.size else 0)
+    if tail:  # trailing zero values, run w/o literal
+        zeros = np.append(zeros, tail)
+        lits = np.append(lits, 0)
+    idx_t = _idx_type(max(zeros.max(initial=0), lits.max(initial=0)))
+    header = np.uint32(zeros.size).astype('<u4').tobytes() + bytes([idx_t.itemsize])
+    return b''.join([header, zeros.astype(idx_t).tobytes(), lits.astype(idx_t).tobytes(),
+                     values[is_lit].tobytes()])
+
+
+def _rle_decode(datas, dtype, count, zero):
+    """Decode a zero-run RLE stream, return a flat array"""  # noqa: DAR101,DAR201,DAR401
+    if len(datas) < _RLE_HEADER_SIZE or datas[4] not in (1, 2, 4):
+        raise InvalidMsgError('Invalid zero-run RLE stream')
+    n_runs = int(np.frombuffer(datas, dtype='<u4', count=1)[0])
+    idx_t = np.dtype('<u{}'.format(datas[4]))
+    pos = _RLE_HEADER_SIZE
+    if len(datas) < pos + 2 * n_runs * idx_t.itemsize:
+        raise InvalidMsgError('Invalid zero-run RLE stream')
+    zeros = np.frombuffer(datas, dtype=idx_t, count=n_runs, offset=pos).astype(np.int64)
+    pos += n_runs * idx_t.itemsize
+    lits = np.frombuffer(datas, dtype=idx_t, count=n_runs, offset=pos).astype(np.int64)
+    pos += n_runs * idx_t.itemsize
+    literals = np.frombuffer(datas, dtype=dtype, offset=pos)
+    if int(zeros.sum() + lits.sum()) != count or literals.size != int(lits.sum()):
+        raise InvalidMsgError('Invalid zero-run RLE stream')
+    values = np.full(count, zero, dtype=dtype)
+    if literals.size:
+        # first position of the literals of each run
+        lit_starts = np.cumsum(zeros + lits) - lits
+        first_lit = np.cumsum(lits) - lits
+        values[np.repeat(lit_starts - first_lit, lits) + np.arange(literals.size)] = literals
+    return values
+
+
+def _delta_encode(values, channels):
+    """Delta coding by channel (wrap-around)"""  # noqa: DAR101,DAR201,DAR401
+    values = values.reshape(-1, channels)
+    deltas = values.copy()
+    deltas[1:] = np.diff(values, axis=0)
+    return deltas.ravel()
+
+
+def _delta_decode(deltas, channels):
+    """Inverse of _delta_encode()"""  # noqa: DAR101,DAR201,DAR401
+    return np.cumsum(deltas.reshape(-1, channels), axis=0, dtype=deltas.dtype).ravel()
+
+
+def _zero_ratio(values, zero, channels=0):
+    """Return the ratio of zero values (or zero deltas by channel) of a strided sample"""
+    # noqa: DAR101,DAR201,DAR401
+    step = max(1, values.size // _SAMPLE_SIZE)
+    if channels and values.size > channels:
+        is_zero = values[channels::step] == values[:values.size - channels:step]
+    else:  # the deltas of a single row are the values
+        is_zero = values[::step] == zero
+    return float(np.count_nonzero(is_zero)) / is_zero.size
+
+
+def encode_datas(data, zero_point=0, encodings=None):
+    """
+    Encode the values of a buffer, the smallest encoding is selected
+
+    Parameters
+    ----------
+    data
+        numpy array, last dimension is the channel dimension
+    zero_point
+        value used for the zero-runs (ENC_ZERO_RLE)
+    encodings
+        candidate encodings (default: all), ENC_RAW is always a candidate
+
+    Returns
+    -------
+    tuple
+        (encoding, datas)
+    """
+    values = np.ascontiguousarray(data, dtype=np.dtype(data.dtype.type).newbyteorder('<')).ravel()
+    best = (stm32msg.ENC_RAW, values.tobytes())
+    if encodings is None:
+        encodings = [stm32msg.ENC_ZERO_RLE, stm32msg.ENC_DELTA_RLE]
+    if not values.size:
+        return best
+    for encoding in encodings:
+        if encoding == stm32msg.ENC_ZERO_RLE:
+            if _zero_ratio(values, values.dtype.type(zero_point)) < _MIN_ZERO_RATIO:
+                continue
+            datas = _rle_encode(values, values.dtype.type(zero_point))
+        elif encoding == stm32msg.ENC_DELTA_RLE and np.issubdtype(values.dtype, np.integer):
+            channels = data.shape[-1] if data.ndim else 1
+            if _zero_ratio(values, 0, channels) < _MIN_ZERO_RATIO:
+                continue
+            datas = _rle_encode(_delta_encode(values, channels), values.dtype.type(0))
+        else:
+            continue
+        if len(datas) < len(best[1]):
+            best = (encoding, datas)
+    return best
+
+
+def decode_datas(datas, encoding, dtype, shape, zero_point=0):
+    """
+    Decode the values of a buffer
+
+    Parameters
+    ----------
+    datas
+        encoded values (bytes)
+    encoding
+        ENC_XX value
+    dtype
+        numpy type of the values
+    shape
+        shape of the buffer, last dimension is the channel dimension
+    zero_point
+        value used for the zero-runs (ENC_ZERO_RLE)
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with the requested shape
+
+    Raises
+    ------
+    InvalidMsgError
+        Invalid or unsupported encoding
+    """
+    dtype = np.dtype(dtype).newbyteorder('<')
+    count = int(np.prod(shape))
+    if encoding == stm32msg.ENC_RAW:
+        return np.reshape(np.frombuffer(datas, dtype=dtype), shape)
+    if encoding == stm32msg.ENC_ZERO_RLE:
+        values = _rle_decode(datas, dtype, count, dtype.type(zero_point))
+    elif encoding == stm32msg.ENC_DELTA_RLE:
+        values = _delta_decode(_rle_decode(datas, dtype, count, dtype.type(0)), shape[-1])
+    else:
+        raise InvalidMsgError('Unsupported encoding: {}'.format(encoding))
+    return np.reshape(values, shape)
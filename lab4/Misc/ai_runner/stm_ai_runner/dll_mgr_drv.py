@@ -11,6 +11,7 @@ Driver to manage the DLL (generated for the X86 validation)
 
 import ctypes as ct
 import os
+import mmap
 import fnmatch
 import time as t
 import platform
@@ -25,6 +26,7 @@ from .ai_runner import AiRunnerDriver, AiRunner
 from .ai_runner import HwIOError, AiRunnerError
 from .stm_ai_utils import stm_ai_error_to_str, AiBufferFormat
 from .stm_ai_utils import stm_ai_node_type_to_str, RT_STM_AI_NAME
+from .ai_model_info import AiModelInfo
 
 _AI_MAGIC_MARKER = 0xA1FACADE
 
@@ -575,9 +577,9 @@ class AiDllBackend:
         """Return list with the capabilities"""  # noqa: DAR101,DAR201,DAR401
         if self._shared_obs_lib is not None:
             return [AiRunner.Caps.IO_ONLY, AiRunner.Caps.PER_LAYER,
-                    AiRunner.Caps.PER_LAYER_WITH_DATA]
+                    AiRunner.Caps.PER_LAYER_WITH_DATA, AiRunner.Caps.BATCH]
         else:
-            return [AiRunner.Caps.IO_ONLY]
+            return [AiRunner.Caps.IO_ONLY, AiRunner.Caps.BATCH]
 
     def release(self):
         """Release, upload the shared libraries"""  # noqa: DAR101,DAR201,DAR401
@@ -593,6 +595,83 @@ class AiDllBackend:
         self.release()
 
 
+def _to_c_ptr(arr):
+    """Return the address of the ndarray data as an ai_u8 pointer"""  # noqa: DAR101,DAR201,DAR401
+    return ct.cast(arr.ctypes.data, ct.POINTER(ct.c_uint8))
+
+
+def _act_view(buffer, shape, dtype):
+    """Return a ndarray mapped on a buffer located in the activations buffer"""  # noqa: DAR101,DAR201,DAR401
+    size = np.dtype(dtype).itemsize * int(np.prod(shape))
+    data = ct.cast(buffer.data, ct.POINTER(ct.c_uint8 * size))
+    bytebuf = np.ctypeslib.as_array(data.contents, (size, ))
+    return np.reshape(np.frombuffer(bytebuf, dtype), shape)
+
+
+class _AiIoArena:
+    """IO buffers of the c-model, built once and reused by each call
+
+    For each input/output, the ndarray view (located in the activations
+    buffer or allocated by the arena for the outputs) and the associated
+    AiBuffer arrays passed to ai_network_run() are created one time. The
+    'data' fields of the AiBuffer objects are aliased (c_void_p) to update
+    the pointers w/o new ctypes objects.
+    """
+
+    def __init__(self, info, io_from_act=True):
+        """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        self.in_act, self.in_views, in_buffers = [], [], []
+        for idx in range(info.n_inputs):
+            in_info = info.inputs[idx]
+            shape = (1, in_info.height, in_info.width, in_info.channels)
+            is_act = bool(in_info.data) and io_from_act
+            view = _act_view(in_info, shape, AiBufferFormat.to_np_type(in_info.format)) if is_act else None
+            self.in_act.append(is_act)
+            self.in_views.append(view)
+            in_buffers.append(AiBuffer(in_info.format, *shape,
+                                       data=_to_c_ptr(view) if is_act else None))
+
+        self.out_act, self.out_views, out_buffers = [], [], []
+        for idx in range(info.n_outputs):
+            out_info = info.outputs[idx]
+            shape = (1, out_info.height, out_info.width, out_info.channels)
+            dtype = AiBufferFormat.to_np_type(out_info.format)
+            is_act = bool(out_info.data) and io_from_act
+            if is_act:
+                view = _act_view(out_info, shape, dtype)
+            else:
+                view = np.require(np.zeros(shape, dtype=dtype), dtype=dtype,
+                                  requirements=['C', 'O', 'W', 'A'])
+            self.out_act.append(is_act)
+            self.out_views.append(view)
+            out_buffers.append(AiBuffer(out_info.format, *shape, data=_to_c_ptr(view)))
+
+        self.in_buffers = (AiBuffer * len(in_buffers))(*in_buffers)
+        self.out_buffers = (AiBuffer * len(out_buffers))(*out_buffers)
+
+        self.in_view_addrs = [view.ctypes.data if view is not None else None for view in self.in_views]
+        self.out_view_addrs = [view.ctypes.data for view in self.out_views]
+        self.in_addrs = self._data_aliases(self.in_buffers)
+        self.out_addrs = self._data_aliases(self.out_buffers)
+
+    @staticmethod
+    def _data_aliases(buffers):
+        """Return the c_void_p objects aliasing the 'data' fields"""  # noqa: DAR101,DAR201,DAR401
+        return [ct.c_void_p.from_buffer(buffers, idx * ct.sizeof(AiBuffer) + AiBuffer.data.offset)
+                for idx in range(len(buffers))]
+
+    @property
+    def user_io(self):
+        """Indicate if all the IO buffers are provided by the user"""
+        # noqa: DAR101,DAR201,DAR401
+        return not any(self.in_act) and not any(self.out_act)
+
+    def set_n_batches(self, n_batches):
+        """Set the number of samples of the IO buffers"""  # noqa: DAR101,DAR201,DAR401
+        for buffer in list(self.in_buffers) + list(self.out_buffers):
+            buffer.n_batches = n_batches
+
+
 class AiDllDriver(AiRunnerDriver):
     """Class to handle the DLL"""
 
@@ -604,11 +683,16 @@ class AiDllDriver(AiRunnerDriver):
         self._activations = None
         self._io_from_act = True
         self._info = None  # cache the description of the models
+        self._model_info = None  # cache the descriptor of the model (AiModelInfo)
         self._s_dur = 0.0
         self._profiler = None
         self._callback = None
         self._weights_ptr_map = None
         self._buffers_data = None
+        self._weights_maps = []  # mmap objects of the binary files (read-only)
+        self._mmap_weights = True
+        self._io_arenas = dict()  # IO buffers, key: io_from_act
+        self._max_batches = None  # max number of samples by ai_network_run() call, None: unknown
         self._mode = AiRunner.Mode.IO_ONLY
         self.ghosted_observer_io_node_cb = None
         super(AiDllDriver, self).__init__(parent)
@@ -641,17 +725,14 @@ class AiDllDriver(AiRunnerDriver):
 
         size, count = sum([len(b) for b in buffers_data]), len(buffers_data) + 2
 
-        # Create list of c-type object with the provided buffers
-        #  note: minimum 8-bytes size is requested to map a bytearray
-        buffers = []
-        for i, buffer in enumerate(buffers_data):
-            if len(buffer) < 8:  # minimum size should be 8 for ctype map
-                buffers_data[i] = buffer + bytearray(8 - len(buffer))
-            buffers.append((ct.POINTER(ct.c_uint8 * len(buffers_data[i]))).from_buffer(buffers_data[i]))
+        # ndarray objects are used to retrieve the address of the provided buffers
+        #  (writable bytearray or read-only mmap objects)
+        #  note: they are returned to be owned (ref_count>0) by the caller
+        views = [np.frombuffer(buffer, dtype=np.uint8) for buffer in buffers_data]
 
         if len(buffers_data) == 1:
             # As a simple buffer(binary format) w/o remap entries
-            return ct.cast(ct.addressof(buffers[0]), ct.POINTER(ct.c_uint8)), None
+            return ct.cast(views[0].ctypes.data, ct.POINTER(ct.c_uint8)), views
 
         msg = f' Building the c-remap table, nb_entry=1+{count - 2}+1 ({size} bytes)'
         self._logger.debug(msg)
@@ -663,13 +744,26 @@ class AiDllDriver(AiRunnerDriver):
         #  note: the params_ptr_map object is returned to be owned (ref_count>0) by the caller
         #        before to use it by the DLL.
         buffers_ptr = [magic_marker]
-        buffers_ptr += [ct.cast(ct.addressof(b), ct.POINTER(ct.c_uint8)) for b in buffers]
+        buffers_ptr += [ct.cast(v.ctypes.data, ct.POINTER(ct.c_uint8)) for v in views]
         buffers_ptr += [magic_marker]
 
         params_ptr_map = (ct.POINTER(ct.c_uint8) * count)(*buffers_ptr)
 
         return (ct.cast(ct.addressof(params_ptr_map), ct.POINTER(ct.c_uint8)),
-                params_ptr_map)
+                (params_ptr_map, views))
+
+    def _load_weights_file(self, file_name):
+        """Return the content of a binary file (read-only mmap object or bytearray)"""
+        # noqa: DAR101,DAR201,DAR401
+        with open(file_name, 'rb') as bin_file:
+            if self._mmap_weights and os.path.getsize(file_name):
+                # pages are shared (page cache) by the processes using the same file
+                self._logger.debug(' mapping weights from binary file: {}'.format(file_name))
+                w_map = mmap.mmap(bin_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._weights_maps.append(w_map)
+                return w_map
+            self._logger.debug(' loading weights from binary file: {}'.format(file_name))
+            return bytearray(bin_file.read())
 
     def _set_params_data(self, params, weights):
         """Set weights buffer"""  # noqa: DAR101,DAR201,DAR401
@@ -691,9 +785,11 @@ class AiDllDriver(AiRunnerDriver):
 
         # Use the data from a binary file
         if isinstance(weights, str) and weights.endswith('.bin') and os.path.isfile(weights):
-            self._logger.debug(' loading weights from binary file: {}'.format(weights))
-            with open(weights, 'rb') as bin_file:
-                self._buffers_data = [bytearray(bin_file.read())]
+            self._buffers_data = [self._load_weights_file(weights)]
+        # Use the data from a list of binary files
+        elif isinstance(weights, list) and weights and\
+                all([isinstance(b, str) and os.path.isfile(b) for b in weights]):
+            self._buffers_data = [self._load_weights_file(b) for b in weights]
         # Use the data from a simple bytearray object
         elif isinstance(weights, bytearray):
             self._logger.debug(' loading weights from bytearray object')
@@ -742,6 +838,7 @@ class AiDllDriver(AiRunnerDriver):
         dll_name = kwargs.pop('dll_name', None)
         weights = kwargs.pop('weights', None)
         reload = kwargs.pop('reload', None)
+        self._mmap_weights = kwargs.pop('mmap_weights', True)
 
         if reload is None:
             if os.environ.get('AI_RUNNER_FORCE_NO_DLL_COPY', None):
@@ -800,6 +897,10 @@ class AiDllDriver(AiRunnerDriver):
 
         # get the updated net info
         self._backend.ai_network_get_info(self._handle, ct.pointer(self._info))
+        self._model_info = AiModelInfo(self._model_to_dict(self._info))
+
+        # build the IO buffers (reused by each call)
+        self._io_arenas = {io_from_act: _AiIoArena(self._info, io_from_act) for io_from_act in (True, False)}
 
         if AiRunner.Caps.PER_LAYER not in self.capabilities:
             return True
@@ -852,7 +953,9 @@ class AiDllDriver(AiRunnerDriver):
             tens_ = node_.tensors[idx]
             shapes.append((tens_.n_batches, tens_.height, tens_.width, tens_.channels))
             if self._mode == AiRunner.Mode.PER_LAYER_WITH_DATA and (profiler or self._callback):
-                feature = tens_.to_ndarray().copy()
+                # the profiler copies the features in its own arrays, the
+                # C-owned memory is only copied for the callback
+                feature = tens_.to_ndarray().copy() if self._callback else tens_.to_ndarray()
             else:
                 feature = np.array([], dtype=AiBufferFormat.to_np_type(tens_.format))
             features.append(feature)
@@ -861,24 +964,16 @@ class AiDllDriver(AiRunnerDriver):
             zeropoints.append(tens_.zeropoint)
 
         if profiler:
-            if node_.c_idx >= len(profiler['c_nodes']):
-                item = {
-                    'c_durations': [node_.elapsed_ms],
-                    'm_id': node_.id,
-                    'layer_type': node_.type & 0x7FFF,
-                    'layer_desc': stm_ai_node_type_to_str(node_.type & 0x7FFF),
-                    'type': types,
-                    'shape': shapes,
-                    'scale': scales,
-                    'zero_point': zeropoints,
-                    'data': features if features is not None else None,
-                }
-                profiler['c_nodes'].append(item)
-            else:
-                item = profiler['c_nodes'][node_.c_idx]
-                item['c_durations'].append(node_.elapsed_ms)
-                for idx, _ in enumerate(features):
-                    item['data'][idx] = np.append(item['data'][idx], features[idx], axis=0)
+            desc = {
+                'm_id': node_.id,
+                'layer_type': node_.type & 0x7FFF,
+                'layer_desc': stm_ai_node_type_to_str(node_.type & 0x7FFF),
+                'type': types,
+                'shape': shapes,
+                'scale': scales,
+                'zero_point': zeropoints,
+            }
+            profiler.add_node(node_.c_idx, desc, node_.elapsed_ms, features)
 
             if flags & AiObserverIoNode.AI_OBSERVER_LAST_EVT == AiObserverIoNode.AI_OBSERVER_LAST_EVT:
                 profiler['c_durations'].append(self._s_dur)
@@ -888,7 +983,9 @@ class AiDllDriver(AiRunnerDriver):
                 'm_id': node_.id,
                 'layer_type': node_.type & 0x7FFF,
                 'shape': shapes,
-                'c_duration': node_.elapsed_ms
+                'c_duration': node_.elapsed_ms,
+                'scale': scales,
+                'zero_point': zeropoints,
             }
             self._callback.on_node_end(node_.c_idx, features if features is not None else None, logs=extra_)
 
@@ -910,9 +1007,15 @@ class AiDllDriver(AiRunnerDriver):
                                                                  self.ghosted_observer_io_node_cb)
             self._handle = None
             self._backend.release()
+        self._io_arenas = dict()
+        self._model_info = None
+        self._max_batches = None
         self._activations = None
         self._weights_ptr_map = None
         self._buffers_data = None
+        for w_map in self._weights_maps:
+            w_map.close()
+        self._weights_maps = []
         self._backend = None
 
     def short_desc(self):
@@ -981,83 +1084,34 @@ class AiDllDriver(AiRunnerDriver):
 
     def get_info(self, c_name=None):
         """Return a dict with the network info of the given c-model"""  # noqa: DAR101,DAR201
-        return self._model_to_dict(self._info) if self.is_connected else dict()
-
-    def _prepare_inputs(self, inputs):
-        """Check and prepare the inputs for the c-runtime"""  # noqa: DAR101,DAR201,DAR401
-        c_inputs = []
-        for idx in range(self._info.n_inputs):
-            in_info = self._info.inputs[idx]
-            shape = (1, in_info.height, in_info.width, in_info.channels)
-            dtype = AiBufferFormat.to_np_type(in_info.format)
-            if self._info.inputs[idx].data and self._io_from_act:
-                # a new ndarray is created with a buffer located inside the activations buffer
-                #  item from the user ndarray are copied in
-                size = np.dtype(dtype).itemsize * int(np.prod(shape))
-                data = ct.cast(self._info.inputs[idx].data, ct.POINTER(ct.c_uint8 * size))
-                bytebuf = np.ctypeslib.as_array(data.contents, (size, ))
-                dst_ = np.reshape(np.frombuffer(bytebuf, dtype), shape)
-                np.copyto(dst_, inputs[idx], casting='no')
-                c_inputs.append(dst_)
+        return self._model_info if self.is_connected and self._model_info else dict()
+
+    def _set_io_buffers(self, arena, s_inputs, dests=None):
+        """Copy in/map the inputs and map the outputs for the c-runtime"""  # noqa: DAR101,DAR201,DAR401
+        for idx, in_ in enumerate(s_inputs):
+            if arena.in_act[idx]:
+                # input is located inside the activations buffer, user data are copied in
+                np.copyto(arena.in_views[idx], in_, casting='no')
             else:
-                c_inputs.append(inputs[idx])
-        return c_inputs
-
-    def _prepare_outputs(self):
-        """Prepare the outputs"""  # noqa: DAR101,DAR201,DAR401
-        c_outputs = []
-        for idx in range(self._info.n_outputs):
-            out_info = self._info.outputs[idx]
-            shape = (1, out_info.height, out_info.width, out_info.channels)
-            dtype = AiBufferFormat.to_np_type(out_info.format)
-            if self._info.outputs[idx].data and self._io_from_act:
-                # ndarray is created with a buffer located inside the activations buffer
-                size = np.dtype(dtype).itemsize * int(np.prod(shape))
-                data = ct.cast(self._info.outputs[idx].data, ct.POINTER(ct.c_uint8 * size))
-                bytebuf = np.ctypeslib.as_array(data.contents, (size, ))
-                out_ = np.reshape(np.frombuffer(bytebuf, dtype), shape)
-                c_outputs.append(out_)
+                arena.in_addrs[idx].value = in_.ctypes.data
+        for idx, is_act in enumerate(arena.out_act):
+            if dests is not None and not is_act:
+                # user buffer, the c-runtime writes directly in the pre-allocated output
+                arena.out_addrs[idx].value = dests[idx].ctypes.data
             else:
-                out = np.zeros(shape, dtype=dtype)
-                c_outputs.append(np.require(out, dtype=dtype,
-                                            requirements=['C', 'O', 'W', 'A']))
-        return c_outputs
-
-    def _post_outputs(self, c_outputs):
-        """Finalize the outputs"""  # noqa: DAR101,DAR201,DAR401
-        outputs = []
-        for idx in range(self._info.n_outputs):
-            if self._info.outputs[idx].data and self._io_from_act:
-                outputs.append(c_outputs[idx].copy())
-            else:
-                outputs.append(c_outputs[idx])
-        return outputs
-
-    def _get_io_buffers(self, inputs, outputs):
-
-        assert self._info.n_inputs == len(inputs) and self._info.n_outputs == len(outputs)
-
-        in_buffers = []
-        for idx, arr in enumerate(inputs):
-            in_format = self._info.inputs[idx].format
-            in_buffers.append(AiBuffer.from_ndarray(arr, in_format))
-
-        in_ = (AiBuffer * len(in_buffers))(*in_buffers)
-
-        out_buffers = []
-        for idx, arr in enumerate(outputs):
-            out_format = self._info.outputs[idx].format
-            out_buffers.append(AiBuffer.from_ndarray(arr, out_format))
-
-        out_ = (AiBuffer * len(out_buffers))(*out_buffers)
-
-        return in_, out_
-
-    def invoke_sample(self, s_inputs, **kwargs):
-        """Invoke the c-model with a sample (batch_size = 1)"""  # noqa: DAR101,DAR201,DAR401
-        if s_inputs[0].shape[0] != 1:
-            raise HwIOError('Should be called with a batch size of 1')
-
+                arena.out_addrs[idx].value = arena.out_view_addrs[idx]
+
+    def _get_outputs(self, arena, dests=None):
+        """Copy out the results"""  # noqa: DAR101,DAR201,DAR401
+        if dests is None:
+            return [out_.copy() for out_ in arena.out_views]
+        for idx, is_act in enumerate(arena.out_act):
+            if is_act:
+                np.copyto(dests[idx], arena.out_views[idx], casting='no')
+        return dests
+
+    def _set_invoke_params(self, kwargs):
+        """Set the invoke parameters"""  # noqa: DAR101,DAR201,DAR401
         if kwargs.pop('disable_io_from_act', None) is not None:
             self._io_from_act = False
         else:
@@ -1067,20 +1121,107 @@ class AiDllDriver(AiRunnerDriver):
         self._mode = kwargs.pop('mode', AiRunner.Mode.IO_ONLY)
         self._s_dur = 0.0
 
-        c_inputs = self._prepare_inputs(s_inputs)
-        c_outputs = self._prepare_outputs()
-        in_buffers, out_buffers = self._get_io_buffers(c_inputs, c_outputs)
+    def invoke_sample(self, s_inputs, **kwargs):
+        """Invoke the c-model with a sample (batch_size = 1)"""  # noqa: DAR101,DAR201,DAR401
+        if s_inputs[0].shape[0] != 1:
+            raise HwIOError('Should be called with a batch size of 1')
 
-        start_time = t.perf_counter()
-        run_batches = self._backend.ai_network_run(self._handle, in_buffers, out_buffers)
+        self._set_invoke_params(kwargs)
+        return self._invoke([np.ascontiguousarray(in_) for in_ in s_inputs])
+
+    def invoke_batch(self, inputs, outputs, **kwargs):
+        """Invoke the c-model with a batch, results are written in outputs"""  # noqa: DAR101,DAR201,DAR401
+        self._set_invoke_params(kwargs)
+
+        inputs = [np.ascontiguousarray(in_) for in_ in inputs]
+        c_outputs = [out_ if out_.flags.c_contiguous else np.empty_like(out_, order='C') for out_ in outputs]
+        arena = self._io_arenas[self._io_from_act]
+
+        if self._mode == AiRunner.Mode.IO_ONLY and self._max_batches != 1 and arena.user_io:
+            durs = self._run_batch(arena, inputs, c_outputs)
+        else:
+            durs = self._run_samples(arena, inputs, c_outputs)
+
+        for out_, c_out_ in zip(outputs, c_outputs):
+            if out_ is not c_out_:
+                out_[...] = c_out_
+        return durs
+
+    def _run_batch(self, arena, inputs, outputs):
+        """Run the c-model with n_batches > 1, the IO buffers are passed w/o copy"""  # noqa: DAR101,DAR201,DAR401
+        ins_ = [(in_.ctypes.data, in_[0].nbytes) for in_ in inputs]
+        outs_ = [(out_.ctypes.data, out_[0].nbytes) for out_ in outputs]
+        n_samples = inputs[0].shape[0]
+
+        durs, start = [], 0
+        try:
+            while start < n_samples:
+                count = min(n_samples - start, self._max_batches if self._max_batches else 0xFFFF)
+                for idx, (addr, size) in enumerate(ins_):
+                    arena.in_addrs[idx].value = addr + start * size
+                for idx, (addr, size) in enumerate(outs_):
+                    arena.out_addrs[idx].value = addr + start * size
+                arena.set_n_batches(count)
+
+                start_time = t.perf_counter()
+                run_batches = self._backend.ai_network_run(self._handle, arena.in_buffers, arena.out_buffers)
+                elapsed_time = (t.perf_counter() - start_time) * 1000.0
+                self._check_run(run_batches, count)
+
+                if run_batches < count:
+                    # only the first samples have been processed
+                    self._max_batches = run_batches
+                    self._logger.debug(' c-runtime - max number of samples by call: {}'.format(run_batches))
+                durs.extend([self._report_duration(elapsed_time / run_batches) for _ in range(run_batches)])
+                if self._profiler:
+                    # only the mean duration by sample is known
+                    self._profiler['debug']['averaged'] += run_batches
+                start += run_batches
+        finally:
+            arena.set_n_batches(1)
+
+        return durs
+
+    def _run_samples(self, arena, inputs, outputs):
+        """Run the c-model sample by sample, IO pointers are updated in place"""  # noqa: DAR101,DAR201,DAR401
+        ins_ = [(in_.ctypes.data, in_[0].nbytes) for in_ in inputs]
+        outs_ = [(out_.ctypes.data, out_[0].nbytes) for out_ in outputs]
+        for idx, is_act in enumerate(arena.out_act):
+            if is_act:
+                arena.out_addrs[idx].value = arena.out_view_addrs[idx]
+
+        durs = []
+        for batch in range(inputs[0].shape[0]):
+            for idx, (addr, size) in enumerate(ins_):
+                if arena.in_act[idx]:
+                    ct.memmove(arena.in_view_addrs[idx], addr + batch * size, size)
+                else:
+                    arena.in_addrs[idx].value = addr + batch * size
+            for idx, (addr, size) in enumerate(outs_):
+                if not arena.out_act[idx]:
+                    arena.out_addrs[idx].value = addr + batch * size
+
+            self._s_dur = 0.0
+            start_time = t.perf_counter()
+            run_batches = self._backend.ai_network_run(self._handle, arena.in_buffers, arena.out_buffers)
+            elapsed_time = (t.perf_counter() - start_time) * 1000.0
+            self._check_run(run_batches, 1)
+
+            for idx, (addr, size) in enumerate(outs_):
+                if arena.out_act[idx]:
+                    ct.memmove(addr + batch * size, arena.out_view_addrs[idx], size)
+            durs.append(self._report_duration(elapsed_time))
+        return durs
+
+    def _check_run(self, run_batches, expected):
+        """Check the result of the ai_network_run() function"""  # noqa: DAR101,DAR201,DAR401
         error = self._backend.ai_network_get_error(self._handle)
-        elapsed_time = (t.perf_counter() - start_time) * 1000.0
-        if error.code or run_batches != c_inputs[0].shape[0]:
+        if error.code or run_batches < 1 or run_batches > expected:
             msg = 'ai_network_run() failed\n AiError - {}'.format(stm_ai_error_to_str(error.code, error.type))
             raise AiRunnerError(msg)
 
-        outputs = self._post_outputs(c_outputs)
-
+    def _report_duration(self, elapsed_time):
+        """Update the profiler with the duration of a sample, return it"""  # noqa: DAR101,DAR201,DAR401
         dur_ = elapsed_time
         if self._profiler:
             self._profiler['debug']['exec_times'].append(elapsed_time)
@@ -1088,5 +1229,18 @@ class AiDllDriver(AiRunnerDriver):
                 self._profiler['c_durations'].append(dur_)
             else:
                 dur_ = self._s_dur
+        return dur_
+
+    def _invoke(self, s_inputs, dests=None):
+        """Run the c-model, outputs are written in dests if provided"""  # noqa: DAR101,DAR201,DAR401
+        self._s_dur = 0.0
+
+        arena = self._io_arenas[self._io_from_act]
+        self._set_io_buffers(arena, s_inputs, dests)
+
+        start_time = t.perf_counter()
+        run_batches = self._backend.ai_network_run(self._handle, arena.in_buffers, arena.out_buffers)
+        elapsed_time = (t.perf_counter() - start_time) * 1000.0
+        self._check_run(run_batches, 1)
 
-        return outputs, dur_
+        return self._get_outputs(arena, dests), self._report_duration(elapsed_time)
@@ -7,6 +7,11 @@
 ###################################################################################
 """
 Driver for proto buff messages
+
+The message layer (AiPbMsgCore) does no IO itself, the exchanges with the
+device are generators yielding the IO requests. They are executed by the
+blocking driver (AiPbMsg) or by the asyncio driver (see ai_runner_async.py),
+the protocol is implemented once.
 """
 import time as t
 import numpy as np
@@ -20,6 +25,8 @@ from .stm32_utility import stm32_id_to_str, stm32_attr_config
 from . import stm32msg_pb2 as stm32msg
 from .stm_ai_utils import stm_ai_node_type_to_str, AiBufferFormat
 from .stm_ai_utils import stm_tflm_node_type_to_str, RT_STM_AI_NAME
+from .buffer_codec import encode_datas, decode_datas
+from .ai_model_info import AiModelInfo
 
 
 def _to_version(ver):
@@ -27,6 +34,17 @@ def _to_version(ver):
     return (ver >> 24 & 0xFF, ver >> 16 & 0xFF, ver >> 8 & 0xFF)
 
 
+_DEFAULT_PACKET_SIZE = 1024  # requested packet size (CAP_PACKET_SIZE)
+
+
+def _to_packet_size(value):
+    """Return a valid requested packet size (0: legacy packets)"""  # noqa: DAR101,DAR201,DAR401
+    value = int(value) if value else 0
+    if value <= stm32msg.IO_OUT_PACKET_SIZE:
+        return 0
+    return min(value, 0xFFFF)
+
+
 _SUPPORTED_AI_RT = {
     stm32msg.AI_RT_STM_AI: RT_STM_AI_NAME,
     stm32msg.AI_RT_TFLM: 'TFLM',
@@ -54,36 +72,69 @@ def _rt_ai_desc(rt_id, is_supported=True):
     return desc_
 
 
-class AiPbMsg(AiRunnerDriver):
-    """Class to handle the messages (protobuf-based)"""
+_IO_READ = 0  # (_IO_READ, size, deadline) -> received bytes (incomplete if the deadline is reached)
+_IO_WRITE = 1  # (_IO_WRITE, data) -> number of written bytes
+
+
+class AiPbMsgCore:
+    """
+    Message layer of the protobuf-based protocol, w/o IO
+
+    The framing, the building/parsing of the messages and the state of the
+    connection are managed here. The exchanges with the device (_gen_xx
+    methods) are generators which yield the IO requests (_IO_READ/_IO_WRITE
+    tuples) and receive the results, they are executed by the blocking
+    (AiPbMsg) or the asyncio (AsyncAiPbMsg) drivers with their own IO driver.
+    """
 
     _NODE_WITH_MULTIPLE_OUTPUTS = 0
     _SHAPE_MSG_WITH_ADDR = 1
     _SYNC_WITH_AI_RT_ID = 2
+    _RUN_STREAM = 3
+    _PACKET_SIZE = 4
+    _COMPRESSED_DATAS = 5
 
     def __init__(self, parent, io_drv):
         """Constructor"""  # noqa: DAR101,DAR201,DAR401
+        if not hasattr(parent, 'get_logger'):
+            raise InvalidParamError('Invalid parent type, get_logger() attr is expected')
         if not hasattr(io_drv, 'set_parent'):
             raise InvalidParamError('Invalid IO Hw Driver type (io_drv)')
+        self._parent = parent
+        self._logger = parent.get_logger()
         self._req_id = 0
         self._io_drv = io_drv
         self._models = dict()  # cache the description of the models
+        self._infos = dict()  # cache the descriptors of the models (AiModelInfo)
         self._sync = None  # cache for the sync message
         self._sys_info = None  # cache for sys info message
-        super(AiPbMsg, self).__init__(parent)
-        self._io_drv.set_parent(self)
+        self._tx_window = 1  # number of packets written before waiting the acks (0: no limit)
+        self._req_packet_size = _DEFAULT_PACKET_SIZE  # requested packet size (0: legacy packets)
+        self._packet_size = 0  # negotiated packet size (0: legacy packets)
+        self._compression = False  # encoded tensor datas are requested (CAP_COMPRESSED_DATAS)
+        self._compress_datas = False  # negotiated
+        self._io_stats = {'tx_bytes': 0, 'rx_bytes': 0, 'datas_bytes': 0, 'raw_datas_bytes': 0}
         self._rt_type = None
+        self._logger.debug('creating {} object'.format(self.__class__.__name__))
+        self._io_drv.set_parent(self)
         self._logger.debug('creating {} object'.format(self._io_drv.__class__.__name__))
 
+    def get_logger(self):
+        """Return logger object"""  # noqa: DAR101,DAR201,DAR401
+        return self._logger
+
     @property
     def is_connected(self):
+        """Indicate if the driver is connected"""
+        # noqa: DAR101,DAR201,DAR401
         return self._io_drv.is_connected
 
-    def connect(self, desc=None, **kwargs):
-        """Connect to the stm.ai run-time"""  # noqa: DAR101,DAR201,DAR401
-        if self._io_drv.is_connected:
-            return False
-        return self._io_drv.connect(desc, **kwargs)
+    def _set_connect_params(self, kwargs):
+        """Set the parameters of the connection, they are removed from kwargs"""  # noqa: DAR101,DAR201,DAR401
+        self._tx_window = max(0, int(kwargs.pop('tx_window', 1)))
+        self._req_packet_size = _to_packet_size(kwargs.pop('packet_size', _DEFAULT_PACKET_SIZE))
+        # opt-in, on a fast link (socket, USB) the encoding costs more than it saves
+        self._compression = bool(kwargs.pop('compression', False))
 
     @property
     def capabilities(self):
@@ -97,14 +148,18 @@ class AiPbMsg(AiRunnerDriver):
                 cap_.append(AiRunner.Caps.SELF_TEST)
             if self._sync.capability & stm32msg.CAP_RELOC:
                 cap_.append(AiRunner.Caps.RELOC)
+            cap_.append(AiRunner.Caps.BATCH)
             return cap_
         return []
 
-    def disconnect(self):
+    def _reset(self):
+        """Clear the state of the connection"""  # noqa: DAR101,DAR201,DAR401
         self._models = dict()
+        self._infos = dict()
         self._sys_info = None
         self._sync = None
-        self._io_drv.disconnect()
+        self._packet_size = 0
+        self._compress_datas = False
 
     def short_desc(self):
         """Return human readable description"""  # noqa: DAR101,DAR201,DAR401
@@ -112,51 +167,94 @@ class AiPbMsg(AiRunnerDriver):
         io_ = self._io_drv.short_desc()
         return 'STM Proto-buffer protocol ' + ver_ + ' (' + io_ + ')'
 
-    def _waiting_io_ack(self, timeout):
-        """Wait a ack"""  # noqa: DAR101,DAR201,DAR401
-        start_time = t.perf_counter()
-        while True:
-            if self._io_drv.read(1):
+    def _gen_io_acks(self, timeout, n_acks=1):
+        """Wait n acks"""  # noqa: DAR101,DAR201,DAR401
+        acks = yield _IO_READ, n_acks, t.monotonic() + timeout / 1000.0
+        self._io_stats['rx_bytes'] += len(acks)
+        return len(acks) == n_acks
+
+    @staticmethod
+    def _to_io_frames(buff, packet_size=0):
+        """Build the stream of packets (header + payload) for a serialized message"""  # noqa: DAR101,DAR201,DAR401
+        if packet_size:
+            return AiPbMsgCore._to_large_io_frames(buff, packet_size)
+        p_size = stm32msg.IO_OUT_PACKET_SIZE
+        n_packets = max(1, (len(buff) + p_size - 1) // p_size)
+        frames = bytearray(n_packets * (p_size + 1))
+        dst, src = memoryview(frames), memoryview(buff)
+        for idx in range(n_packets):
+            chunk = src[idx * p_size:(idx + 1) * p_size]
+            pos = idx * (p_size + 1)
+            dst[pos] = len(chunk)
+            dst[pos + 1:pos + 1 + len(chunk)] = chunk
+        return frames, n_packets
+
+    @staticmethod
+    def _to_large_io_frames(buff, packet_size):
+        """Build the stream of large packets (header + size + payload w/o padding)"""  # noqa: DAR101,DAR201,DAR401
+        h_size = stm32msg.IO_LARGE_HEADER_SIZE
+        n_packets = max(1, (len(buff) + packet_size - 1) // packet_size)
+        frames = bytearray(len(buff) + n_packets * h_size)
+        dst, src = memoryview(frames), memoryview(buff)
+        for idx in range(n_packets):
+            chunk = src[idx * packet_size:(idx + 1) * packet_size]
+            pos = idx * (packet_size + h_size)
+            dst[pos] = stm32msg.IO_HEADER_LARGE_FLAG
+            if idx == n_packets - 1:
+                dst[pos] |= stm32msg.IO_HEADER_EOM_FLAG
+            dst[pos + 1] = len(chunk) & 0xFF
+            dst[pos + 2] = len(chunk) >> 8
+            dst[pos + h_size:pos + h_size + len(chunk)] = chunk
+        return frames, n_packets
+
+    def _frame_size(self):
+        """Return the size of a full packet (header + payload)"""  # noqa: DAR101,DAR201,DAR401
+        if self._packet_size:
+            return self._packet_size + stm32msg.IO_LARGE_HEADER_SIZE
+        return stm32msg.IO_OUT_PACKET_SIZE + 1
+
+    def _gen_write_io_frames(self, frames, n_packets, timeout):
+        """Write the packets, device acknowledges each packet except the last one"""  # noqa: DAR101,DAR201,DAR401
+        frame_s = self._frame_size()
+        window = self._tx_window if self._tx_window else n_packets
+        view = memoryview(frames)
+        n_w, pos = 0, 0
+        while pos < n_packets:
+            end = min(pos + window, n_packets)
+            n_w += yield _IO_WRITE, view[pos * frame_s:end * frame_s]
+            n_acks = end - pos if end < n_packets else end - pos - 1
+            if n_acks and not (yield from self._gen_io_acks(timeout, n_acks)):
                 break
-            if t.perf_counter() - start_time > timeout / 1000.0:
-                return False
-        return True
-
-    def _write_io_packet(self, payload, delay=0):
-        iob = bytearray(stm32msg.IO_OUT_PACKET_SIZE + 1)
-        iob[0] = len(payload)
-        for i, val in enumerate(payload):
-            iob[i + 1] = val
-        if not delay:
-            _w = self._io_drv.write(iob)
-        else:
-            _w = 0
-            for elem in iob:
-                _w += self._io_drv.write(elem.to_bytes(1, 'big'))
-                t.sleep(delay)
-        return _w
+            pos = end
+        self._io_stats['tx_bytes'] += n_w
+        return n_w
 
-    def _write_delimited(self, mess, timeout=5000):
-        """Helper function to write a message prefixed with its size"""  # noqa: DAR101,DAR201,DAR401
+    def _gen_write_delimited(self, mess, timeout=5000):
+        """Write a message prefixed with its size"""  # noqa: DAR101,DAR201,DAR401
 
         if not mess.IsInitialized():
             raise NotInitializedMsgError
 
-        buff = mess.SerializeToString()
-        _head = _VarintBytes(mess.ByteSize())
-
-        buff = _head + buff
-
-        packs = [buff[i:i + stm32msg.IO_OUT_PACKET_SIZE]
-                 for i in range(0, len(buff), stm32msg.IO_OUT_PACKET_SIZE)]
-
-        n_w = self._write_io_packet(packs[0])
-        for pack in packs[1:]:
-            if not self._waiting_io_ack(timeout):
-                break
-            n_w += self._write_io_packet(pack)
-
-        return n_w
+        buff = _VarintBytes(mess.ByteSize()) + mess.SerializeToString()
+        frames, n_packets = self._to_io_frames(buff, self._packet_size)
+
+        return (yield from self._gen_write_io_frames(frames, n_packets, timeout))
+
+    def _update_io_stats(self, profiler, start_stats, start_time):
+        """Report the IO statistics in the profiler"""  # noqa: DAR101,DAR201,DAR401
+        if not profiler:
+            return
+        io_ = profiler['debug'].setdefault('io', {'tx_bytes': 0, 'rx_bytes': 0, 'datas_bytes': 0,
+                                                  'raw_datas_bytes': 0, 'duration': 0.0})
+        for key in ['tx_bytes', 'rx_bytes', 'datas_bytes', 'raw_datas_bytes']:
+            io_[key] += self._io_stats[key] - start_stats[key]
+        io_['duration'] += (t.perf_counter() - start_time) * 1000.0
+        io_['bytes_per_s'] = (io_['tx_bytes'] + io_['rx_bytes']) * 1000.0 / io_['duration']\
+            if io_['duration'] else 0.0
+        n_samples = len(profiler['c_durations'])
+        io_['bytes_by_sample'] = (io_['tx_bytes'] + io_['rx_bytes']) / n_samples if n_samples else 0.0
+        # compression ratio of the tensor datas (CAP_COMPRESSED_DATAS)
+        io_['datas_ratio'] = io_['raw_datas_bytes'] / io_['datas_bytes'] if io_['datas_bytes'] else 1.0
 
     def _parse_and_check(self, data, msg_type=None):
         """Parse/convert and check the received buffer"""  # noqa: DAR101,DAR201,DAR401
@@ -172,40 +270,55 @@ class AiPbMsg(AiRunnerDriver):
                 resp.WhichOneof('payload'), msg_type))
         return None
 
-    def _waiting_msg(self, timeout, msg_type=None):
-        """Helper function to receive a message"""  # noqa: DAR101,DAR201,DAR401
-        buf = bytearray()
+    def _gen_read_io_packet(self, deadline):
+        """Read a packet (header + payload), return None if it is incomplete"""  # noqa: DAR101,DAR201,DAR401
+        if self._packet_size:
+            packet_s = int(stm32msg.IO_LARGE_HEADER_SIZE)
+            p_buf = bytearray((yield _IO_READ, packet_s, deadline))
+            if len(p_buf) == packet_s:
+                packet_s += p_buf[1] | p_buf[2] << 8
+                p_buf += yield _IO_READ, packet_s - len(p_buf), deadline
+        else:
+            packet_s = int(stm32msg.IO_IN_PACKET_SIZE + 1)
+            p_buf = bytearray((yield _IO_READ, packet_s, deadline))
+        self._io_stats['rx_bytes'] += len(p_buf)
+        return p_buf if len(p_buf) == packet_s else None
 
-        packet_s = int(stm32msg.IO_IN_PACKET_SIZE + 1)
-        if timeout == 0:
-            t.sleep(0.2)
+    def _gen_msg(self, timeout, msg_type=None):
+        """Receive a message"""  # noqa: DAR101,DAR201,DAR401
+        buf = bytearray()
 
+        # timeout bounds the whole message, timeout=0: the message is only
+        # expected in the next 200ms
         start_time = t.monotonic()
+        deadline = start_time + (timeout / 1000.0 if timeout else 0.2)
         while True:
-            p_buf = bytearray()
-            while len(p_buf) < packet_s:
-                io_buf = self._io_drv.read(packet_s - len(p_buf))
-                if io_buf:
-                    p_buf += io_buf
-                else:
-                    cum_time = t.monotonic() - start_time
-                    if timeout and (cum_time > timeout / 1000):
-                        raise TimeoutError(
-                            'STM32 - read timeout {:.1f}ms/{}ms'.format(cum_time * 1000, timeout))
-                    if timeout == 0:
-                        return self._parse_and_check(buf, msg_type)
-            last = p_buf[0] & stm32msg.IO_HEADER_EOM_FLAG
-            # cbuf[0] = cbuf[0] & 0x7F & ~stm32msg.IO_HEADER_SIZE_MSK
-            p_buf[0] &= 0x7F  # & ~stm32msg.IO_HEADER_SIZE_MSK)
-            if last:
-                buf += p_buf[1:1 + p_buf[0]]
+            p_buf = yield from self._gen_read_io_packet(deadline)
+            if p_buf is None:
+                if timeout == 0:
+                    return self._parse_and_check(buf, msg_type)
+                cum_time = t.monotonic() - start_time
+                msg = 'STM32 - read timeout, msg not completed after {:.1f}ms/{}ms'.format(cum_time * 1000, timeout)
+                raise TimeoutError(msg)
+            if self._append_packet(buf, p_buf):
                 break
-            buf += p_buf[1:packet_s]
         resp = self._parse_and_check(buf, msg_type)
         return resp
 
-    def _send_request(self, cmd, param=0, name=None, opt=0):
-        """Build a request msg and send it"""  # noqa: DAR101,DAR201,DAR401
+    @staticmethod
+    def _append_packet(buf, p_buf):
+        """Append the payload of a received packet, return True if last packet of the msg"""  # noqa: DAR101,DAR201,DAR401
+        last = p_buf[0] & stm32msg.IO_HEADER_EOM_FLAG
+        if p_buf[0] & stm32msg.IO_HEADER_LARGE_FLAG:
+            buf += p_buf[stm32msg.IO_LARGE_HEADER_SIZE:]
+        elif last:
+            buf += p_buf[1:1 + (p_buf[0] & stm32msg.IO_HEADER_SIZE_MSK)]
+        else:
+            buf += p_buf[1:]
+        return bool(last)
+
+    def _build_request(self, cmd, param=0, name=None, opt=0):
+        """Build a request msg"""  # noqa: DAR101,DAR201,DAR401
         self._req_id += 1
         req_msg = stm32msg.reqMsg()
         req_msg.reqid = self._req_id
@@ -216,34 +329,44 @@ class AiPbMsg(AiRunnerDriver):
             req_msg.name = name
         else:
             req_msg.name = ''
-        n_w = self._write_delimited(req_msg)
+        return req_msg
+
+    def _gen_request(self, cmd, param=0, name=None, opt=0):
+        """Build a request msg and send it"""  # noqa: DAR101,DAR201,DAR401
+        req_msg = self._build_request(cmd, param, name, opt)
+        n_w = yield from self._gen_write_delimited(req_msg)
         return n_w, req_msg
 
-    def _send_ack(self, param=0, err=0):
+    def _gen_ack(self, param=0, err=0):
         """Build an acknowledge msg and send it"""  # noqa: DAR101,DAR201,DAR401
         ack_msg = stm32msg.ackMsg(param=param, error=err)
-        return self._write_delimited(ack_msg)
+        return (yield from self._gen_write_delimited(ack_msg))
 
-    def _device_log(self, resp):
-        """Process a log message from a device"""  # noqa: DAR101,DAR201,DAR401
+    def _log_device_msg(self, resp):
+        """Log the message from a device, return True if it is a log message"""  # noqa: DAR101,DAR201,DAR401
+        if resp.reqid != self._req_id:
+            raise InvalidMsgError('SeqID is not valid - {} instead {}'.format(
+                resp.reqid, self._req_id))
         if resp.WhichOneof('payload') == 'log':
             msg = 'STM32:{}: {}'.format(resp.log.level, resp.log.str)
             self._logger.info(msg)
-            self._send_ack()
             return True
         return False
 
-    def _waiting_answer(self, timeout=10000, msg_type=None, state=None):
+    def _gen_answer(self, timeout=10000, msg_type=None, state=None):
         """Wait an answer/msg from the device and post-process it"""  # noqa: DAR101,DAR201,DAR401
 
-        cont = True
-        while cont:  # to manage the "log" msg
-            resp = self._waiting_msg(timeout=timeout)
-            if resp.reqid != self._req_id:
-                raise InvalidMsgError('SeqID is not valid - {} instead {}'.format(
-                    resp.reqid, self._req_id))
-            cont = self._device_log(resp)
+        while True:  # to manage the "log" msg
+            resp = yield from self._gen_msg(timeout=timeout)
+            if not self._log_device_msg(resp):
+                break
+            yield from self._gen_ack()
+
+        return self._check_answer(resp, msg_type, state)
 
+    @staticmethod
+    def _check_answer(resp, msg_type=None, state=None):
+        """Check the type and the state of the answer"""  # noqa: DAR101,DAR201,DAR401
         if msg_type and resp.WhichOneof('payload') != msg_type:
             raise InvalidMsgError('receive \'{}\' instead \'{}\''.format(
                 resp.WhichOneof('payload'), msg_type))
@@ -254,24 +377,29 @@ class AiPbMsg(AiRunnerDriver):
 
         return resp
 
-    def _cmd_sync(self, timeout):
-        """SYNC command"""  # noqa: DAR101,DAR201,DAR401
-        self._send_request(stm32msg.CMD_SYNC)
-        resp = self._waiting_answer(timeout=timeout, msg_type='sync',
-                                    state=stm32msg.S_IDLE)
+    def _gen_cmd_sync(self, timeout):
+        """SYNC command, requested packet size is passed as parameter"""  # noqa: DAR101,DAR201,DAR401
+        self._packet_size = 0  # SYNC is always exchanged with the legacy packets
+        yield from self._gen_request(stm32msg.CMD_SYNC, param=self._req_packet_size, opt=self._host_capability())
+        resp = yield from self._gen_answer(timeout=timeout, msg_type='sync',
+                                           state=stm32msg.S_IDLE)
         return resp.sync
 
-    def _cmd_sys_info(self, timeout):
+    def _gen_cmd_sys_info(self, timeout):
         """SYS_INFO command"""  # noqa: DAR101,DAR201,DAR401
-        self._send_request(stm32msg.CMD_SYS_INFO)
-        resp = self._waiting_answer(timeout=timeout, msg_type='sinfo',
-                                    state=stm32msg.S_IDLE)
+        yield from self._gen_request(stm32msg.CMD_SYS_INFO)
+        resp = yield from self._gen_answer(timeout=timeout, msg_type='sinfo',
+                                           state=stm32msg.S_IDLE)
         return resp.sinfo
 
-    def _cmd_network_info(self, timeout, param=0):
-        """SYS_INFO command"""  # noqa: DAR101,DAR201,DAR401
-        self._send_request(stm32msg.CMD_NETWORK_INFO, param=param)
-        resp = self._waiting_answer(timeout=timeout, state=stm32msg.S_IDLE)
+    def _gen_cmd_network_info(self, timeout, param=0):
+        """NETWORK_INFO command"""  # noqa: DAR101,DAR201,DAR401
+        yield from self._gen_request(stm32msg.CMD_NETWORK_INFO, param=param)
+        resp = yield from self._gen_answer(timeout=timeout, state=stm32msg.S_IDLE)
+        return self._to_network_info(resp, param)
+
+    def _to_network_info(self, resp, param):
+        """Return the network info or None (end of the list)"""  # noqa: DAR101,DAR201,DAR401
         if resp.WhichOneof('payload') == 'ninfo':
             return resp.ninfo
         elif resp.WhichOneof('payload') == 'ack':
@@ -281,13 +409,28 @@ class AiPbMsg(AiRunnerDriver):
                     param, rt_id_str))
         return None
 
-    def _cmd_run(self, timeout, c_name, param):
+    def _gen_cmd_run(self, timeout, c_name, param):
         """NETWORK_RUN command"""  # noqa: DAR101,DAR201,DAR401
-        self._send_request(stm32msg.CMD_NETWORK_RUN, param=param, name=c_name)
-        resp = self._waiting_answer(timeout=timeout, msg_type='ack',
-                                    state=stm32msg.S_WAITING)
+        yield from self._gen_request(stm32msg.CMD_NETWORK_RUN, param=param, name=c_name)
+        resp = yield from self._gen_answer(timeout=timeout, msg_type='ack',
+                                           state=stm32msg.S_WAITING)
         return resp
 
+    def _gen_cmd_run_stream(self, timeout, c_name, n_samples):
+        """NETWORK_RUN_STREAM command, return the size of the window"""  # noqa: DAR101,DAR201,DAR401
+        yield from self._gen_request(stm32msg.CMD_NETWORK_RUN_STREAM, param=stm32msg.P_RUN_MODE_NORMAL,
+                                     name=c_name, opt=n_samples)
+        resp = yield from self._gen_answer(timeout=timeout, msg_type='ack',
+                                           state=stm32msg.S_WAITING)
+        return self._to_stream_window(resp)
+
+    @staticmethod
+    def _to_stream_window(resp):
+        """Return the size of the window (ack of the NETWORK_RUN_STREAM command)"""  # noqa: DAR101,DAR201,DAR401
+        if resp.ack.error != stm32msg.E_NONE:
+            raise HwIOError('NETWORK_RUN_STREAM has failed (error={})'.format(resp.ack.error))
+        return max(1, resp.ack.param)
+
     def _protocol_is_supported(self):
         """Indicate if the protocol version is supported"""  # noqa: DAR101,DAR201,DAR401
         major, minor = self._sync.version >> 8, self._sync.version & 0xFF
@@ -299,28 +442,43 @@ class AiPbMsg(AiRunnerDriver):
 
     def _is_supported(self, feature):
         """Indicates if a specific feature is supported by the Protocol"""  # noqa: DAR101,DAR201,DAR401
-        if (self._sync.version >> 8 == 2) and (self._sync.version & 0xFF >= 2):
+        if (self._sync.version >> 8 == 2) and ((self._sync.version & 0xFF) >= 2):
             if feature in [self._NODE_WITH_MULTIPLE_OUTPUTS, self._SHAPE_MSG_WITH_ADDR, self._SYNC_WITH_AI_RT_ID]:
                 return True
+        if (self._sync.version >> 8 == 2) and ((self._sync.version & 0xFF) >= 3):
+            if feature == self._RUN_STREAM:
+                return bool(self._sync.capability & stm32msg.CAP_STREAM)
+        if (self._sync.version >> 8 == 2) and ((self._sync.version & 0xFF) >= 4):
+            if feature == self._PACKET_SIZE:
+                return bool(self._sync.capability & stm32msg.CAP_PACKET_SIZE)
+        if (self._sync.version >> 8 == 2) and ((self._sync.version & 0xFF) >= 5):
+            if feature == self._COMPRESSED_DATAS:
+                return bool(self._sync.capability & stm32msg.CAP_COMPRESSED_DATAS)
         return False
 
-    def is_alive(self, timeout=500):
-        """"Indicate if the connection is always alive"""  # noqa: DAR101,DAR201,DAR401
-        try:
-            self._sync = self._cmd_sync(timeout)
-            if self._is_supported(self._SYNC_WITH_AI_RT_ID):
-                self._rt_type = self._sync.rtid & 0xFF
-            self._logger.debug('CMD_SYS_INFO v{}.{}'.format(self._sync.version >> 8, self._sync.version & 0xFF))
-        except (AiRunnerError, TimeoutError) as exc_:
-            self._logger.debug('is_alive() %s', str(exc_))
-            return False
-        return self._protocol_is_supported()
+    def _host_capability(self):
+        """Return the capabilities of the host (CMD_SYNC opt)"""  # noqa: DAR101,DAR201,DAR401
+        return stm32msg.CAP_COMPRESSED_DATAS if self._compression else 0
+
+    def _negotiated_packet_size(self):
+        """Return the packet size accepted by the device (0: legacy packets)"""  # noqa: DAR101,DAR201,DAR401
+        if not self._req_packet_size or not self._is_supported(self._PACKET_SIZE):
+            return 0
+        return min(self._req_packet_size, self._sync.capability >> stm32msg.IO_PACKET_SIZE_POS)
+
+    def _gen_sync(self, timeout):
+        """Synchronize with the device, the negotiated settings are updated"""  # noqa: DAR101,DAR201,DAR401
+        self._sync = yield from self._gen_cmd_sync(timeout)
+        self._packet_size = self._negotiated_packet_size()
+        self._compress_datas = self._compression and self._is_supported(self._COMPRESSED_DATAS)
+        if self._is_supported(self._SYNC_WITH_AI_RT_ID):
+            self._rt_type = self._sync.rtid & 0xFF
+        self._logger.debug('CMD_SYS_INFO v{}.{} (packet size: {})'.format(
+            self._sync.version >> 8, self._sync.version & 0xFF,
+            self._packet_size if self._packet_size else stm32msg.IO_OUT_PACKET_SIZE))
 
     def _to_device(self):
         """Return a dict with the device settings"""  # noqa: DAR101,DAR201,DAR401
-        if self._sys_info is None:
-            self._sys_info = self._cmd_sys_info(timeout=500)
-
         desc_ = stm32_id_to_str(self._sys_info.devid)
         desc_ += ' @{:.0f}/{:.0f}MHz'.format(self._sys_info.sclock / 1000000,
                                              self._sys_info.hclock / 1000000)
@@ -393,26 +551,34 @@ class AiPbMsg(AiRunnerDriver):
 
     def get_info(self, c_name=None):
         """Return a dict with the network info of the given model"""  # noqa: DAR101,DAR201,DAR401
-        if not self._models:
+        if not self._infos:
             return dict()
-        if c_name is None or c_name not in self._models.keys():
+        if c_name is None or c_name not in self._infos:
             # first c-model is used
-            c_name = self._models.keys()[0]
-        model = self._models[c_name]
-        return self._model_to_dict(model)
+            c_name = next(iter(self._infos))
+        return self._infos[c_name]
 
-    def discover(self, flush=False):
+    def _add_model(self, model_info):
+        """Register a discovered model, its descriptor is built once"""  # noqa: DAR101,DAR201,DAR401
+        self._models[model_info.model_name] = model_info
+        self._infos[model_info.model_name] = AiModelInfo(self._model_to_dict(model_info))
+
+    def _gen_discover(self, flush=False):
         """Build the list of the available model"""  # noqa: DAR101,DAR201,DAR401
         if flush:
             self._models.clear()
+            self._infos.clear()
         if self._models:
             return list(self._models.keys())
+        if self._sys_info is None:
+            # cached, the descriptors of the models are built w/o IO
+            self._sys_info = yield from self._gen_cmd_sys_info(timeout=500)
         param, cont = 0, True
 
         while cont:
-            n_info = self._cmd_network_info(timeout=5000, param=param)
+            n_info = yield from self._gen_cmd_network_info(timeout=5000, param=param)
             if n_info is not None:
-                self._models[n_info.model_name] = n_info
+                self._add_model(n_info)
                 msg = 'discover() found="{}"'.format(str(n_info.model_name))
                 self._logger.debug(msg)
                 param += 1
@@ -431,9 +597,15 @@ class AiPbMsg(AiRunnerDriver):
         msg_.shape.scale = 0.0  # pylint: disable=no-member
         msg_.shape.zeropoint = 0  # pylint: disable=no-member
         msg_.shape.addr = 0  # pylint: disable=no-member
-        dt_ = np.dtype(data.dtype.type)
-        dt_ = dt_.newbyteorder('<')
-        msg_.datas = bytes(data.astype(dt_).flatten().tobytes())
+        if self._compress_datas:
+            # zero-runs: zero-point of the msg (0)
+            msg_.encoding, msg_.datas = encode_datas(data)
+        else:
+            dt_ = np.dtype(data.dtype.type)
+            dt_ = dt_.newbyteorder('<')
+            msg_.datas = np.ascontiguousarray(data, dtype=dt_).tobytes()
+        self._io_stats['raw_datas_bytes'] += data.nbytes
+        self._io_stats['datas_bytes'] += len(msg_.datas)
         return msg_
 
     def _from_buffer_msg(self, msg, fill_with_zero=False):
@@ -452,16 +624,20 @@ class AiPbMsg(AiRunnerDriver):
             return np.zeros(shape_, dtype=dt_), shape_
         if not buffer.datas:
             return np.array([], dtype=dt_), shape_
+        self._io_stats['datas_bytes'] += len(buffer.datas)
+        self._io_stats['raw_datas_bytes'] += int(np.prod(shape_)) * dt_.itemsize
+        if buffer.encoding != stm32msg.ENC_RAW:
+            return decode_datas(buffer.datas, buffer.encoding, dt_, shape_, buffer.shape.zeropoint), shape_
         return np.reshape(np.frombuffer(buffer.datas, dtype=dt_), shape_), shape_
 
-    def _send_buffer(self, data, buffer_desc, is_last=False):
+    def _gen_send_buffer(self, data, buffer_desc, is_last=False):
         """Send a buffer to the device and wait an ack"""  # noqa: DAR101,DAR201,DAR401
 
         buffer_msg = self._to_buffer_msg(data, buffer_desc)
-        self._write_delimited(buffer_msg)
+        yield from self._gen_write_delimited(buffer_msg)
         state = stm32msg.S_PROCESSING if is_last else stm32msg.S_WAITING
-        self._waiting_answer(msg_type='ack', state=state)
-        self._send_ack()
+        yield from self._gen_answer(msg_type='ack', state=state)
+        yield from self._gen_ack()
 
     def _layer_type_to_str(self, layer_type):
         """Return short description of the type of the operator"""  # noqa: DAR101,DAR201,DAR401
@@ -472,7 +648,7 @@ class AiPbMsg(AiRunnerDriver):
             return stm_tflm_node_type_to_str(layer_type & 0x7FFF)
         return stm_ai_node_type_to_str(layer_type & 0x7FFF)
 
-    def _receive_features(self, profiler, callback):
+    def _gen_features(self, profiler, callback):
         """Collect the intermediate/hidden values"""  # noqa: DAR101,DAR201,DAR401
 
         # main loop to receive the datas
@@ -480,65 +656,28 @@ class AiPbMsg(AiRunnerDriver):
         duration = 0.0
 
         while True:
-            resp = self._waiting_answer(msg_type='node', timeout=50000)
+            resp = yield from self._gen_answer(msg_type='node', timeout=50000)
             ilayer = resp.node
 
-            is_internal = ilayer.type >> 16
-            is_internal = bool(is_internal & stm32msg.LAYER_TYPE_INTERNAL_LAST) or\
-                bool(is_internal & stm32msg.LAYER_TYPE_INTERNAL)
-
-            if not is_internal:
+            if not self._is_internal_node(ilayer):
                 return resp
 
-            self._send_ack()
+            yield from self._gen_ack()
 
             # loop on a c-node to collect the data
-            shapes, features, types, scales, zeropoints = [], [], [], [], []
+            node_data = ([], [], [], [], [])
             while True:
-                feature, shape = self._from_buffer_msg(resp.node.buffer)
-                features.append(feature)
-                shapes.append(shape)
-                types.append(feature.dtype.type)
-                scales.append(resp.node.buffer.shape.scale)
-                zeropoints.append(resp.node.buffer.shape.zeropoint)
-                m_o = self._is_supported(self._NODE_WITH_MULTIPLE_OUTPUTS)
-                if m_o and ilayer.type >> 16 & (stm32msg.LAYER_TYPE_INTERNAL_DATA_NO_LAST):
-                    resp = self._waiting_answer(msg_type='node', timeout=1000)
+                self._append_node_data(resp, node_data)
+                if self._has_next_node_data(ilayer):
+                    resp = yield from self._gen_answer(msg_type='node', timeout=1000)
                     ilayer = resp.node
-                    self._send_ack()
+                    yield from self._gen_ack()
                 else:
                     # last data has been received
                     break
 
             if profiler:
-                feature, shape = self._from_buffer_msg(resp.node.buffer)
-                duration += ilayer.duration
-                if idx_node >= len(profiler['c_nodes']):
-                    item = {
-                        'c_durations': [ilayer.duration],
-                        'm_id': ilayer.id,
-                        'layer_type': ilayer.type & 0x7FFF,
-                        'layer_desc': self._layer_type_to_str(ilayer.type),
-                        'type': types,
-                        'shape': shapes,  # feature.shape,
-                        'scale': scales,
-                        'zero_point': zeropoints,
-                        'data': features if features is not None else None,
-                    }
-                    profiler['c_nodes'].append(item)
-                else:
-                    item = profiler['c_nodes'][idx_node]
-                    item['c_durations'].append(ilayer.duration)
-                    for idx, _ in enumerate(features):
-                        item['data'][idx] = np.append(item['data'][idx], features[idx], axis=0)
-
-                if callback:
-                    callback.on_node_end(idx_node,
-                                         features if features is not None else None,
-                                         logs={'dur': ilayer.duration,
-                                               'shape': shapes,
-                                               'm_id': ilayer.id,
-                                               'layer-type': ilayer.type & 0x7FFF})
+                duration += self._update_node_profile(profiler, callback, idx_node, ilayer, node_data)
 
             # end main loop
             if ilayer.type >> 16 & stm32msg.LAYER_TYPE_INTERNAL_LAST:
@@ -549,74 +688,259 @@ class AiPbMsg(AiRunnerDriver):
         # retreive the report
         # legacy support (2.1 protocol) - not used here
         #  global execution time is reported in the output tensors
-        self._waiting_answer(msg_type='report',
-                             timeout=20000,
-                             state=stm32msg.S_PROCESSING)
-        self._send_ack()
+        yield from self._gen_answer(msg_type='report',
+                                    timeout=20000,
+                                    state=stm32msg.S_PROCESSING)
+        yield from self._gen_ack()
 
         if profiler:
             profiler['c_durations'].append(duration)
 
         return None
 
-    def invoke_sample(self, s_inputs, **kwargs):
+    def _is_internal_node(self, ilayer):
+        """Indicate if the received node is an internal/hidden node"""  # noqa: DAR101,DAR201,DAR401
+        is_internal = ilayer.type >> 16
+        return bool(is_internal & stm32msg.LAYER_TYPE_INTERNAL_LAST) or\
+            bool(is_internal & stm32msg.LAYER_TYPE_INTERNAL)
+
+    def _has_next_node_data(self, ilayer):
+        """Indicate if other data are expected for the current node"""  # noqa: DAR101,DAR201,DAR401
+        m_o = self._is_supported(self._NODE_WITH_MULTIPLE_OUTPUTS)
+        return bool(m_o and ilayer.type >> 16 & (stm32msg.LAYER_TYPE_INTERNAL_DATA_NO_LAST))
+
+    def _append_node_data(self, resp, node_data):
+        """Append the received data (shapes, features, types, scales, zeropoints)"""  # noqa: DAR101,DAR201,DAR401
+        shapes, features, types, scales, zeropoints = node_data
+        feature, shape = self._from_buffer_msg(resp.node.buffer)
+        features.append(feature)
+        shapes.append(shape)
+        types.append(feature.dtype.type)
+        scales.append(resp.node.buffer.shape.scale)
+        zeropoints.append(resp.node.buffer.shape.zeropoint)
+
+    def _update_node_profile(self, profiler, callback, idx_node, ilayer, node_data):
+        """Update the profiler with the data of a c-node, return the duration"""  # noqa: DAR101,DAR201,DAR401
+        shapes, features, types, scales, zeropoints = node_data
+        desc = {
+            'm_id': ilayer.id,
+            'layer_type': ilayer.type & 0x7FFF,
+            'layer_desc': self._layer_type_to_str(ilayer.type),
+            'type': types,
+            'shape': shapes,  # feature.shape,
+            'scale': scales,
+            'zero_point': zeropoints,
+        }
+        profiler.add_node(idx_node, desc, ilayer.duration, features)
+
+        if callback:
+            callback.on_node_end(idx_node,
+                                 features if features is not None else None,
+                                 logs={'dur': ilayer.duration,
+                                       'shape': shapes,
+                                       'm_id': ilayer.id,
+                                       'layer-type': ilayer.type & 0x7FFF,
+                                       'scale': scales,
+                                       'zero_point': zeropoints})
+        return ilayer.duration
+
+    def _gen_invoke_sample(self, s_inputs, **kwargs):
         """Invoke the model (sample mode)"""  # noqa: DAR101,DAR201,DAR401
 
         if s_inputs[0].shape[0] != 1:
             raise HwIOError('Should be called with a batch size of 1')
 
         name = kwargs.pop('name', None)
+        profiler = kwargs.pop('profiler', None)
+        mode = kwargs.pop('mode', AiRunner.Mode.IO_ONLY)
+        callback = kwargs.pop('callback', None)
 
-        if name is None or name not in self._models.keys():
-            raise InvalidParamError('Invalid requested model name: ' + name)
+        start_stats, start_time = dict(self._io_stats), t.perf_counter()
+        res = yield from self._gen_invoke(s_inputs, self._get_model(name), profiler, mode, callback)
+        self._update_io_stats(profiler, start_stats, start_time)
+        return res
 
-        model = self._models[name]
+    def _gen_invoke_batch(self, inputs, outputs, **kwargs):
+        """Invoke the model (batch mode), results are written in outputs"""  # noqa: DAR101,DAR201,DAR401
 
+        name = kwargs.pop('name', None)
         profiler = kwargs.pop('profiler', None)
         mode = kwargs.pop('mode', AiRunner.Mode.IO_ONLY)
-        callback = kwargs.pop('callback', None)
 
+        model = self._get_model(name)
+        start_stats, start_time = dict(self._io_stats), t.perf_counter()
+        durs = []
+        if mode == AiRunner.Mode.IO_ONLY and self._use_stream(inputs):
+            def _on_sample(batch, s_outputs, dur):
+                for idx, out_ in enumerate(s_outputs):
+                    outputs[idx][batch] = np.reshape(out_, outputs[idx].shape[1:])
+                durs.append(dur)
+
+            yield from self._gen_stream(inputs, model, profiler, _on_sample)
+        else:
+            for batch in range(inputs[0].shape[0]):
+                s_inputs = [in_[batch:batch + 1] for in_ in inputs]
+                dests = [out_[batch:batch + 1] for out_ in outputs]
+                _, dur = yield from self._gen_invoke(s_inputs, model, profiler, mode, dests=dests)
+                durs.append(dur)
+        self._update_io_stats(profiler, start_stats, start_time)
+        return durs
+
+    def _use_stream(self, inputs):
+        """Indicate if the RUN_STREAM command is used for the inputs (IO_ONLY mode)"""  # noqa: DAR101,DAR201,DAR401
+        return inputs[0].shape[0] > 1 and self._is_supported(self._RUN_STREAM)
+
+    def _gen_stream(self, inputs, model, profiler, on_sample):
+        """Execute a RUN_STREAM task, on_sample(batch, outputs, duration) is called for each sample"""
+        # noqa: DAR101,DAR201,DAR401
+
+        n_samples = inputs[0].shape[0]
+        window = yield from self._gen_cmd_run_stream(timeout=1000, c_name=model.model_name, n_samples=n_samples)
+
+        for start in range(0, n_samples, window):
+            end = min(start + window, n_samples)
+
+            # send the inputs of the window back to back, no ack by buffer
+            for batch in range(start, end):
+                for idx, buffer_desc in enumerate(model.inputs):
+                    buffer_msg = self._to_buffer_msg(inputs[idx][batch:batch + 1], buffer_desc)
+                    yield from self._gen_write_delimited(buffer_msg)
+
+            # receive the outputs of the window, last one closes the window
+            for batch in range(start, end):
+                s_outputs = []
+                for idx in range(model.n_outputs):
+                    state = self._stream_state(batch, end, n_samples, (idx + 1) == model.n_outputs)
+                    resp = yield from self._gen_answer(msg_type='node', timeout=50000, state=state)
+                    output, _ = self._from_buffer_msg(resp.node.buffer)
+                    s_outputs.append(output)
+                on_sample(batch, s_outputs, self._report_duration(profiler, AiRunner.Mode.IO_ONLY, resp))
+
+    @staticmethod
+    def _stream_state(batch, end, n_samples, is_last_output):
+        """Return the expected state of an output (NETWORK_RUN_STREAM)"""  # noqa: DAR101,DAR201,DAR401
+        if is_last_output and (batch + 1) == n_samples:
+            return stm32msg.S_DONE
+        if is_last_output and (batch + 1) == end:
+            return stm32msg.S_WAITING
+        return stm32msg.S_PROCESSING
+
+    @staticmethod
+    def _run_param(mode):
+        """Return the param of the NETWORK_RUN command"""  # noqa: DAR101,DAR201,DAR401
         if mode == AiRunner.Mode.PER_LAYER:
-            param = stm32msg.P_RUN_MODE_INSPECTOR_WITHOUT_DATA
-        elif mode == AiRunner.Mode.PER_LAYER_WITH_DATA:
-            param = stm32msg.P_RUN_MODE_INSPECTOR
+            return stm32msg.P_RUN_MODE_INSPECTOR_WITHOUT_DATA
+        if mode == AiRunner.Mode.PER_LAYER_WITH_DATA:
+            return stm32msg.P_RUN_MODE_INSPECTOR
+        return stm32msg.P_RUN_MODE_NORMAL
+
+    @staticmethod
+    def _report_duration(profiler, mode, resp):
+        """Update the profiler with the duration of the last output, return it"""  # noqa: DAR101,DAR201,DAR401
+        if profiler:
+            profiler['debug']['exec_times'].append(resp.node.duration)
+            if mode != AiRunner.Mode.IO_ONLY and len(profiler['c_durations']) != 0:
+                dur = profiler['c_durations'][-1]
+            else:
+                dur = resp.node.duration
+                profiler['c_durations'].append(dur)
         else:
-            param = stm32msg.P_RUN_MODE_NORMAL
+            dur = resp.node.duration
+        return dur
+
+    def check_inputs(self, _1, _2):
+        """Specific function to check the inputs (generic checks are used)"""  # noqa: DAR101,DAR201,DAR401
+        return False
+
+    def _get_model(self, name):
+        """Return the model descriptor"""  # noqa: DAR101,DAR201,DAR401
+        if name is None or name not in self._models.keys():
+            raise InvalidParamError('Invalid requested model name: {}'.format(name))
+        return self._models[name]
+
+    def _gen_invoke(self, s_inputs, model, profiler, mode, callback=None, dests=None):
+        """Execute a RUN task, outputs are written in dests if provided"""  # noqa: DAR101,DAR201,DAR401
+
+        name = model.model_name
+        param = self._run_param(mode)
 
         s_outputs = []
 
         # start a RUN task
-        self._cmd_run(timeout=1000, c_name=name, param=param)
+        yield from self._gen_cmd_run(timeout=1000, c_name=name, param=param)
 
         # send the inputs
         for idx, buffer_desc in enumerate(model.inputs):
             input_ = s_inputs[idx]
             is_last = (idx + 1) == model.n_inputs
-            self._send_buffer(input_, buffer_desc, is_last=is_last)
+            yield from self._gen_send_buffer(input_, buffer_desc, is_last=is_last)
 
         # receive the features
-        resp = self._receive_features(profiler, callback)
+        resp = yield from self._gen_features(profiler, callback)
 
         # receive the outputs
         for idx, buffer_desc in enumerate(model.outputs):
             is_last = (idx + 1) == model.n_outputs
             state = stm32msg.S_DONE if is_last else stm32msg.S_PROCESSING
             if resp is None:
-                resp = self._waiting_answer(msg_type='node', timeout=50000, state=state)
+                resp = yield from self._gen_answer(msg_type='node', timeout=50000, state=state)
             output, _ = self._from_buffer_msg(resp.node.buffer)
+            if dests is not None:
+                dests[idx][...] = np.reshape(output, dests[idx].shape)
+                output = dests[idx]
             s_outputs.append(output)
             if not is_last:
-                self._send_ack()
+                yield from self._gen_ack()
                 resp = None
 
-        if profiler:
-            profiler['debug']['exec_times'].append(resp.node.duration)
-            if mode != AiRunner.Mode.IO_ONLY and len(profiler['c_durations']) != 0:
-                dur = profiler['c_durations'][-1]
-            else:
-                dur = resp.node.duration
-                profiler['c_durations'].append(dur)
-        else:
-            dur = resp.node.duration
+        return s_outputs, self._report_duration(profiler, mode, resp)
+
+
+class AiPbMsg(AiPbMsgCore, AiRunnerDriver):
+    """Class to handle the messages (protobuf-based) - blocking IO driver"""
+
+    def _run(self, gen):
+        """Execute an exchange (_gen_xx generator) with the IO driver, return its result"""
+        # noqa: DAR101,DAR201,DAR401
+        io_drv = self._io_drv
+        try:
+            req = next(gen)
+            while True:
+                if req[0] == _IO_READ:
+                    req = gen.send(io_drv.read_exact(req[1], req[2]))
+                else:
+                    req = gen.send(io_drv.write(req[1]))
+        except StopIteration as res:
+            return res.value
+
+    def connect(self, desc=None, **kwargs):
+        """Connect to the stm.ai run-time"""  # noqa: DAR101,DAR201,DAR401
+        if self._io_drv.is_connected:
+            return False
+        self._set_connect_params(kwargs)
+        return self._io_drv.connect(desc, **kwargs)
+
+    def disconnect(self):
+        self._reset()
+        self._io_drv.disconnect()
+
+    def is_alive(self, timeout=500):
+        """"Indicate if the connection is always alive"""  # noqa: DAR101,DAR201,DAR401
+        try:
+            self._run(self._gen_sync(timeout))
+        except (AiRunnerError, TimeoutError) as exc_:
+            self._logger.debug('is_alive() %s', str(exc_))
+            return False
+        return self._protocol_is_supported()
+
+    def discover(self, flush=False):
+        """Build the list of the available model"""  # noqa: DAR101,DAR201,DAR401
+        return self._run(self._gen_discover(flush))
+
+    def invoke_sample(self, s_inputs, **kwargs):
+        """Invoke the model (sample mode)"""  # noqa: DAR101,DAR201,DAR401
+        return self._run(self._gen_invoke_sample(s_inputs, **kwargs))
 
-        return s_outputs, dur
+    def invoke_batch(self, inputs, outputs, **kwargs):
+        """Invoke the model (batch mode), results are written in outputs"""  # noqa: DAR101,DAR201,DAR401
+        return self._run(self._gen_invoke_batch(inputs, outputs, **kwargs))
@@ -98,6 +98,7 @@ class SerialHwDriver(AiHwDriver):
         """Constructor"""  # noqa: DAR101,DAR201,DAR401
         self._device = None
         self._baudrate = 0
+        self._timeout = None
         super().__init__()
 
     def get_config(self):
@@ -142,6 +143,7 @@ class SerialHwDriver(AiHwDriver):
                 self._hdl.reset_output_buffer()
                 self._device = dev['device']
                 self._baudrate = baudrate
+                self._timeout = timeout
                 cpt = 1000
                 while self._read(10) and cpt:
                     cpt = cpt - 1
@@ -180,6 +182,21 @@ class SerialHwDriver(AiHwDriver):
         """Read data from the connected device"""  # noqa: DAR101,DAR201,DAR401
         return self._hdl.read(size)
 
+    def _read_wait(self, size, timeout):
+        """Read the data, wait is delegated to the serial timeout"""  # noqa: DAR101,DAR201,DAR401
+        wait_ = self._timeout
+        if not self._timeout or (timeout is not None and timeout < self._timeout):
+            # non-blocking COM or remaining time before the deadline is shorter
+            wait_ = timeout
+        if wait_ == self._timeout:
+            # read() returns when size bytes are received or the COM timeout expires
+            return self._hdl.read(size)
+        self._hdl.timeout = wait_
+        try:
+            return self._hdl.read(size)
+        finally:
+            self._hdl.timeout = self._timeout
+
     def _write(self, data, timeout=0):
         """Write data to the connected device"""  # noqa: DAR101,DAR201,DAR401
         return self._hdl.write(data)
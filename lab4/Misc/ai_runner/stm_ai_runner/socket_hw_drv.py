@@ -19,6 +19,7 @@ extra or specific messags is added.
 """
 
 import time as t
+import select
 import socket
 
 from .ai_runner import AiHwDriver
@@ -158,6 +159,8 @@ class SocketHwDriver(AiHwDriver):
             raise HwIOError(msg_err)
 
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # small packets are exchanged (ack/packet mode), Nagle's algorithm is disabled
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         n_retry = 4
         while n_retry:
             try:
@@ -188,6 +191,16 @@ class SocketHwDriver(AiHwDriver):
         """Read data from the connected device"""  # noqa: DAR101,DAR201,DAR401
         return self._hdl.recv(size)
 
+    def _read_wait(self, size, timeout):
+        """Wait the socket is readable (select) and read the data"""  # noqa: DAR101,DAR201,DAR401
+        readable, _, _ = select.select([self._hdl], [], [], timeout)
+        if not readable:
+            return b''
+        data = self._hdl.recv(size)
+        if not data:
+            raise HwIOError('Connection closed by the server')
+        return data
+
     def _write(self, data, timeout=0):
         """Send data to the socket"""  # noqa: DAR101,DAR201,DAR401
         res = self._hdl.sendall(data)
@@ -0,0 +1,652 @@
+###################################################################################
+#   Copyright (c) 2021 STMicroelectronics.
+#   All rights reserved.
+#   This software is licensed under terms that can be found in the LICENSE file in
+#   the root directory of this software component.
+#   If no LICENSE file comes with this software, it is provided AS-IS.
+###################################################################################
+"""
+STM32 aiValidation firmware emulator
+
+Reference implementation of the device side of the COM protocol (see
+nanopb/stm32msg.proto): SYNC (negotiated packet size and encoded datas),
+SYS_INFO, NETWORK_INFO, NETWORK_RUN (normal and inspector modes, the outputs of
+the c-nodes are sent), NETWORK_RUN_STREAM and log messages. The emulated models
+can be float or quantized (int8/uint8 tensors). It allows to test the AiPbMsg driver without board, the
+emulator is served on a TCP socket ('socket' domain) or on a pseudo-terminal
+('serial' domain, POSIX only). The emulated link can be throttled
+(baudrate/turnaround latency) to be representative of a serial link.
+
+Example:
+
+    emu = Stm32Emulator([EmuModel()])
+    serve_socket(emu, port=10000)
+    ...
+    runner.connect('socket:localhost:10000')
+
+    master_fd, _, device = open_pty()
+    threading.Thread(target=serve_pty, args=(emu, master_fd), daemon=True).start()
+    runner.connect('serial:' + device)
+
+"""
+
+import os
+import hashlib
+import socket
+import time as t
+
+import numpy as np
+
+from google.protobuf.internal.decoder import _DecodeVarint32
+
+from . import stm32msg_pb2 as stm32msg
+from .stm_ai_utils import AiBufferFormat
+from .buffer_codec import encode_datas, decode_datas
+
+
+_EMU_VERSION = (7 << 24) | (0 << 16) | (0 << 8)  # reported runtime/tools version (7.0.0)
+
+_EMU_DEV_ID = 0x450  # STM32H7
+_EMU_SYS_CLOCK = 480000000
+_EMU_BUS_CLOCK = 240000000
+_EMU_CACHE = (3 << 24) | (1 << 16) | (1 << 11) | (1 << 10)  # H7, fpu, I$/D$ enabled
+
+_EMU_NODE_DENSE = 0x104  # stm.ai operator ids (see stm_ai_node_type_to_str())
+_EMU_NODE_SOFTMAX = 0x10C
+
+_EMU_RELU_SCALE = 1.0 / 16  # quantization of the c-node outputs (quantized model)
+_EMU_LOGITS_SCALE = 1.0 / 8
+
+
+class EmuModel:
+    """Reference c-model executed by the emulator (dense layers + softmax)"""
+
+    def __init__(self, name='network', n_features=32, n_classes=10, seed=42, exec_time=0.0,
+                 hidden=None, quantized=False):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        name
+            c-name of the model
+        n_features
+            size of the input tensor (1, 1, 1, n_features)
+        n_classes
+            size of the output tensor (1, 1, 1, n_classes)
+        seed
+            seed used to generate the weights
+        exec_time
+            simulated inference time by sample (ms)
+        hidden
+            optional list with the size of the hidden dense layers (relu)
+        quantized
+            if True, the tensors are quantized: uint8 input (scale: 1/255), int8
+            outputs for the dense layers (zero-point: -128 after a relu) and uint8
+            output (scale: 1/256)
+        """
+        rng = np.random.RandomState(seed)
+        hidden = list(hidden) if hidden else []
+        self.name = name
+        n_last = hidden[-1] if hidden else n_features
+        self.weights = rng.uniform(-1.0, 1.0, (n_last, n_classes)).astype(np.float32)
+        self.bias = rng.uniform(-1.0, 1.0, (n_classes,)).astype(np.float32)
+        self.hidden = []  # list of (weights, bias)
+        for n_in, n_out in zip([n_features] + hidden[:-1], hidden):
+            scale = 1.0 / np.sqrt(n_in)
+            self.hidden.append((rng.uniform(-scale, scale, (n_in, n_out)).astype(np.float32),
+                                rng.uniform(-scale, scale, (n_out,)).astype(np.float32)))
+        self.input_shapes = [(1, 1, 1, n_features)]
+        self.output_shapes = [(1, 1, 1, n_classes)]
+        self.exec_time = exec_time
+        self.quantized = quantized
+        # (format, scale, zero-point) of the input and of the c-node outputs
+        if quantized:
+            self.input_formats = [(AiBufferFormat.AI_BUFFER_FORMAT_U8, 1.0 / 255, 0)]
+            self.node_formats = [(AiBufferFormat.AI_BUFFER_FORMAT_S8, _EMU_RELU_SCALE, -128)] * len(hidden)
+            self.node_formats += [(AiBufferFormat.AI_BUFFER_FORMAT_S8, _EMU_LOGITS_SCALE, 0),
+                                  (AiBufferFormat.AI_BUFFER_FORMAT_U8, 1.0 / 256, 0)]
+        else:
+            self.input_formats = [(AiBufferFormat.AI_BUFFER_FORMAT_FLOAT, 0.0, 0)]
+            self.node_formats = [(AiBufferFormat.AI_BUFFER_FORMAT_FLOAT, 0.0, 0)] * (len(hidden) + 2)
+        self.output_formats = self.node_formats[-1:]
+
+    @property
+    def params(self):
+        """Return the list of the params"""  # noqa: DAR101,DAR201,DAR401
+        params = [self.weights, self.bias]
+        for weights, bias in self.hidden:
+            params.extend([weights, bias])
+        return params
+
+    @property
+    def signature(self):
+        """Return the signature of the model (hash of the params)"""  # noqa: DAR101,DAR201,DAR401
+        return hashlib.md5(b''.join([param.tobytes() for param in self.params])).hexdigest()
+
+    @property
+    def macc(self):
+        """Return the number of MACC"""  # noqa: DAR101,DAR201,DAR401
+        return int(sum([param.size for param in self.params]))
+
+    @property
+    def node_types(self):
+        """Return the stm.ai operator id of the c-nodes"""  # noqa: DAR101,DAR201,DAR401
+        return [_EMU_NODE_DENSE] * (len(self.hidden) + 1) + [_EMU_NODE_SOFTMAX]
+
+    @staticmethod
+    def _quantize(x_, fmt):
+        """Quantize and de-quantize the values (fmt: (format, scale, zero-point))"""  # noqa: DAR101,DAR201,DAR401
+        dtype = np.dtype(AiBufferFormat.to_np_type(fmt[0]))
+        info = np.iinfo(dtype)
+        q_ = np.clip(np.round(x_ / fmt[1]) + fmt[2], info.min, info.max).astype(dtype)
+        return q_, ((q_.astype(np.float32) - fmt[2]) * fmt[1]).astype(np.float32)
+
+    def forward(self, inputs):
+        """Compute the outputs of all c-nodes (batch dimension is supported)"""  # noqa: DAR101,DAR201,DAR401
+        x_ = np.reshape(inputs[0], (-1, self.input_shapes[0][-1])).astype(np.float32)
+        if self.quantized:
+            x_ = (x_ - self.input_formats[0][2]) * np.float32(self.input_formats[0][1])
+        features = []
+        for (weights, bias), fmt in zip(self.hidden, self.node_formats):
+            x_ = np.maximum(x_ @ weights + bias, 0.0)
+            if self.quantized:
+                q_, x_ = self._quantize(x_, fmt)
+                features.append(q_)
+            else:
+                features.append(x_)
+        y_ = x_ @ self.weights + self.bias
+        if self.quantized:
+            q_, y_ = self._quantize(y_, self.node_formats[-2])
+            features.append(q_)
+        else:
+            features.append(y_)
+        e_ = np.exp(y_ - np.max(y_, axis=-1, keepdims=True))
+        prob = (e_ / np.sum(e_, axis=-1, keepdims=True)).astype(np.float32)
+        features.append(self._quantize(prob, self.node_formats[-1])[0] if self.quantized else prob)
+        return [np.reshape(f_, (-1, 1, 1, f_.shape[-1])) for f_ in features]
+
+    def __call__(self, inputs):
+        """Compute the outputs (batch dimension is supported)"""  # noqa: DAR101,DAR201,DAR401
+        return [self.forward(inputs)[-1]]
+
+
+class EmuLink:
+    """Byte stream link with simulated baudrate and turnaround latency"""
+
+    def __init__(self, read, write, baudrate=0, latency=0.0):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        read
+            function to read n bytes (blocking), EOFError is raised if closed
+        write
+            function to write the bytes
+        baudrate
+            simulated baudrate (0: no limitation)
+        latency
+            simulated turnaround latency (ms), applied when the direction changes
+        """
+        self._read = read
+        self._write = write
+        self._baudrate = baudrate
+        self._latency = latency / 1000.0
+        self._rx_last = True
+
+    def _transfer_time(self, size):
+        """Return the transfer time of n bytes (8N1)"""  # noqa: DAR101,DAR201,DAR401
+        return size * 10 / self._baudrate if self._baudrate else 0.0
+
+    def read(self, size):
+        """Read n bytes"""  # noqa: DAR101,DAR201,DAR401
+        data = self._read(size)
+        self._rx_last = True
+        if self._baudrate:
+            t.sleep(self._transfer_time(size))
+        return data
+
+    def write(self, data):
+        """Write the bytes"""  # noqa: DAR101,DAR201,DAR401
+        if self._rx_last and self._latency:
+            t.sleep(self._latency)
+        self._rx_last = False
+        if self._baudrate:
+            t.sleep(self._transfer_time(len(data)))
+        self._write(data)
+
+
+class Stm32Emulator:
+    """Device side of the COM protocol (aiValidation firmware)"""
+
+    def __init__(self, models=None, capability=stm32msg.CAP_STREAM | stm32msg.CAP_INSPECTOR, window=8,
+                 logger=None, log_msg=False, packet_size=1024):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        models
+            list of EmuModel objects
+        capability
+            capabilities reported by the SYNC command (CAP_XX bits)
+        window
+            max number of samples by window (CMD_NETWORK_RUN_STREAM)
+        logger
+            optional logger object
+        log_msg
+            if True, a log message is sent to the host by NETWORK_RUN command
+        packet_size
+            max size of the packets (CAP_PACKET_SIZE), 0 to emulate a firmware
+            which supports only the legacy packets (IO_XX_PACKET_SIZE)
+        """
+        self._models = models if models else [EmuModel()]
+        self._capability = capability
+        self._window = max(1, window)
+        self._logger = logger
+        self._log_msg = log_msg
+        self._packet_size = min(max(0, packet_size), 0xFFFF)
+        self._tx_packet_size = 0  # negotiated packet size (0: legacy packets)
+        self._compress_datas = False  # encoded datas are sent (CAP_COMPRESSED_DATAS)
+        self._link = None
+        self._reqid = 0
+        self._cmds = {
+            stm32msg.CMD_SYNC: self._cmd_sync,
+            stm32msg.CMD_SYS_INFO: self._cmd_sys_info,
+            stm32msg.CMD_NETWORK_INFO: self._cmd_network_info,
+            stm32msg.CMD_NETWORK_RUN: self._cmd_run,
+            stm32msg.CMD_NETWORK_RUN_STREAM: self._cmd_run_stream,
+        }
+
+    @property
+    def models(self):
+        """Return the list of the emulated models"""  # noqa: DAR101,DAR201,DAR401
+        return self._models
+
+    def _debug(self, msg):
+        if self._logger:
+            self._logger.debug(msg)
+
+    def serve(self, link):
+        """Process the requests until the link is closed"""  # noqa: DAR101,DAR201,DAR401
+        self._link = link
+        self._tx_packet_size = 0
+        self._compress_datas = False
+        try:
+            while True:
+                req = self._read_msg(stm32msg.reqMsg())
+                self._reqid = req.reqid
+                self._debug('emu: cmd={} param={} opt={}'.format(req.cmd, req.param, req.opt))
+                cmd_ = self._cmds.get(req.cmd, self._cmd_unsupported)
+                cmd_(req)
+        except EOFError:
+            pass
+        finally:
+            self._link = None
+
+    def _read_packet(self):
+        """Read a packet (legacy or large packet) and return the payload"""  # noqa: DAR101,DAR201,DAR401
+        header = self._link.read(1)
+        if header[0] & stm32msg.IO_HEADER_LARGE_FLAG:
+            size = self._link.read(stm32msg.IO_LARGE_HEADER_SIZE - 1)
+            return self._link.read(size[0] | size[1] << 8)
+        packet = self._link.read(stm32msg.IO_OUT_PACKET_SIZE)
+        return packet[:header[0] & stm32msg.IO_HEADER_SIZE_MSK]
+
+    def _read_msg(self, msg):
+        """Read and parse a message prefixed with its size"""  # noqa: DAR101,DAR201,DAR401
+        buf = bytearray(self._read_packet())
+        size, pos = _DecodeVarint32(bytes(buf), 0)
+        while len(buf) < pos + size:
+            self._link.write(bytes([stm32msg.IO_OUT_SYNC]))
+            buf += self._read_packet()
+        msg.ParseFromString(bytes(buf[pos:pos + size]))
+        return msg
+
+    def _write_msg(self, state, **payload):
+        """Build a response message and send it (packet mode)"""  # noqa: DAR101,DAR201,DAR401
+        resp = stm32msg.respMsg(reqid=self._reqid, state=state, **payload)
+        buf = resp.SerializeToString()
+        if self._tx_packet_size:
+            self._link.write(self._to_large_packets(buf))
+            return
+        p_size = stm32msg.IO_IN_PACKET_SIZE
+        frames = bytearray()
+        for pos in range(0, len(buf), p_size):
+            chunk = buf[pos:pos + p_size]
+            header = len(chunk)
+            if pos + p_size >= len(buf):
+                header |= stm32msg.IO_HEADER_EOM_FLAG
+            frames.append(header)
+            frames += chunk
+            frames += bytes(p_size - len(chunk))
+        self._link.write(bytes(frames))
+
+    def _to_large_packets(self, buf):
+        """Build the stream of large packets (header + size + payload w/o padding)"""  # noqa: DAR101,DAR201,DAR401
+        p_size = self._tx_packet_size
+        frames = bytearray()
+        for pos in range(0, len(buf), p_size):
+            chunk = buf[pos:pos + p_size]
+            header = stm32msg.IO_HEADER_LARGE_FLAG
+            if pos + p_size >= len(buf):
+                header |= stm32msg.IO_HEADER_EOM_FLAG
+            frames += bytes([header, len(chunk) & 0xFF, len(chunk) >> 8])
+            frames += chunk
+        return bytes(frames)
+
+    def _write_ack(self, state, param=0, error=stm32msg.E_NONE):
+        self._write_msg(state, ack=stm32msg.ackMsg(param=param, error=error))
+
+    def _write_log(self, state, msg, level=1):
+        """Send a log message, host acknowledges it"""  # noqa: DAR101,DAR201,DAR401
+        self._write_msg(state, log=stm32msg.logMsg(level=level, str=msg))
+        self._read_msg(stm32msg.ackMsg())
+
+    @staticmethod
+    def _to_shape_msg(shape, fmt=AiBufferFormat.AI_BUFFER_FORMAT_FLOAT, scale=0.0, zero_point=0):
+        """Return aiBufferShapeMsg"""  # noqa: DAR101,DAR201,DAR401
+        return stm32msg.aiBufferShapeMsg(format=fmt, n_batches=shape[0], height=shape[1],
+                                         width=shape[2], channels=shape[3],
+                                         scale=scale, zeropoint=zero_point, addr=0)
+
+    @staticmethod
+    def _to_ndarray(msg):
+        """Convert aiBufferByteMsg to ndarray"""  # noqa: DAR101,DAR201,DAR401
+        shape = (msg.shape.n_batches, msg.shape.height, msg.shape.width, msg.shape.channels)
+        dt_ = np.dtype(AiBufferFormat.to_np_type(msg.shape.format)).newbyteorder('<')
+        return decode_datas(msg.datas, msg.encoding, dt_, shape, msg.shape.zeropoint)
+
+    def _to_node_msg(self, data, duration, node_type=stm32msg.LAYER_TYPE_OUTPUT << 16, node_id=0,
+                     with_data=True, fmt=(AiBufferFormat.AI_BUFFER_FORMAT_FLOAT, 0.0, 0)):
+        """Return nodeMsg with an output tensor (fmt: (format, scale, zero-point))"""  # noqa: DAR101,DAR201,DAR401
+        buffer = stm32msg.aiBufferByteMsg(shape=self._to_shape_msg(data.shape, *fmt), datas=b'')
+        if with_data and self._compress_datas:
+            buffer.encoding, buffer.datas = encode_datas(data, zero_point=fmt[2])
+        elif with_data:
+            buffer.datas = np.ascontiguousarray(data, dtype=data.dtype.newbyteorder('<')).tobytes()
+        return stm32msg.nodeMsg(type=node_type, id=node_id,
+                                duration=duration, buffer=buffer)
+
+    def _get_model(self, name):
+        """Return the requested model"""  # noqa: DAR101,DAR201,DAR401
+        for model in self._models:
+            if model.name == name:
+                return model
+        return None
+
+    def _run(self, model, inputs):
+        """Execute the model, return the outputs and the duration (ms)"""  # noqa: DAR101,DAR201,DAR401
+        start_time = t.perf_counter()
+        outputs = model(inputs)
+        if model.exec_time:
+            t.sleep(model.exec_time / 1000.0)
+        return outputs, (t.perf_counter() - start_time) * 1000.0
+
+    def _run_inspector(self, model, inputs, with_data):
+        """Execute the model, the outputs of the c-nodes are sent"""  # noqa: DAR101,DAR201,DAR401
+        start_time = t.perf_counter()
+        features = model.forward(inputs)
+        if model.exec_time:
+            t.sleep(model.exec_time / 1000.0)
+        duration = (t.perf_counter() - start_time) * 1000.0
+        n_nodes = len(features)
+        for idx, (feature, op_type) in enumerate(zip(features, model.node_types)):
+            is_last = (idx + 1) == n_nodes
+            layer_type = stm32msg.LAYER_TYPE_INTERNAL_LAST if is_last else stm32msg.LAYER_TYPE_INTERNAL
+            node = self._to_node_msg(feature, duration / n_nodes, node_type=layer_type << 16 | op_type,
+                                     node_id=idx, with_data=with_data, fmt=model.node_formats[idx])
+            self._write_msg(stm32msg.S_PROCESSING, node=node)
+            self._read_msg(stm32msg.ackMsg())
+        report = stm32msg.aiRunReportMsg(id=0, signature=0, num_inferences=1, n_nodes=n_nodes,
+                                         elapsed_ms=duration)
+        self._write_msg(stm32msg.S_PROCESSING, report=report)
+        self._read_msg(stm32msg.ackMsg())
+        return features[-1:], duration
+
+    def _cmd_unsupported(self, req):
+        self._write_ack(stm32msg.S_ERROR, error=stm32msg.E_INVALID_CMD)
+
+    def _cmd_sync(self, req):
+        version = stm32msg.P_VERSION_MAJOR << 8 | stm32msg.P_VERSION_MINOR
+        capability = self._capability
+        packet_size = min(req.param, self._packet_size) if req.param else self._packet_size
+        if packet_size:
+            capability |= stm32msg.CAP_PACKET_SIZE | packet_size << stm32msg.IO_PACKET_SIZE_POS
+        sync = stm32msg.syncMsg(version=version, capability=capability,
+                                rtid=stm32msg.AI_RT_STM_AI | stm32msg.AI_GCC << 8)
+        # the SYNC answer is always sent with the legacy packets
+        self._tx_packet_size = 0
+        self._write_msg(stm32msg.S_IDLE, sync=sync)
+        self._tx_packet_size = packet_size if req.param else 0
+        self._compress_datas = bool(req.opt & self._capability & stm32msg.CAP_COMPRESSED_DATAS)
+
+    def _cmd_sys_info(self, req):
+        sinfo = stm32msg.sysinfoMsg(devid=_EMU_DEV_ID, sclock=_EMU_SYS_CLOCK,
+                                    hclock=_EMU_BUS_CLOCK, cache=_EMU_CACHE)
+        self._write_msg(stm32msg.S_IDLE, sinfo=sinfo)
+
+    def _cmd_network_info(self, req):
+        if req.param >= len(self._models):
+            self._write_ack(stm32msg.S_IDLE, error=stm32msg.E_INVALID_PARAM)
+            return
+        model = self._models[req.param]
+        n_weights = model.macc * 4
+        ninfo = stm32msg.aiNetworkInfoMsg(
+            model_name=model.name,
+            model_signature=model.signature,
+            model_datetime='emulated',
+            compile_datetime='emulated',
+            runtime_revision='emu',
+            runtime_version=_EMU_VERSION,
+            tool_revision='emu',
+            tool_version=_EMU_VERSION,
+            tool_api_version=_EMU_VERSION,
+            api_version=_EMU_VERSION,
+            interface_api_version=_EMU_VERSION,
+            n_macc=model.macc,
+            n_inputs=len(model.input_shapes),
+            n_outputs=len(model.output_shapes),
+            n_nodes=len(model.node_types),
+            inputs=[self._to_shape_msg(s_, *f_) for s_, f_ in zip(model.input_shapes, model.input_formats)],
+            outputs=[self._to_shape_msg(s_, *f_) for s_, f_ in zip(model.output_shapes, model.output_formats)],
+            activations=self._to_shape_msg((1, 1, 1, 0)),
+            weights=self._to_shape_msg((1, 1, 1, n_weights)),
+            signature=0)
+        self._write_msg(stm32msg.S_IDLE, ninfo=ninfo)
+
+    def _cmd_run(self, req):
+        model = self._get_model(req.name)
+        if model is None:
+            self._write_ack(stm32msg.S_ERROR, error=stm32msg.E_INVALID_PARAM)
+            return
+        self._write_ack(stm32msg.S_WAITING)
+
+        # receive the inputs, each buffer is acknowledged
+        inputs = []
+        n_inputs = len(model.input_shapes)
+        for idx in range(n_inputs):
+            inputs.append(self._to_ndarray(self._read_msg(stm32msg.aiBufferByteMsg())))
+            is_last = (idx + 1) == n_inputs
+            self._write_ack(stm32msg.S_PROCESSING if is_last else stm32msg.S_WAITING)
+            self._read_msg(stm32msg.ackMsg())
+
+        if req.param in (stm32msg.P_RUN_MODE_INSPECTOR, stm32msg.P_RUN_MODE_INSPECTOR_WITHOUT_DATA) and\
+                self._capability & stm32msg.CAP_INSPECTOR:
+            with_data = req.param == stm32msg.P_RUN_MODE_INSPECTOR
+            outputs, duration = self._run_inspector(model, inputs, with_data)
+        else:
+            outputs, duration = self._run(model, inputs)
+
+        if self._log_msg:
+            self._write_log(stm32msg.S_PROCESSING,
+                            '{}: done ({:.3f}ms)'.format(model.name, duration))
+
+        # send the outputs, host acknowledges each output except the last one
+        for idx, output in enumerate(outputs):
+            is_last = (idx + 1) == len(outputs)
+            state = stm32msg.S_DONE if is_last else stm32msg.S_PROCESSING
+            self._write_msg(state, node=self._to_node_msg(output, duration, fmt=model.output_formats[idx]))
+            if not is_last:
+                self._read_msg(stm32msg.ackMsg())
+
+    def _cmd_run_stream(self, req):
+        model = self._get_model(req.name)
+        if model is None or not req.opt:
+            self._write_ack(stm32msg.S_ERROR, error=stm32msg.E_INVALID_PARAM)
+            return
+        n_samples = req.opt
+        window = min(self._window, n_samples)
+        self._write_ack(stm32msg.S_WAITING, param=window)
+
+        for start in range(0, n_samples, window):
+            end = min(start + window, n_samples)
+
+            # inputs of the window are received back to back
+            samples = []
+            for _ in range(start, end):
+                samples.append([self._to_ndarray(self._read_msg(stm32msg.aiBufferByteMsg()))
+                                for _ in model.input_shapes])
+
+            # outputs are sent w/o ack, last one closes the window
+            for batch, inputs in enumerate(samples, start):
+                outputs, duration = self._run(model, inputs)
+                for idx, output in enumerate(outputs):
+                    is_last = (idx + 1) == len(outputs)
+                    if is_last and (batch + 1) == n_samples:
+                        state = stm32msg.S_DONE
+                    elif is_last and (batch + 1) == end:
+                        state = stm32msg.S_WAITING
+                    else:
+                        state = stm32msg.S_PROCESSING
+                    self._write_msg(state, node=self._to_node_msg(output, duration,
+                                                                  fmt=model.output_formats[idx]))
+
+
+def _socket_reader(conn):
+    """Return a function to read n bytes from a socket"""  # noqa: DAR101,DAR201,DAR401
+
+    def _read(size):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        pos = 0
+        while pos < size:
+            n_r = conn.recv_into(view[pos:])
+            if not n_r:
+                raise EOFError()
+            pos += n_r
+        return bytes(buf)
+
+    return _read
+
+
+def serve_socket(emulator, host='localhost', port=10000, baudrate=0, latency=0.0,
+                 once=False, ready=None):
+    """
+    Serve the emulator on a TCP socket (one client at a time)
+
+    Parameters
+    ----------
+    emulator
+        Stm32Emulator object
+    host
+        hostname or ip
+    port
+        port number
+    baudrate
+        simulated baudrate (0: no limitation)
+    latency
+        simulated turnaround latency (ms)
+    once
+        return after the first connection is closed
+    ready
+        optional threading.Event, set when the server is listening
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(1)
+        if ready is not None:
+            ready.set()
+        while True:
+            conn, _ = sock.accept()
+            with conn:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                link = EmuLink(_socket_reader(conn), conn.sendall, baudrate, latency)
+                try:
+                    emulator.serve(link)
+                except ConnectionError:
+                    pass
+            if once:
+                break
+
+
+def open_pty():
+    """
+    Create a pseudo-terminal (POSIX only) in raw mode
+
+    The slave side is kept open, the emulator can be re-opened by the host
+    (reconnection).
+
+    Returns
+    -------
+    tuple
+        master file descriptor, slave file descriptor and name of the device
+        (to be used with the 'serial' domain)
+    """
+    import tty
+
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(slave_fd)
+    return master_fd, slave_fd, os.ttyname(slave_fd)
+
+
+def _fd_reader(fd):
+    """Return a function to read n bytes from a file descriptor"""  # noqa: DAR101,DAR201,DAR401
+
+    def _read(size):
+        buf = bytearray()
+        while len(buf) < size:
+            try:
+                data = os.read(fd, size - len(buf))
+            except OSError as exc_:
+                raise EOFError() from exc_
+            if not data:
+                raise EOFError()
+            buf += data
+        return bytes(buf)
+
+    return _read
+
+
+def _fd_writer(fd):
+    """Return a function to write the bytes to a file descriptor"""  # noqa: DAR101,DAR201,DAR401
+
+    def _write(data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    return _write
+
+
+def serve_pty(emulator, master_fd, baudrate=0, latency=0.0):
+    """
+    Serve the emulator on a pseudo-terminal (see open_pty())
+
+    The function returns when the master file descriptor is closed.
+
+    Parameters
+    ----------
+    emulator
+        Stm32Emulator object
+    master_fd
+        master file descriptor of the pseudo-terminal
+    baudrate
+        simulated baudrate (0: no limitation)
+    latency
+        simulated turnaround latency (ms)
+    """
+    link = EmuLink(_fd_reader(master_fd), _fd_writer(master_fd), baudrate, latency)
+    emulator.serve(link)
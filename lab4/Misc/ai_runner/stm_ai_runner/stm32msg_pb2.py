@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: stm32msg.proto
 
@@ -8,7 +9,6 @@ from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
 from google.protobuf import reflection as _reflection
 from google.protobuf import symbol_database as _symbol_database
-from google.protobuf import descriptor_pb2
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
@@ -20,9 +20,9 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   name='stm32msg.proto',
   package='',
   syntax='proto2',
-  serialized_pb=_b('\n\x0estm32msg.proto\"f\n\x06reqMsg\x12\r\n\x05reqid\x18\x01 \x02(\r\x12#\n\x03\x63md\x18\x02 \x02(\x0e\x32\x08.EnumCmd:\x0c\x43MD_SYS_INFO\x12\r\n\x05param\x18\x03 \x02(\r\x12\x0c\n\x04name\x18\x04 \x02(\t\x12\x0b\n\x03opt\x18\x05 \x02(\r\"l\n\x0e\x61iRunReportMsg\x12\n\n\x02id\x18\x01 \x02(\r\x12\x11\n\tsignature\x18\x02 \x02(\r\x12\x16\n\x0enum_inferences\x18\x03 \x02(\r\x12\x0f\n\x07n_nodes\x18\x04 \x02(\r\x12\x12\n\nelapsed_ms\x18\x05 \x02(\x02\"\xae\x01\n\x10\x61iBufferShapeMsg\x12\x11\n\x06\x66ormat\x18\x01 \x02(\r:\x01\x30\x12\x14\n\tn_batches\x18\x02 \x02(\r:\x01\x31\x12\x11\n\x06height\x18\x03 \x02(\r:\x01\x31\x12\x10\n\x05width\x18\x04 \x02(\r:\x01\x31\x12\x13\n\x08\x63hannels\x18\x05 \x02(\r:\x01\x31\x12\x10\n\x05scale\x18\x06 \x02(\x02:\x01\x30\x12\x14\n\tzeropoint\x18\x07 \x02(\x05:\x01\x30\x12\x0f\n\x04\x61\x64\x64r\x18\x08 \x02(\x05:\x01\x30\"\x8b\x04\n\x10\x61iNetworkInfoMsg\x12\x12\n\nmodel_name\x18\x01 \x02(\t\x12\x17\n\x0fmodel_signature\x18\x02 \x02(\t\x12\x16\n\x0emodel_datetime\x18\x03 \x02(\t\x12\x18\n\x10\x63ompile_datetime\x18\x04 \x02(\t\x12\x18\n\x10runtime_revision\x18\x05 \x02(\t\x12\x17\n\x0fruntime_version\x18\x06 \x02(\r\x12\x15\n\rtool_revision\x18\x07 \x02(\t\x12\x14\n\x0ctool_version\x18\x08 \x02(\r\x12\x18\n\x10tool_api_version\x18\t \x02(\r\x12\x13\n\x0b\x61pi_version\x18\n \x02(\r\x12\x1d\n\x15interface_api_version\x18\x0b \x02(\r\x12\x0e\n\x06n_macc\x18\x0c \x02(\r\x12\x10\n\x08n_inputs\x18\r \x02(\r\x12\x11\n\tn_outputs\x18\x0e \x02(\r\x12\x0f\n\x07n_nodes\x18\x0f \x02(\r\x12!\n\x06inputs\x18\x10 \x03(\x0b\x32\x11.aiBufferShapeMsg\x12\"\n\x07outputs\x18\x11 \x03(\x0b\x32\x11.aiBufferShapeMsg\x12&\n\x0b\x61\x63tivations\x18\x12 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\"\n\x07weights\x18\x13 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\x11\n\tsignature\x18\x14 \x02(\r\"B\n\x0f\x61iBufferByteMsg\x12 \n\x05shape\x18\x01 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\r\n\x05\x64\x61tas\x18\x02 \x02(\x0c\"<\n\x07syncMsg\x12\x0f\n\x07version\x18\x01 \x02(\r\x12\x12\n\ncapability\x18\x04 \x02(\r\x12\x0c\n\x04rtid\x18\x05 \x02(\r\"J\n\nsysinfoMsg\x12\r\n\x05\x64\x65vid\x18\x01 \x02(\r\x12\x0e\n\x06sclock\x18\x02 \x02(\r\x12\x0e\n\x06hclock\x18\x03 \x02(\r\x12\r\n\x05\x63\x61\x63he\x18\x04 \x02(\r\"2\n\x06\x61\x63kMsg\x12\r\n\x05param\x18\x01 \x02(\r\x12\x19\n\x05\x65rror\x18\x02 \x02(\x0e\x32\n.EnumError\"$\n\x06logMsg\x12\r\n\x05level\x18\x01 \x02(\r\x12\x0b\n\x03str\x18\x02 \x02(\t\"W\n\x07nodeMsg\x12\x0c\n\x04type\x18\x01 \x02(\r\x12\n\n\x02id\x18\x02 \x02(\r\x12\x10\n\x08\x64uration\x18\x03 \x02(\x02\x12 \n\x06\x62uffer\x18\x04 \x02(\x0b\x32\x10.aiBufferByteMsg\"\x87\x02\n\x07respMsg\x12\r\n\x05reqid\x18\x01 \x02(\r\x12\x19\n\x05state\x18\x02 \x02(\x0e\x32\n.EnumState\x12\x18\n\x04sync\x18\n \x01(\x0b\x32\x08.syncMsgH\x00\x12\x1c\n\x05sinfo\x18\x0b \x01(\x0b\x32\x0b.sysinfoMsgH\x00\x12\x16\n\x03\x61\x63k\x18\x0c \x01(\x0b\x32\x07.ackMsgH\x00\x12\x16\n\x03log\x18\r \x01(\x0b\x32\x07.logMsgH\x00\x12\x18\n\x04node\x18\x0e \x01(\x0b\x32\x08.nodeMsgH\x00\x12\"\n\x05ninfo\x18\x14 \x01(\x0b\x32\x11.aiNetworkInfoMsgH\x00\x12!\n\x06report\x18\x15 \x01(\x0b\x32\x0f.aiRunReportMsgH\x00\x42\t\n\x07payload*;\n\x0b\x45numVersion\x12\x13\n\x0fP_VERSION_MAJOR\x10\x02\x12\x13\n\x0fP_VERSION_MINOR\x10\x02\x1a\x02\x10\x01*\x86\x01\n\x0e\x45numLowLevelIO\x12\x17\n\x12IO_HEADER_EOM_FLAG\x10\x80\x01\x12\x16\n\x12IO_HEADER_SIZE_MSK\x10\x7f\x12\x15\n\x11IO_IN_PACKET_SIZE\x10 \x12\x16\n\x12IO_OUT_PACKET_SIZE\x10 \x12\x10\n\x0bIO_OUT_SYNC\x10\xaa\x01\x1a\x02\x10\x01*@\n\rEnumAiRuntime\x12\x10\n\x0c\x41I_RT_STM_AI\x10\x01\x12\x0e\n\nAI_RT_TFLM\x10\x02\x12\r\n\tAI_RT_TVM\x10\x03*?\n\tEnumTools\x12\n\n\x06\x41I_GCC\x10\x01\x12\n\n\x06\x41I_IAR\x10\x02\x12\x0c\n\x08\x41I_MDK_5\x10\x03\x12\x0c\n\x08\x41I_MDK_6\x10\x04*[\n\x0e\x45numCapability\x12\x11\n\rCAP_INSPECTOR\x10\x01\x12\x13\n\x0f\x43\x41P_FIXED_POINT\x10\x02\x12\r\n\tCAP_RELOC\x10\x04\x12\x12\n\rCAP_SELF_TEST\x10\x80\x01*\x95\x01\n\x07\x45numCmd\x12\x0c\n\x08\x43MD_SYNC\x10\x00\x12\x10\n\x0c\x43MD_SYS_INFO\x10\x01\x12\x14\n\x10\x43MD_NETWORK_INFO\x10\n\x12\x13\n\x0f\x43MD_NETWORK_RUN\x10\x0b\x12\x16\n\x12\x43MD_NETWORK_REPORT\x10\x0c\x12\x0c\n\x08\x43MD_TEST\x10\x64\x12\x19\n\x14\x43MD_TEST_UNSUPPORTED\x10\xc8\x01*Q\n\tEnumState\x12\n\n\x06S_IDLE\x10\x00\x12\r\n\tS_WAITING\x10\x01\x12\x10\n\x0cS_PROCESSING\x10\x02\x12\n\n\x06S_DONE\x10\x03\x12\x0b\n\x07S_ERROR\x10\x04*\xbf\x01\n\tEnumError\x12\n\n\x06\x45_NONE\x10\x00\x12\x12\n\x0e\x45_INVALID_SIZE\x10\x01\x12\x14\n\x10\x45_INVALID_FORMAT\x10\x02\x12\x13\n\x0f\x45_INVALID_STATE\x10\x03\x12\x13\n\x0f\x45_INVALID_PARAM\x10\x04\x12\x13\n\x0f\x45_INVALID_SHAPE\x10\x05\x12\x11\n\rE_INVALID_CMD\x10\x06\x12\x1b\n\x17\x45_INVALID_UNINITIALIZED\x10\x07\x12\r\n\tE_GENERIC\x10\n*f\n\x0c\x45numRunParam\x12\x15\n\x11P_RUN_MODE_NORMAL\x10\x00\x12\x18\n\x14P_RUN_MODE_INSPECTOR\x10\x01\x12%\n!P_RUN_MODE_INSPECTOR_WITHOUT_DATA\x10\x02*\x83\x01\n\rEnumLayerType\x12\x15\n\x11LAYER_TYPE_OUTPUT\x10\x00\x12\x17\n\x13LAYER_TYPE_INTERNAL\x10\x01\x12\x1c\n\x18LAYER_TYPE_INTERNAL_LAST\x10\x02\x12$\n LAYER_TYPE_INTERNAL_DATA_NO_LAST\x10\x04')
+  serialized_options=None,
+  serialized_pb=_b('\n\x0estm32msg.proto\"f\n\x06reqMsg\x12\r\n\x05reqid\x18\x01 \x02(\r\x12#\n\x03\x63md\x18\x02 \x02(\x0e\x32\x08.EnumCmd:\x0c\x43MD_SYS_INFO\x12\r\n\x05param\x18\x03 \x02(\r\x12\x0c\n\x04name\x18\x04 \x02(\t\x12\x0b\n\x03opt\x18\x05 \x02(\r\"l\n\x0e\x61iRunReportMsg\x12\n\n\x02id\x18\x01 \x02(\r\x12\x11\n\tsignature\x18\x02 \x02(\r\x12\x16\n\x0enum_inferences\x18\x03 \x02(\r\x12\x0f\n\x07n_nodes\x18\x04 \x02(\r\x12\x12\n\nelapsed_ms\x18\x05 \x02(\x02\"\xae\x01\n\x10\x61iBufferShapeMsg\x12\x11\n\x06\x66ormat\x18\x01 \x02(\r:\x01\x30\x12\x14\n\tn_batches\x18\x02 \x02(\r:\x01\x31\x12\x11\n\x06height\x18\x03 \x02(\r:\x01\x31\x12\x10\n\x05width\x18\x04 \x02(\r:\x01\x31\x12\x13\n\x08\x63hannels\x18\x05 \x02(\r:\x01\x31\x12\x10\n\x05scale\x18\x06 \x02(\x02:\x01\x30\x12\x14\n\tzeropoint\x18\x07 \x02(\x05:\x01\x30\x12\x0f\n\x04\x61\x64\x64r\x18\x08 \x02(\x05:\x01\x30\"\x8b\x04\n\x10\x61iNetworkInfoMsg\x12\x12\n\nmodel_name\x18\x01 \x02(\t\x12\x17\n\x0fmodel_signature\x18\x02 \x02(\t\x12\x16\n\x0emodel_datetime\x18\x03 \x02(\t\x12\x18\n\x10\x63ompile_datetime\x18\x04 \x02(\t\x12\x18\n\x10runtime_revision\x18\x05 \x02(\t\x12\x17\n\x0fruntime_version\x18\x06 \x02(\r\x12\x15\n\rtool_revision\x18\x07 \x02(\t\x12\x14\n\x0ctool_version\x18\x08 \x02(\r\x12\x18\n\x10tool_api_version\x18\t \x02(\r\x12\x13\n\x0b\x61pi_version\x18\n \x02(\r\x12\x1d\n\x15interface_api_version\x18\x0b \x02(\r\x12\x0e\n\x06n_macc\x18\x0c \x02(\r\x12\x10\n\x08n_inputs\x18\r \x02(\r\x12\x11\n\tn_outputs\x18\x0e \x02(\r\x12\x0f\n\x07n_nodes\x18\x0f \x02(\r\x12!\n\x06inputs\x18\x10 \x03(\x0b\x32\x11.aiBufferShapeMsg\x12\"\n\x07outputs\x18\x11 \x03(\x0b\x32\x11.aiBufferShapeMsg\x12&\n\x0b\x61\x63tivations\x18\x12 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\"\n\x07weights\x18\x13 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\x11\n\tsignature\x18\x14 \x02(\r\"l\n\x0f\x61iBufferByteMsg\x12 \n\x05shape\x18\x01 \x02(\x0b\x32\x11.aiBufferShapeMsg\x12\r\n\x05\x64\x61tas\x18\x02 \x02(\x0c\x12(\n\x08\x65ncoding\x18\x03 \x01(\x0e\x32\r.EnumEncoding:\x07\x45NC_RAW\"<\n\x07syncMsg\x12\x0f\n\x07version\x18\x01 \x02(\r\x12\x12\n\ncapability\x18\x04 \x02(\r\x12\x0c\n\x04rtid\x18\x05 \x02(\r\"J\n\nsysinfoMsg\x12\r\n\x05\x64\x65vid\x18\x01 \x02(\r\x12\x0e\n\x06sclock\x18\x02 \x02(\r\x12\x0e\n\x06hclock\x18\x03 \x02(\r\x12\r\n\x05\x63\x61\x63he\x18\x04 \x02(\r\"2\n\x06\x61\x63kMsg\x12\r\n\x05param\x18\x01 \x02(\r\x12\x19\n\x05\x65rror\x18\x02 \x02(\x0e\x32\n.EnumError\"$\n\x06logMsg\x12\r\n\x05level\x18\x01 \x02(\r\x12\x0b\n\x03str\x18\x02 \x02(\t\"W\n\x07nodeMsg\x12\x0c\n\x04type\x18\x01 \x02(\r\x12\n\n\x02id\x18\x02 \x02(\r\x12\x10\n\x08\x64uration\x18\x03 \x02(\x02\x12 \n\x06\x62uffer\x18\x04 \x02(\x0b\x32\x10.aiBufferByteMsg\"\x87\x02\n\x07respMsg\x12\r\n\x05reqid\x18\x01 \x02(\r\x12\x19\n\x05state\x18\x02 \x02(\x0e\x32\n.EnumState\x12\x18\n\x04sync\x18\n \x01(\x0b\x32\x08.syncMsgH\x00\x12\x1c\n\x05sinfo\x18\x0b \x01(\x0b\x32\x0b.sysinfoMsgH\x00\x12\x16\n\x03\x61\x63k\x18\x0c \x01(\x0b\x32\x07.ackMsgH\x00\x12\x16\n\x03log\x18\r \x01(\x0b\x32\x07.logMsgH\x00\x12\x18\n\x04node\x18\x0e \x01(\x0b\x32\x08.nodeMsgH\x00\x12\"\n\x05ninfo\x18\x14 \x01(\x0b\x32\x11.aiNetworkInfoMsgH\x00\x12!\n\x06report\x18\x15 \x01(\x0b\x32\x0f.aiRunReportMsgH\x00\x42\t\n\x07payload*7\n\x0b\x45numVersion\x12\x13\n\x0fP_VERSION_MAJOR\x10\x02\x12\x13\n\x0fP_VERSION_MINOR\x10\x05*\xd2\x01\n\x0e\x45numLowLevelIO\x12\x17\n\x12IO_HEADER_EOM_FLAG\x10\x80\x01\x12\x16\n\x12IO_HEADER_SIZE_MSK\x10\x7f\x12\x15\n\x11IO_IN_PACKET_SIZE\x10 \x12\x16\n\x12IO_OUT_PACKET_SIZE\x10 \x12\x10\n\x0bIO_OUT_SYNC\x10\xaa\x01\x12\x18\n\x14IO_HEADER_LARGE_FLAG\x10@\x12\x18\n\x14IO_LARGE_HEADER_SIZE\x10\x03\x12\x16\n\x12IO_PACKET_SIZE_POS\x10\x10\x1a\x02\x10\x01*@\n\rEnumAiRuntime\x12\x10\n\x0c\x41I_RT_STM_AI\x10\x01\x12\x0e\n\nAI_RT_TFLM\x10\x02\x12\r\n\tAI_RT_TVM\x10\x03*?\n\tEnumTools\x12\n\n\x06\x41I_GCC\x10\x01\x12\n\n\x06\x41I_IAR\x10\x02\x12\x0c\n\x08\x41I_MDK_5\x10\x03\x12\x0c\n\x08\x41I_MDK_6\x10\x04*\x9a\x01\n\x0e\x45numCapability\x12\x11\n\rCAP_INSPECTOR\x10\x01\x12\x13\n\x0f\x43\x41P_FIXED_POINT\x10\x02\x12\r\n\tCAP_RELOC\x10\x04\x12\x0e\n\nCAP_STREAM\x10\x08\x12\x13\n\x0f\x43\x41P_PACKET_SIZE\x10\x10\x12\x18\n\x14\x43\x41P_COMPRESSED_DATAS\x10 \x12\x12\n\rCAP_SELF_TEST\x10\x80\x01*\xb1\x01\n\x07\x45numCmd\x12\x0c\n\x08\x43MD_SYNC\x10\x00\x12\x10\n\x0c\x43MD_SYS_INFO\x10\x01\x12\x14\n\x10\x43MD_NETWORK_INFO\x10\n\x12\x13\n\x0f\x43MD_NETWORK_RUN\x10\x0b\x12\x16\n\x12\x43MD_NETWORK_REPORT\x10\x0c\x12\x1a\n\x16\x43MD_NETWORK_RUN_STREAM\x10\r\x12\x0c\n\x08\x43MD_TEST\x10\x64\x12\x19\n\x14\x43MD_TEST_UNSUPPORTED\x10\xc8\x01*Q\n\tEnumState\x12\n\n\x06S_IDLE\x10\x00\x12\r\n\tS_WAITING\x10\x01\x12\x10\n\x0cS_PROCESSING\x10\x02\x12\n\n\x06S_DONE\x10\x03\x12\x0b\n\x07S_ERROR\x10\x04*\xbf\x01\n\tEnumError\x12\n\n\x06\x45_NONE\x10\x00\x12\x12\n\x0e\x45_INVALID_SIZE\x10\x01\x12\x14\n\x10\x45_INVALID_FORMAT\x10\x02\x12\x13\n\x0f\x45_INVALID_STATE\x10\x03\x12\x13\n\x0f\x45_INVALID_PARAM\x10\x04\x12\x13\n\x0f\x45_INVALID_SHAPE\x10\x05\x12\x11\n\rE_INVALID_CMD\x10\x06\x12\x1b\n\x17\x45_INVALID_UNINITIALIZED\x10\x07\x12\r\n\tE_GENERIC\x10\n*f\n\x0c\x45numRunParam\x12\x15\n\x11P_RUN_MODE_NORMAL\x10\x00\x12\x18\n\x14P_RUN_MODE_INSPECTOR\x10\x01\x12%\n!P_RUN_MODE_INSPECTOR_WITHOUT_DATA\x10\x02*@\n\x0c\x45numEncoding\x12\x0b\n\x07\x45NC_RAW\x10\x00\x12\x10\n\x0c\x45NC_ZERO_RLE\x10\x01\x12\x11\n\rENC_DELTA_RLE\x10\x02*\x83\x01\n\rEnumLayerType\x12\x15\n\x11LAYER_TYPE_OUTPUT\x10\x00\x12\x17\n\x13LAYER_TYPE_INTERNAL\x10\x01\x12\x1c\n\x18LAYER_TYPE_INTERNAL_LAST\x10\x02\x12$\n LAYER_TYPE_INTERNAL_DATA_NO_LAST\x10\x04')
 )
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 _ENUMVERSION = _descriptor.EnumDescriptor(
   name='EnumVersion',
@@ -32,17 +32,17 @@ _ENUMVERSION = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='P_VERSION_MAJOR', index=0, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
-      name='P_VERSION_MINOR', index=1, number=2,
-      options=None,
+      name='P_VERSION_MINOR', index=1, number=5,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=_descriptor._ParseOptions(descriptor_pb2.EnumOptions(), _b('\020\001')),
-  serialized_start=1586,
-  serialized_end=1645,
+  serialized_options=None,
+  serialized_start=1628,
+  serialized_end=1683,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMVERSION)
 
@@ -55,29 +55,41 @@ _ENUMLOWLEVELIO = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='IO_HEADER_EOM_FLAG', index=0, number=128,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='IO_HEADER_SIZE_MSK', index=1, number=127,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='IO_IN_PACKET_SIZE', index=2, number=32,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='IO_OUT_PACKET_SIZE', index=3, number=32,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='IO_OUT_SYNC', index=4, number=170,
-      options=None,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='IO_HEADER_LARGE_FLAG', index=5, number=64,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='IO_LARGE_HEADER_SIZE', index=6, number=3,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='IO_PACKET_SIZE_POS', index=7, number=16,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=_descriptor._ParseOptions(descriptor_pb2.EnumOptions(), _b('\020\001')),
-  serialized_start=1648,
-  serialized_end=1782,
+  serialized_options=_b('\020\001'),
+  serialized_start=1686,
+  serialized_end=1896,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMLOWLEVELIO)
 
@@ -90,21 +102,21 @@ _ENUMAIRUNTIME = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='AI_RT_STM_AI', index=0, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='AI_RT_TFLM', index=1, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='AI_RT_TVM', index=2, number=3,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=1784,
-  serialized_end=1848,
+  serialized_options=None,
+  serialized_start=1898,
+  serialized_end=1962,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMAIRUNTIME)
 
@@ -117,25 +129,25 @@ _ENUMTOOLS = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='AI_GCC', index=0, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='AI_IAR', index=1, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='AI_MDK_5', index=2, number=3,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='AI_MDK_6', index=3, number=4,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=1850,
-  serialized_end=1913,
+  serialized_options=None,
+  serialized_start=1964,
+  serialized_end=2027,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMTOOLS)
 
@@ -148,25 +160,37 @@ _ENUMCAPABILITY = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='CAP_INSPECTOR', index=0, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CAP_FIXED_POINT', index=1, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CAP_RELOC', index=2, number=4,
-      options=None,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='CAP_STREAM', index=3, number=8,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
-      name='CAP_SELF_TEST', index=3, number=128,
-      options=None,
+      name='CAP_PACKET_SIZE', index=4, number=16,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='CAP_COMPRESSED_DATAS', index=5, number=32,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='CAP_SELF_TEST', index=6, number=128,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=1915,
-  serialized_end=2006,
+  serialized_options=None,
+  serialized_start=2030,
+  serialized_end=2184,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMCAPABILITY)
 
@@ -179,37 +203,41 @@ _ENUMCMD = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='CMD_SYNC', index=0, number=0,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CMD_SYS_INFO', index=1, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CMD_NETWORK_INFO', index=2, number=10,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CMD_NETWORK_RUN', index=3, number=11,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='CMD_NETWORK_REPORT', index=4, number=12,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
-      name='CMD_TEST', index=5, number=100,
-      options=None,
+      name='CMD_NETWORK_RUN_STREAM', index=5, number=13,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
-      name='CMD_TEST_UNSUPPORTED', index=6, number=200,
-      options=None,
+      name='CMD_TEST', index=6, number=100,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='CMD_TEST_UNSUPPORTED', index=7, number=200,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=2009,
-  serialized_end=2158,
+  serialized_options=None,
+  serialized_start=2187,
+  serialized_end=2364,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMCMD)
 
@@ -222,29 +250,29 @@ _ENUMSTATE = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='S_IDLE', index=0, number=0,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='S_WAITING', index=1, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='S_PROCESSING', index=2, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='S_DONE', index=3, number=3,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='S_ERROR', index=4, number=4,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=2160,
-  serialized_end=2241,
+  serialized_options=None,
+  serialized_start=2366,
+  serialized_end=2447,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMSTATE)
 
@@ -257,45 +285,45 @@ _ENUMERROR = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='E_NONE', index=0, number=0,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_SIZE', index=1, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_FORMAT', index=2, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_STATE', index=3, number=3,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_PARAM', index=4, number=4,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_SHAPE', index=5, number=5,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_CMD', index=6, number=6,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_INVALID_UNINITIALIZED', index=7, number=7,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='E_GENERIC', index=8, number=10,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=2244,
-  serialized_end=2435,
+  serialized_options=None,
+  serialized_start=2450,
+  serialized_end=2641,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMERROR)
 
@@ -308,25 +336,52 @@ _ENUMRUNPARAM = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='P_RUN_MODE_NORMAL', index=0, number=0,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='P_RUN_MODE_INSPECTOR', index=1, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='P_RUN_MODE_INSPECTOR_WITHOUT_DATA', index=2, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=2437,
-  serialized_end=2539,
+  serialized_options=None,
+  serialized_start=2643,
+  serialized_end=2745,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMRUNPARAM)
 
 EnumRunParam = enum_type_wrapper.EnumTypeWrapper(_ENUMRUNPARAM)
+_ENUMENCODING = _descriptor.EnumDescriptor(
+  name='EnumEncoding',
+  full_name='EnumEncoding',
+  filename=None,
+  file=DESCRIPTOR,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='ENC_RAW', index=0, number=0,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='ENC_ZERO_RLE', index=1, number=1,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='ENC_DELTA_RLE', index=2, number=2,
+      serialized_options=None,
+      type=None),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=2747,
+  serialized_end=2811,
+)
+_sym_db.RegisterEnumDescriptor(_ENUMENCODING)
+
+EnumEncoding = enum_type_wrapper.EnumTypeWrapper(_ENUMENCODING)
 _ENUMLAYERTYPE = _descriptor.EnumDescriptor(
   name='EnumLayerType',
   full_name='EnumLayerType',
@@ -335,36 +390,39 @@ _ENUMLAYERTYPE = _descriptor.EnumDescriptor(
   values=[
     _descriptor.EnumValueDescriptor(
       name='LAYER_TYPE_OUTPUT', index=0, number=0,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='LAYER_TYPE_INTERNAL', index=1, number=1,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='LAYER_TYPE_INTERNAL_LAST', index=2, number=2,
-      options=None,
+      serialized_options=None,
       type=None),
     _descriptor.EnumValueDescriptor(
       name='LAYER_TYPE_INTERNAL_DATA_NO_LAST', index=3, number=4,
-      options=None,
+      serialized_options=None,
       type=None),
   ],
   containing_type=None,
-  options=None,
-  serialized_start=2542,
-  serialized_end=2673,
+  serialized_options=None,
+  serialized_start=2814,
+  serialized_end=2945,
 )
 _sym_db.RegisterEnumDescriptor(_ENUMLAYERTYPE)
 
 EnumLayerType = enum_type_wrapper.EnumTypeWrapper(_ENUMLAYERTYPE)
 P_VERSION_MAJOR = 2
-P_VERSION_MINOR = 2
+P_VERSION_MINOR = 5
 IO_HEADER_EOM_FLAG = 128
 IO_HEADER_SIZE_MSK = 127
 IO_IN_PACKET_SIZE = 32
 IO_OUT_PACKET_SIZE = 32
 IO_OUT_SYNC = 170
+IO_HEADER_LARGE_FLAG = 64
+IO_LARGE_HEADER_SIZE = 3
+IO_PACKET_SIZE_POS = 16
 AI_RT_STM_AI = 1
 AI_RT_TFLM = 2
 AI_RT_TVM = 3
@@ -375,12 +433,16 @@ AI_MDK_6 = 4
 CAP_INSPECTOR = 1
 CAP_FIXED_POINT = 2
 CAP_RELOC = 4
+CAP_STREAM = 8
+CAP_PACKET_SIZE = 16
+CAP_COMPRESSED_DATAS = 32
 CAP_SELF_TEST = 128
 CMD_SYNC = 0
 CMD_SYS_INFO = 1
 CMD_NETWORK_INFO = 10
 CMD_NETWORK_RUN = 11
 CMD_NETWORK_REPORT = 12
+CMD_NETWORK_RUN_STREAM = 13
 CMD_TEST = 100
 CMD_TEST_UNSUPPORTED = 200
 S_IDLE = 0
@@ -400,6 +462,9 @@ E_GENERIC = 10
 P_RUN_MODE_NORMAL = 0
 P_RUN_MODE_INSPECTOR = 1
 P_RUN_MODE_INSPECTOR_WITHOUT_DATA = 2
+ENC_RAW = 0
+ENC_ZERO_RLE = 1
+ENC_DELTA_RLE = 2
 LAYER_TYPE_OUTPUT = 0
 LAYER_TYPE_INTERNAL = 1
 LAYER_TYPE_INTERNAL_LAST = 2
@@ -420,42 +485,42 @@ _REQMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='cmd', full_name='reqMsg.cmd', index=1,
       number=2, type=14, cpp_type=8, label=2,
       has_default_value=True, default_value=1,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='param', full_name='reqMsg.param', index=2,
       number=3, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='name', full_name='reqMsg.name', index=3,
       number=4, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='opt', full_name='reqMsg.opt', index=4,
       number=5, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
@@ -479,42 +544,42 @@ _AIRUNREPORTMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='signature', full_name='aiRunReportMsg.signature', index=1,
       number=2, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='num_inferences', full_name='aiRunReportMsg.num_inferences', index=2,
       number=3, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_nodes', full_name='aiRunReportMsg.n_nodes', index=3,
       number=4, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='elapsed_ms', full_name='aiRunReportMsg.elapsed_ms', index=4,
       number=5, type=2, cpp_type=6, label=2,
       has_default_value=False, default_value=float(0),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
@@ -538,63 +603,63 @@ _AIBUFFERSHAPEMSG = _descriptor.Descriptor(
       has_default_value=True, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_batches', full_name='aiBufferShapeMsg.n_batches', index=1,
       number=2, type=13, cpp_type=3, label=2,
       has_default_value=True, default_value=1,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='height', full_name='aiBufferShapeMsg.height', index=2,
       number=3, type=13, cpp_type=3, label=2,
       has_default_value=True, default_value=1,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='width', full_name='aiBufferShapeMsg.width', index=3,
       number=4, type=13, cpp_type=3, label=2,
       has_default_value=True, default_value=1,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='channels', full_name='aiBufferShapeMsg.channels', index=4,
       number=5, type=13, cpp_type=3, label=2,
       has_default_value=True, default_value=1,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='scale', full_name='aiBufferShapeMsg.scale', index=5,
       number=6, type=2, cpp_type=6, label=2,
       has_default_value=True, default_value=float(0),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='zeropoint', full_name='aiBufferShapeMsg.zeropoint', index=6,
       number=7, type=5, cpp_type=1, label=2,
       has_default_value=True, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='addr', full_name='aiBufferShapeMsg.addr', index=7,
       number=8, type=5, cpp_type=1, label=2,
       has_default_value=True, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
@@ -618,147 +683,147 @@ _AINETWORKINFOMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='model_signature', full_name='aiNetworkInfoMsg.model_signature', index=1,
       number=2, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='model_datetime', full_name='aiNetworkInfoMsg.model_datetime', index=2,
       number=3, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='compile_datetime', full_name='aiNetworkInfoMsg.compile_datetime', index=3,
       number=4, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='runtime_revision', full_name='aiNetworkInfoMsg.runtime_revision', index=4,
       number=5, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='runtime_version', full_name='aiNetworkInfoMsg.runtime_version', index=5,
       number=6, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='tool_revision', full_name='aiNetworkInfoMsg.tool_revision', index=6,
       number=7, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='tool_version', full_name='aiNetworkInfoMsg.tool_version', index=7,
       number=8, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='tool_api_version', full_name='aiNetworkInfoMsg.tool_api_version', index=8,
       number=9, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='api_version', full_name='aiNetworkInfoMsg.api_version', index=9,
       number=10, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='interface_api_version', full_name='aiNetworkInfoMsg.interface_api_version', index=10,
       number=11, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_macc', full_name='aiNetworkInfoMsg.n_macc', index=11,
       number=12, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_inputs', full_name='aiNetworkInfoMsg.n_inputs', index=12,
       number=13, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_outputs', full_name='aiNetworkInfoMsg.n_outputs', index=13,
       number=14, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='n_nodes', full_name='aiNetworkInfoMsg.n_nodes', index=14,
       number=15, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='inputs', full_name='aiNetworkInfoMsg.inputs', index=15,
       number=16, type=11, cpp_type=10, label=3,
       has_default_value=False, default_value=[],
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='outputs', full_name='aiNetworkInfoMsg.outputs', index=16,
       number=17, type=11, cpp_type=10, label=3,
       has_default_value=False, default_value=[],
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='activations', full_name='aiNetworkInfoMsg.activations', index=17,
       number=18, type=11, cpp_type=10, label=2,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='weights', full_name='aiNetworkInfoMsg.weights', index=18,
       number=19, type=11, cpp_type=10, label=2,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='signature', full_name='aiNetworkInfoMsg.signature', index=19,
       number=20, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
@@ -782,28 +847,35 @@ _AIBUFFERBYTEMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='datas', full_name='aiBufferByteMsg.datas', index=1,
       number=2, type=12, cpp_type=9, label=2,
       has_default_value=False, default_value=_b(""),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='encoding', full_name='aiBufferByteMsg.encoding', index=2,
+      number=3, type=14, cpp_type=8, label=1,
+      has_default_value=True, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
   serialized_start=935,
-  serialized_end=1001,
+  serialized_end=1043,
 )
 
 
@@ -820,35 +892,35 @@ _SYNCMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='capability', full_name='syncMsg.capability', index=1,
       number=4, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='rtid', full_name='syncMsg.rtid', index=2,
       number=5, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1003,
-  serialized_end=1063,
+  serialized_start=1045,
+  serialized_end=1105,
 )
 
 
@@ -865,42 +937,42 @@ _SYSINFOMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='sclock', full_name='sysinfoMsg.sclock', index=1,
       number=2, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='hclock', full_name='sysinfoMsg.hclock', index=2,
       number=3, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='cache', full_name='sysinfoMsg.cache', index=3,
       number=4, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1065,
-  serialized_end=1139,
+  serialized_start=1107,
+  serialized_end=1181,
 )
 
 
@@ -917,28 +989,28 @@ _ACKMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='error', full_name='ackMsg.error', index=1,
       number=2, type=14, cpp_type=8, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1141,
-  serialized_end=1191,
+  serialized_start=1183,
+  serialized_end=1233,
 )
 
 
@@ -955,28 +1027,28 @@ _LOGMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='str', full_name='logMsg.str', index=1,
       number=2, type=9, cpp_type=9, label=2,
       has_default_value=False, default_value=_b("").decode('utf-8'),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1193,
-  serialized_end=1229,
+  serialized_start=1235,
+  serialized_end=1271,
 )
 
 
@@ -993,42 +1065,42 @@ _NODEMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='id', full_name='nodeMsg.id', index=1,
       number=2, type=13, cpp_type=3, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='duration', full_name='nodeMsg.duration', index=2,
       number=3, type=2, cpp_type=6, label=2,
       has_default_value=False, default_value=float(0),
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='buffer', full_name='nodeMsg.buffer', index=3,
       number=4, type=11, cpp_type=10, label=2,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1231,
-  serialized_end=1318,
+  serialized_start=1273,
+  serialized_end=1360,
 )
 
 
@@ -1045,70 +1117,70 @@ _RESPMSG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='state', full_name='respMsg.state', index=1,
       number=2, type=14, cpp_type=8, label=2,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='sync', full_name='respMsg.sync', index=2,
       number=10, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='sinfo', full_name='respMsg.sinfo', index=3,
       number=11, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='ack', full_name='respMsg.ack', index=4,
       number=12, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='log', full_name='respMsg.log', index=5,
       number=13, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='node', full_name='respMsg.node', index=6,
       number=14, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='ninfo', full_name='respMsg.ninfo', index=7,
       number=20, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
     _descriptor.FieldDescriptor(
       name='report', full_name='respMsg.report', index=8,
       number=21, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      options=None),
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
   ],
-  options=None,
+  serialized_options=None,
   is_extendable=False,
   syntax='proto2',
   extension_ranges=[],
@@ -1117,8 +1189,8 @@ _RESPMSG = _descriptor.Descriptor(
       name='payload', full_name='respMsg.payload',
       index=0, containing_type=None, fields=[]),
   ],
-  serialized_start=1321,
-  serialized_end=1584,
+  serialized_start=1363,
+  serialized_end=1626,
 )
 
 _REQMSG.fields_by_name['cmd'].enum_type = _ENUMCMD
@@ -1127,6 +1199,7 @@ _AINETWORKINFOMSG.fields_by_name['outputs'].message_type = _AIBUFFERSHAPEMSG
 _AINETWORKINFOMSG.fields_by_name['activations'].message_type = _AIBUFFERSHAPEMSG
 _AINETWORKINFOMSG.fields_by_name['weights'].message_type = _AIBUFFERSHAPEMSG
 _AIBUFFERBYTEMSG.fields_by_name['shape'].message_type = _AIBUFFERSHAPEMSG
+_AIBUFFERBYTEMSG.fields_by_name['encoding'].enum_type = _ENUMENCODING
 _ACKMSG.fields_by_name['error'].enum_type = _ENUMERROR
 _NODEMSG.fields_by_name['buffer'].message_type = _AIBUFFERBYTEMSG
 _RESPMSG.fields_by_name['state'].enum_type = _ENUMSTATE
@@ -1178,88 +1251,87 @@ DESCRIPTOR.enum_types_by_name['EnumCmd'] = _ENUMCMD
 DESCRIPTOR.enum_types_by_name['EnumState'] = _ENUMSTATE
 DESCRIPTOR.enum_types_by_name['EnumError'] = _ENUMERROR
 DESCRIPTOR.enum_types_by_name['EnumRunParam'] = _ENUMRUNPARAM
+DESCRIPTOR.enum_types_by_name['EnumEncoding'] = _ENUMENCODING
 DESCRIPTOR.enum_types_by_name['EnumLayerType'] = _ENUMLAYERTYPE
+_sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
-reqMsg = _reflection.GeneratedProtocolMessageType('reqMsg', (_message.Message,), dict(
-  DESCRIPTOR = _REQMSG,
-  __module__ = 'stm32msg_pb2'
+reqMsg = _reflection.GeneratedProtocolMessageType('reqMsg', (_message.Message,), {
+  'DESCRIPTOR' : _REQMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:reqMsg)
-  ))
+  })
 _sym_db.RegisterMessage(reqMsg)
 
-aiRunReportMsg = _reflection.GeneratedProtocolMessageType('aiRunReportMsg', (_message.Message,), dict(
-  DESCRIPTOR = _AIRUNREPORTMSG,
-  __module__ = 'stm32msg_pb2'
+aiRunReportMsg = _reflection.GeneratedProtocolMessageType('aiRunReportMsg', (_message.Message,), {
+  'DESCRIPTOR' : _AIRUNREPORTMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:aiRunReportMsg)
-  ))
+  })
 _sym_db.RegisterMessage(aiRunReportMsg)
 
-aiBufferShapeMsg = _reflection.GeneratedProtocolMessageType('aiBufferShapeMsg', (_message.Message,), dict(
-  DESCRIPTOR = _AIBUFFERSHAPEMSG,
-  __module__ = 'stm32msg_pb2'
+aiBufferShapeMsg = _reflection.GeneratedProtocolMessageType('aiBufferShapeMsg', (_message.Message,), {
+  'DESCRIPTOR' : _AIBUFFERSHAPEMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:aiBufferShapeMsg)
-  ))
+  })
 _sym_db.RegisterMessage(aiBufferShapeMsg)
 
-aiNetworkInfoMsg = _reflection.GeneratedProtocolMessageType('aiNetworkInfoMsg', (_message.Message,), dict(
-  DESCRIPTOR = _AINETWORKINFOMSG,
-  __module__ = 'stm32msg_pb2'
+aiNetworkInfoMsg = _reflection.GeneratedProtocolMessageType('aiNetworkInfoMsg', (_message.Message,), {
+  'DESCRIPTOR' : _AINETWORKINFOMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:aiNetworkInfoMsg)
-  ))
+  })
 _sym_db.RegisterMessage(aiNetworkInfoMsg)
 
-aiBufferByteMsg = _reflection.GeneratedProtocolMessageType('aiBufferByteMsg', (_message.Message,), dict(
-  DESCRIPTOR = _AIBUFFERBYTEMSG,
-  __module__ = 'stm32msg_pb2'
+aiBufferByteMsg = _reflection.GeneratedProtocolMessageType('aiBufferByteMsg', (_message.Message,), {
+  'DESCRIPTOR' : _AIBUFFERBYTEMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:aiBufferByteMsg)
-  ))
+  })
 _sym_db.RegisterMessage(aiBufferByteMsg)
 
-syncMsg = _reflection.GeneratedProtocolMessageType('syncMsg', (_message.Message,), dict(
-  DESCRIPTOR = _SYNCMSG,
-  __module__ = 'stm32msg_pb2'
+syncMsg = _reflection.GeneratedProtocolMessageType('syncMsg', (_message.Message,), {
+  'DESCRIPTOR' : _SYNCMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:syncMsg)
-  ))
+  })
 _sym_db.RegisterMessage(syncMsg)
 
-sysinfoMsg = _reflection.GeneratedProtocolMessageType('sysinfoMsg', (_message.Message,), dict(
-  DESCRIPTOR = _SYSINFOMSG,
-  __module__ = 'stm32msg_pb2'
+sysinfoMsg = _reflection.GeneratedProtocolMessageType('sysinfoMsg', (_message.Message,), {
+  'DESCRIPTOR' : _SYSINFOMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:sysinfoMsg)
-  ))
+  })
 _sym_db.RegisterMessage(sysinfoMsg)
 
-ackMsg = _reflection.GeneratedProtocolMessageType('ackMsg', (_message.Message,), dict(
-  DESCRIPTOR = _ACKMSG,
-  __module__ = 'stm32msg_pb2'
+ackMsg = _reflection.GeneratedProtocolMessageType('ackMsg', (_message.Message,), {
+  'DESCRIPTOR' : _ACKMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:ackMsg)
-  ))
+  })
 _sym_db.RegisterMessage(ackMsg)
 
-logMsg = _reflection.GeneratedProtocolMessageType('logMsg', (_message.Message,), dict(
-  DESCRIPTOR = _LOGMSG,
-  __module__ = 'stm32msg_pb2'
+logMsg = _reflection.GeneratedProtocolMessageType('logMsg', (_message.Message,), {
+  'DESCRIPTOR' : _LOGMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:logMsg)
-  ))
+  })
 _sym_db.RegisterMessage(logMsg)
 
-nodeMsg = _reflection.GeneratedProtocolMessageType('nodeMsg', (_message.Message,), dict(
-  DESCRIPTOR = _NODEMSG,
-  __module__ = 'stm32msg_pb2'
+nodeMsg = _reflection.GeneratedProtocolMessageType('nodeMsg', (_message.Message,), {
+  'DESCRIPTOR' : _NODEMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:nodeMsg)
-  ))
+  })
 _sym_db.RegisterMessage(nodeMsg)
 
-respMsg = _reflection.GeneratedProtocolMessageType('respMsg', (_message.Message,), dict(
-  DESCRIPTOR = _RESPMSG,
-  __module__ = 'stm32msg_pb2'
+respMsg = _reflection.GeneratedProtocolMessageType('respMsg', (_message.Message,), {
+  'DESCRIPTOR' : _RESPMSG,
+  '__module__' : 'stm32msg_pb2'
   # @@protoc_insertion_point(class_scope:respMsg)
-  ))
+  })
 _sym_db.RegisterMessage(respMsg)
 
 
-_ENUMVERSION.has_options = True
-_ENUMVERSION._options = _descriptor._ParseOptions(descriptor_pb2.EnumOptions(), _b('\020\001'))
-_ENUMLOWLEVELIO.has_options = True
-_ENUMLOWLEVELIO._options = _descriptor._ParseOptions(descriptor_pb2.EnumOptions(), _b('\020\001'))
+_ENUMLOWLEVELIO._options = None
 # @@protoc_insertion_point(module_scope)
@@ -11,13 +11,20 @@ import sys
 import numpy as np
 import pandas as pd
 import time
+import threading
+import queue
+import collections
 
 from ai_runner.stm_ai_runner import AiRunner
+from ai_runner.stm_ai_runner.ai_quantization import quantize, dequantize
+from ai_runner.stm_ai_runner.ai_dataset import open_dataset
+from ai_runner.stm_ai_runner.ai_metrics import AiConfusionMatrix, class_indexes
+from ai_runner.stm_ai_runner.ai_runner import AiRunnerError
 
 from PyQt5.QtWidgets import QPushButton, QHeaderView, QErrorMessage, QSizePolicy, QAbstractItemView, QVBoxLayout, QHBoxLayout, QWidget, QGridLayout, QTableWidget, QTableWidgetItem, QMainWindow, QProgressBar, QAction, QComboBox, QMessageBox, QApplication, QStyleFactory, QFrame, QLabel, QComboBox, QFileDialog, QTextEdit
 from PyQt5.QtWidgets import QMenu, QToolButton, QMenuBar
 from PyQt5.QtGui import QPixmap, QFont, QColor, QIcon, QPainter, QPen
-from PyQt5.QtCore import QSize, Qt, QRect
+from PyQt5.QtCore import QSize, Qt, QRect, QObject, QThread, pyqtSignal
 from PyQt5 import QtCore, QtGui, QtWidgets
 import cv2
 from time import sleep
@@ -40,74 +47,279 @@ def createList(r1, r2):
 col_val=tuple(createList(0,3071))
 
 class Converter:
-    def _map_to_fixed_point(self, values, fmt):
-        """
-        Map a list of arrays to fixed point by rounding (+0.5 if positive, -0.5
-        otherwise). Optionally add bias to the maximum value to map asymetric
-        ranges.
-        """
-        
-        assert isinstance(fmt, tuple) and len(fmt) == 4
-        min_value, max_value, scale, zero = fmt
-
-        # Map values to fixed point representation
-        out = np.round(np.asarray(values) * scale).astype(np.int64) - zero
-
-        # clip values to avoid wrap-around problems
-        out = np.clip(out, min_value, max_value)
-
-        return out
-
-    def int_format_quantize(self, values, fmt, signed=False):
-        """Map a list of arrays to an integer format with a number of bits given
-        by the format specification and using the given scale and zero point."""
-        
-        bits, scales, zeros = fmt
-
-        if signed:
-            min_value, max_value = -2**(bits - 1), 2**(bits - 1) - 1
-        else:
-            min_value, max_value = 0, 2**bits - 1
-
-        def _quantize(values, scale, zero):
-            assert scale > 0.0
-
-            fmt = (min_value, max_value, 1.0 / scale, -zero)
-            return self._map_to_fixed_point(values, fmt)
-
-        return _quantize(values, scales, zeros)
-        
-    def dequantize(self, values, scale, zero=0):
-        """Maps an array of quantized values to floating point using the given zero
-        point and scale."""
-        
-        return (values.astype(np.float32) - zero) * scale
+    """Conversion of the float values to/from the format of the IO tensors (see ai_quantization)"""
 
     def from_float(self, inputs, desc):
-    
-      if desc['type'] == np.uint8 and desc['scale'] != 0:
-          outs =  self.int_format_quantize(inputs, (8, desc['scale'], desc['zero_point']))
-          return outs.astype(np.uint8) 
-      
-      elif desc['type'] == np.int8 and desc['scale'] != 0:
-          outs =  self.int_format_quantize(inputs, (8, desc['scale'], desc['zero_point']), True)
-          return outs.astype(np.int8) 
-             
-      else: # float type
-          return inputs.astype(np.float32)
+        """Quantize the float values (whole batch) if the tensor is quantized"""
+        return quantize(inputs, desc)
 
     def to_float(self, outputs, desc):
-    
-      if desc['type'] != np.float32 and desc['scale'] != 0:
-          outs =  self.dequantize(outputs, desc['scale'], desc['zero_point'])
-          return outs.astype(np.float32) 
-
-      else:
-          return outputs.astype(np.float32) 
+        """De-quantize the values (whole batch) if the tensor is quantized"""
+        return dequantize(outputs, desc)
+
+
+class FramePreprocessor:
+    """ Convert the camera frames (BGR, any size) to the input tensor of the model, in memory:
+    resize->color conversion->scale (1/255)->quantization. The buffers are allocated once and
+    reused for each frame, the returned input array is overwritten by the next call."""
+
+    def __init__(self, input_desc):
+        shape = tuple(input_desc['shape'][1:])
+        self.desc = input_desc
+        self.dsize = (shape[0], shape[1])
+        self.channels = shape[2]
+        self.resized = np.empty((shape[1], shape[0], 3), dtype=np.uint8)
+        if self.channels == 1:
+            self.pixels = np.empty((shape[1], shape[0]), dtype=np.uint8)
+        elif self.channels == 3:
+            self.pixels = np.empty((shape[1], shape[0], 3), dtype=np.uint8)
+        else:
+            self.pixels = None
+        self.scaled = np.empty((1,) + shape, dtype=np.float32)
+        self.inputs = np.empty((1,) + shape, dtype=input_desc['type'])
+
+    def __call__(self, frame):
+        """ Return the inputs (list with one array) for AiRunner.invoke"""
+
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        resized = cv2.resize(frame, self.dsize, dst=self.resized if frame.shape[2] == 3 else None)
+        if self.channels == 1:
+            pixels = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY, dst=self.pixels)
+        elif self.channels == 3:
+            pixels = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=self.pixels)
+        else:
+            pixels = resized
+        np.multiply(pixels.reshape(self.scaled.shape), 1.0 / 255, out=self.scaled)
+        quantize(self.scaled, self.desc, out=self.inputs)
+        return [self.inputs]
+
+
+class DropOldestQueue:
+    """ Bounded queue between two stages, the oldest item is dropped (and returned by put())
+    when the queue is full: the consumer always gets the most recent items."""
+
+    def __init__(self, maxsize=1):
+        self.items = collections.deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        """ Add an item, return the dropped item or None"""
+
+        with self.cond:
+            dropped = None
+            if len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+        return dropped
+
+    def get(self, timeout=None):
+        """ Remove and return the oldest item, None if the queue is still empty after timeout"""
+
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.items, timeout):
+                return None
+            return self.items.popleft()
+
+
+class CameraPipeline:
+    """ Pipelined camera streaming: the capture, the pre-processing and the inference (AiRunner)
+    stages run in their own thread and are connected by bounded queues (DropOldestQueue), so the
+    camera and the board are busy at the same time. The input buffers (FramePreprocessor) are
+    taken from a pool and given back after the inference or when they are dropped."""
+
+    STAGES = ('capture', 'preprocess', 'invoke', 'end-to-end')
+
+    def __init__(self, webcam, nn, c_name, queue_size=1):
+        self.webcam = webcam
+        self.nn = nn
+        self.c_name = c_name
+        self.output_desc = nn.get_output_infos(name=c_name)[0]
+        input_desc = nn.get_input_infos(name=c_name)[0]
+
+        self.frames = DropOldestQueue(queue_size)
+        self.tensors = DropOldestQueue(queue_size)
+        # one buffer by queued tensor, plus the ones in pre-processing and in inference
+        self.buffers = queue.Queue()
+        for _ in range(queue_size + 2):
+            self.buffers.put(FramePreprocessor(input_desc))
+
+        self.lock = threading.Lock()
+        self.latest_frame = None
+        self.prediction = None
+        self.error = None
+        self.latency = dict.fromkeys(self.STAGES, 0.0)
+        self.done = collections.deque(maxlen=30)
+        self.stop_event = threading.Event()
+        self.threads = [threading.Thread(target=stage, daemon=True)
+                        for stage in (self.capture_stage, self.preprocess_stage, self.invoke_stage)]
+
+    def start(self):
+        """ Start the stages"""
+
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """ Stop the stages, the webcam is not released"""
+
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    def status(self):
+        """ Return the last captured frame, the last predicted class index, the latencies (ms, moving
+        average by stage), the end-to-end FPS, the number of dropped items and the error (or None)"""
+
+        with self.lock:
+            done = self.done
+            fps = (len(done) - 1) / (done[-1] - done[0]) if len(done) > 1 and done[-1] > done[0] else 0.0
+            dropped = self.frames.dropped + self.tensors.dropped
+            return self.latest_frame, self.prediction, dict(self.latency), fps, dropped, self.error
+
+    def update(self, stage, duration):
+        """ Update the moving average of the latency of a stage"""
+
+        with self.lock:
+            latency = duration * 1000
+            self.latency[stage] += 0.1 * (latency - self.latency[stage]) if self.latency[stage] else latency
+
+    def fail(self, error_message):
+        """ Stop the stages on error"""
+
+        with self.lock:
+            self.error = error_message
+        self.stop_event.set()
+
+    def capture_stage(self):
+        """ Read the frames from the camera"""
+
+        while not self.stop_event.is_set():
+            start_time = time.perf_counter()
+            check, frame = self.webcam.read()
+            end_time = time.perf_counter()
+            if not check:
+                self.fail('Webcam error, retry')
+                return
+            self.update('capture', end_time - start_time)
+            with self.lock:
+                self.latest_frame = frame
+            self.frames.put((end_time, frame))
+
+    def preprocess_stage(self):
+        """ Convert the last captured frame to the input tensor (free buffer of the pool)"""
+
+        while not self.stop_event.is_set():
+            item = self.frames.get(timeout=0.1)
+            if item is None:
+                continue
+            try:
+                buffer = self.buffers.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            start_time = time.perf_counter()
+            try:
+                buffer(item[1])
+            except (ValueError, cv2.error) as exc:
+                self.buffers.put(buffer)
+                self.fail('Pre-processing has failed\n' + str(exc))
+                return
+            self.update('preprocess', time.perf_counter() - start_time)
+            dropped = self.tensors.put((item[0], buffer))
+            if dropped is not None:
+                self.buffers.put(dropped[1])
+
+    def invoke_stage(self):
+        """ Invoke the model with the last pre-processed tensor"""
+
+        converter = Converter()
+        while not self.stop_event.is_set():
+            item = self.tensors.get(timeout=0.1)
+            if item is None:
+                continue
+            capture_time, buffer = item
+            start_time = time.perf_counter()
+            try:
+                out_values, _ = self.nn.invoke([buffer.inputs], name=self.c_name, disable_pb=True)
+            except AiRunnerError as exc:
+                self.fail('Inference has failed\n' + str(exc))
+                return
+            finally:
+                self.buffers.put(buffer)
+            end_time = time.perf_counter()
+
+            out_values = converter.to_float(out_values[0], self.output_desc)
+            prediction = np.argmax(out_values, axis=-1).reshape(out_values.shape[0], -1)[0, 0]
+
+            self.update('invoke', end_time - start_time)
+            self.update('end-to-end', end_time - capture_time)
+            with self.lock:
+                self.prediction = prediction
+                self.done.append(end_time)
+
+
+class InferenceWorker(QObject):
+    """ Run the samples of a dataset by batch (AiRunner.invoke), out of the Qt main thread.
+    The predicted classes and the progress are emitted at most every 'interval' seconds."""
+
+    progress = pyqtSignal(int)          # percentage of processed samples
+    results = pyqtSignal(int, object)   # index of the first sample, predicted class indexes
+    finished = pyqtSignal(object)       # durations (dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, nn, c_name, dataset, output_desc, batch_size=32, interval=0.1):
+        super(InferenceWorker, self).__init__()
+        self.nn = nn
+        self.c_name = c_name
+        self.dataset = dataset
+        self.output_desc = output_desc
+        self.batch_size = batch_size
+        self.interval = interval
+
+    def run(self):
+        """ Invoke the model batch by batch, the device/host durations are accumulated"""
+
+        converter = Converter()
+        number_samples = len(self.dataset)
+        stats = {'n_samples': number_samples, 'duration': 0.0, 'host_duration': 0.0, 'device_duration': 0.0}
+        pending, first, done = [], 0, 0
+        last_emit = time.perf_counter()
+        start_time = last_emit
+
+        try:
+            for in_values, _ in self.dataset.batches(self.batch_size):
+                out_values, profile = self.nn.invoke(in_values, name=self.c_name, reshape=True, disable_pb=True)
+                out_values = converter.to_float(out_values[0], self.output_desc)
+                pending.append(np.argmax(out_values, axis=-1).reshape(out_values.shape[0], -1)[:, 0])
+                stats['host_duration'] += profile['debug']['host_duration']
+                stats['device_duration'] += float(np.sum(profile['c_durations']))
+                done += in_values.shape[0]
+
+                now = time.perf_counter()
+                if now - last_emit >= self.interval or done == number_samples:
+                    self.results.emit(first, np.concatenate(pending))
+                    self.progress.emit(int(done * 100 / number_samples))
+                    pending, first, last_emit = [], done, now
+        except (AiRunnerError, ValueError) as exc:
+            self.failed.emit(str(exc))
+            return
+        except Exception as exc:  # pylint: disable=broad-except
+            # any error must be reported, the GUI is restored by the failed slot
+            self.failed.emit('{}: {}'.format(type(exc).__name__, exc))
+            return
+
+        stats['duration'] = time.perf_counter() - start_time
+        self.finished.emit(stats)
 
 class Window(QMainWindow):
     networks = []
     j=0
+    class_ids = np.zeros(0, dtype=np.int64)     # index of the labels (len(labels): 'no_class')
+    output_ids = np.zeros(0, dtype=np.int64)
     def setupUi(self, Form):
         """Instance grapichal object and discover networks and video inputs"""
 
@@ -331,17 +543,24 @@ class Window(QMainWindow):
         return str(outputs)
 
         
+    def label_ids (self, values):
+        """ Return the index of the label of each value, len(self.labels) if there is no label ('no_class')"""
+
+        keys = np.array(list(self.labels.keys()), dtype=np.float32)
+        ids = class_indexes(np.asarray(values, dtype=np.float32).reshape(-1), keys)
+        if args.verbose and np.any(ids == keys.size):
+            print('do not be able to determine the class of {} sample(s)'.format(np.count_nonzero(ids == keys.size)))
+        return ids
+
+    def convert_ids (self, ids):
+        """ Convert the label indexes (see label_ids()) to the label names"""
+
+        names = np.array(list(self.labels.values()) + ['no_class'], dtype=object)
+        return [str(name) for name in names[ids]]
+
     def convert_outputs1 (self, x):
         """ Convert output values to the corresponding label if they match"""
-        outputs = []
-        for i in range(0,len(x)):
-            try:
-                outputs.append(self.labels[np.float32(x[i][0])])
-            except(KeyError):
-                outputs.append('no_class')
-
-                if args.verbose:  print('do not be able to determine the class' + '\n' + 'sample n° ' + str(i) + '\n' + str(x[i])+ '\n')        
-        return outputs
+        return self.convert_ids(self.label_ids(np.asarray(x)[:, 0]))
 
     def file_open(self, filepath):
         """ Open the *.csv file (filepath) that contain input data for the validation.
@@ -355,79 +574,120 @@ class Window(QMainWindow):
             t_input_desc = self.nn.get_input_infos(name=self.c_name)[0]
             t_output_desc = self.nn.get_output_infos(name=self.c_name)[0]
  
-            i_shape = t_input_desc['shape'][1:]
-            i_dtype = t_input_desc['type']
-            o_shape = t_output_desc['shape'][1:]           
+            self.check_labels(t_output_desc)
             
+            # the CSV file is converted once (memory-mapped .aidata file, inputs with the format of the model)
             try:
-                isinstance(self.labels, dict)
-            except:
-                self.labels ={}
-                for i in range(0, o_shape[2]):
-                    self.labels[np.float32(i)] = str(i)
-            
-            type(self).labels = self.labels.copy()
-            
-            inputs = np.genfromtxt(filepath, delimiter=',')
-                        
-            if inputs.size == inputs.shape[0] :
-                    inputs = inputs.reshape((1,inputs.shape[0]))
-
-            class_label = [ self.convert(_c) for _c in inputs[:,-1]]
-            inputs = inputs[:, :-1]
-
-            if inputs.shape[1] == i_shape[0] * i_shape[1] * i_shape[2]:
-                converter = Converter()
-
-                outputs_temp = []
-            
-                CPU_duration = 0
-                start_USB_duration = time.time()
-                
-                type(self).classes = class_label
-
-                number_samples = inputs.shape[0]
-                adur = 0.0
-                
-                for i in range(number_samples):
+                dataset = open_dataset(filepath, desc=t_input_desc)
+            except OSError as exc:
+                self.display_error('Unable to open the file\n' + str(exc))
+                return
+            except (AiRunnerError, ValueError):
+                dataset = None
+
+            if dataset is not None and len(dataset) and dataset.is_compatible(t_input_desc):
+                type(self).class_ids = self.label_ids(dataset.labels)
+                type(self).classes = self.convert_ids(Window.class_ids)
+                type(self).output_ids = np.zeros(0, dtype=np.int64)
+                type(self).outputs = []
+
+                self.run_inference(dataset, t_output_desc)
+    
+            else : 
+                self.display_error("Wrong file size")
                 
-                    in_values = converter.from_float(inputs[i], t_input_desc)
+    def check_labels(self, output_desc):
+        """ Create the default labels (index of the class) if no label file has been loaded"""
 
-                    in_values = in_values.reshape((1,) + i_shape)
-                    assert i_dtype == in_values.dtype
-                    in_values = np.ascontiguousarray(in_values.astype(i_dtype))
+        o_shape = output_desc['shape'][1:]
 
-                    # start_CPU_duration = time.time()
-                    out_values, profile =  self.nn.invoke(in_values, name=self.c_name)
+        try:
+            isinstance(self.labels, dict)
+        except:
+            self.labels ={}
+            for i in range(0, o_shape[2]):
+                self.labels[np.float32(i)] = str(i)
 
-                    adur += np.mean(profile['c_durations'])
-                    
-                    # end_CPU_duration = time.time()
-                    
-                    out_values = converter.to_float(out_values[0], t_output_desc)
-                    CPU_duration += profile['debug']['host_duration'] # end_CPU_duration-start_CPU_duration
-                    self.progressBar.setValue(int(i*100/number_samples))
+        type(self).labels = self.labels.copy()
 
-                    outputs_temp.append(np.argmax(out_values, axis=-1).flatten())
+    def run_inference(self, dataset, output_desc):
+        """ Start the inference worker, the results are streamed in the Results window"""
 
-                type(self).outputs = self.convert_outputs1(outputs_temp)            
+        if getattr(self, 'inference_thread', None) is not None:
+            self.display_error('Inference is on-going ...')
+            return
 
-                self.progressBar.reset()
-                self.progressBar.setValue(0)
-                end_USB_duration = time.time()
-                USB_duration = end_USB_duration - start_USB_duration
+        self.go_enabled = self.pushButton_2.isEnabled()
+        self.button_disabled()
+        self.comboBox.setEnabled(False)
+        self.progressBar.setValue(0)
+
+        self.res_win.clean_data()
+        self.res_win.init_labels()
+        self.res_win.setup_stream()
+        if not self.res_win.isVisible():
+            self.res_win.show()
+
+        self.inference_worker = InferenceWorker(self.nn, self.c_name, dataset, output_desc)
+        self.inference_worker.progress.connect(self.progressBar.setValue)
+        self.inference_worker.results.connect(self.on_inference_results)
+        self.inference_worker.finished.connect(self.on_inference_finished)
+        self.inference_worker.failed.connect(self.on_inference_failed)
+
+        self.inference_thread = QThread()
+        self.inference_worker.moveToThread(self.inference_thread)
+        self.inference_thread.started.connect(self.inference_worker.run)
+        self.inference_thread.start()
+
+    def stop_inference(self):
+        """ Release the worker thread and restore the GUI"""
+
+        if getattr(self, 'inference_thread', None) is not None:
+            self.inference_thread.quit()
+            self.inference_thread.wait()
+            self.inference_thread = None
+        self.inference_worker = None
+        self.progressBar.reset()
+        self.progressBar.setValue(0)
+        self.button_enabled()
+        self.comboBox.setEnabled(True)
+        self.pushButton_2.setEnabled(self.go_enabled)
+
+    def on_inference_results(self, first, predictions):
+        """ Append the predicted classes (partial results)"""
+
+        output_ids = self.label_ids(predictions)
+        outputs = self.convert_ids(output_ids)
+        type(self).output_ids = np.concatenate((Window.output_ids, output_ids))
+        type(self).outputs = Window.outputs + outputs
+        if self.res_win.stream_table is not None:
+            self.res_win.append_rows(first, outputs, Window.classes[first:first + len(outputs)])
+
+    def on_inference_finished(self, stats):
+        """ Display the final results, the rates are based on the durations measured by the worker"""
+
+        self.stop_inference()
+        self.show_results(stats)
+
+    def show_results(self, stats):
+        """ Open the Results window, the rates are based on the measured durations"""
+
+        number_samples = stats['n_samples']
+
+        type(self).USB_rate = int(number_samples / stats['duration']) if stats['duration'] else 0
+        type(self).CPU_rate = int(number_samples * 1000 / stats['host_duration']) if stats['host_duration'] else 0
+        type(self).inference_time = stats['device_duration'] / number_samples
+        type(self).device_desc = self.nn.get_info()['device']['desc']
+
+        self.dialogs = list()
+        self.openResults()
+
+    def on_inference_failed(self, error_message):
+        """ Restore the GUI and display the error"""
+
+        self.stop_inference()
+        self.display_error('Inference has failed\n' + error_message)
 
-                type(self).USB_rate = int(number_samples/USB_duration)
-                type(self).CPU_rate = int(number_samples/CPU_duration)
-                type(self).inference_time = adur/number_samples
-                type(self).device_desc = self.nn.get_info()['device']['desc']
-                
-                self.dialogs = list()
-                self.openResults()
-    
-            else : 
-                self.display_error("Wrong file size")
-                
     def network_discovery(self):
         """ Open the connection and search for networks and add networks names to the combobox dropdown list"""
         c_baudrate = int(self.comboBox_3.currentText())
@@ -653,27 +913,43 @@ class Window(QMainWindow):
             
             
             flag_loop=False
+            pipeline = None
             
             msg = QMessageBox()
             msg.setIcon(QMessageBox.Information)
-            msg.setText('S validate one image\nL validate in loop\nP pause loop\nQ quit')
+            msg.setText('S validate one image\nL validate in loop\nC stream (pipelined)\nP pause loop\nQ quit')
             msg.setWindowTitle("Capturing")
             msg.exec_()
     
             while True:
                 try:
-                    check, frame = webcam.read()
+                    if pipeline is None:
+                        check, frame = webcam.read()
+                        display = frame
+                    else:
+                        check, frame, display = self.stream_status(pipeline)
+                        if not check:
+                            pipeline = None
+                            continue
+                        if frame is None:
+                            cv2.waitKey(1)
+                            continue
                     
                     if not check:
                         self.display_error('Webcam error, retry')
                         break
-                    cv2.imshow("Capturing", frame)
+                    cv2.imshow("Capturing", display)
                     key = cv2.waitKey(1)
 
+                    # the camera and the board are released by the pipeline before any other action
+                    if pipeline is not None and (key in (ord('s'), ord('l'), ord('p'), ord('q')) or
+                                                 cv2.getWindowProperty("Capturing", cv2.WND_PROP_VISIBLE) <= 0):
+                        pipeline.stop()
+                        pipeline = None
+
                     if key == ord('s'):
-                        if args.verbose: print("Saving image from webcam")
-                        cv2.imwrite(filename='temp_cv.jpg', img=frame)
-                        self.process_image(file_name='temp_cv.jpg')
+                        if args.verbose: print("Validating image from webcam")
+                        self.process_frame(frame)
                         flag_loop=False                        
 
                     elif key == ord('q') or cv2.getWindowProperty("Capturing", cv2.WND_PROP_VISIBLE) <= 0:
@@ -688,11 +964,17 @@ class Window(QMainWindow):
                         
                     elif key == ord('l') or flag_loop==True:
                         if args.verbose:  print("Loop from webcam")
-                        cv2.imwrite(filename='temp_cv.jpg', img=frame)
-                        self.process_image(file_name='temp_cv.jpg')
-                        flag_loop = True
+                        flag_loop = self.process_frame(frame)
+
+                    elif key == ord('c') and pipeline is None:
+                        if args.verbose:  print("Pipelined stream from webcam")
+                        self.check_labels(self.nn.get_output_infos(name=self.c_name)[0])
+                        pipeline = CameraPipeline(webcam, self.nn, self.c_name)
+                        pipeline.start()
 
                 except(KeyboardInterrupt):
+                    if pipeline is not None:
+                        pipeline.stop()
                     if args.verbose:  print("Turning off camera.")
                     webcam.release()
                     if args.verbose:  print("Camera off.")
@@ -705,37 +987,75 @@ class Window(QMainWindow):
 
 
 
+    def stream_status(self, pipeline):
+        """ Return the running state, the last captured frame (None if no frame has been captured)
+        and the frame to display, annotated with the predicted class, the end-to-end FPS and the
+        latency of each stage. The pipeline is stopped on error."""
+
+        frame, prediction, latency, fps, dropped, error = pipeline.status()
+        if error is not None:
+            pipeline.stop()
+            self.display_error(error)
+            return False, None, None
+        if frame is None:
+            return True, None, None
+
+        label = self.convert_outputs1([[prediction]])[0] if prediction is not None else '-'
+        lines = ['class: {}   {:.1f} FPS   dropped: {}'.format(label, fps, dropped),
+                 'capture {:.1f} ms  preprocess {:.1f} ms'.format(latency['capture'], latency['preprocess']),
+                 'invoke {:.1f} ms  end-to-end {:.1f} ms'.format(latency['invoke'], latency['end-to-end'])]
+        display = frame.copy()
+        for i, line in enumerate(lines):
+            cv2.putText(display, line, (10, 20 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        return True, frame, display
+
     def process_image(self, file_name):
-        """ Process image captured from the camera or selected from the GUI.
-        Open->resize->reshape->flatten->save .csv->self.open_file()"""
+        """ Process image selected from the GUI.
+        Open->self.process_frame()"""
         
-        # in_tens = self.nn.input_tensor(name=self.c_name)
         in_shape = self.nn.get_input_infos(name=self.c_name)[0]['shape'][1:]
-            
-        #ottimizzato
-        if in_shape[2]==1:
-            img_ = cv2.imread(file_name, cv2.IMREAD_GRAYSCALE)
-
-        elif in_shape[2]==3:
+        if in_shape[2] in (1, 3):
             img_ = cv2.imread(file_name, cv2.IMREAD_COLOR)
-            img_ = cv2.cvtColor(img_, cv2.COLOR_BGR2RGB)
-
         else:
             img_ = cv2.imread(file_name, cv2.IMREAD_UNCHANGED)
-        
-        img_ = cv2.resize(img_,(in_shape[0],in_shape[1]))
-        cv2.imwrite(filename='resized_temp.jpg', img=img_)
-        image_array = np.asarray(img_)
-        image_array = image_array.reshape((1,image_array.shape[0]*image_array.shape[1]*in_shape[2],1))
-        output = 0
-        image_array = np.append(image_array,output)
-        image_array = image_array.reshape((1,image_array.shape[0]))
-        image_array = image_array/255
-
-        with open("temp_val.csv", 'wb') as f:
-            np.savetxt(f,image_array,newline='\n' , delimiter=",")#Saving the list as a csv    
+        self.process_frame(img_)
+
+    def process_frame(self, frame):
+        """ Validate one image (camera frame or file), all in memory:
+        frame->FramePreprocessor (resize->color->quantize)->invoke->Results window.
+        Return False if the inference has failed."""
+
+        t_input_desc = self.nn.get_input_infos(name=self.c_name)[0]
+        t_output_desc = self.nn.get_output_infos(name=self.c_name)[0]
+
+        self.check_labels(t_output_desc)
+
+        # the buffers are re-allocated only if the model has changed
+        if getattr(self, 'frame_preprocessor', None) is None or self.frame_preprocessor.desc is not t_input_desc:
+            self.frame_preprocessor = FramePreprocessor(t_input_desc)
+
+        start_time = time.perf_counter()
+        try:
+            inputs = self.frame_preprocessor(frame)
+            out_values, profile = self.nn.invoke(inputs, name=self.c_name, disable_pb=True)
+        except (AiRunnerError, ValueError, cv2.error) as exc:
+            self.display_error('Inference has failed\n' + str(exc))
+            return False
+        duration = time.perf_counter() - start_time
+
+        out_values = Converter().to_float(out_values[0], t_output_desc)
+        prediction = np.argmax(out_values, axis=-1).reshape(out_values.shape[0], -1)[:, 0]
+
+        type(self).class_ids = self.label_ids([0])
+        type(self).classes = self.convert_ids(Window.class_ids)
+        type(self).output_ids = self.label_ids(prediction)
+        type(self).outputs = self.convert_ids(Window.output_ids)
+
         self.file_type = "image"
-        self.file_open("temp_val.csv")
+        self.show_results({'n_samples': 1, 'duration': duration,
+                           'host_duration': profile['debug']['host_duration'],
+                           'device_duration': float(np.sum(profile['c_durations']))})
+        return True
 
         
     def image_open(self):
@@ -773,24 +1093,34 @@ class Results(QMainWindow):
         self.classification = {}
         self.confusion_matrix = {}
         self.item_number = 0        
+        self.stream_table = None
     
     
     def init_labels(self):
-        labels = Window.labels.copy()
-        self.labels_inv = {} #label con values : 0
-        self.labels_cf = {}
-        for i in labels.values():
-            self.labels_inv[i] = 0
-        for i in labels.values():
-            self.labels_cf[i]= self.labels_inv.copy()
+        """ Reset the accumulated results, the last class ('no_class') is used for the values without label"""
+        self.label_names = list(Window.labels.values()) + ['no_class']
+        self.metrics = AiConfusionMatrix(len(self.label_names))
+        self.last_metrics = self.metrics.metrics()
         self.item_number = 0
 
-        
-        self.error_rate = self.labels_inv.copy()
-        self.classification = self.labels_inv.copy()
-        self.confusion_matrix = self.labels_cf.copy()
-    
-    #def setup(self, parent=None):
+        self.error_rate = {}
+        self.classification = {}
+        self.confusion_matrix = {}
+
+    def update_metrics(self):
+        """ Accumulate the results of the last run (Window.class_ids, Window.output_ids)"""
+
+        if getattr(self, 'metrics', None) is None:
+            self.init_labels()
+        self.metrics.update(Window.class_ids, Window.output_ids)
+        self.last_metrics = self.metrics.metrics()
+
+        # number of predictions by class, 'no_class' only if it has been predicted
+        self.classification = {name: int(count) for name, count in zip(self.label_names, self.last_metrics['predicted'])
+                               if count or name != 'no_class'}
+        type(self).classification = self.classification
+        type(self).confusion_matrix = self.metrics.matrix
+
     def setup_v(self):
         """ Set the Results window and initialize the variables """
         
@@ -800,6 +1130,7 @@ class Results(QMainWindow):
         self.setWindowTitle("ST demonstrator on Tiny Neural Network: Validation Results")
 
         self.setCentralWidget(QFrame())
+        self.update_metrics()
 
         grid_layout = QGridLayout()         # Create QGridLayout
 
@@ -811,9 +1142,48 @@ class Results(QMainWindow):
         grid_layout.addLayout(self.confusionMatrix(), 2, 1)
          
         self.centralWidget().setLayout(grid_layout)
+        self.stream_table = None
         #self.clean_data()    def setup(self):
         
         
+    def setup_stream(self):
+        """ Set the Results window for the partial results (inference on-going)"""
+
+        self.setStyleSheet("QMainWindow {background: 'white';}");
+        self.setGeometry(100, 100, 750, 500)
+        self.setMinimumSize(QSize(480, 80))         # Set sizes 
+        self.setWindowTitle("ST demonstrator on Tiny Neural Network: Validation Results (running)")
+
+        self.setCentralWidget(QFrame())
+
+        table = QTableWidget(self)  # Create a table
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.setColumnCount(2)     #Set two columns
+        table.setHorizontalHeaderLabels(["Image n°", "Predicted Class"])
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stream_table = table
+
+        box_layout = QHBoxLayout()
+        box_layout.addWidget(table)
+        self.centralWidget().setLayout(box_layout)
+
+    def append_rows(self, first, outputs, classes):
+        """ Append the partial results to the table (one repaint by call)"""
+
+        table = self.stream_table
+        table.setUpdatesEnabled(False)
+        table.setRowCount(first + len(outputs))
+        for i, (output, truth) in enumerate(zip(outputs, classes)):
+            text = output if output == truth else str(output) + ' (truth = ' + str(truth) + ')'
+            table.setItem(first + i, 0, QTableWidgetItem(str(first + i + 1)))
+            table.setItem(first + i, 1, QTableWidgetItem(text))
+            table.item(first + i, 0).setTextAlignment(4)
+            table.item(first + i, 1).setTextAlignment(4)
+            table.item(first + i, 1).setBackground(QColor(129, 212, 26) if output == truth else QColor(226, 103, 103))
+        table.setUpdatesEnabled(True)
+        table.scrollToBottom()
+
     def setup_t(self):
         """ Set the Results window and initialize the variables """
         
@@ -823,6 +1193,7 @@ class Results(QMainWindow):
         self.setWindowTitle("ST demonstrator on Tiny Neural Network: Test Results")
 
         self.setCentralWidget(QFrame())
+        self.update_metrics()
 
         grid_layout = QGridLayout()         # Create QGridLayout
 
@@ -834,6 +1205,7 @@ class Results(QMainWindow):
         #grid_layout.addLayout(self.confusionMatrix(), 2, 1)
                 
         self.centralWidget().setLayout(grid_layout)
+        self.stream_table = None
         #self.clean_data()
         
     def clean_data(self):
@@ -850,6 +1222,8 @@ class Results(QMainWindow):
     def clean_res(self):
         Window.classes = []
         Window.outputs = []
+        Window.class_ids = np.zeros(0, dtype=np.int64)
+        Window.output_ids = np.zeros(0, dtype=np.int64)
         Window.USB_rate = 0
         Window.CPU_rate = 0
         Window.inference_time = 0
@@ -859,32 +1233,27 @@ class Results(QMainWindow):
     def confusionMatrix(self):
         """ Set the layout for the confusion matrix """
         
+        matrix = self.metrics.matrix
+        # 'no_class' row/column is displayed only if it is used
+        keep = np.ones(len(self.label_names), dtype=bool)
+        keep[-1] = matrix[-1].any() or matrix[:, -1].any()
+        matrix = matrix[keep][:, keep]
+        table_headers = [name for name, used in zip(self.label_names, keep) if used]
+
         table = QTableWidget(self)
         #table.verticalHeader().setVisible(True)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         table.verticalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        table.setColumnCount(len(self.classification))
-        table.setRowCount(len(self.classification))
+        table.setColumnCount(len(table_headers))
+        table.setRowCount(len(table_headers))
                 
-        table_headers=[]
-        for i in self.confusion_matrix:
-            for j in self.confusion_matrix[i]:
-                if i not in table_headers:
-                    table_headers.append(i)
-                if j not in table_headers:
-                    table_headers.append(j)
         # Set the table headers
         table.setHorizontalHeaderLabels(table_headers)
         table.setVerticalHeaderLabels(table_headers)
         
-        for i in range(len(self.confusion_matrix)):                    
-            for j in range(len(self.confusion_matrix)):
-                table.setItem(i, j, QTableWidgetItem(str(0)))
-                
-     
-        for i in self.confusion_matrix:
-            for j in self.confusion_matrix[i]:
-                table.setItem(table_headers.index(i), table_headers.index(j), QTableWidgetItem(str(self.confusion_matrix[i][j])))
+        for i in range(matrix.shape[0]):
+            for j in range(matrix.shape[1]):
+                table.setItem(i, j, QTableWidgetItem(str(matrix[i, j])))
         table.resizeColumnsToContents()
         table.resizeRowsToContents()
 
@@ -900,12 +1269,9 @@ class Results(QMainWindow):
 
         return box_layout
 
-
     def table_v(self):
         """ Set the layout for the table"""
-        error_rate = self.error_rate 
         
-        #example : error_rate = {'level_100':0, 'level_50':0, 'level_80':0, 'level_empty':0}
         table = QTableWidget(self)  # Create a table
         table.verticalHeader().setVisible(False)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -925,8 +1291,15 @@ class Results(QMainWindow):
         table.horizontalHeaderItem(0).setTextAlignment(Qt.AlignHCenter)
         table.horizontalHeaderItem(1).setTextAlignment(Qt.AlignHCenter)
 
+        # results of the last run are appended to the previous ones
+        correct = Window.class_ids == Window.output_ids
+        for output, truth, valid in zip(Window.outputs, Window.classes, correct):
+            self.table_string.append(output if valid else str(output) + ' (truth = ' + str(truth) + ')')
+            self.table_bool.append(bool(valid))
+        self.item_number += len(Window.outputs)
+
+        table.setRowCount(len(self.table_string))
         for i in range(0,  len(self.table_string)):
-            table.insertRow(table.rowCount())
             table.setItem(i, 0, QTableWidgetItem(str(i+1)))
             table.setItem(i, 1, QTableWidgetItem(self.table_string[i]))
             table.item(i, 0).setTextAlignment(4)
@@ -937,44 +1310,7 @@ class Results(QMainWindow):
 
             elif self.table_bool[i] == False:
                 table.item(i, 1).setBackground(QColor(226,103,103)) #rosso (250,0,0)
-            
-                
-        for i in range(0, len(Window.outputs)):
-            if Window.outputs[i] not in error_rate: 
-                error_rate[Window.outputs[i]] = 0
-            if (Window.classes[i] != Window.outputs[i]) :
-                """
-                if (Window.classes[i] > Window.outputs[i]) :
-                    self.table_string.append(str(Window.outputs[i]) + '(truth = unknown)')
-                    self.table_bool.append(False)
-                else :
-                """    
-                self.table_string.append(str(Window.outputs[i]) + ' (truth = ' + str(Window.classes[i]) + ')')
-                self.table_bool.append(False)
-                table.insertRow(table.rowCount())
-                table.setItem(i+ self.item_number, 0, QTableWidgetItem(str(i+ self.item_number+1)))
-                table.item(i+ self.item_number, 0).setTextAlignment(4)
-                table.setItem(i+ self.item_number, 1, QTableWidgetItem(self.table_string[-1]))
-                table.item(i+ self.item_number, 1).setBackground(QColor(226,103,103))
-                table.item(i+ self.item_number, 1).setTextAlignment(4)
-                error_rate[Window.outputs[i]] += 1
-                type(self).accuracy_ratio += 1
-            else:
-                self.table_string.append(Window.outputs[i])
-                self.table_bool.append(False)
-                table.insertRow(table.rowCount())
-                table.setItem(i+ self.item_number, 0, QTableWidgetItem(str(i+ self.item_number+1)))
-                table.item(i+ self.item_number, 0).setTextAlignment(4)
-                table.setItem(i+ self.item_number, 1, QTableWidgetItem(Window.outputs[i]))
-                table.item(i+ self.item_number, 1).setBackground(QColor(129,212,26))
-                table.item(i+ self.item_number, 1).setTextAlignment(4)
-                
-                
-        self.item_number += len(Window.outputs)
-                
-        self.error_rate = error_rate 
-        
-        #type(self).accuracy_ratio = self.accuracy_ratio/len(Window.classes)
+
         # Do the resize of the columns by content
         table.resizeColumnsToContents()
         table.resizeRowsToContents()
@@ -991,12 +1327,10 @@ class Results(QMainWindow):
         box_layout.addWidget(table)
 
         return box_layout
-    
+
     def table_t(self):
         """ Set the layout for the table"""
-        error_rate = self.error_rate 
         
-        #example : error_rate = {'level_100':0, 'level_50':0, 'level_80':0, 'level_empty':0}
         table = QTableWidget(self)  # Create a table
         table.verticalHeader().setVisible(False)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
@@ -1016,32 +1350,20 @@ class Results(QMainWindow):
         table.horizontalHeaderItem(0).setTextAlignment(Qt.AlignHCenter)
         table.horizontalHeaderItem(1).setTextAlignment(Qt.AlignHCenter)
 
+        # results of the last run are appended to the previous ones
+        correct = Window.class_ids == Window.output_ids
+        for output, truth, valid in zip(Window.outputs, Window.classes, correct):
+            self.table_string.append(output)
+            self.table_bool.append(bool(valid))
+        self.item_number += len(Window.outputs)
+
+        table.setRowCount(len(self.table_string))
         for i in range(0,  len(self.table_string)):
-            table.insertRow(table.rowCount())
             table.setItem(i, 0, QTableWidgetItem(str(i+1)))
             table.setItem(i, 1, QTableWidgetItem(self.table_string[i]))
             table.item(i, 0).setTextAlignment(4)
             table.item(i, 1).setTextAlignment(4)
 
-            
-                
-        for i in range(0, len(Window.outputs)):
-            if Window.outputs[i] not in error_rate: 
-                error_rate[Window.outputs[i]] = 0
-            
-            self.table_string.append(Window.outputs[i])
-            self.table_bool.append(False)
-            table.insertRow(table.rowCount())
-            table.setItem(i+ self.item_number, 0, QTableWidgetItem(str(i+ self.item_number+1)))            
-            table.item(i+ self.item_number, 0).setTextAlignment(4)
-            table.setItem(i+ self.item_number, 1, QTableWidgetItem(Window.outputs[i]))
-            table.item(i+ self.item_number, 1).setTextAlignment(4)
-
-        self.item_number += len(Window.outputs)
-                
-        self.error_rate = error_rate 
-        
-        #type(self).accuracy_ratio = self.accuracy_ratio/len(Window.classes)
         # Do the resize of the columns by content
         table.resizeColumnsToContents()
         table.resizeRowsToContents()
@@ -1050,7 +1372,7 @@ class Results(QMainWindow):
 
         size = QSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
 
-        # Left layout
+        ## Left layout
         size.setHorizontalStretch(1)
         table.setSizePolicy(size)
         
@@ -1062,101 +1384,34 @@ class Results(QMainWindow):
     def classification_samples_t(self):
         """ Set the layout for the classification samples"""
         
-        classification = self.classification
-        confusion_matrix = self.confusion_matrix
-        error = self.error_rate.copy()
-        
         box_layout = QVBoxLayout(self)
-     
-        for i in range (0, len(Window.outputs)) :
-            if Window.outputs[i] in classification:
-                classification[Window.outputs[i]] += 1
-            else :
-                classification[Window.outputs[i]] = 1
-            
-            if Window.classes[i] not in confusion_matrix:
-                confusion_matrix[Window.classes[i]] = {}
-                confusion_matrix[Window.classes[i]][Window.outputs[i]] = 1
-            else : 
-                if Window.outputs[i] not in confusion_matrix[Window.classes[i]]:
-                    confusion_matrix[Window.classes[i]][Window.outputs[i]] = 1
-                else : 
-                    confusion_matrix[Window.classes[i]][Window.outputs[i]] += 1
-
-
-
-        for i in self.error_rate: 
-            if classification[i]>0:
-                error[i] = int(100*(classification[i]-self.error_rate[i])/classification[i])
-                #self.accuracy_ratio += error[i]
-
-            else : 
-                error[i] = 0
-
 
         classification_title = QLabel('Classification of the outputs', self)
         classification_title.setFont(QFont('Arial', 12, QFont.Bold))
         box_layout.addWidget(classification_title)
 
-        for i in classification:
-            label = QLabel(i + ' : ' + str(classification[i]) + ' Images', self)
+        for i in self.classification:
+            label = QLabel(i + ' : ' + str(self.classification[i]) + ' Images', self)
             box_layout.addWidget(label)        
         
-        self.classification = classification
-        self.confusion_matrix = confusion_matrix
-        type(self).classification = classification
-        type(self).confusion_matrix = confusion_matrix
-        
         return box_layout
-    
+
     def classification_samples_v(self):
         """ Set the layout for the classification samples"""
         
-        classification = self.classification
-        confusion_matrix = self.confusion_matrix
-        error = self.error_rate.copy()
-        
         box_layout = QVBoxLayout(self)
-     
-        for i in range (0, len(Window.outputs)) :
-            if Window.outputs[i] in classification:
-                classification[Window.outputs[i]] += 1
-            else :
-                classification[Window.outputs[i]] = 1
-            
-            if Window.classes[i] not in confusion_matrix:
-                confusion_matrix[Window.classes[i]] = {}
-                confusion_matrix[Window.classes[i]][Window.outputs[i]] = 1
-            else : 
-                if Window.outputs[i] not in confusion_matrix[Window.classes[i]]:
-                    confusion_matrix[Window.classes[i]][Window.outputs[i]] = 1
-                else : 
-                    confusion_matrix[Window.classes[i]][Window.outputs[i]] += 1
-
-
-
-        for i in self.error_rate: 
-            if classification[i]>0:
-                error[i] = int(100*(classification[i]-self.error_rate[i])/classification[i])
-                self.accuracy_ratio += [int(self.error_rate[i])]
-
-            else : 
-                error[i] = 0
-
 
         classification_title = QLabel('Classification of the outputs', self)
         classification_title.setFont(QFont('Arial', 12, QFont.Bold))
         box_layout.addWidget(classification_title)
 
-        for i in classification:
-            label = QLabel(i + ' : ' + str(classification[i]) + ' Images (acc: ' + str(error[i]) + ' %)', self)
+        # accuracy of the predicted class (precision)
+        precision = dict(zip(self.label_names, self.last_metrics['precision']))
+
+        for i in self.classification:
+            label = QLabel(i + ' : ' + str(self.classification[i]) + ' Images (acc: ' + str(int(100 * precision[i])) + ' %)', self)
             box_layout.addWidget(label)        
         
-        self.classification = classification
-        self.confusion_matrix = confusion_matrix
-        type(self).classification = classification
-        type(self).confusion_matrix = confusion_matrix
-        
         return box_layout
 
     def efficiency(self):
@@ -1206,15 +1461,9 @@ class Results(QMainWindow):
         #box_layout.addWidget(ratio)
         
         
-        self.accuracy_ratio += []
-        for i in range(0,len(self.accuracy_ratio)-1):
-            self.accuracy_ratio[-1] += self.accuracy_ratio[i]
-
-        #accuracy = QLabel('Overall accuracy : ' + str(int(100-self.accuracy_ratio*100)) + '%', self)
-        accuracy = QLabel('Overall accuracy : ' + str(100-(int(self.accuracy_ratio[-1])/len(Window.outputs))*100) + '%', self) 
+        accuracy = QLabel('Overall accuracy : {:.2f}%'.format(100 * self.last_metrics['accuracy']), self)
         accuracy.setFont(QFont('Arial', 12, QFont.Bold))
         box_layout.addWidget(accuracy)
-        self.accuracy_ratio = []
         return box_layout
             
     def download(self):